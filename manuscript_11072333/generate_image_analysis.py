@@ -3,695 +3,21 @@
 Image Analysis Generation Script
 Parses extracted images and generates structured analysis with publication-grade captions
 Following parsing-images skill guidelines
-"""
-
-import json
-from pathlib import Path
-
-# Define output directory
-output_dir = Path("/Users/yangyuhang/Obsidian/METIS/B/03.Manuscript_Agent/manuscript_11072333")
-
-# Image analysis data structure
-image_analysis = {
-    "metadata": {
-        "report_file": "TNBC预后结果报告.docx",
-        "total_figures": 5,
-        "extraction_date": "2025-11-08",
-        "analysis_guidelines": "image-analysis-guidelines.md",
-        "caption_examples": "figure-caption-examples.md"
-    },
-    "figures": []
-}
-
-# Figure 1: scRNA-seq landscape analysis (Multi-panel: A-E)
-figure1 = {
-    "figure_id": "figure_1",
-    "original_file": "image1.png",
-    "figure_number": 1,
-    "has_subplots": True,
-    "subplot_count": 5,
-    "context_from_report": {
-        "purpose": "Identify major cell clusters in TNBC through integrated scRNA-seq analysis",
-        "methods": "UMAP dimensionality reduction, cell type annotation using marker genes, cell proportion comparison between Normal and TNBC",
-        "key_findings": "11 distinct cell types identified; increased immune cell infiltration (B cells, T cells, Macrophages) in TNBC tumors; differential gene expression in T cells including IGLV1, TRBV20-1, ATP5E"
-    },
-    "subplots": [
-        {
-            "subplot_id": "1A",
-            "type": "UMAP_plot",
-            "guideline_ref": "Guidelines 1.4 - Scatter plots and dimensional reduction",
-            "structured_data": {
-                "plot_type": "UMAP",
-                "total_cells": 84837,
-                "samples": 19,
-                "clusters": 11,
-                "coloring_schemes": ["by sample ID", "by group (Normal/TNBC)", "by cluster number"]
-            }
-        },
-        {
-            "subplot_id": "1B",
-            "type": "dot_plot",
-            "guideline_ref": "Guidelines 1.6 - Dot plots",
-            "structured_data": {
-                "genes_shown": ["KRT23", "KRT15", "CD3D", "TRBC2", "CD3E", "MKI67", "TOP2A", "CD68", "CD14", "DCN", "LUM", "KRT5", "KRT14", "PECAM1", "PLVAP", "KRT18", "ANKRD30A", "IGHG1", "IGHG4", "RGS5", "COX4I2", "MS4A1", "BANK1"],
-                "cell_clusters": 11,
-                "metrics": ["average_expression", "percent_expressed"]
-            }
-        },
-        {
-            "subplot_id": "1C",
-            "type": "UMAP_plot_annotated",
-            "guideline_ref": "Guidelines 1.4 - Scatter plots",
-            "structured_data": {
-                "cell_types": ["Epithelial", "T cells", "Proliferating Epithelial", "Macrophages", "Fibroblasts", "Basal", "Endothelial", "Luminal Epithelial", "Plasma cells", "Pericytes", "B cells"]
-            }
-        },
-        {
-            "subplot_id": "1D",
-            "type": "stacked_bar_chart",
-            "guideline_ref": "Guidelines 1.1 - Bar charts",
-            "structured_data": {
-                "groups": ["Normal", "TNBC"],
-                "cell_types": 11,
-                "key_differences": "Increased B cells, T cells, Macrophages in TNBC"
-            }
-        },
-        {
-            "subplot_id": "1E",
-            "type": "volcano_plot",
-            "guideline_ref": "Guidelines 1.3 - Volcano plots",
-            "structured_data": {
-                "comparison": "TNBC vs Normal DEGs across cell types",
-                "significance_threshold": "padj < 0.01",
-                "top_genes_labeled": "Top 10 per cell type",
-                "color_scheme": {"red": "padj < 0.01", "black": "padj >= 0.01"}
-            }
-        }
-    ]
-}
-
-# Figure 2: Cell-cell communication analysis (Multi-panel: A-J)
-figure2 = {
-    "figure_id": "figure_2",
-    "original_file": "image2.png",
-    "figure_number": 2,
-    "has_subplots": True,
-    "subplot_count": 10,
-    "context_from_report": {
-        "purpose": "Elucidate bidirectional communication between T cells and other cell types in TNBC microenvironment",
-        "methods": "CellChat analysis of ligand-receptor interactions between cell types in Normal vs TNBC",
-        "key_findings": "87 pathways identified (12 Normal-specific, 31 TNBC-specific, 44 shared); Enhanced T cell incoming/outgoing signal strength in TNBC; MHC-I, MIF, CD99 signaling specifically altered in TNBC"
-    },
-    "subplots": [
-        {
-            "subplot_id": "2A",
-            "type": "chord_diagram",
-            "guideline_ref": "Guidelines 3.1 - Network diagrams",
-            "structured_data": {
-                "metric": "Differential number of interactions",
-                "groups": ["Luminal Epithelial", "Basal", "T cells", "B cells", "Proliferating Epithelial", "Epithelial", "Pericytes", "Plasma cells", "Macrophages", "Fibroblasts", "Endothelial"],
-                "edge_colors": {"red": "increased in TNBC", "blue": "decreased in TNBC"}
-            }
-        },
-        {
-            "subplot_id": "2B",
-            "type": "chord_diagram",
-            "guideline_ref": "Guidelines 3.1 - Network diagrams",
-            "structured_data": {
-                "metric": "Differential interaction strength"
-            }
-        },
-        {
-            "subplot_id": "2C",
-            "type": "network_diagram",
-            "guideline_ref": "Guidelines 3.1 - Network diagrams",
-            "structured_data": {
-                "condition": "Normal",
-                "metric": "Number of interactions"
-            }
-        },
-        {
-            "subplot_id": "2D",
-            "type": "network_diagram",
-            "guideline_ref": "Guidelines 3.1 - Network diagrams",
-            "structured_data": {
-                "condition": "TNBC",
-                "metric": "Number of interactions"
-            }
-        },
-        {
-            "subplot_id": "2E",
-            "type": "stacked_bar_chart",
-            "guideline_ref": "Guidelines 1.1 - Bar charts",
-            "structured_data": {
-                "metric": "Relative information flow",
-                "comparison": "Normal vs TNBC",
-                "pathways": "87 total pathways"
-            }
-        },
-        {
-            "subplot_id": "2F",
-            "type": "scatter_plot",
-            "guideline_ref": "Guidelines 1.4 - Scatter plots",
-            "structured_data": {
-                "condition": "Normal",
-                "axes": {"x": "Outgoing interaction strength", "y": "Incoming interaction strength"},
-                "cell_types_plotted": 11
-            }
-        },
-        {
-            "subplot_id": "2G",
-            "type": "scatter_plot",
-            "guideline_ref": "Guidelines 1.4 - Scatter plots",
-            "structured_data": {
-                "condition": "TNBC",
-                "key_observation": "Enhanced T cell incoming signal strength"
-            }
-        },
-        {
-            "subplot_id": "2H",
-            "type": "scatter_plot",
-            "guideline_ref": "Guidelines 1.4 - Scatter plots",
-            "structured_data": {
-                "axes": {"x": "Differential outgoing interaction strength", "y": "Differential incoming interaction strength"},
-                "highlighted_pathways": ["MIF-(CD74+CD44)", "MIF-(CD74+CXCR4)", "COLLAGEN", "MHC-I", "APP", "CD99"],
-                "significance": "p < 0.01",
-                "focus": "T cell signaling changes"
-            }
-        },
-        {
-            "subplot_id": "2I",
-            "type": "dot_heatmap",
-            "guideline_ref": "Guidelines 1.6 - Dot plots",
-            "structured_data": {
-                "direction": "Senders (other cells) to T cells",
-                "pathways": ["MIF-(CD74+CD44)", "MIF-(CD74+CXCR4)", "CXCL12-CXCR4", "CXCL10-CXCR3"],
-                "sender_cells": 9,
-                "significance": "One-sided permutation test",
-                "color_metric": "Communication probability"
-            }
-        },
-        {
-            "subplot_id": "2J",
-            "type": "dot_heatmap",
-            "guideline_ref": "Guidelines 1.6 - Dot plots",
-            "structured_data": {
-                "direction": "T cells to receivers",
-                "receiver_cells": ["B cells", "Macrophages", "Endothelial"],
-                "ligand_receptor_pairs": ["MIF-(CD74+CD44)", "MIF-(CD74+CXCR4)", "CCL5-ACKR1", "CCL5-CCR1"]
-            }
-        }
-    ]
-}
-
-# Figure 3: WGCNA and gene identification (Multi-panel: A-G)
-figure3 = {
-    "figure_id": "figure_3",
-    "original_file": "image3.png",
-    "figure_number": 3,
-    "has_subplots": True,
-    "subplot_count": 7,
-    "context_from_report": {
-        "purpose": "Identify ubiquitination-related key genes through WGCNA combined with differential expression and prognosis analysis",
-        "methods": "Venn diagram intersection of T cell markers and ubiquitin proteasome genes (177 genes); WGCNA module detection; differential expression, KM survival, and Cox regression analysis",
-        "key_findings": "MEturquoise module highly correlated with survival time; 13 common genes identified (e.g., BTBD6, CDC34, FBXL15) with prognostic value"
-    },
-    "subplots": [
-        {
-            "subplot_id": "3A",
-            "type": "venn_diagram",
-            "guideline_ref": "Guidelines 3.3 - Venn diagrams",
-            "structured_data": {
-                "set1": {"name": "T cell Markers", "unique": 2890, "percentage": 78.3},
-                "set2": {"name": "Ubiquitin Proteasome", "unique": 623, "percentage": 16.9},
-                "intersection": {"count": 177, "percentage": 4.8}
-            }
-        },
-        {
-            "subplot_id": "3B",
-            "type": "dendrogram_modules",
-            "guideline_ref": "Guidelines 1.7 - Hierarchical clustering",
-            "structured_data": {
-                "modules": ["MEblue", "MEbrown", "MEturquoise", "MEgrey"],
-                "module_colors": ["blue", "brown", "cyan", "grey"]
-            }
-        },
-        {
-            "subplot_id": "3C",
-            "type": "heatmap",
-            "guideline_ref": "Guidelines 1.5 - Heatmaps",
-            "structured_data": {
-                "rows": ["MEblue", "MEbrown", "MEturquoise", "MEgrey"],
-                "columns": ["Time"],
-                "correlation_values": {"MEblue": 0.1, "MEbrown": 0.4, "MEturquoise": 0.002, "MEgrey": 0.07},
-                "key_finding": "MEturquoise module highly correlated with survival time (p=0.002)"
-            }
-        },
-        {
-            "subplot_id": "3D",
-            "type": "heatmap",
-            "guideline_ref": "Guidelines 1.5 - Heatmaps",
-            "structured_data": {
-                "comparison": "Normal vs Tumor",
-                "genes_shown": "MEturquoise module genes",
-                "color_scale": "Blue (low) to Red (high) expression"
-            }
-        },
-        {
-            "subplot_id": "3E",
-            "type": "forest_plot",
-            "guideline_ref": "Guidelines 1.2 - Forest plots",
-            "structured_data": {
-                "analysis": "Univariate Cox regression",
-                "genes_count": 30,
-                "genes_shown": ["BTBD6", "CDC34", "FBXL15", "FBXL18", "FBXL6", "GMCL1", "HECTD3", "HECW1", "KCTD17", "KLHL17", "KRT8", "LZTR1", "MPND", "MUL1", "OTUB1", "PPIL2", "PSMA2", "RCBTB1", "RNF123", "RNF135", "RNF185", "RNF187", "SHKBP1", "SHPRH", "SPSB1", "UBR4", "USP2", "VPS18", "ZBTB7B", "ZBTB7C"],
-                "metrics": {"HR": "Hazard Ratio", "CI": "95% confidence interval", "p_threshold": 0.05},
-                "key_findings": "All genes with p < 0.05"
-            }
-        },
-        {
-            "subplot_id": "3F",
-            "type": "bar_chart",
-            "guideline_ref": "Guidelines 1.1 - Bar charts",
-            "structured_data": {
-                "y_axis": "p-value",
-                "x_axis": "Genes (ordered by significance)",
-                "genes_count": "21 genes from KM analysis",
-                "significance_levels": "Increasing p-values from left to right"
-            }
-        },
-        {
-            "subplot_id": "3G",
-            "type": "upset_plot",
-            "guideline_ref": "Guidelines 3.4 - UpSet plots",
-            "structured_data": {
-                "sets": ["KM", "COX", "DEGs"],
-                "intersections": [
-                    {"size": 21, "sets": ["KM"]},
-                    {"size": 17, "sets": ["COX"]},
-                    {"size": 13, "sets": ["KM", "COX", "DEGs"]},
-                    {"size": 8, "sets": ["DEGs"]}
-                ],
-                "key_finding": "13 genes common to all three analyses"
-            }
-        }
-    ]
-}
-
-# Figure 4: Prognostic risk model construction (Multi-panel: A-F)
-figure4 = {
-    "figure_id": "figure_4",
-    "original_file": "image4.png",
-    "figure_number": 4,
-    "has_subplots": True,
-    "subplot_count": 9,
-    "context_from_report": {
-        "purpose": "Construct and validate ubiquitination and T cell-related gene prognostic risk model",
-        "methods": "LASSO Cox regression identified 3-gene signature (GMCL1, KRT8, OTUB1); Risk score classification; Validation in TCGA-Train, TCGA-Test, GSE25066",
-        "key_findings": "High-risk group has significantly higher mortality; Risk score independently predicts prognosis across multiple datasets"
-    },
-    "subplots": [
-        {
-            "subplot_id": "4A",
-            "type": "kaplan_meier_curve",
-            "guideline_ref": "Guidelines 1.8 - Survival curves",
-            "structured_data": {
-                "dataset": "TCGA-Train",
-                "groups": {"high": 114, "low": 114},
-                "statistic": "Log-rank p < 0.0001",
-                "follow_up_months": 360
-            }
-        },
-        {
-            "subplot_id": "4B",
-            "type": "kaplan_meier_curve",
-            "guideline_ref": "Guidelines 1.8 - Survival curves",
-            "structured_data": {
-                "dataset": "TCGA-Test",
-                "groups": {"high": 45, "low": 46},
-                "statistic": "Log-rank p = 0.00019"
-            }
-        },
-        {
-            "subplot_id": "4C",
-            "type": "kaplan_meier_curve",
-            "guideline_ref": "Guidelines 1.8 - Survival curves",
-            "structured_data": {
-                "dataset": "GSE25066",
-                "groups": {"high": 89, "low": 89},
-                "statistic": "Log-rank p = 0.0023"
-            }
-        },
-        {
-            "subplot_id": "4D",
-            "type": "risk_score_scatter",
-            "guideline_ref": "Guidelines 1.4 - Scatter plots",
-            "structured_data": {
-                "dataset": "TCGA-Train",
-                "y_axis": "Survival time (months)",
-                "x_axis": "Patients (increasing risk score)",
-                "status": {"alive": "circle", "dead": "triangle"},
-                "middle_panel": "Risk score trajectory",
-                "bottom_panel": "Gene expression heatmap (GMCL1, KRT8, OTUB1)"
-            }
-        },
-        {
-            "subplot_id": "4E",
-            "type": "risk_score_scatter",
-            "guideline_ref": "Guidelines 1.4 - Scatter plots",
-            "structured_data": {
-                "dataset": "TCGA-Test"
-            }
-        },
-        {
-            "subplot_id": "4F",
-            "type": "risk_score_scatter",
-            "guideline_ref": "Guidelines 1.4 - Scatter plots",
-            "structured_data": {
-                "dataset": "GSE25066"
-            }
-        }
-    ]
-}
-
-# Figure 5: Model validation and clinical nomogram (Multi-panel: A-I)
-figure5 = {
-    "figure_id": "figure_5",
-    "original_file": "image5.png",
-    "figure_number": 5,
-    "has_subplots": True,
-    "subplot_count": 9,
-    "context_from_report": {
-        "purpose": "Validate risk score model efficacy and construct clinical prediction model",
-        "methods": "ROC curve analysis; Univariate and multivariate Cox regression; Nomogram construction integrating risk score and clinical factors; Calibration and validation",
-        "key_findings": "TCGA-Train AUC: 0.67 (2yr), 0.69 (3yr), 0.72 (5yr); Risk score is independent prognostic factor; Nomogram AUC: 0.719; High nomogram score associated with poor prognosis"
-    },
-    "subplots": [
-        {
-            "subplot_id": "5A",
-            "type": "roc_curve",
-            "guideline_ref": "Guidelines 1.9 - ROC curves",
-            "structured_data": {
-                "dataset": "Train",
-                "time_points": ["2 years", "3 years", "5 years"],
-                "auc_values": [0.67, 0.69, 0.72]
-            }
-        },
-        {
-            "subplot_id": "5B",
-            "type": "roc_curve",
-            "guideline_ref": "Guidelines 1.9 - ROC curves",
-            "structured_data": {
-                "dataset": "Test",
-                "auc_values": [0.53, 0.63, 0.70]
-            }
-        },
-        {
-            "subplot_id": "5C",
-            "type": "roc_curve",
-            "guideline_ref": "Guidelines 1.9 - ROC curves",
-            "structured_data": {
-                "dataset": "GSE25066",
-                "auc_values": [0.62, 0.63, 0.59]
-            }
-        },
-        {
-            "subplot_id": "5D",
-            "type": "forest_plot",
-            "guideline_ref": "Guidelines 1.2 - Forest plots",
-            "structured_data": {
-                "analysis": "Univariate Cox regression",
-                "variables": ["Grade", "T", "N", "Age", "risk_score"],
-                "significant_variables": ["T (p=0.004)", "N (p=0.026)", "risk_score (p=0.007)"]
-            }
-        },
-        {
-            "subplot_id": "5E",
-            "type": "forest_plot",
-            "guideline_ref": "Guidelines 1.2 - Forest plots",
-            "structured_data": {
-                "analysis": "Multivariate Cox regression",
-                "variables": ["T", "N", "risk_score"],
-                "key_finding": "risk_score is independent prognostic factor (HR=8.881, p=0.003)"
-            }
-        },
-        {
-            "subplot_id": "5F",
-            "type": "nomogram",
-            "guideline_ref": "Guidelines 3.5 - Nomograms",
-            "structured_data": {
-                "predictors": ["Age", "T", "Grade", "N", "risk_score"],
-                "outcomes": ["Pr(futime<5)", "Pr(futime<3)", "Pr(futime<1)"],
-                "total_points_range": [100, 240]
-            }
-        },
-        {
-            "subplot_id": "5G",
-            "type": "calibration_curve",
-            "guideline_ref": "Guidelines 1.10 - Calibration curves",
-            "structured_data": {
-                "time_points": ["1-year", "3-year", "5-year"],
-                "x_axis": "Nomogram-predicted OS",
-                "y_axis": "Observed OS (Kaplan-Meier)",
-                "performance": "Robust prediction"
-            }
-        },
-        {
-            "subplot_id": "5H",
-            "type": "roc_curve",
-            "guideline_ref": "Guidelines 1.9 - ROC curves",
-            "structured_data": {
-                "models": ["Grade", "N", "Nomogram", "Risk", "T"],
-                "auc_values": {"Grade": 0.458, "N": 0.463, "Nomogram": 0.719, "Risk": 0.627, "T": 0.404},
-                "best_model": "Nomogram (AUC=0.719)"
-            }
-        },
-        {
-            "subplot_id": "5I",
-            "type": "kaplan_meier_curve",
-            "guideline_ref": "Guidelines 1.8 - Survival curves",
-            "structured_data": {
-                "stratification": "Nomogram levels (high vs low)",
-                "groups": {"B1": 81, "B2": 63},
-                "statistic": "p = 0.00034",
-                "key_finding": "High nomogram score associated with worse prognosis"
-            }
-        }
-    ]
-}
-
-# Add all figures to analysis
-image_analysis["figures"] = [figure1, figure2, figure3, figure4, figure5]
-
-# Save JSON
-json_path = output_dir / "image_analysis.json"
-with open(json_path, 'w', encoding='utf-8') as f:
-    json.dump(image_analysis, f, indent=2, ensure_ascii=False)
-
-print(f"✓ Generated: {json_path}")
-
-# Generate figure captions (publication-grade, Nature Communications style)
-captions = """# Publication-Grade Figure Captions
 
-## Figure 1. Single-cell RNA-seq landscape reveals cellular heterogeneity in triple-negative breast cancer.
-
-(A) UMAP visualization of 84,837 cells from 19 samples after quality control and batch correction. Cells are colored by sample ID (left), condition (Normal vs TNBC, middle), and cluster assignment (right). (B) Dot plot showing expression patterns of canonical marker genes across 11 cell clusters. Dot size represents the percentage of cells expressing each gene; color intensity indicates average expression level. (C) UMAP plot annotated with 11 identified cell types: Epithelial (cluster 0), T cells (cluster 1), Proliferating Epithelial (cluster 2), Macrophages (cluster 3), Fibroblasts (cluster 4), Basal (cluster 5), Endothelial (cluster 6), Luminal Epithelial (cluster 7), Plasma cells (cluster 8), Pericytes (cluster 9), and B cells (cluster 10). (D) Stacked bar chart displaying the proportion of each cell type in Normal and TNBC tissues. TNBC tumors exhibit increased infiltration of immune cells, including B cells, T cells, and Macrophages. (E) Volcano plots showing differentially expressed genes (DEGs) between TNBC and Normal samples for each cell type. Top 10 genes with the largest fold changes are labeled. Red dots indicate genes with adjusted p-value < 0.01; black dots indicate non-significant genes. Key T cell DEGs include IGLV1, TRBV20-1, and ATP5E, which are significantly upregulated in TNBC.
-
-## Figure 2. Cell-cell communication analysis reveals enhanced T cell signaling in TNBC microenvironment.
-
-(A-B) Chord diagrams comparing the differential number (A) and strength (B) of intercellular interactions between Normal and TNBC samples. Red edges indicate increased signaling in TNBC; blue edges indicate decreased signaling. T cells, B cells, and Macrophages show increased interaction with other cell types in TNBC. (C-D) Network diagrams depicting the number of interactions between cell types in Normal (C) and TNBC (D) samples. (E) Stacked bar chart showing the relative information flow of each signaling pathway. Vertical dashed line indicates 50% of total information flow. The analysis identified 87 pathways total: 12 Normal-specific, 31 TNBC-specific, and 44 shared pathways. (F-G) Scatter plots showing the dominant senders and receivers in two-dimensional space for Normal (F) and TNBC (G) samples. Bubble size represents the number of interactions; axes represent outgoing and incoming interaction strengths. T cells exhibit significantly enhanced incoming signal strength in TNBC. (H) Scatter plot displaying T cell-related signaling changes between Normal and TNBC. MHC-I, MIF-(CD74+CD44), MIF-(CD74+CXCR4), COLLAGEN, APP, and CD99 pathways show unique alterations in TNBC (p < 0.01). (I) Dot heatmap showing significant ligand-receptor pairs from sender cells (Macrophages, Epithelial, Endothelial, Fibroblasts, etc.) to T cells via MIF, CXCL, CCL, and COMPLEMENT pathways in TNBC. Key pairs include MIF-(CD74+CD44), MIF-(CD74+CXCR4), CXCL12-CXCR4, and CXCL10-CXCR3. (J) Dot heatmap displaying significant ligand-receptor pairs from T cells to receiver cells (B cells, Macrophages, Endothelial) via MIF and CCL pathways. Notable pairs include MIF-(CD74+CD44), MIF-(CD74+CXCR4), and CCL5-ACKR1/CCR1. P-values calculated by one-sided permutation test; heatmap color represents communication probability.
-
-## Figure 3. WGCNA analysis identifies ubiquitination-related prognostic genes in TNBC T cells.
-
-(A) Venn diagram showing the intersection of T cell marker genes (3,067 genes) and ubiquitin proteasome-related genes (800 genes), yielding 177 T cell-related ubiquitination genes (TCRUG). (B) Hierarchical clustering dendrogram of TCRUG with module assignment indicated by color bars below. Four co-expression modules were identified: MEblue, MEbrown, MEturquoise, and MEgrey. (C) Module-trait correlation heatmap showing the relationship between gene modules and survival time. The MEturquoise module exhibits the strongest correlation with survival time (correlation = 0.002, p < 0.01). (D) Heatmap displaying expression patterns of MEturquoise module genes in Normal and Tumor samples. Hierarchical clustering reveals distinct expression profiles between conditions. Color scale represents z-scored expression levels (blue: low; red: high). (E) Forest plot showing univariate Cox regression analysis results for 30 genes from the MEturquoise module. All genes displayed significant prognostic value (p < 0.05). Genes include BTBD6, CDC34, FBXL15, FBXL18, FBXL6, GMCL1, HECTD3, HECW1, KCTD17, KLHL17, KRT8, LZTR1, MPND, MUL1, OTUB1, PPIL2, PSMA2, RCBTB1, RNF123, RNF135, RNF185, RNF187, SHKBP1, SHPRH, SPSB1, UBR4, USP2, VPS18, ZBTB7B, and ZBTB7C. Hazard ratios (HR) with 95% confidence intervals are shown. (F) Bar chart displaying p-values from Kaplan-Meier survival analysis for 21 prognostically significant genes. P-values are arranged in ascending order. (G) UpSet plot showing the intersection of genes identified through three independent analyses: Kaplan-Meier (KM, 21 genes), Cox regression (COX, 30 genes), and differential expression (DEGs, 59 genes). Thirteen genes were common to all three analyses and selected as key prognostic candidates.
-
-## Figure 4. Construction and validation of a three-gene prognostic risk model for TNBC.
-
-(A-C) Kaplan-Meier survival curves comparing high-risk and low-risk patient groups in TCGA-Train (A), TCGA-Test (B), and GSE25066 (C) cohorts. High-risk patients exhibit significantly poorer overall survival than low-risk patients across all datasets (log-rank test: p < 0.0001 for TCGA-Train, p = 0.00019 for TCGA-Test, p = 0.0023 for GSE25066). Numbers at risk are shown below each plot. (D-F) Risk score distribution, survival status, and gene expression profiles for TCGA-Train (D), TCGA-Test (E), and GSE25066 (F) cohorts. Top panel: scatter plot of survival time vs patients ranked by increasing risk score (circles: alive; triangles: dead). Middle panel: risk score trajectory showing the threshold separating high-risk and low-risk groups (dashed line at risk score = 0). Bottom panel: heatmap displaying expression patterns of the three model genes (GMCL1, KRT8, OTUB1). KRT8 and OTUB1 are upregulated in high-risk patients, while GMCL1 shows opposite expression pattern. Color scale represents z-scored expression (blue: low; red: high).
-
-## Figure 5. Independent validation and clinical nomogram construction for TNBC prognosis prediction.
-
-(A-C) Time-dependent ROC curves evaluating the prognostic accuracy of the three-gene risk score in Train (A), Test (B), and GSE25066 (C) cohorts. AUC values for 2-year, 3-year, and 5-year survival are displayed. TCGA-Train achieves AUC values of 0.67, 0.69, and 0.72, respectively; TCGA-Test achieves 0.53, 0.63, and 0.70; GSE25066 achieves 0.62, 0.63, and 0.59. (D) Forest plot showing univariate Cox regression analysis of clinical variables and risk score. T stage (HR = 1.600, p = 0.004), N stage (HR = 1.340, p = 0.026), and risk score (HR = 6.549, p = 0.007) are significantly associated with prognosis. (E) Forest plot displaying multivariate Cox regression analysis. Risk score remains an independent prognostic factor (HR = 8.881, p = 0.003) after adjusting for T and N stages. (F) Nomogram integrating age, T stage, grade, N stage, and risk score to predict 1-year, 3-year, and 5-year survival probabilities. Total points range from 100 to 240, with higher scores indicating poorer prognosis. (G) Calibration curves validating the nomogram's predictive performance for 1-year, 3-year, and 5-year survival. The predicted survival probabilities closely match the observed outcomes, demonstrating robust calibration. (H) ROC curves comparing the prognostic performance of individual clinical factors (Grade, T, N, Risk) and the integrated nomogram. The nomogram achieves the highest AUC (0.719), substantially outperforming individual predictors. (I) Kaplan-Meier survival analysis stratified by nomogram score levels (high vs low). Patients with high nomogram scores have significantly worse overall survival (p = 0.00034). Numbers at risk are shown for both groups at multiple time points.
-
----
-
-**Technical Notes:**
-- All UMAP plots were generated using the first 50 principal components with resolution = 0.1
-- Differential expression analysis: minimum percentage = 0.25, log2FC threshold = 0.25, adjusted p < 0.05
-- CellChat analysis performed using default settings with CellChatDB ligand-receptor database
-- Statistical significance: *p < 0.05, **p < 0.01, ***p < 0.001
-- Survival curves: log-rank test for group comparison
-- Forest plots: hazard ratios (HR) with 95% confidence intervals
-- All analyses performed in R version 4.x using Seurat, CellChat, WGCNA, survival, and timeROC packages
+Per-figure annotations live in figure_annotations.json; the analysis itself
+is done by manuscript_agent.figures, which discovers every images/image*.png,
+analyses figures in parallel and skips figures whose PNG and context are
+unchanged since the last run.
 """
 
-captions_path = output_dir / "figure_captions.md"
-with open(captions_path, 'w', encoding='utf-8') as f:
-    f.write(captions)
-
-print(f"✓ Generated: {captions_path}")
-
-# Generate summary report
-report = f"""# Image Analysis Summary Report
-
-**Report Generated:** 2025-11-08
-**Source Document:** TNBC预后结果报告.docx
-**Analysis Guidelines:** image-analysis-guidelines.md (v1.0)
-**Caption Standards:** figure-caption-examples.md (Nature Communications style)
-
-## Overview
-
-Successfully extracted and analyzed **5 figures** (25 subplots total) from the TNBC prognosis research report. All figures are multi-panel compositions requiring comprehensive type classification, context association, and publication-grade caption generation.
-
-## Figure Summary
-
-### Figure 1: scRNA-seq Landscape (5 subplots: A-E)
-- **Type:** Multi-panel combination (UMAP + Dot plot + Annotated UMAP + Stacked bar + Volcano plot)
-- **Key Finding:** 11 distinct cell types identified from 84,837 cells; Enhanced immune cell infiltration in TNBC
-- **Context Association:** Lines 55-68 in report_content.md
-- **Statistical Annotations:** 11 clusters, n=84,837 cells, p.adjust < 0.01 for DEGs
-- **Guidelines Applied:** 1.1 (Bar charts), 1.3 (Volcano plots), 1.4 (UMAP), 1.6 (Dot plots)
-
-### Figure 2: Cell-Cell Communication (10 subplots: A-J)
-- **Type:** Multi-panel combination (Chord diagrams + Network diagrams + Bar chart + Scatter plots + Dot heatmaps)
-- **Key Finding:** 87 pathways identified; Enhanced T cell signaling via MIF, CXCL, CCL pathways in TNBC
-- **Context Association:** Lines 105-132 in report_content.md
-- **Statistical Annotations:** p < 0.01 (one-sided permutation test)
-- **Guidelines Applied:** 1.1, 1.4, 1.6, 3.1 (Network diagrams)
-
-### Figure 3: WGCNA Gene Identification (7 subplots: A-G)
-- **Type:** Multi-panel combination (Venn + Dendrogram + Heatmaps + Forest plot + Bar chart + UpSet plot)
-- **Key Finding:** 13 prognostic genes identified (GMCL1, KRT8, OTUB1, etc.) via integrated analysis
-- **Context Association:** Lines 139-151 in report_content.md
-- **Statistical Annotations:** MEturquoise module p=0.002, 30 genes p < 0.05 (Cox)
-- **Guidelines Applied:** 1.1, 1.2 (Forest plots), 1.5 (Heatmaps), 1.7 (Hierarchical clustering), 3.3 (Venn), 3.4 (UpSet)
-
-### Figure 4: Prognostic Risk Model (6 subplots: A-F)
-- **Type:** Multi-panel combination (3 KM curves + 3 Risk score distributions with heatmaps)
-- **Key Finding:** 3-gene signature (GMCL1, KRT8, OTUB1) stratifies patients into high/low-risk groups
-- **Context Association:** Lines 160-166 in report_content.md
-- **Statistical Annotations:** Log-rank p < 0.0001 (TCGA-Train), p = 0.00019 (TCGA-Test), p = 0.0023 (GSE25066)
-- **Guidelines Applied:** 1.4 (Scatter plots), 1.5 (Heatmaps), 1.8 (Survival curves)
-
-### Figure 5: Model Validation and Nomogram (9 subplots: A-I)
-- **Type:** Multi-panel combination (ROC curves + Forest plots + Nomogram + Calibration + KM curve)
-- **Key Finding:** Risk score is independent prognostic factor (HR=8.881, p=0.003); Nomogram AUC=0.719
-- **Context Association:** Lines 178-202 in report_content.md
-- **Statistical Annotations:** AUC values 0.53-0.72 across cohorts, p = 0.00034 (nomogram stratification)
-- **Guidelines Applied:** 1.2, 1.8, 1.9 (ROC curves), 1.10 (Calibration curves), 3.5 (Nomograms)
-
-## Quality Metrics
-
-### Context Association: 100% Success Rate
-- All 5 figures successfully linked to corresponding report sections
-- Research purpose, methods, and conclusions extracted for each figure
-- Original Chinese figure legends translated and refined for publication
-
-### Subplot Detection: 100% Completeness
-- **Figure 1:** 5/5 subplots detected (A-E)
-- **Figure 2:** 10/10 subplots detected (A-J)
-- **Figure 3:** 7/7 subplots detected (A-G)
-- **Figure 4:** 6/6 subplots detected (A-F, with 3×2 grid layout)
-- **Figure 5:** 9/9 subplots detected (A-I)
-- **Total:** 37 subplots identified (accounting for panel structure)
-
-### Statistical Accuracy: 100% Preservation
-- All p-values, hazard ratios, and confidence intervals accurately transcribed
-- Original significance markers (*/***/***) preserved in captions
-- Sample sizes (n) explicitly stated for all analyses
-- Statistical methods (log-rank test, Cox regression, permutation test) documented
-
-### Figure Type Distribution
-- **Data visualizations:** 20 subplots
-  - Scatter plots/UMAP: 6
-  - Bar charts: 3
-  - Heatmaps: 5
-  - Survival curves: 4
-  - ROC curves: 4
-  - Forest plots: 3
-  - Dot plots/heatmaps: 3
-- **Network/Pathway diagrams:** 4 subplots (chord + network diagrams)
-- **Specialized plots:** 3 subplots (Venn, UpSet, Nomogram, Calibration)
-
-## Caption Quality Assessment
-
-### Compliance with Nature Communications Guidelines
-✓ **One-sentence title:** Each caption begins with concise title (no adjectives)
-✓ **Subplot descriptions:** All subplots (A-J) explicitly described
-✓ **Sample size declaration:** n values stated for all analyses
-✓ **Error type specification:** Not applicable (no error bars in these figure types)
-✓ **Statistical methods:** All tests named (log-rank, Cox regression, permutation test)
-✓ **Technical details:** Resolution, thresholds, software packages documented
-✓ **Passive voice:** Methods described using passive constructions
-✓ **Objective language:** No subjective terms ("striking", "excellent", "remarkable")
-
-### Caption Length
-- Figure 1: ~220 words (appropriate for 5-panel figure)
-- Figure 2: ~310 words (appropriate for 10-panel figure with complex network analysis)
-- Figure 3: ~270 words (appropriate for 7-panel multi-analysis figure)
-- Figure 4: ~200 words (appropriate for 6-panel survival analysis)
-- Figure 5: ~280 words (appropriate for 9-panel clinical validation figure)
-
-## Traceability
-
-All structured data extractions reference specific guideline sections:
-- **Bar charts:** Guidelines 1.1
-- **Forest plots:** Guidelines 1.2
-- **Volcano plots:** Guidelines 1.3
-- **Scatter plots/UMAP:** Guidelines 1.4
-- **Heatmaps:** Guidelines 1.5
-- **Dot plots:** Guidelines 1.6
-- **Hierarchical clustering:** Guidelines 1.7
-- **Survival curves:** Guidelines 1.8
-- **ROC curves:** Guidelines 1.9
-- **Calibration curves:** Guidelines 1.10
-- **Network diagrams:** Guidelines 3.1
-- **Venn diagrams:** Guidelines 3.3
-- **UpSet plots:** Guidelines 3.4
-- **Nomograms:** Guidelines 3.5
-
-## Output Files Generated
-
-| File | Size | Purpose |
-|------|------|---------|
-| `images/image1.png` | 901 KB | Figure 1: scRNA-seq landscape |
-| `images/image2.png` | 903 KB | Figure 2: Cell-cell communication |
-| `images/image3.png` | 299 KB | Figure 3: WGCNA analysis |
-| `images/image4.png` | 438 KB | Figure 4: Risk model |
-| `images/image5.png` | 318 KB | Figure 5: Model validation |
-| `image_analysis.json` | ~25 KB | Structured analysis data |
-| `figure_captions.md` | ~8 KB | Publication-grade captions |
-| `image_analysis_report.md` | ~5 KB | This summary report |
-
-## Recommendations for Manuscript Integration
-
-1. **Direct Use:** All captions are publication-ready and can be directly incorporated into the Results section
-2. **Figure References:** Update in-text citations to match final figure numbering (currently Figure 1-5)
-3. **Supplementary Figures:** Consider moving Figure S1 and Figure S2 references from report to supplementary materials
-4. **Technical Details:** The "Technical Notes" section in captions can be moved to Methods if needed
-5. **High-Resolution Figures:** Current PNGs are suitable for submission; consider re-exporting at 300+ DPI if required
-
-## Phase 0.5 Completion Status
-
-✅ **Text extraction:** report_content.md (207 lines)
-✅ **Image extraction:** 5 PNG files from DOCX
-✅ **Type classification:** 37 subplots classified across 12 figure types
-✅ **Context association:** 100% figures linked to report content
-✅ **Structured data extraction:** Complete JSON with guideline references
-✅ **Caption generation:** Publication-grade captions following Nature Communications standards
-✅ **Quality validation:** Zero context loss, zero subplot omission, 100% statistical accuracy
+import sys
+from pathlib import Path
 
-**Ready for Phase 1:** All prerequisite materials prepared for Results section generation.
-"""
+# Output directory is the workspace this script lives in
+output_dir = Path(__file__).resolve().parent
+sys.path.insert(0, str(output_dir.parent))
 
-report_path = output_dir / "image_analysis_report.md"
-with open(report_path, 'w', encoding='utf-8') as f:
-    f.write(report)
+from manuscript_agent.figures import run
 
-print(f"✓ Generated: {report_path}")
-print("\n=== Phase 0.5 Complete ===")
-print(f"Total figures analyzed: 5")
-print(f"Total subplots detected: 37")
-print(f"Context association: 100%")
-print(f"Caption quality: Publication-ready")
-print(f"\nAll files saved to: {output_dir}")
+if __name__ == "__main__":
+    run(output_dir)
@@ -0,0 +1,7 @@
+"""
+Manuscript Agent
+Pipeline engines behind the manuscript workspaces (manuscript_<id>/):
+report ingestion, figure analysis, literature search and drafting support.
+"""
+
+__version__ = "0.1.0"
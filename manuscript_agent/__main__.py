@@ -0,0 +1,50 @@
+"""
+Command-line entry point: python -m manuscript_agent <command> [args...]
+Each command lives in its own module and is imported only when invoked.
+"""
+
+import importlib
+import sys
+
+COMMANDS = {
+    "analyzers": "manuscript_agent.analyzers",
+    "artifacts": "manuscript_agent.artifacts",
+    "assemble": "manuscript_agent.assemble",
+    "batch": "manuscript_agent.batch",
+    "bench": "manuscript_agent.benchsuite",
+    "cache": "manuscript_agent.cache",
+    "checkpoint": "manuscript_agent.checkpoint",
+    "citations": "manuscript_agent.citations",
+    "citegraph": "manuscript_agent.citegraph",
+    "claims": "manuscript_agent.claims",
+    "dedup": "manuscript_agent.dedup",
+    "fakeserver": "manuscript_agent.fakeserver",
+    "figures": "manuscript_agent.figures",
+    "fulltext": "manuscript_agent.fulltext",
+    "ingest": "manuscript_agent.ingest",
+    "journals": "manuscript_agent.journals",
+    "panels": "manuscript_agent.panels",
+    "papers": "manuscript_agent.papers",
+    "pipeline": "manuscript_agent.pipeline",
+    "profile": "manuscript_agent.spans",
+    "pyramid": "manuscript_agent.pyramid",
+    "quality": "manuscript_agent.quality",
+    "score": "manuscript_agent.scoring",
+    "search": "manuscript_agent.search",
+    "semantic": "manuscript_agent.semantic",
+    "translate": "manuscript_agent.translation",
+}
+
+
+def main(argv=None):
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if not argv or argv[0] not in COMMANDS:
+        print("usage: python -m manuscript_agent <command> [args...]")
+        print("commands: " + ", ".join(sorted(COMMANDS)))
+        return 2
+    module = importlib.import_module(COMMANDS[argv[0]])
+    return module.main(argv[1:])
+
+
+if __name__ == "__main__":
+    sys.exit(main())
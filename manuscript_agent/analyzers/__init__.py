@@ -0,0 +1,212 @@
+"""
+Figure-Type Analyzer Registry
+Per-type plugins that turn a subplot's structured_data into a caption
+clause and guideline checks. Dispatch is table-driven: ANALYZERS maps a
+subplot `type` to "module:function", GUIDELINES maps the section number of
+its guideline_ref ("Guidelines 1.8 - Survival curves" -> 1.8) for types
+without an entry of their own. Plugin modules are imported on first use,
+so a run only loads the analyzers for the figure types it actually meets
+and importing the registry stays cheap however many types are listed.
+
+    python -m manuscript_agent analyzers
+    python -m manuscript_agent analyzers manuscript_11072333
+    python -m manuscript_agent analyzers --bench 20
+"""
+
+import importlib
+import re
+import sys
+
+PACKAGE = __name__
+ANALYZERS = {
+    "bar_chart": "charts:bar_chart",
+    "stacked_bar_chart": "charts:stacked_bar_chart",
+    "forest_plot": "regression:forest_plot",
+    "nomogram": "regression:nomogram",
+    "volcano_plot": "embedding:volcano_plot",
+    "UMAP_plot": "embedding:embedding_plot",
+    "UMAP_plot_annotated": "embedding:embedding_plot",
+    "tSNE_plot": "embedding:embedding_plot",
+    "PCA_plot": "embedding:embedding_plot",
+    "scatter_plot": "embedding:scatter_plot",
+    "heatmap": "matrix:heatmap",
+    "dot_plot": "matrix:dot_plot",
+    "dot_heatmap": "matrix:dot_plot",
+    "dendrogram_modules": "matrix:dendrogram",
+    "kaplan_meier_curve": "survival:kaplan_meier",
+    "risk_score_scatter": "survival:risk_score",
+    "roc_curve": "roc:roc_curve",
+    "calibration_curve": "roc:calibration_curve",
+    "chord_diagram": "networks:network",
+    "network_diagram": "networks:network",
+    "venn_diagram": "sets:venn",
+    "upset_plot": "sets:upset",
+}
+# Fallback by guideline section for types without their own entry
+GUIDELINES = {
+    "1.1": "charts:bar_chart",
+    "1.2": "regression:forest_plot",
+    "1.3": "embedding:volcano_plot",
+    "1.4": "embedding:scatter_plot",
+    "1.5": "matrix:heatmap",
+    "1.6": "matrix:dot_plot",
+    "1.7": "matrix:dendrogram",
+    "1.8": "survival:kaplan_meier",
+    "1.9": "roc:roc_curve",
+    "1.10": "roc:calibration_curve",
+    "3.1": "networks:network",
+    "3.3": "sets:venn",
+    "3.4": "sets:upset",
+    "3.5": "regression:nomogram",
+}
+GUIDELINE_NUMBER = re.compile(r"Guidelines\s+([\d.]+)")
+
+_resolved = {}
+
+
+def guideline_number(ref):
+    match = GUIDELINE_NUMBER.match(ref or "")
+    return match.group(1).rstrip(".") if match else None
+
+
+def target(subplot):
+    """Registry entry ("module:function") for a subplot, or None for the generic analyzer."""
+    return ANALYZERS.get(subplot.get("type")) or \
+        GUIDELINES.get(guideline_number(subplot.get("guideline_ref")))
+
+
+def resolve(entry):
+    """Import the plugin module behind `entry` (once) and return its function."""
+    if entry not in _resolved:
+        module, function = entry.split(":")
+        _resolved[entry] = getattr(importlib.import_module(f"{PACKAGE}.{module}"), function)
+    return _resolved[entry]
+
+
+def generic(subplot):
+    kind = (subplot.get("type") or "panel").replace("_", " ")
+    return f"{kind[0].upper()}{kind[1:]}", []
+
+
+def analyze(subplot):
+    """{"description": caption clause, "guideline_issues": [...]} for one subplot."""
+    entry = target(subplot)
+    description, issues = (resolve(entry) if entry else generic)(subplot)
+    return {"description": description, "guideline_issues": issues}
+
+
+def caption_text(subplots, number):
+    """Draft caption from panel descriptions: "(A) ... (B) ..."."""
+    prefix = str(number)
+    parts = []
+    for subplot in subplots:
+        label = subplot["subplot_id"]
+        label = label[len(prefix):] if label.startswith(prefix) else label
+        description = subplot.get("description") or analyze(subplot)["description"]
+        parts.append(f"({label}) {description.rstrip('.')}.")
+    return " ".join(parts)
+
+
+# Shared helpers for plugins
+
+def data_of(subplot):
+    return subplot.get("structured_data") or {}
+
+
+def listing(items, limit=6):
+    """'a, b and c', truncated to `limit` items with a count of the rest."""
+    items = [str(item) for item in items]
+    if len(items) > limit:
+        items = items[:limit] + [f"{len(items) - limit} more"]
+    if len(items) <= 1:
+        return "".join(items)
+    return ", ".join(items[:-1]) + " and " + items[-1]
+
+
+def lower_first(text):
+    """Lower-case a leading capital unless it starts an acronym or a name like 'T cells'."""
+    return text[0].lower() + text[1:] if text[1:2].islower() else text
+
+
+def cohort(data):
+    return f" in the {data['dataset']} cohort" if data.get("dataset") else ""
+
+
+def startup(code):
+    """Wall time (ms) and number of loaded plugin modules of `code` in a fresh interpreter."""
+    import subprocess
+    from pathlib import Path
+
+    script = (f"import sys, time; start = time.perf_counter(); {code}; "
+              f"print((time.perf_counter() - start) * 1000, "
+              f"sum(m.startswith('{PACKAGE}.') for m in sys.modules))")
+    output = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True,
+                            check=True, cwd=Path(__file__).resolve().parents[2]).stdout.split()
+    return float(output[0]), int(output[1])
+
+
+def benchmark(repeat=20):
+    """Registry import and dispatch costs, lazy vs importing every plugin up front."""
+    import time
+
+    load = f"import {PACKAGE} as r"
+    eager = f"{load}; [r.resolve(e) for e in set(r.ANALYZERS.values())]"
+    one = f"{load}; r.analyze({{'type': 'kaplan_meier_curve'}})"
+    results = {"registered_types": len(ANALYZERS),
+               "plugin_modules": len({e.split(':')[0] for e in ANALYZERS.values()})}
+    for name, code in (("registry", load), ("one_type", one), ("all_plugins", eager)):
+        runs = [startup(code) for _ in range(repeat)]
+        results[f"{name}_ms"] = round(sorted(t for t, _ in runs)[len(runs) // 2], 2)
+        results[f"{name}_modules"] = runs[0][1]
+    subplot = {"type": "roc_curve", "structured_data": {"auc_values": [0.7, 0.8]}}
+    analyze(subplot)
+    start = time.perf_counter()
+    for _ in range(10000):
+        analyze(subplot)
+    results["dispatch_us"] = round((time.perf_counter() - start) * 100, 2)
+    return results
+
+
+def main(argv=None):
+    # Only the command line needs these; importing the registry stays cheap
+    import argparse
+    import json
+    from pathlib import Path
+
+    parser = argparse.ArgumentParser(prog="manuscript_agent analyzers",
+                                     description=__doc__.strip().splitlines()[0])
+    parser.add_argument("workspace", nargs="?",
+                        help="analyse the subplots of this workspace's figure_annotations.json")
+    parser.add_argument("--bench", type=int, metavar="RUNS",
+                        help="time registry startup over RUNS fresh interpreters")
+    args = parser.parse_args(argv)
+
+    if args.bench:
+        for name, value in benchmark(args.bench).items():
+            print(f"{name:>20}: {value}")
+        return 0
+    if not args.workspace:
+        for kind, entry in sorted(ANALYZERS.items(), key=lambda item: item[0].lower()):
+            print(f"  {kind:<24} {entry}")
+        for number, entry in sorted(GUIDELINES.items(),
+                                    key=lambda item: tuple(map(int, item[0].split(".")))):
+            print(f"  Guidelines {number:<13} {entry}")
+        return 0
+
+    path = Path(args.workspace) / "figure_annotations.json"
+    if not path.exists():
+        print(f"✗ {path} not found")
+        return 1
+    with open(path, 'r', encoding='utf-8') as f:
+        figures = json.load(f).get("figures", {})
+    for name, figure in figures.items():
+        print(f"{name}:")
+        for subplot in figure.get("subplots", []):
+            result = analyze(subplot)
+            mark = "✗" if result["guideline_issues"] else "✓"
+            print(f"  {mark} {subplot['subplot_id']:<4} {result['description']}")
+            for issue in result["guideline_issues"]:
+                print(f"         - {issue}")
+    loaded = sorted(name.rsplit(".", 1)[1] for name in sys.modules if name.startswith(f"{PACKAGE}."))
+    print(f"Loaded plugins: {', '.join(loaded) or 'none'}")
+    return 0
@@ -0,0 +1,29 @@
+"""Bar charts, plain and stacked (Guidelines 1.1)."""
+
+from manuscript_agent.analyzers import data_of, listing, lower_first
+
+
+def bar_chart(subplot):
+    data = data_of(subplot)
+    description = "Bar chart"
+    if data.get("y_axis"):
+        description += f" of {data['y_axis']}"
+        if data.get("x_axis"):
+            description += f" by {lower_first(data['x_axis'])}"
+    issues = [] if data.get("y_axis") else ["plotted quantity not described"]
+    return description, issues
+
+
+def stacked_bar_chart(subplot):
+    data = data_of(subplot)
+    description = "Stacked bar chart"
+    if data.get("metric"):
+        description += f" of {lower_first(data['metric'])}"
+    elif data.get("cell_types"):
+        description += f" of the proportions of {data['cell_types']} cell types"
+    if data.get("groups"):
+        description += f" in {listing(data['groups'])}"
+    elif data.get("comparison"):
+        description += f" ({data['comparison']})"
+    issues = [] if (data.get("groups") or data.get("comparison")) else ["compared groups not named"]
+    return description, issues
@@ -0,0 +1,48 @@
+"""Scatter-type panels: embeddings, scatter and volcano plots (Guidelines 1.3, 1.4)."""
+
+from manuscript_agent.analyzers import data_of, listing, lower_first
+
+
+def embedding_plot(subplot):
+    data = data_of(subplot)
+    method = data.get("plot_type") or (subplot.get("type") or "UMAP").split("_")[0]
+    description = f"{method} visualization"
+    if data.get("total_cells"):
+        description += f" of {data['total_cells']:,} cells"
+        if data.get("samples"):
+            description += f" from {data['samples']} samples"
+    if data.get("cell_types"):
+        description += f" annotated with {len(data['cell_types'])} cell types"
+    elif data.get("coloring_schemes"):
+        description += f", colored {listing(data['coloring_schemes'])}"
+    issues = []
+    if not (data.get("total_cells") or data.get("cell_types") or data.get("clusters")):
+        issues.append("number of cells or clusters not reported")
+    return description, issues
+
+
+def scatter_plot(subplot):
+    data = data_of(subplot)
+    axes = data.get("axes") or {}
+    if axes.get("x") and axes.get("y"):
+        description = f"Scatter plot of {lower_first(axes['y'])} " \
+                      f"versus {lower_first(axes['x'])}"
+    else:
+        description = "Scatter plot"
+    if data.get("condition"):
+        description += f" in {data['condition']}"
+    if data.get("highlighted_pathways"):
+        description += f", highlighting {listing(data['highlighted_pathways'], 4)}"
+    issues = [] if axes else ["axis quantities not described"]
+    return description, issues
+
+
+def volcano_plot(subplot):
+    data = data_of(subplot)
+    description = "Volcano plot"
+    if data.get("comparison"):
+        description += f" of {data['comparison']}"
+    if data.get("significance_threshold"):
+        description += f" (significance: {data['significance_threshold']})"
+    issues = [] if data.get("significance_threshold") else ["significance threshold not stated"]
+    return description, issues
@@ -0,0 +1,43 @@
+"""Matrix-type panels: heatmaps, dot plots and dendrograms (Guidelines 1.5-1.7)."""
+
+from manuscript_agent.analyzers import data_of, listing, lower_first
+
+
+def heatmap(subplot):
+    data = data_of(subplot)
+    description = "Heatmap"
+    if data.get("rows") and data.get("columns"):
+        description += f" of {listing(data['rows'], 4)} against {listing(data['columns'], 4)}"
+    elif data.get("genes_shown"):
+        description += f" of {data['genes_shown']}"
+    if data.get("comparison"):
+        description += f" ({data['comparison']})"
+    issues = []
+    if not (data.get("color_scale") or data.get("correlation_values")):
+        issues.append("colour scale not described")
+    return description, issues
+
+
+def dot_plot(subplot):
+    data = data_of(subplot)
+    genes = data.get("genes_shown") or data.get("pathways") or data.get("ligand_receptor_pairs")
+    description = "Dot plot"
+    if data.get("direction"):
+        description += f" of {lower_first(data['direction'])}"
+    if genes:
+        description += f" showing {listing(genes, 4)}"
+    if data.get("cell_clusters"):
+        description += f" across {data['cell_clusters']} clusters"
+    issues = []
+    if not (data.get("metrics") or data.get("color_metric")):
+        issues.append("dot size and colour encodings not described")
+    return description, issues
+
+
+def dendrogram(subplot):
+    data = data_of(subplot)
+    modules = data.get("modules") or []
+    description = "Hierarchical clustering dendrogram"
+    if modules:
+        description += f" with {len(modules)} co-expression modules ({listing(modules)})"
+    return description, [] if modules else ["modules not listed"]
@@ -0,0 +1,17 @@
+"""Interaction networks and chord diagrams (Guidelines 3.1)."""
+
+from manuscript_agent.analyzers import data_of, lower_first
+
+
+def network(subplot):
+    data = data_of(subplot)
+    kind = "Chord diagram" if subplot.get("type") == "chord_diagram" else "Network diagram"
+    description = kind
+    if data.get("metric"):
+        description += f" of {lower_first(data['metric'])}"
+    if data.get("condition"):
+        description += f" in {data['condition']}"
+    issues = []
+    if data.get("metric", "").lower().startswith("differential") and not data.get("edge_colors"):
+        issues.append("edge colours for increased/decreased interactions not explained")
+    return description, issues
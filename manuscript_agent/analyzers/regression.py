@@ -0,0 +1,33 @@
+"""Regression models: forest plots and nomograms (Guidelines 1.2, 3.5)."""
+
+from manuscript_agent.analyzers import data_of, listing, lower_first
+
+
+def forest_plot(subplot):
+    data = data_of(subplot)
+    variables = data.get("variables") or data.get("genes_shown") or []
+    count = data.get("genes_count") or len(variables)
+    analysis = data.get("analysis") or "Regression"
+    description = f"Forest plot of {lower_first(analysis)}"
+    if variables:
+        description += f" for {count} variables" if count > 6 else f" for {listing(variables)}"
+    if data.get("key_finding"):
+        description += f"; {data['key_finding']}"
+    issues = []
+    metrics = data.get("metrics") or {}
+    if not metrics and "HR" not in (data.get("key_finding") or "") \
+            and not data.get("significant_variables"):
+        issues.append("hazard ratios with 95% CI and p-values not reported")
+    return description, issues
+
+
+def nomogram(subplot):
+    data = data_of(subplot)
+    predictors = data.get("predictors") or []
+    description = "Nomogram"
+    if predictors:
+        description += f" integrating {listing(predictors)}"
+    if data.get("outcomes"):
+        description += f" to predict {listing(data['outcomes'])}"
+    issues = [] if predictors else ["predictors not listed"]
+    return description, issues
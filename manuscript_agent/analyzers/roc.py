@@ -0,0 +1,37 @@
+"""Discrimination and calibration: ROC and calibration curves (Guidelines 1.9, 1.10)."""
+
+from manuscript_agent.analyzers import cohort, data_of, listing
+
+
+def roc_curve(subplot):
+    data = data_of(subplot)
+    auc = data.get("auc_values")
+    points = data.get("time_points") or []
+    description = "Time-dependent ROC curves" if points else "ROC curves"
+    if data.get("models"):
+        description += f" comparing {listing(data['models'])}"
+    description += cohort(data)
+    issues = []
+    if isinstance(auc, dict):
+        description += f" (AUC: {', '.join(f'{k} {v}' for k, v in auc.items())})"
+    elif auc:
+        labels = points if len(points) == len(auc) else None
+        values = [f"{label} {value}" for label, value in zip(labels, auc)] if labels else auc
+        description += f" (AUC {', '.join(map(str, values))})"
+    else:
+        issues.append("AUC values not reported")
+    if isinstance(auc, list) and len(auc) > 1 and len(points) != len(auc):
+        issues.append("AUC values not matched to time points or models")
+    return description, issues
+
+
+def calibration_curve(subplot):
+    data = data_of(subplot)
+    points = data.get("time_points") or []
+    description = "Calibration curves of predicted versus observed outcome"
+    if points:
+        description += f" at {listing(points)}"
+    issues = []
+    if not data.get("x_axis") or not data.get("y_axis"):
+        issues.append("predicted and observed axes not labelled")
+    return description, issues
@@ -0,0 +1,29 @@
+"""Set overlaps: Venn diagrams and UpSet plots (Guidelines 3.3, 3.4)."""
+
+from manuscript_agent.analyzers import data_of
+
+
+def venn(subplot):
+    data = data_of(subplot)
+    sets = [data[key] for key in sorted(data) if key.startswith("set") and isinstance(data[key], dict)]
+    description = "Venn diagram"
+    if sets:
+        description += " of " + " and ".join(s.get("name", "?") for s in sets)
+    overlap = data.get("intersection") or {}
+    if overlap.get("count") is not None:
+        description += f" ({overlap['count']} shared"
+        description += f", {overlap['percentage']}%)" if "percentage" in overlap else ")"
+    issues = [] if sets else ["set sizes not reported"]
+    return description, issues
+
+
+def upset(subplot):
+    data = data_of(subplot)
+    sets = data.get("sets") or []
+    description = "UpSet plot"
+    if sets:
+        description += f" of intersections among {', '.join(sets)}"
+    if data.get("key_finding"):
+        description += f"; {data['key_finding']}"
+    issues = [] if data.get("intersections") else ["intersection sizes not reported"]
+    return description, issues
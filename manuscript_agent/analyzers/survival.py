@@ -0,0 +1,37 @@
+"""Survival analyses: Kaplan-Meier curves and risk-score distributions (Guidelines 1.8)."""
+
+from manuscript_agent.analyzers import cohort, data_of, lower_first
+
+
+def group_sizes(groups):
+    return ", ".join(f"{name} n = {size}" for name, size in groups.items())
+
+
+def kaplan_meier(subplot):
+    data = data_of(subplot)
+    groups = data.get("groups") or {}
+    description = "Kaplan-Meier survival curves"
+    if data.get("stratification"):
+        description += f" stratified by {lower_first(data['stratification'])}"
+    elif groups:
+        description += f" of {' and '.join(groups)} groups"
+    description += cohort(data)
+    details = [part for part in (group_sizes(groups), data.get("statistic")) if part]
+    if details:
+        description += f" ({'; '.join(details)})"
+    issues = []
+    if not groups:
+        issues.append("group sizes (numbers at risk) not reported")
+    if not data.get("statistic"):
+        issues.append("no log-rank or other test statistic for the curve difference")
+    return description, issues
+
+
+def risk_score(subplot):
+    data = data_of(subplot)
+    description = "Risk score distribution, survival status and signature-gene expression of " \
+                  "patients ranked by increasing risk score" + cohort(data)
+    issues = []
+    if not data.get("dataset"):
+        issues.append("cohort not identified")
+    return description, issues
@@ -0,0 +1,601 @@
+"""
+Content-Addressed Artifact Store
+Deduplicating snapshots of manuscript workspaces. Every object is stored once
+under its SHA-256, zlib-compressed, in a store shared by all workspaces:
+
+- text files are split into content-defined chunks (paragraphs, or runs of
+  lines ending at a line whose hash hits the boundary modulus), so draft
+  versions and backups that share most paragraphs share most chunks;
+- result files with a "papers" list are stored per paper and per large
+  field, so the pubmed/openalex/merged/validated/final stages of a citation
+  point keep one copy of each abstract and author list;
+- anything else is stored in fixed-size chunks.
+
+A snapshot maps each workspace path to a file manifest and records its
+permission bits; unchanged files are recognised from a per-workspace
+(size, mtime) index and cost no reads.
+Snapshots can be listed, diffed against each other or the working tree,
+restored, and pruned; gc deletes objects no snapshot references.
+
+The default location is ~/.cache/manuscript_agent/artifacts (override with
+MANUSCRIPT_AGENT_ARTIFACTS or --store).
+
+    python -m manuscript_agent artifacts snapshot manuscript_11072333 --label phase1
+    python -m manuscript_agent artifacts diff manuscript_11072333 phase1 --patch
+    python -m manuscript_agent artifacts restore manuscript_11072333 phase1 --to /tmp/phase1
+    python -m manuscript_agent artifacts gc --keep 5
+    python -m manuscript_agent artifacts --bench 20
+"""
+
+import argparse
+import difflib
+import hashlib
+import json
+import os
+import shutil
+import stat
+import tempfile
+import time
+import zlib
+from datetime import datetime, timezone
+from pathlib import Path
+
+from manuscript_agent import spans
+from manuscript_agent.checkpoint import atomic_write_json, file_mode
+
+# Regenerable per-workspace caches are not worth snapshotting.
+SKIP_DIRS = {"cache", "__pycache__"}
+TEXT_SUFFIXES = {".md", ".txt", ".log", ".json", ".jsonl", ".csv", ".tsv", ".py", ".bib"}
+# A line ends a chunk when crc32(line) % CHUNK_MODULUS == 0 (or it is blank),
+# so chunks average a few lines and boundaries survive insertions upstream.
+CHUNK_MODULUS = 16
+BLOCK_SIZE = 1 << 20
+# Paper fields whose JSON is shorter than this are kept inline.
+INLINE_BYTES = 64
+# Renderings tried when storing a papers file; it must reproduce the bytes.
+JSON_FORMATS = [{"indent": 2, "ensure_ascii": False, "newline": False},
+                {"indent": 2, "ensure_ascii": False, "newline": True},
+                {"indent": 2, "ensure_ascii": True, "newline": False},
+                {"indent": 2, "ensure_ascii": True, "newline": True}]
+
+
+def default_path():
+    return Path(os.environ.get("MANUSCRIPT_AGENT_ARTIFACTS",
+                               Path.home() / ".cache" / "manuscript_agent" / "artifacts"))
+
+
+def digest(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def text_chunks(data):
+    """Split text bytes into content-defined chunks of whole lines."""
+    chunks, start, pos = [], 0, 0
+    for line in data.splitlines(keepends=True):
+        pos += len(line)
+        if not line.strip() or zlib.crc32(line) % CHUNK_MODULUS == 0:
+            chunks.append(data[start:pos])
+            start = pos
+    if start < len(data):
+        chunks.append(data[start:])
+    return chunks
+
+
+def block_chunks(data):
+    return [data[i:i + BLOCK_SIZE] for i in range(0, len(data), BLOCK_SIZE)]
+
+
+def render_json(data, fmt):
+    text = json.dumps(data, indent=fmt["indent"], ensure_ascii=fmt["ensure_ascii"])
+    return (text + "\n" if fmt["newline"] else text).encode('utf-8')
+
+
+def encode(obj):
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode('utf-8')
+
+
+def utc_now():
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def workspace_key(workspace):
+    """
+    Refs and index name of a workspace: its directory name plus a hash of its
+    resolved path, so same-named workspaces under different roots stay apart.
+    """
+    path = Path(workspace).resolve()
+    return f"{path.name}-{hashlib.sha256(str(path).encode('utf-8')).hexdigest()[:12]}"
+
+
+def workspace_files(workspace):
+    """Workspace-relative POSIX paths of every file worth snapshotting."""
+    root = Path(workspace)
+    for directory, dirs, files in os.walk(root):
+        dirs[:] = sorted(d for d in dirs if d not in SKIP_DIRS and not d.startswith("."))
+        for name in sorted(files):
+            if not name.startswith(".") and not name.endswith(".tmp"):
+                yield (Path(directory) / name).relative_to(root).as_posix()
+
+
+class ArtifactStore:
+    """
+    objects/<2 hex>/<62 hex>  zlib-compressed content, named by sha256
+    refs/<workspace key>.json     snapshot list, oldest first
+    index/<workspace key>.json    path -> [size, mtime_ns, manifest] for reuse
+    """
+
+    def __init__(self, root=None):
+        self.root = Path(root or default_path())
+        self.objects = self.root / "objects"
+        self.written = self.reused = self.bytes_written = 0
+
+    def path(self, key):
+        return self.objects / key[:2] / key[2:]
+
+    def put(self, data, write=True):
+        key = digest(data)
+        if not write:
+            return key
+        path = self.path(key)
+        if path.exists():
+            self.reused += 1
+            return key
+        path.parent.mkdir(parents=True, exist_ok=True)
+        packed = zlib.compress(data, 6)
+        # Objects are immutable and re-creatable from the workspace, so a plain
+        # rename is enough; only the refs file is written durably.
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        with os.fdopen(fd, 'wb') as f:
+            f.write(packed)
+        os.replace(tmp, path)
+        self.written += 1
+        self.bytes_written += len(packed)
+        return key
+
+    def get(self, key):
+        data = zlib.decompress(self.path(key).read_bytes())
+        if digest(data) != key:
+            raise ValueError(f"Corrupt object {key}")
+        return data
+
+    def put_json(self, obj, write=True):
+        return self.put(encode(obj), write)
+
+    def get_json(self, key):
+        return json.loads(self.get(key))
+
+    # Files
+
+    def put_paper(self, paper, write=True):
+        if not isinstance(paper, dict):
+            return self.put_json({"value": paper}, write)
+        fields = []
+        for name, value in paper.items():
+            raw = encode(value)
+            if len(raw) < INLINE_BYTES:
+                fields.append([name, value])
+            else:
+                fields.append([name, None, self.put(raw, write)])
+        return self.put_json({"fields": fields}, write)
+
+    def get_paper(self, key):
+        record = self.get_json(key)
+        if "value" in record:
+            return record["value"]
+        return {field[0]: field[1] if len(field) == 2 else self.get_json(field[2])
+                for field in record["fields"]}
+
+    def papers_manifest(self, data, write=True):
+        """Per-paper manifest for a result file, or None if it is not one."""
+        if not data.lstrip().startswith(b"{") or b'"papers"' not in data:
+            return None
+        try:
+            doc = json.loads(data)
+        except ValueError:
+            return None
+        if not isinstance(doc, dict) or not isinstance(doc.get("papers"), list):
+            return None
+        fmt = next((f for f in JSON_FORMATS if render_json(doc, f) == data), None)
+        if fmt is None:
+            return None
+        return {"type": "papers", "size": len(data), "format": fmt,
+                "template": self.put_json(dict(doc, papers=None), write),
+                "papers": [self.put_paper(p, write) for p in doc["papers"]]}
+
+    def put_file(self, data, name, write=True):
+        """Store file bytes and return the manifest key."""
+        manifest = None
+        if name.endswith(".json"):
+            manifest = self.papers_manifest(data, write)
+        if manifest is None:
+            kind = "text" if Path(name).suffix.lower() in TEXT_SUFFIXES else "blocks"
+            chunks = text_chunks(data) if kind == "text" else block_chunks(data)
+            manifest = {"type": kind, "size": len(data),
+                        "chunks": [self.put(c, write) for c in chunks]}
+        return self.put_json(manifest, write)
+
+    def get_file(self, key):
+        manifest = self.get_json(key)
+        if manifest["type"] == "papers":
+            doc = self.get_json(manifest["template"])
+            doc["papers"] = [self.get_paper(p) for p in manifest["papers"]]
+            return render_json(doc, manifest["format"])
+        return b"".join(self.get(c) for c in manifest["chunks"])
+
+    def references(self, manifest):
+        """Object keys a file manifest depends on (excluding itself)."""
+        if manifest["type"] != "papers":
+            return list(manifest["chunks"])
+        keys = [manifest["template"]]
+        for paper in manifest["papers"]:
+            keys.append(paper)
+            record = self.get_json(paper)
+            keys.extend(field[2] for field in record.get("fields", []) if len(field) == 3)
+        return keys
+
+    # Snapshots
+
+    def refs_path(self, name):
+        return self.root / "refs" / f"{name}.json"
+
+    def index_path(self, name):
+        return self.root / "index" / f"{name}.json"
+
+    def snapshots(self, name):
+        path = self.refs_path(name)
+        if not path.exists():
+            return []
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def adopt_legacy(self, workspace):
+        """
+        Move snapshots stored under the bare directory name (before refs were
+        keyed by path) to the workspace's key; the first workspace asking wins.
+        """
+        name = workspace_key(workspace)
+        legacy = self.refs_path(Path(workspace).resolve().name)
+        if legacy.exists() and not self.refs_path(name).exists():
+            os.replace(legacy, self.refs_path(name))
+        return name
+
+    def workspaces(self):
+        directory = self.root / "refs"
+        return sorted(p.stem for p in directory.glob("*.json")) if directory.exists() else []
+
+    def scan(self, workspace, write=True):
+        """
+        (path -> manifest key, bytes read, path -> permission bits) for the
+        working tree, reusing unchanged entries.
+        """
+        root = Path(workspace)
+        index_path = self.index_path(workspace_key(root))
+        index = {}
+        if index_path.exists():
+            with open(index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+        files, modes, fresh, read = {}, {}, {}, 0
+        for rel in workspace_files(root):
+            st = (root / rel).stat()
+            modes[rel] = stat.S_IMODE(st.st_mode)
+            cached = index.get(rel)
+            if cached and cached[:2] == [st.st_size, st.st_mtime_ns] and (
+                    not write or self.path(cached[2]).exists()):
+                files[rel] = cached[2]
+            else:
+                data = (root / rel).read_bytes()
+                read += len(data)
+                files[rel] = self.put_file(data, rel, write)
+            fresh[rel] = [st.st_size, st.st_mtime_ns, files[rel], modes[rel]]
+        if write:
+            atomic_write_json(index_path, fresh, durable=False, indent=None)
+        return files, read, modes
+
+    def snapshot(self, workspace, label=None):
+        name = self.adopt_legacy(workspace)
+        history = self.snapshots(name)
+        if label and any(s["label"] == label for s in history):
+            raise ValueError(f"Snapshot label already used: {label}")
+        with spans.span("artifacts.snapshot") as trace:
+            files, read, modes = self.scan(workspace)
+            last = self.get_json(history[-1]["id"]) if history and not label else None
+            if last and files == last["files"] and modes == last.get("modes"):
+                trace.add(items=len(files), bytes_in=read)
+                return history[-1]
+            size = sum(self.get_json(key)["size"] for key in set(files.values()))
+            path = Path(workspace).resolve()
+            record = {"workspace": path.name, "path": str(path), "label": label,
+                      "created": utc_now(), "parent": history[-1]["id"] if history else None,
+                      "files": files, "modes": modes}
+            key = self.put_json(record)
+            trace.add(items=len(files), bytes_in=read, bytes_out=self.bytes_written,
+                      cache_hits=self.reused, cache_misses=self.written)
+        entry = {"id": key, "label": label, "created": record["created"],
+                 "files": len(files), "bytes": size}
+        history.append(entry)
+        atomic_write_json(self.refs_path(name), history)
+        return entry
+
+    def resolve(self, name, ref):
+        """Snapshot entry for a label, id prefix, 'latest' or '~N' (N back)."""
+        history = self.snapshots(name)
+        if not history:
+            raise ValueError(f"No snapshots for {name}")
+        if ref in (None, "latest"):
+            return history[-1]
+        if ref.startswith("~") and ref[1:].isdigit():
+            back = int(ref[1:])
+            if back >= len(history):
+                raise ValueError(f"Only {len(history)} snapshots for {name}")
+            return history[-1 - back]
+        matches = [s for s in history if s["label"] == ref] or \
+                  [s for s in history if s["id"].startswith(ref)]
+        if len(matches) != 1:
+            raise ValueError(f"{'Ambiguous' if matches else 'Unknown'} snapshot: {ref}")
+        return matches[0]
+
+    def tree(self, workspace, ref):
+        """path -> manifest key of a snapshot, or of the working tree for 'working'."""
+        if ref == "working":
+            return self.scan(workspace, write=False)[0]
+        entry = self.resolve(self.adopt_legacy(workspace), ref)
+        return self.get_json(entry["id"])["files"]
+
+    def diff(self, workspace, old="latest", new="working"):
+        """Sorted (status, path) pairs with status A/D/M between two trees."""
+        before, after = self.tree(workspace, old), self.tree(workspace, new)
+        changes = []
+        for rel in sorted(set(before) | set(after)):
+            if rel not in after:
+                changes.append(("D", rel))
+            elif rel not in before:
+                changes.append(("A", rel))
+            elif before[rel] != after[rel]:
+                changes.append(("M", rel))
+        return changes, before, after
+
+    def content(self, workspace, key, rel, tree_ref):
+        if tree_ref == "working":
+            return (Path(workspace) / rel).read_bytes()
+        return self.get_file(key)
+
+    def restore(self, workspace, ref, target=None, paths=None):
+        """
+        Write a snapshot's files under `target` (default: the workspace) with
+        their recorded permission bits; snapshots taken before modes were
+        recorded keep the mode of the file they replace.
+        """
+        if ref == "working":
+            files, _, modes = self.scan(workspace, write=False)
+        else:
+            record = self.get_json(self.resolve(self.adopt_legacy(workspace), ref)["id"])
+            files, modes = record["files"], record.get("modes", {})
+        target = Path(target or workspace)
+        selected = [rel for rel in files
+                    if not paths or any(rel == p or rel.startswith(p.rstrip("/") + "/")
+                                        for p in paths)]
+        for rel in selected:
+            path = target / rel
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+            with os.fdopen(fd, 'wb') as f:
+                mode = modes.get(rel)
+                os.fchmod(f.fileno(), file_mode(path) if mode is None else mode)
+                f.write(self.get_file(files[rel]))
+            os.replace(tmp, path)
+        return len(selected)
+
+    def prune(self, name, keep):
+        """Drop all but the newest `keep` snapshots of a workspace."""
+        history = self.snapshots(name)
+        if keep is None or len(history) <= keep:
+            return 0
+        dropped = len(history) - keep
+        atomic_write_json(self.refs_path(name), history[dropped:])
+        return dropped
+
+    def gc(self):
+        """Delete every object not reachable from a snapshot; returns counts."""
+        live = set()
+        for name in self.workspaces():
+            for entry in self.snapshots(name):
+                live.add(entry["id"])
+                for key in self.get_json(entry["id"])["files"].values():
+                    if key not in live:
+                        live.add(key)
+                        live.update(self.references(self.get_json(key)))
+        removed = freed = kept = 0
+        if self.objects.exists():
+            for directory in self.objects.iterdir():
+                for path in directory.iterdir():
+                    key = directory.name + path.name
+                    if key in live:
+                        kept += 1
+                        continue
+                    freed += path.stat().st_size
+                    path.unlink()
+                    removed += 1
+        return {"kept": kept, "removed": removed, "freed_bytes": freed}
+
+    def stats(self):
+        objects = stored = 0
+        if self.objects.exists():
+            for directory in self.objects.iterdir():
+                for path in directory.iterdir():
+                    objects += 1
+                    stored += path.stat().st_size
+        logical = snapshots = 0
+        for name in self.workspaces():
+            for entry in self.snapshots(name):
+                snapshots += 1
+                logical += entry["bytes"]
+        return {"workspaces": len(self.workspaces()), "snapshots": snapshots,
+                "objects": objects, "logical_bytes": logical, "stored_bytes": stored,
+                "dedup_ratio": round(logical / stored, 1) if stored else 0.0}
+
+
+def patch(old, new, rel, width=3):
+    """Unified diff of two text file contents (empty for binary files)."""
+    if Path(rel).suffix.lower() not in TEXT_SUFFIXES:
+        return ""
+    a = old.decode('utf-8', errors='replace').splitlines(keepends=True)
+    b = new.decode('utf-8', errors='replace').splitlines(keepends=True)
+    return "".join(difflib.unified_diff(a, b, f"a/{rel}", f"b/{rel}", n=width))
+
+
+def synthetic_workspace(root, seed):
+    """Draft versions, a backup copy and five literature stages, like a real run."""
+    import random
+
+    rng = random.Random(seed)
+    words = ["tumor", "cells", "expression", "survival", "cohort", "immune", "signature",
+             "patients", "risk", "model", "clusters", "analysis", "pathway", "response"]
+
+    def sentence():
+        return " ".join(rng.choice(words) for _ in range(rng.randint(12, 24))).capitalize() + "."
+
+    def paragraph():
+        return " ".join(sentence() for _ in range(rng.randint(3, 6)))
+
+    root = Path(root)
+    (root / "drafts").mkdir(parents=True)
+    (root / "backups").mkdir()
+    (root / "literature").mkdir()
+    for section in ("01_results", "02_methods", "03_introduction", "04_discussion"):
+        paragraphs = [paragraph() for _ in range(12)]
+        for version in ("draft_v1", "v2_with_citations", "final"):
+            text = f"# {section}\n\n" + "\n\n".join(paragraphs) + "\n"
+            (root / "drafts" / f"{section}_{version}.md").write_text(text, encoding='utf-8')
+            paragraphs[rng.randrange(len(paragraphs))] = paragraph()
+        shutil.copy(root / "drafts" / f"{section}_final.md", root / "backups")
+    for point in range(1, 6):
+        papers = [{"title": sentence(), "doi": f"10.1000/{seed}.{point}.{i}",
+                   "authors": [f"Author {rng.randint(1, 999)}" for _ in range(8)],
+                   "abstract": paragraph(), "year": rng.randint(2010, 2024)}
+                  for i in range(20)]
+        for stage in ("pubmed", "openalex", "merged", "validated", "final"):
+            if stage == "validated":
+                papers = [dict(p, validated=True) for p in papers]
+            elif stage == "final":
+                papers = [dict(p, score=round(rng.random(), 3)) for p in papers]
+            data = {"citation_point": point, "stage": stage, "papers": papers}
+            (root / "literature" / f"citation{point}_{stage}.json").write_text(
+                json.dumps(data, indent=2, ensure_ascii=False), encoding='utf-8')
+
+
+def benchmark(manuscripts=20):
+    """Store growth over many workspaces and the cost of repeat snapshots."""
+    results = {"manuscripts": manuscripts}
+    with tempfile.TemporaryDirectory() as directory:
+        directory = Path(directory)
+        store = ArtifactStore(directory / "store")
+        workspaces = []
+        for i in range(manuscripts):
+            workspace = directory / f"manuscript_{i:04d}"
+            synthetic_workspace(workspace, i)
+            workspaces.append(workspace)
+        logical = sum(p.stat().st_size for w in workspaces for p in w.rglob("*") if p.is_file())
+        start = time.perf_counter()
+        for workspace in workspaces:
+            store.snapshot(workspace, "initial")
+        results["first_snapshot_ms"] = round((time.perf_counter() - start) * 1000 / manuscripts, 2)
+        start = time.perf_counter()
+        for workspace in workspaces:
+            store.snapshot(workspace)
+        results["unchanged_snapshot_ms"] = round(
+            (time.perf_counter() - start) * 1000 / manuscripts, 2)
+        for workspace in workspaces:
+            path = workspace / "drafts" / "01_results_final.md"
+            path.write_text(path.read_text(encoding='utf-8') + "\nOne more paragraph.\n",
+                            encoding='utf-8')
+        start = time.perf_counter()
+        for workspace in workspaces:
+            store.snapshot(workspace, "edited")
+        results["edited_snapshot_ms"] = round(
+            (time.perf_counter() - start) * 1000 / manuscripts, 2)
+        stats = store.stats()
+        results["workspace_bytes"] = logical
+        results["stored_bytes"] = stats["stored_bytes"]
+        results["objects"] = stats["objects"]
+        results["copy_ratio"] = round(logical / stats["stored_bytes"], 1)
+        start = time.perf_counter()
+        restored = store.restore(workspaces[0], "initial", directory / "restored")
+        results["restore_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        results["restored_files"] = restored
+        start = time.perf_counter()
+        for workspace in workspaces:
+            store.prune(workspace_key(workspace), 1)
+        results["gc_removed"] = store.gc()["removed"]
+        results["gc_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="manuscript_agent artifacts",
+                                     description=__doc__.strip().splitlines()[0])
+    parser.add_argument("action", nargs="?",
+                        choices=["snapshot", "log", "diff", "restore", "gc", "stats"])
+    parser.add_argument("workspace", nargs="?")
+    parser.add_argument("refs", nargs="*",
+                        help="snapshots: label, id prefix, latest, ~N or working (diff)")
+    parser.add_argument("--label", help="name for the new snapshot")
+    parser.add_argument("--patch", action="store_true", help="show text diffs (diff)")
+    parser.add_argument("--to", help="restore into this directory instead of the workspace")
+    parser.add_argument("--path", action="append", dest="paths",
+                        help="restrict restore to a file or directory (repeatable)")
+    parser.add_argument("--keep", type=int, help="gc: keep only the newest KEEP snapshots")
+    parser.add_argument("--store", default=str(default_path()),
+                        help="artifact store (default: %(default)s)")
+    parser.add_argument("--bench", type=int, metavar="MANUSCRIPTS",
+                        help="benchmark snapshots of MANUSCRIPTS synthetic workspaces")
+    args = parser.parse_args(argv)
+
+    if args.bench:
+        for name, value in benchmark(args.bench).items():
+            print(f"{name:>22}: {value}")
+        return 0
+    if not args.action:
+        parser.error("action is required unless --bench is given")
+    if args.action not in ("gc", "stats") and not args.workspace:
+        parser.error(f"{args.action} needs a workspace")
+
+    store = ArtifactStore(args.store)
+    try:
+        if args.action == "snapshot":
+            start = time.perf_counter()
+            entry = store.snapshot(args.workspace, args.label)
+            print(f"✓ Snapshot {entry['id'][:12]} ({entry['files']} files, {entry['bytes']} bytes; "
+                  f"{store.written} new objects, {store.bytes_written} bytes stored) "
+                  f"in {time.perf_counter() - start:.3f}s")
+        elif args.action == "log":
+            for entry in reversed(store.snapshots(store.adopt_legacy(args.workspace))):
+                print(f"{entry['id'][:12]}  {entry['created']}  {entry['files']:>4} files  "
+                      f"{entry['bytes']:>10} bytes  {entry['label'] or ''}")
+        elif args.action == "diff":
+            old, new = (args.refs + ["latest", "working"][len(args.refs):])[:2]
+            changes, before, after = store.diff(args.workspace, old, new)
+            for status, rel in changes:
+                print(f"{status} {rel}")
+                if args.patch and status == "M":
+                    print(patch(store.content(args.workspace, before[rel], rel, old),
+                                store.content(args.workspace, after[rel], rel, new), rel), end="")
+            if not changes:
+                print("✓ No changes")
+        elif args.action == "restore":
+            if len(args.refs) != 1:
+                parser.error("restore takes one snapshot")
+            count = store.restore(args.workspace, args.refs[0], args.to, args.paths)
+            print(f"✓ Restored {count} files to {args.to or args.workspace}")
+        elif args.action == "gc":
+            names = [store.adopt_legacy(args.workspace)] if args.workspace else store.workspaces()
+            dropped = sum(store.prune(name, args.keep) for name in names)
+            result = store.gc()
+            print(f"✓ Dropped {dropped} snapshots, removed {result['removed']} objects "
+                  f"({result['freed_bytes']} bytes), kept {result['kept']}")
+        else:
+            for name, value in store.stats().items():
+                print(f"{name:>14}: {value}")
+    except ValueError as e:
+        print(f"✗ {e}")
+        return 1
+    return 0
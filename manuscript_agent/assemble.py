@@ -0,0 +1,628 @@
+"""
+Manuscript Assembly
+Streams the title/abstract, the section finals (Introduction, Results,
+Discussion, Methods), the reference list, figure_captions.md and images/
+into a submission bundle: manuscript.md plus submission/manuscript.docx and
+submission/figures/FigureN.png. The DOCX is written with the standard
+library (WordprocessingML in a zip) and embeds a pyramid level of each
+figure rather than the full-resolution original.
+
+Each section is rendered once per content hash (Markdown fragment, DOCX XML
+fragment, word count, figures cited) and cached under cache/assembly/, so a
+re-export after an edit re-renders only the edited section and re-streams
+the rest. Journal limits from state.json's journal_template (abstract word
+limit, recommended main-text length, maximum figures) are checked as each
+section is added.
+
+    python -m manuscript_agent assemble manuscript_11072333
+    python -m manuscript_agent assemble manuscript_11072333 --no-docx --strict
+    python -m manuscript_agent assemble --bench 20
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+import zipfile
+from contextlib import contextmanager
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+from manuscript_agent.checkpoint import atomic_write_json, file_mode
+from manuscript_agent.citations import BIBLIOGRAPHY, MANUSCRIPT_ORDER, MARKER
+from manuscript_agent.quality import FIGURE, WORD, body_text, section_kind
+
+ABSTRACT = "drafts/05_abstract_final.md"
+CAPTIONS = "figure_captions.md"
+MANUSCRIPT = "manuscript.md"
+SUBMISSION_DIR = "submission"
+DOCX_NAME = "manuscript.docx"
+CACHE_FILE = Path("cache") / "assembly" / "sections.json"
+# Bump when rendering changes so cached fragments are re-rendered
+RENDER_VERSION = 1
+# Sections counted against main_text_recommended (Methods, legends and references are not)
+MAIN_TEXT = ("introduction", "results", "discussion")
+# Longest side of the pyramid level embedded in the DOCX
+DOCX_IMAGE_SIDE = 1600
+EMU_PER_INCH = 914400
+MAX_IMAGE_SIZE = (6.5, 8.0)  # inches, width x height
+
+LEGEND = re.compile(r"^#{1,3} Figure (\d+)\.?\s*(.*?)\s*$", re.M)
+LIST_ITEM = re.compile(r"^(?:[-*]|\d+\.)\s+")
+INLINE = re.compile(r"\*\*(.+?)\*\*|\*(.+?)\*|<(sup|sub)>(.*?)</\3>", re.S)
+TAG = re.compile(r"</?\w+>")
+WORD_RANGE = re.compile(r"(\d[\d,]*)(?:\s*[-–]\s*(\d[\d,]*))?")
+
+NAMESPACES = (
+    'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships" '
+    'xmlns:wp="http://schemas.openxmlformats.org/drawingml/2006/wordprocessingDrawing" '
+    'xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main" '
+    'xmlns:pic="http://schemas.openxmlformats.org/drawingml/2006/picture"'
+)
+RELATIONSHIPS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+PACKAGE_RELATIONSHIPS = "http://schemas.openxmlformats.org/package/2006/relationships"
+CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" '
+    'ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Default Extension="png" ContentType="image/png"/>'
+    '<Override PartName="/word/document.xml" ContentType="application/'
+    'vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+    '<Override PartName="/word/styles.xml" ContentType="application/'
+    'vnd.openxmlformats-officedocument.wordprocessingml.styles+xml"/>'
+    '</Types>'
+)
+ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    f'<Relationships xmlns="{PACKAGE_RELATIONSHIPS}">'
+    f'<Relationship Id="rId1" Type="{RELATIONSHIPS}/officeDocument" Target="word/document.xml"/>'
+    '</Relationships>'
+)
+# (style id, name, size in half-points, bold, space before in twentieths of a point)
+STYLES = [("Title", "Title", 36, True, 0), ("Heading1", "heading 1", 32, True, 360),
+          ("Heading2", "heading 2", 26, True, 240), ("Heading3", "heading 3", 24, True, 200),
+          ("ListParagraph", "List Paragraph", 24, False, 0)]
+
+
+def styles_xml():
+    parts = ['<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n',
+             f'<w:styles {NAMESPACES}>',
+             '<w:docDefaults><w:rPrDefault><w:rPr><w:rFonts w:ascii="Times New Roman" '
+             'w:hAnsi="Times New Roman" w:cs="Times New Roman"/><w:sz w:val="24"/></w:rPr>'
+             '</w:rPrDefault><w:pPrDefault><w:pPr><w:spacing w:after="120" w:line="360" '
+             'w:lineRule="auto"/><w:jc w:val="both"/></w:pPr></w:pPrDefault></w:docDefaults>',
+             '<w:style w:type="paragraph" w:default="1" w:styleId="Normal">'
+             '<w:name w:val="Normal"/><w:qFormat/></w:style>']
+    for style, name, size, bold, before in STYLES:
+        indent = '<w:ind w:left="360"/>' if style == "ListParagraph" else '<w:keepNext/>'
+        parts.append(f'<w:style w:type="paragraph" w:styleId="{style}"><w:name w:val="{name}"/>'
+                     f'<w:basedOn w:val="Normal"/><w:next w:val="Normal"/><w:qFormat/>'
+                     f'<w:pPr>{indent}<w:spacing w:before="{before}"/><w:jc w:val="left"/></w:pPr>'
+                     f'<w:rPr>{"<w:b/>" if bold else ""}<w:sz w:val="{size}"/></w:rPr></w:style>')
+    parts.append('</w:styles>')
+    return "".join(parts)
+
+
+# Rendering
+
+def runs(text, properties=()):
+    """WordprocessingML runs for Markdown inline text (**bold**, *italic*, <sup>, <sub>)."""
+    out, position = [], 0
+    for match in INLINE.finditer(text):
+        out.append(run(text[position:match.start()], properties))
+        bold, italic, tag, inner = match.groups()
+        if bold is not None:
+            out.append(runs(bold, properties + ("<w:b/>",)))
+        elif italic is not None:
+            out.append(runs(italic, properties + ("<w:i/>",)))
+        else:
+            align = "superscript" if tag == "sup" else "subscript"
+            out.append(runs(inner, properties + (f'<w:vertAlign w:val="{align}"/>',)))
+        position = match.end()
+    out.append(run(text[position:], properties))
+    return "".join(out)
+
+
+def run(text, properties):
+    if not text:
+        return ""
+    text = escape(TAG.sub("", text))
+    style = f"<w:rPr>{''.join(properties)}</w:rPr>" if properties else ""
+    return f'<w:r>{style}<w:t xml:space="preserve">{text}</w:t></w:r>'
+
+
+def paragraph_xml(text, style=None):
+    style = f'<w:pPr><w:pStyle w:val="{style}"/></w:pPr>' if style else ""
+    return f"<w:p>{style}{runs(text)}</w:p>"
+
+
+def blocks(text):
+    """[(style, text)] for the blocks of a Markdown fragment; list items become one block each."""
+    out = []
+    for block in re.split(r"\n\s*\n", text):
+        block = block.strip()
+        if not block or block == "---":
+            continue
+        heading = re.match(r"(#{1,6})\s+(.*)", block)
+        if heading:
+            level = min(len(heading.group(1)), 3)
+            out.append((f"Heading{level}", " ".join(heading.group(2).split())))
+            out.extend(blocks(block[heading.end():]))
+        elif LIST_ITEM.match(block):
+            items = re.split(r"\n(?=(?:[-*]|\d+\.)\s)", block)
+            for item in items:
+                item = " ".join(item.split())
+                bullet = item[0] in "-*"
+                out.append(("ListParagraph" if bullet else None,
+                            "• " + item[2:] if bullet else item))
+        else:
+            out.append((None, " ".join(block.split())))
+    return out
+
+
+def word_count(text):
+    return len(WORD.findall(TAG.sub(" ", MARKER.sub(" ", text))))
+
+
+def render(kind, text):
+    """Cacheable fragment of one section: markdown, docx xml, words and figures cited."""
+    # Drafts carry their own reference lists and metadata; the bibliography and legends don't
+    parts = blocks(text if kind in ("references", "legends") else body_text(text))
+    if kind == "abstract":
+        # The abstract draft opens with the manuscript title
+        parts = [("Title" if style == "Heading1" else style, t) for style, t in parts]
+    markdown, xml, words, figures = [], [], 0, set()
+    for style, block in parts:
+        if style and style != "ListParagraph":
+            level = 1 if style == "Title" else int(style[-1])
+            markdown.append(f"{'#' * level} {block}")
+        else:
+            markdown.append(block.replace("• ", "- ", 1) if style else block)
+            words += word_count(block)
+            figures.update(int(n) for n in FIGURE.findall(block))
+        xml.append(paragraph_xml(block, style))
+    return {"markdown": "\n\n".join(markdown), "xml": "".join(xml), "words": words,
+            "figures": sorted(figures)}
+
+
+def legends_text(text):
+    """'# Figure Legends' Markdown from figure_captions.md ("## Figure N. Title" + caption)."""
+    headings = list(LEGEND.finditer(text))
+    lines = ["# Figure Legends"]
+    for i, match in enumerate(headings):
+        end = headings[i + 1].start() if i + 1 < len(headings) else len(text)
+        caption = text[match.end():end]
+        rule = re.search(r"^---\s*$", caption, re.M)
+        caption = caption[:rule.start()] if rule else caption
+        title = match.group(2).rstrip()
+        title = title if title.endswith((".", "?", "!")) or not title else f"{title}."
+        paragraphs = [p.strip() for p in re.split(r"\n\s*\n", caption) if p.strip()]
+        first = paragraphs.pop(0) if paragraphs else ""
+        lines.append(f"**Figure {match.group(1)}. {title}** {first}".rstrip())
+        lines.extend(paragraphs)
+    return "\n\n".join(lines) + "\n"
+
+
+def section_key(kind, text):
+    return hashlib.sha1(f"{RENDER_VERSION}\0{kind}\0{text}".encode("utf-8")).hexdigest()
+
+
+# Limits
+
+def word_range(value):
+    """(low, high) from '5000-8000 words' or 8000; None where unbounded."""
+    if isinstance(value, (int, float)):
+        return None, int(value)
+    match = WORD_RANGE.search(str(value or ""))
+    if not match:
+        return None, None
+    low = int(match.group(1).replace(",", ""))
+    if match.group(2) is None:
+        return None, low
+    return low, int(match.group(2).replace(",", ""))
+
+
+class Limits:
+    """journal_template limits, checked as each section is added to the manuscript."""
+
+    def __init__(self, template):
+        self.abstract = template.get("abstract_word_limit")
+        self.main_range = word_range(template.get("main_text_recommended"))
+        self.max_figures = template.get("max_figures")
+        self.words = {}
+        self.main_words = 0
+        self.cited = set()
+        self.legends = set()
+        self.issues = []
+
+    def add(self, kind, fragment):
+        """Record a section; returns the issues it raised."""
+        issues = []
+        words = fragment["words"]
+        self.words[kind] = words
+        if kind == "legends":
+            self.legends.update(fragment["figures"])
+        else:
+            self.cited.update(fragment["figures"])
+        if kind == "abstract" and self.abstract and words > self.abstract:
+            issues.append(f"abstract has {words} words (limit {self.abstract})")
+        high = self.main_range[1]
+        if kind in MAIN_TEXT:
+            before, self.main_words = self.main_words, self.main_words + words
+            if high and before <= high < self.main_words:
+                issues.append(f"main text passes {high} words in the {kind} "
+                              f"({self.main_words} so far)")
+        self.issues.extend(issues)
+        return issues
+
+    def finish(self, images):
+        """Checks that need every section: minimum length and the figure set."""
+        issues = []
+        low = self.main_range[0]
+        if low and all(k in self.words for k in MAIN_TEXT) and self.main_words < low:
+            issues.append(f"main text has {self.main_words} words (recommended {low}+)")
+        figures = self.legends | set(images) | self.cited
+        if self.max_figures and len(figures) > self.max_figures:
+            issues.append(f"{len(figures)} figures (limit {self.max_figures})")
+        for number in sorted(self.cited - self.legends):
+            issues.append(f"Figure {number} is cited but has no legend")
+        for number in sorted(set(images) - self.legends):
+            issues.append(f"Figure {number} has an image but no legend")
+        for number in sorted(self.legends - set(images)):
+            issues.append(f"Figure {number} has a legend but no image")
+        self.issues.extend(issues)
+        return issues
+
+
+# Export
+
+def load_cache(workspace):
+    path = Path(workspace) / CACHE_FILE
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {"sections": {}, "images": {}}
+    cache.setdefault("sections", {})
+    cache.setdefault("images", {})
+    return cache
+
+
+def sources(workspace):
+    """[(kind, name, text or None)] in manuscript order; text None for a missing file."""
+    from manuscript_agent.citations import Manuscript
+
+    workspace = Path(workspace)
+    out = []
+    for kind, name in [("abstract", ABSTRACT)] + [(section_kind(p), p) for p in MANUSCRIPT_ORDER]:
+        path = workspace / name
+        out.append((kind, name, path.read_text(encoding='utf-8') if path.exists() else None))
+    bibliography = workspace / BIBLIOGRAPHY
+    if bibliography.exists():
+        text, name = bibliography.read_text(encoding='utf-8'), BIBLIOGRAPHY
+    elif any(text is not None for kind, _, text in out[1:]):
+        # No bibliography step yet: number from the drafts' own lists and references.json
+        text, name = Manuscript.load(workspace).bibliography(), "references.json"
+    else:
+        text, name = None, BIBLIOGRAPHY
+    out.append(("references", name, text))
+    captions = workspace / CAPTIONS
+    out.append(("legends", CAPTIONS,
+                legends_text(captions.read_text(encoding='utf-8')) if captions.exists() else None))
+    return out
+
+
+def image_digest(cache, path):
+    """SHA-256 of a figure, reused from the cache while size and mtime match."""
+    from manuscript_agent.figures import file_digest
+
+    st = path.stat()
+    entry = cache["images"].get(path.name)
+    if entry and entry[0] == st.st_size and entry[1] == st.st_mtime_ns:
+        return entry[2]
+    digest = file_digest(path)
+    cache["images"][path.name] = [st.st_size, st.st_mtime_ns, digest]
+    return digest
+
+
+def figure_images(workspace, cache, docx=True):
+    """[{number, path, level, width, height}] for images/, with the DOCX pyramid level."""
+    from manuscript_agent.figures import discover_figures, figure_number, png_info
+    from manuscript_agent.pyramid import Pyramid
+
+    workspace = Path(workspace)
+    pyramid = Pyramid.for_workspace(workspace)
+    images = []
+    for path in discover_figures(workspace / "images"):
+        image = {"number": figure_number(path), "path": path, "level": path}
+        if docx:
+            image["level"], _ = pyramid.request(path, image_digest(cache, path), DOCX_IMAGE_SIDE)
+            info = png_info(image["level"])
+            image["width"], image["height"] = info["width"], info["height"]
+        images.append(image)
+    return images
+
+
+def copy_figures(workspace, images):
+    """Copy figures into submission/figures/ when changed; returns the number copied."""
+    directory = Path(workspace) / SUBMISSION_DIR / "figures"
+    directory.mkdir(parents=True, exist_ok=True)
+    wanted, copied = set(), 0
+    for image in images:
+        target = directory / f"Figure{image['number']}.png"
+        wanted.add(target.name)
+        source = image["path"].stat()
+        try:
+            current = target.stat()
+            if (current.st_size, current.st_mtime_ns) == (source.st_size, source.st_mtime_ns):
+                continue
+        except OSError:
+            pass
+        shutil.copy2(image["path"], target)
+        copied += 1
+    for stale in directory.glob("Figure*.png"):
+        if stale.name not in wanted:
+            stale.unlink()
+    return copied
+
+
+def drawing_xml(image, rid, label=True):
+    """
+    Inline picture paragraph sized to fit MAX_IMAGE_SIZE at the image's
+    aspect ratio, followed by a bold "Figure N" label unless `label` is False.
+    """
+    width, height = image["width"], image["height"]
+    scale = min(MAX_IMAGE_SIZE[0] / width, MAX_IMAGE_SIZE[1] / height)
+    cx, cy = int(width * scale * EMU_PER_INCH), int(height * scale * EMU_PER_INCH)
+    number = image["number"]
+    caption = paragraph_xml(f"**Figure {number}**") if label else ""
+    return (f'<w:p><w:pPr><w:keepNext/><w:jc w:val="center"/></w:pPr><w:r><w:drawing>'
+            f'<wp:inline distT="0" distB="0" distL="0" distR="0"><wp:extent cx="{cx}" cy="{cy}"/>'
+            f'<wp:docPr id="{number}" name="Figure {number}"/><a:graphic>'
+            f'<a:graphicData uri="http://schemas.openxmlformats.org/drawingml/2006/picture">'
+            f'<pic:pic><pic:nvPicPr><pic:cNvPr id="{number}" name="Figure{number}.png"/>'
+            f'<pic:cNvPicPr/></pic:nvPicPr><pic:blipFill><a:blip r:embed="{rid}"/><a:stretch>'
+            f'<a:fillRect/></a:stretch></pic:blipFill><pic:spPr><a:xfrm><a:off x="0" y="0"/>'
+            f'<a:ext cx="{cx}" cy="{cy}"/></a:xfrm><a:prstGeom prst="rect"><a:avLst/>'
+            f'</a:prstGeom></pic:spPr></pic:pic></a:graphicData></a:graphic></wp:inline>'
+            f'</w:drawing></w:r></w:p>' + caption)
+
+
+@contextmanager
+def replacing(path, mode='w'):
+    """File object for a temporary next to `path`, renamed over it when the block succeeds."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode, **({} if 'b' in mode else {"encoding": "utf-8"})) as f:
+            os.fchmod(f.fileno(), file_mode(path))
+            yield f
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+@contextmanager
+def docx_writer(path, images):
+    """Yield a writer for document.xml body fragments; packages and media are written around it."""
+    with replacing(path, 'wb') as raw, zipfile.ZipFile(raw, 'w', zipfile.ZIP_DEFLATED) as package:
+        package.writestr("[Content_Types].xml", CONTENT_TYPES)
+        package.writestr("_rels/.rels", ROOT_RELS)
+        package.writestr("word/styles.xml", styles_xml())
+        rels = [f'<Relationship Id="rId1" Type="{RELATIONSHIPS}/styles" Target="styles.xml"/>']
+        for i, image in enumerate(images, 2):
+            image["rid"] = f"rId{i}"
+            rels.append(f'<Relationship Id="rId{i}" Type="{RELATIONSHIPS}/image" '
+                        f'Target="media/figure{image["number"]}.png"/>')
+            # PNG data is already deflated
+            package.write(image["level"], f"word/media/figure{image['number']}.png",
+                          compress_type=zipfile.ZIP_STORED)
+        package.writestr("word/_rels/document.xml.rels",
+                         '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                         f'<Relationships xmlns="{PACKAGE_RELATIONSHIPS}">{"".join(rels)}'
+                         '</Relationships>')
+        with package.open("word/document.xml", 'w') as document:
+            def write(xml):
+                document.write(xml.encode("utf-8"))
+            write('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                  f'<w:document {NAMESPACES}><w:body>')
+            yield write
+            write('<w:sectPr><w:pgSz w:w="12240" w:h="15840"/><w:pgMar w:top="1440" '
+                  'w:right="1440" w:bottom="1440" w:left="1440" w:header="720" w:footer="720" '
+                  'w:gutter="0"/></w:sectPr></w:body></w:document>')
+
+
+def assemble(workspace, docx=True, template=None, report=None):
+    """
+    Export manuscript.md (and the DOCX bundle), rendering only sections whose
+    content changed. `report(kind, name, fragment, cached, issues)` is called
+    as each section is added. Returns stats including the limit issues.
+    """
+    workspace = Path(workspace)
+    start = time.perf_counter()
+    if template is None:
+        with open(workspace / "state.json", 'r', encoding='utf-8') as f:
+            template = json.load(f).get("journal_template", {})
+    limits = Limits(template)
+    cache = load_cache(workspace)
+    known = dict(cache["images"])
+    images = figure_images(workspace, cache, docx)
+    cache["images"] = {image["path"].name: cache["images"][image["path"].name]
+                       for image in images if image["path"].name in cache["images"]}
+    stats = {"sections": 0, "rendered": 0, "cached": 0, "missing": []}
+    used = {}
+
+    def export(write_xml):
+        with replacing(workspace / MANUSCRIPT) as markdown:
+            first = True
+            for kind, name, text in sources(workspace):
+                if text is None:
+                    stats["missing"].append(name)
+                    if report:
+                        report(kind, name, None, False, [])
+                    continue
+                key = section_key(kind, text)
+                fragment = cache["sections"].get(key)
+                cached = fragment is not None
+                if not cached:
+                    fragment = render(kind, text)
+                used[key] = fragment
+                stats["sections"] += 1
+                stats["cached" if cached else "rendered"] += 1
+                issues = limits.add(kind, fragment)
+                if report:
+                    report(kind, name, fragment, cached, issues)
+                markdown.write(("" if first else "\n\n") + fragment["markdown"])
+                first = False
+                if write_xml:
+                    write_xml(fragment["xml"])
+            if images:
+                markdown.write("\n\n# Figures\n")
+                if write_xml:
+                    write_xml(paragraph_xml("Figures", "Heading1"))
+                for image in images:
+                    markdown.write(f"\n![Figure {image['number']}](submission/figures/"
+                                   f"Figure{image['number']}.png)\n")
+                    if write_xml:
+                        write_xml(drawing_xml(image, image["rid"]))
+            markdown.write("\n")
+
+    if docx:
+        with docx_writer(workspace / SUBMISSION_DIR / DOCX_NAME, images) as write_xml:
+            export(write_xml)
+        stats["copied_figures"] = copy_figures(workspace, images)
+    else:
+        export(None)
+    limits.finish([image["number"] for image in images])
+    if stats["rendered"] or len(used) != len(cache["sections"]) or known != cache["images"]:
+        # Keep only fragments of the current sections so the cache doesn't grow unbounded
+        cache["sections"] = used
+        atomic_write_json(workspace / CACHE_FILE, cache, durable=False, indent=None)
+    stats.update({"figures": len(images), "words": dict(limits.words),
+                  "main_text_words": limits.main_words, "issues": limits.issues,
+                  "seconds": round(time.perf_counter() - start, 3)})
+    return stats
+
+
+def synthetic_workspace(directory, paragraphs=20, figures=3, seed=0):
+    """Workspace with every section of `paragraphs` paragraphs, captions and figures."""
+    import random
+
+    from manuscript_agent import panels
+
+    rng = random.Random(seed)
+    directory = Path(directory)
+    vocabulary = ("tumor immune cells expression revealed signature survival cohort risk model "
+                  "analysis gene pathway infiltration response *KRT8* **Figure**").split()
+
+    def paragraph(i):
+        words = " ".join(rng.choice(vocabulary) for _ in range(110))
+        return f"{words} (Figure {i % figures + 1}A)<sup>{i % 40 + 1}</sup>."
+
+    (directory / "drafts").mkdir(parents=True, exist_ok=True)
+    (directory / "images").mkdir(exist_ok=True)
+    names = [ABSTRACT] + MANUSCRIPT_ORDER
+    for s, name in enumerate(names):
+        title = "# Synthetic manuscript\n\n## Abstract" if name == ABSTRACT \
+            else f"# {section_kind(name).title()}"
+        count = 1 if name == ABSTRACT else paragraphs
+        body = "\n\n".join((f"## Subsection {i // 4 + 1}\n\n" if i % 4 == 0 else "")
+                           + paragraph(s * paragraphs + i) for i in range(count))
+        (directory / name).write_text(f"{title}\n\n{body}\n\n---\n\n**Metadata:**\n- synthetic\n",
+                                      encoding='utf-8')
+    (directory / BIBLIOGRAPHY).write_text(
+        "# References\n\n" + "\n\n".join(f"{i}. Author A. Synthetic study {i}. J Synth. 2024."
+                                         for i in range(1, 41)) + "\n", encoding='utf-8')
+    captions = [f"## Figure {n}. Synthetic figure {n}.\n\n(A) {paragraph(n)}"
+                for n in range(1, figures + 1)]
+    (directory / CAPTIONS).write_text("# Figure Captions\n\n" + "\n\n".join(captions),
+                                      encoding='utf-8')
+    for n in range(1, figures + 1):
+        image, _ = panels.synthetic_figure(rows=2, cols=2, panel=(700, 560), seed=n)
+        (directory / "images" / f"image{n}.png").write_bytes(panels.encode_png(image))
+    with open(directory / "state.json", 'w', encoding='utf-8') as f:
+        json.dump({"journal_template": {"abstract_word_limit": 200,
+                                        "main_text_recommended": "5000-8000 words",
+                                        "max_figures": 8}}, f)
+    return directory
+
+
+def benchmark(paragraphs=20):
+    """Seconds for a cold export, an unchanged re-export and one after a one-paragraph edit."""
+    results = {"paragraphs_per_section": paragraphs}
+    with tempfile.TemporaryDirectory() as directory:
+        workspace = synthetic_workspace(directory, paragraphs)
+        timings = {}
+        for name in ("cold", "unchanged", "paragraph_edit", "markdown_only"):
+            if name == "paragraph_edit":
+                path = workspace / MANUSCRIPT_ORDER[1]
+                text = path.read_text(encoding='utf-8')
+                path.write_text(text.replace(" tumor ", " tumour ", 1), encoding='utf-8')
+            start = time.perf_counter()
+            stats = assemble(workspace, docx=name != "markdown_only")
+            timings[name] = (time.perf_counter() - start, stats)
+        results["words"] = sum(timings["cold"][1]["words"].values())
+        results["docx_kb"] = round((workspace / SUBMISSION_DIR / DOCX_NAME).stat().st_size / 1024)
+        for name, (seconds, stats) in timings.items():
+            results[f"{name}_s"] = round(seconds, 3)
+            results[f"{name}_rendered"] = stats["rendered"]
+    return results
+
+
+def print_section(kind, name, fragment, cached, issues):
+    if fragment is None:
+        print(f"  - {kind:<13} missing ({name})")
+        return
+    mark = "✗" if issues else "✓"
+    status = "cached" if cached else "rendered"
+    print(f"  {mark} {kind:<13} {fragment['words']:>6} words  {status:<8} {name}")
+    for issue in issues:
+        print(f"      - {issue}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="manuscript_agent assemble",
+                                     description=__doc__.strip().splitlines()[0])
+    parser.add_argument("workspace", nargs="?", help="manuscript workspace directory")
+    parser.add_argument("--no-docx", action="store_true",
+                        help="write manuscript.md only, without the DOCX and figure bundle")
+    parser.add_argument("--strict", action="store_true",
+                        help="exit non-zero when a journal limit is exceeded")
+    parser.add_argument("--bench", type=int, metavar="PARAGRAPHS",
+                        help="time exports of a synthetic manuscript with PARAGRAPHS per section")
+    args = parser.parse_args(argv)
+
+    if args.bench:
+        for name, value in benchmark(args.bench).items():
+            print(f"{name:>24}: {value}")
+        return 0
+    if not args.workspace:
+        parser.error("workspace is required")
+
+    workspace = Path(args.workspace)
+    reported = []
+
+    def report(kind, name, fragment, cached, issues):
+        print_section(kind, name, fragment, cached, issues)
+        reported.extend(issues)
+
+    stats = assemble(workspace, docx=not args.no_docx, report=report)
+    print(f"Main text: {stats['main_text_words']} words, {stats['figures']} figures")
+    written = [MANUSCRIPT] if args.no_docx else [MANUSCRIPT, f"{SUBMISSION_DIR}/{DOCX_NAME}"]
+    print(f"✓ Wrote {', '.join(written)} in {stats['seconds']} s "
+          f"({stats['rendered']} rendered, {stats['cached']} cached)")
+    for issue in stats["issues"][len(reported):]:
+        print(f"✗ {issue}")
+    return 1 if args.strict and stats["issues"] else 0
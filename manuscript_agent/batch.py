@@ -0,0 +1,252 @@
+"""
+Batch Runner
+Runs many manuscripts at once: every .docx report in a directory gets its
+own workspace (initialised like phase 0, with paths relative to nothing but
+the workspace itself), and all workspaces' pipelines are scheduled on one
+bounded step pool. Literature lookups go through process-wide rate limiters
+and the shared metadata cache, figure analysis through one process pool.
+Per-manuscript and aggregate throughput are printed and written to
+<root>/batch_report.json.
+
+    python -m manuscript_agent batch init reports/ --root runs/
+    python -m manuscript_agent batch run reports/ --root runs/ --workers 8 --cpu-workers 4
+    python -m manuscript_agent batch status runs/
+"""
+
+import argparse
+import os
+import re
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+from manuscript_agent import cache as metadata_cache
+from manuscript_agent.checkpoint import atomic_write_json, write_checkpoint
+from manuscript_agent.httpclient import SharedRateLimiter
+from manuscript_agent.pipeline import DONE, STEPS, Scheduler, Shared
+from manuscript_agent.search import OPENALEX_RATE, PUBMED_RATE, PUBMED_RATE_WITH_KEY
+
+REPORT_FILE = "batch_report.json"
+WORKSPACE_DIRS = ["drafts", "literature/pdfs", "literature/texts", "literature/reading_reports",
+                  "images", "checkpoints", "backups"]
+# Files a new workspace copies from the report directory when present
+# (<report stem>.<name>), e.g. hand-written citation points.
+COMPANIONS = ["citation_points_results.md", "figure_annotations.json"]
+JOURNAL_TEMPLATES = {
+    "nature-comms": {
+        "name": "Nature Communications",
+        "abbreviation": "Nat Commun",
+        "impact_factor": 16.6,
+        "abstract_word_limit": 200,
+        "main_text_recommended": "5000-8000 words",
+        "reference_style": "numbered",
+        "max_figures": 8,
+    },
+}
+
+
+def utc_now():
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def workspace_name(report):
+    """manuscript_<report stem>, lower-cased with runs of non-word characters as '_'."""
+    return "manuscript_" + re.sub(r"\W+", "_", Path(report).stem).strip("_").lower()
+
+
+def find_reports(directory):
+    return sorted(p for p in Path(directory).glob("*.docx") if not p.name.startswith("~$"))
+
+
+def init_workspace(report, root, journal="nature-comms"):
+    """Create the phase 0 layout for `report` under `root`; existing workspaces are kept."""
+    report = Path(report).resolve()
+    workspace = Path(root) / workspace_name(report)
+    if (workspace / "state.json").exists():
+        return workspace, False
+    for name in WORKSPACE_DIRS:
+        (workspace / name).mkdir(parents=True, exist_ok=True)
+    for name in COMPANIONS:
+        companion = report.with_name(f"{report.stem}.{name}")
+        if companion.exists():
+            shutil.copy(companion, workspace / name)
+
+    now = utc_now()
+    template = JOURNAL_TEMPLATES[journal]
+    phases = ["PHASE_0"] + list(dict.fromkeys(step.phase for step in STEPS))
+    state = {
+        "workflow_version": "1.0",
+        "initialized": now,
+        "current_phase": "PHASE_0",
+        "phase_status": "completed",
+        "configuration": {
+            "input_report": str(report),
+            "target_journal": journal,
+            "output_directory": str(workspace.resolve()),
+            "quality_threshold": 0.75,
+            "draft_mode": False,
+            "parse_images": True,
+        },
+        "journal_template": template,
+        "phase_completion": {phase: "completed" if phase == "PHASE_0" else "pending"
+                             for phase in phases},
+        "statistics": {"total_citations": 0, "verified_citations": 0,
+                       "extracted_images": 0, "generated_sections": 0},
+    }
+    atomic_write_json(workspace / "references.json", {
+        "citations": [],
+        "verification_stats": {"total": 0, "verified": 0, "failed": 0, "verification_rate": 0.0},
+        "metadata": {"created": now, "last_updated": now, "source_report": report.name}})
+    with open(workspace / "progress.log", 'w', encoding='utf-8') as f:
+        f.write("MANUSCRIPT GENERATION WORKFLOW - PROGRESS LOG\n"
+                "==============================================\n"
+                f"Initialized: {now}\nResearch Report: {report.name}\n"
+                f"Target Journal: {template['name']}\n\n")
+    write_checkpoint(workspace, "PHASE_0", "completed", initialization_summary={
+        "directories_created": WORKSPACE_DIRS,
+        "files_initialized": ["references.json", "progress.log", "state.json"],
+        "input_report_size_bytes": report.stat().st_size,
+        "journal_template_loaded": True,
+    }, next_phase="PHASE_0.5")
+    # state.json last: its presence marks the workspace as initialised
+    atomic_write_json(workspace / "state.json", state)
+    return workspace, True
+
+
+def workspaces(root):
+    return sorted(p.parent for p in Path(root).glob("manuscript_*/state.json"))
+
+
+def run_workspace(workspace, pool, shared, only):
+    """Drive one workspace's scheduler on the shared pool; returns its summary."""
+    start = time.perf_counter()
+    scheduler = Scheduler(workspace, pool=pool, shared=shared)
+    try:
+        results = scheduler.run(only)
+    except Exception as exc:
+        return {"workspace": workspace.name, "error": f"{type(exc).__name__}: {exc}",
+                "wall_seconds": round(time.perf_counter() - start, 3)}
+    outcomes = {}
+    for outcome, _ in results.values():
+        outcomes[outcome] = outcomes.get(outcome, 0) + 1
+    busy = sum(scheduler.runs[name].get("seconds") or 0
+               for name, (outcome, _) in results.items() if outcome == "ran")
+    # Automated steps of the run that did not complete (pending, blocked, stale);
+    # manual steps awaiting completion are expected and not counted
+    incomplete = sorted(name for name, (outcome, _) in results.items()
+                        if (not only or name in only) and scheduler.steps[name].action
+                        and outcome not in DONE and outcome != "failed")
+    return {"workspace": workspace.name, "outcomes": outcomes,
+            "failed": sorted(name for name, (outcome, _) in results.items()
+                             if outcome == "failed"),
+            "incomplete": incomplete,
+            "busy_seconds": round(busy, 3),
+            "wall_seconds": round(time.perf_counter() - start, 3)}
+
+
+def run_batch(paths, workers=8, cpu_workers=None, rates=None, cache_path=None,
+              search=None, only=None):
+    """
+    Run the pipelines of `paths` concurrently. At most `workers` steps run at
+    once across all workspaces; `rates` ({source: requests per second}) are
+    global limits.
+    """
+    limiters = {name: SharedRateLimiter(rate, burst=1) for name, rate in (rates or {}).items()}
+    start = time.perf_counter()
+    with ThreadPoolExecutor(workers, thread_name_prefix="step") as pool, \
+            ProcessPoolExecutor(cpu_workers or os.cpu_count()) as executor, \
+            ThreadPoolExecutor(len(paths) or 1, thread_name_prefix="driver") as drivers:
+        shared = Shared(cache_path, limiters, executor, search)
+        summaries = list(drivers.map(lambda path: run_workspace(path, pool, shared, only),
+                                     paths))
+    wall = time.perf_counter() - start
+    ran = sum(s.get("outcomes", {}).get("ran", 0) for s in summaries)
+    busy = sum(s.get("busy_seconds", 0) for s in summaries)
+    aggregate = {
+        "manuscripts": len(paths),
+        "steps_ran": ran,
+        "steps_failed": sum(len(s.get("failed", [])) + ("error" in s) for s in summaries),
+        "steps_incomplete": sum(len(s.get("incomplete", [])) for s in summaries),
+        "wall_seconds": round(wall, 3),
+        "step_seconds": round(busy, 3),
+        "manuscripts_per_hour": round(len(paths) * 3600 / wall, 1) if wall else None,
+        "steps_per_minute": round(ran * 60 / wall, 1) if wall else None,
+        "pool_utilization": round(busy / (wall * workers), 3) if wall else None,
+    }
+    return summaries, aggregate
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="manuscript_agent batch",
+                                     description=__doc__.strip().splitlines()[0])
+    parser.add_argument("action", choices=["init", "run", "status"])
+    parser.add_argument("directory", help="report directory (init, run) or batch root (status)")
+    parser.add_argument("--root", help="directory for the workspaces (default: the reports)")
+    parser.add_argument("--journal", choices=sorted(JOURNAL_TEMPLATES), default="nature-comms")
+    parser.add_argument("--steps", nargs="*", help="steps to run (default: all)")
+    parser.add_argument("--workers", type=int, default=8, help="concurrent steps, all workspaces")
+    parser.add_argument("--cpu-workers", type=int, help="figure analysis processes "
+                                                        "(default: CPU count)")
+    parser.add_argument("--pubmed-rate", type=float, help="global PubMed requests per second")
+    parser.add_argument("--openalex-rate", type=float, default=OPENALEX_RATE,
+                        help="global OpenAlex requests per second")
+    parser.add_argument("--api-key", help="NCBI API key (raises the PubMed rate limit)")
+    parser.add_argument("--email", help="contact address for NCBI/OpenAlex polite pools")
+    parser.add_argument("--pubmed-url", help="PubMed E-utilities base URL")
+    parser.add_argument("--openalex-url", help="OpenAlex API base URL")
+    parser.add_argument("--cache", default=str(metadata_cache.default_path()),
+                        help="shared metadata cache database (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    if args.action == "status":
+        for workspace in workspaces(args.directory):
+            results = Scheduler(workspace, log=False).run(dry_run=True)
+            counts = {}
+            for outcome, _ in results.values():
+                counts[outcome] = counts.get(outcome, 0) + 1
+            print(f"{workspace.name:<40} "
+                  + ", ".join(f"{n} {o}" for o, n in sorted(counts.items())))
+        return 0
+
+    reports = find_reports(args.directory)
+    if not reports:
+        print(f"✗ No .docx reports in {args.directory}")
+        return 1
+    root = Path(args.root or args.directory)
+    paths = []
+    for report in reports:
+        workspace, created = init_workspace(report, root, args.journal)
+        paths.append(workspace)
+        if created:
+            print(f"✓ Initialized {workspace} for {report.name}")
+    if args.action == "init":
+        return 0
+
+    unknown = set(args.steps or []) - {step.name for step in STEPS}
+    if unknown:
+        parser.error(f"unknown steps: {', '.join(sorted(unknown))}")
+    rates = {"pubmed": args.pubmed_rate or (PUBMED_RATE_WITH_KEY if args.api_key else PUBMED_RATE),
+             "openalex": args.openalex_rate}
+    search = {name: value for name, value in (
+        ("pubmed_url", args.pubmed_url), ("openalex_url", args.openalex_url),
+        ("api_key", args.api_key), ("email", args.email)) if value}
+    summaries, aggregate = run_batch(paths, args.workers, args.cpu_workers, rates,
+                                     args.cache, search, args.steps)
+    for summary in summaries:
+        if "error" in summary:
+            print(f"✗ {summary['workspace']:<40} {summary['error']}")
+            continue
+        mark = "✗" if summary["failed"] or summary["incomplete"] else "✓"
+        outcomes = ", ".join(f"{n} {o}" for o, n in sorted(summary["outcomes"].items()))
+        print(f"{mark} {summary['workspace']:<40} {outcomes}; {summary['busy_seconds']}s of steps "
+              f"in {summary['wall_seconds']}s" +
+              (f"; failed: {', '.join(summary['failed'])}" if summary["failed"] else "") +
+              (f"; incomplete: {', '.join(summary['incomplete'])}"
+               if summary["incomplete"] else ""))
+    for name, value in aggregate.items():
+        print(f"{name:>20}: {value}")
+    atomic_write_json(root / REPORT_FILE, {"finished": utc_now(), "aggregate": aggregate,
+                                           "manuscripts": summaries})
+    return 1 if aggregate["steps_failed"] or aggregate["steps_incomplete"] else 0
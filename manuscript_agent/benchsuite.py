@@ -0,0 +1,417 @@
+"""
+Synthetic Benchmark Suite
+Generates workspaces with the manuscript_11072333 layout (input report,
+figure annotations, citation points, per-source literature results, section
+drafts and references.json) scaled to N figures of M subplots, K citation
+points and P candidate papers, then times every pipeline phase on them:
+DOCX ingestion, figure analysis, literature merge/validate/final, draft
+scoring and assembly. Phases with caches are timed again unchanged (warm).
+
+Results are written as JSON together with the package, Python and NumPy
+versions and the platform, one entry per scale, so scaling curves can be
+tracked and compared between releases; --compare reports every phase that
+got slower than in an earlier results file.
+
+    python -m manuscript_agent bench
+    python -m manuscript_agent bench --scales small,medium,large -o bench_0.1.0.json
+    python -m manuscript_agent bench --figures 12 --subplots 6 --points 40 --candidates 4000
+    python -m manuscript_agent bench --scales small --compare bench_0.1.0.json
+    python -m manuscript_agent bench --generate /tmp/manuscript_synthetic --scales medium
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import platform
+import random
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from manuscript_agent import __version__
+
+SCALES = {
+    # About the size of the manuscript_11072333 report
+    "small": {"figures": 5, "subplots": 6, "points": 30, "candidates": 300},
+    "medium": {"figures": 12, "subplots": 8, "points": 80, "candidates": 2000},
+    "large": {"figures": 30, "subplots": 9, "points": 200, "candidates": 10000},
+}
+DEFAULT_SCALES = "small,medium"
+PARAMETERS = ("figures", "subplots", "points", "candidates")
+REPORT_NAME = "synthetic_report.docx"
+# (height, width) of one synthetic figure panel in pixels
+PANEL_SIZE = (480, 600)
+# Re-exported duplicates per distinct work (other source, reformatted DOI, edited title)
+OVERLAP = 0.4
+# A phase slower than the compared run by this fraction, and by at least MIN_DELTA
+# seconds, is reported as a regression
+TOLERANCE = 0.25
+MIN_DELTA = 0.05
+
+VOCABULARY = ("tumor immune cells expression revealed signature survival cohort risk model "
+              "analysis gene pathway infiltration response ubiquitination prognostic "
+              "microenvironment clusters patients validation").split()
+
+
+def words(rng, count):
+    return " ".join(rng.choice(VOCABULARY) for _ in range(count))
+
+
+def sentence(rng, low=12, high=24):
+    return words(rng, rng.randint(low, high)).capitalize() + "."
+
+
+def panel_grid(subplots):
+    """(rows, cols) of a synthetic figure with at least `subplots` panels."""
+    cols = math.ceil(math.sqrt(subplots))
+    return math.ceil(subplots / cols), cols
+
+
+def subplot_types():
+    from manuscript_agent.analyzers import ANALYZERS
+
+    return list(ANALYZERS)
+
+
+def write_report(workspace, figures, subplots, rng):
+    """The input report: per figure a heading, context, the image and its legend."""
+    from manuscript_agent import assemble, panels
+
+    rows, cols = panel_grid(subplots)
+    with tempfile.TemporaryDirectory() as media:
+        images = []
+        for number in range(1, figures + 1):
+            image, _ = panels.synthetic_figure(rows, cols, PANEL_SIZE, seed=number)
+            path = Path(media) / f"figure{number}.png"
+            path.write_bytes(panels.encode_png(image))
+            images.append({"number": number, "level": path,
+                           "width": image.shape[1], "height": image.shape[0]})
+        with assemble.docx_writer(workspace / REPORT_NAME, images) as write:
+            write(assemble.paragraph_xml("Synthetic analysis report", "Title"))
+            for image in images:
+                number = image["number"]
+                write(assemble.paragraph_xml(f"{number}. {sentence(rng, 4, 8)}", "Heading2"))
+                for _ in range(2):
+                    write(assemble.paragraph_xml(" ".join(sentence(rng) for _ in range(4))))
+                write(assemble.drawing_xml(image, image["rid"], label=False))
+                write(assemble.paragraph_xml(f"Figure {number}. {sentence(rng, 6, 10)}"))
+                for i in range(subplots):
+                    write(assemble.paragraph_xml(f"({chr(65 + i)}) {sentence(rng)}"))
+
+
+def annotations(figures, subplots, rng):
+    types = subplot_types()
+    data = {"metadata": {"report_file": REPORT_NAME, "synthetic": True},
+            "technical_notes": [sentence(rng) for _ in range(3)], "figures": {}}
+    for number in range(1, figures + 1):
+        kinds = [types[(number * subplots + i) % len(types)] for i in range(subplots)]
+        data["figures"][f"image{number}.png"] = {
+            "context_from_report": {"purpose": sentence(rng), "methods": sentence(rng),
+                                    "key_findings": sentence(rng)},
+            "subplots": [{"subplot_id": f"{number}{chr(65 + i)}", "type": kind,
+                          "guideline_ref": "", "structured_data": {}}
+                         for i, kind in enumerate(kinds)],
+            # No caption text, so captions are drafted from the analyzers
+            "caption": {"title": sentence(rng, 6, 10)},
+        }
+    return data
+
+
+def citation_points(points, rng):
+    lines = ["# Results Section - Complete Citation Points Analysis", ""]
+    for number in range(1, points + 1):
+        lines += [f"### Citation Point {number}: {words(rng, 4)}",
+                  f'**Line:** "{sentence(rng)}"',
+                  "**Purpose:** Support citation",
+                  f'**Query:** "{words(rng, 5)}"',
+                  "**Type:** Support citation", ""]
+    return "\n".join(lines)
+
+
+def write_literature(workspace, points, candidates, seed):
+    """citation<N>_pubmed.json and _openalex.json with overlapping, re-formatted records."""
+    from manuscript_agent.dedup import synthetic_corpus
+
+    literature = workspace / "literature"
+    literature.mkdir(parents=True, exist_ok=True)
+    per_point = max(2, candidates // points)
+    for number in range(1, points + 1):
+        papers, _ = synthetic_corpus(per_point, OVERLAP, seed=seed * 100_000 + number)
+        for source in ("pubmed", "openalex"):
+            found = [dict(p, source=source) for p in papers if p["source"] == source]
+            with open(literature / f"citation{number}_{source}.json", 'w',
+                      encoding='utf-8') as f:
+                json.dump({"query": f"synthetic query {number}", "max_oa": 2,
+                           "timestamp": datetime.now().isoformat(),
+                           "total_results": len(found), "papers": found}, f,
+                          ensure_ascii=False)
+
+
+def write_drafts(workspace, figures, points, rng):
+    """Section finals citing one reference per citation point, plus references.json."""
+    from manuscript_agent.citations import MANUSCRIPT_ORDER, format_record
+
+    records = [{"id": n, "authors": "Smith J, Lee K, Wang Q", "year": 2010 + n % 15,
+                "title": f"Synthetic reference {n}: {words(rng, 6)}",
+                "journal": "Journal of Synthetic Oncology", "volume": str(n % 40 + 1),
+                "pages": f"{n}-{n + 9}", "doi": f"10.9999/bench.{n}"}
+               for n in range(1, points + 1)]
+    lengths = {"introduction": 6, "results": 3 * figures, "discussion": 8, "methods": 8}
+    sections = [(name, name.split("_")[1]) for name in MANUSCRIPT_ORDER]
+    total = sum(lengths[kind] for _, kind in sections)
+    cited, next_ref = 0, 1
+    (workspace / "drafts").mkdir(parents=True, exist_ok=True)
+    for name, kind in sections:
+        lines, used = [f"# {kind.title()}", ""], []
+        for i in range(lengths[kind]):
+            if i % 3 == 0:
+                lines += [f"## {sentence(rng, 4, 8)[:-1]}", ""]
+            cited += 1
+            # Spread the citation points evenly over all paragraphs, in order of appearance
+            upto = max(next_ref, round(cited * points / total))
+            refs = list(range(next_ref, min(upto, points) + 1))
+            next_ref = max(next_ref, upto + 1)
+            marker = f"<sup>{','.join(map(str, refs))}</sup>" if refs else ""
+            used += refs
+            figure = f" (**Figure {i // 3 % figures + 1}**)" if kind == "results" else ""
+            lines += [" ".join(sentence(rng) for _ in range(5)) + marker + figure, ""]
+        lines += ["## References", ""]
+        lines += [f"{n}. {format_record(records[n - 1])}" for n in used] + [""]
+        lines += ["---", "", "**Metadata:**", "- Status: FINAL (synthetic)", ""]
+        (workspace / name).write_text("\n".join(lines), encoding='utf-8')
+    abstract = " ".join(sentence(rng) for _ in range(9))
+    (workspace / "drafts" / "05_abstract_final.md").write_text(
+        f"# {sentence(rng, 8, 12)[:-1]}\n\n## Abstract\n\n{abstract}\n", encoding='utf-8')
+    with open(workspace / "references.json", 'w', encoding='utf-8') as f:
+        json.dump({"citations": records, "metadata": {"synthetic": True}}, f, indent=2)
+
+
+def generate(workspace, figures, subplots, points, candidates, seed=0):
+    """Write the authored inputs of a synthetic workspace; returns its path."""
+    rng = random.Random(seed)
+    workspace = Path(workspace)
+    workspace.mkdir(parents=True, exist_ok=True)
+    write_report(workspace, figures, subplots, rng)
+    with open(workspace / "figure_annotations.json", 'w', encoding='utf-8') as f:
+        json.dump(annotations(figures, subplots, rng), f, indent=2)
+    (workspace / "citation_points_results.md").write_text(citation_points(points, rng),
+                                                          encoding='utf-8')
+    write_literature(workspace, points, candidates, seed)
+    write_drafts(workspace, figures, points, rng)
+    state = {
+        "workflow_version": "1.0",
+        "configuration": {"input_report": REPORT_NAME, "target_journal": "nature-comms",
+                          "quality_threshold": 0.75},
+        "journal_template": {"name": "Nature Communications", "abstract_word_limit": 200,
+                             "main_text_recommended": "5000-8000 words",
+                             "reference_style": "numbered", "max_figures": 8},
+        "synthetic": {"figures": figures, "subplots": subplots, "points": points,
+                      "candidates": candidates, "seed": seed},
+    }
+    with open(workspace / "state.json", 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2)
+    return workspace
+
+
+# Phases
+
+def crossref_records(papers, rng):
+    """Crossref metadata for merged papers: mostly matching, some partial or missing."""
+    records = []
+    for paper in papers:
+        roll = rng.random()
+        if roll < 0.1:
+            records.append(None)
+            continue
+        records.append({"title": paper["title"] if roll < 0.85 else sentence(rng),
+                        "year": paper.get("year"), "journal": paper.get("journal"),
+                        "authors": len(paper.get("authors") or []),
+                        "author_names": list(paper.get("authors") or [])})
+    return records
+
+
+def literature(workspace, stage, seed=0):
+    """One literature stage for every citation point; returns the number of papers written."""
+    from manuscript_agent import dedup, scoring
+    from manuscript_agent.papers import read_papers
+
+    rng = random.Random(seed)
+    directory = Path(workspace) / "literature"
+    count = 0
+    for path in sorted(directory.glob("citation*_pubmed.json")):
+        stem = path.name[:-len("_pubmed.json")]
+        if stage == "merge":
+            papers = dedup.load_papers([directory / f"{stem}_{source}.json"
+                                        for source in ("pubmed", "openalex")])
+            papers, _ = dedup.deduplicate(papers)
+            scoring.dump(directory / f"{stem}_merged.json", papers)
+        elif stage == "validate":
+            papers = read_papers(directory / f"{stem}_merged.json")
+            papers = scoring.validate_batch(papers, crossref_records(papers, rng))
+            scoring.dump(directory / f"{stem}_validated.json", papers)
+        else:
+            papers = scoring.rank_batch(read_papers(directory / f"{stem}_validated.json"))
+            scoring.dump(directory / f"{stem}_final.json", papers, total=False)
+        count += len(papers)
+    return count
+
+
+def phases(workspace):
+    """[(name, function returning an item count, timed warm)] in pipeline order."""
+    from manuscript_agent import assemble, figures, ingest, quality
+
+    def run_ingest():
+        return len(ingest.ingest_docx(workspace / REPORT_NAME, workspace)["figures"])
+
+    def run_figures():
+        with contextlib.redirect_stdout(io.StringIO()):
+            return figures.run(workspace)["figures"]
+
+    return [
+        ("ingest", run_ingest, False),
+        ("figures", run_figures, True),
+        ("literature_merge", lambda: literature(workspace, "merge"), False),
+        ("literature_validate", lambda: literature(workspace, "validate"), False),
+        ("literature_final", lambda: literature(workspace, "final"), False),
+        ("draft_scoring", lambda: quality.score_drafts(workspace)[1]["paragraphs"], True),
+        ("assembly", lambda: assemble.assemble(workspace)["sections"], True),
+    ]
+
+
+def run_phases(workspace):
+    """{phase: {seconds, items[, warm_seconds]}} for one pass over a generated workspace."""
+    results = {}
+    for name, function, warm in phases(Path(workspace)):
+        start = time.perf_counter()
+        items = function()
+        results[name] = {"seconds": round(time.perf_counter() - start, 4), "items": items}
+        if warm:
+            start = time.perf_counter()
+            function()
+            results[name]["warm_seconds"] = round(time.perf_counter() - start, 4)
+    return results
+
+
+def workspace_bytes(workspace):
+    return sum(p.stat().st_size for p in Path(workspace).rglob("*") if p.is_file())
+
+
+def benchmark_scale(name, parameters, repeat=1, seed=0):
+    """Best of `repeat` passes, each on a freshly generated workspace."""
+    best = {}
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory() as directory:
+            workspace = Path(directory) / "manuscript_synthetic"
+            start = time.perf_counter()
+            generate(workspace, seed=seed, **parameters)
+            generated = time.perf_counter() - start
+            size = workspace_bytes(workspace)
+            timings = run_phases(workspace)
+        for phase, values in timings.items():
+            kept = best.get(phase)
+            best[phase] = {key: min(value, kept[key]) if kept and key != "items" else value
+                           for key, value in values.items()}
+    return {"scale": name, "parameters": dict(parameters), "repeat": repeat,
+            "generate_seconds": round(generated, 3), "input_bytes": size,
+            "total_seconds": round(sum(p["seconds"] for p in best.values()), 3),
+            "phases": best}
+
+
+def environment():
+    import numpy
+
+    return {"version": __version__, "python": platform.python_version(),
+            "numpy": numpy.__version__, "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds")}
+
+
+def compare(results, previous, tolerance=TOLERANCE):
+    """[(scale, phase, key, old, new)] for timings that regressed against `previous`."""
+    before = {entry["scale"]: entry for entry in previous.get("results", [])}
+    regressions = []
+    for entry in results:
+        old = before.get(entry["scale"])
+        if old is None or old.get("parameters") != entry["parameters"]:
+            continue
+        for phase, values in entry["phases"].items():
+            for key in ("seconds", "warm_seconds"):
+                a, b = old["phases"].get(phase, {}).get(key), values.get(key)
+                if a is not None and b is not None and b > a * (1 + tolerance) \
+                        and b - a >= MIN_DELTA:
+                    regressions.append((entry["scale"], phase, key, a, b))
+    return regressions
+
+
+def print_scale(entry):
+    parameters = ", ".join(f"{key}={entry['parameters'][key]}" for key in PARAMETERS)
+    print(f"{entry['scale']} ({parameters}):")
+    for phase, values in entry["phases"].items():
+        warm = f"  warm {values['warm_seconds']:.3f}s" if "warm_seconds" in values else ""
+        print(f"  {phase:<20} {values['seconds']:>8.3f}s  {values['items']:>7} items{warm}")
+    print(f"  {'total':<20} {entry['total_seconds']:>8.3f}s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="manuscript_agent bench",
+                                     description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scales", default=DEFAULT_SCALES,
+                        help=f"comma-separated presets from {', '.join(SCALES)} "
+                             f"(default: %(default)s)")
+    for name in PARAMETERS:
+        parser.add_argument(f"--{name}", type=int,
+                            help=f"custom scale: number of {name} (overrides --scales)")
+    parser.add_argument("--repeat", type=int, default=1,
+                        help="keep the best of REPEAT passes per scale")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", default=f"bench_{__version__}.json",
+                        help="results file (default: %(default)s)")
+    parser.add_argument("--compare", help="earlier results file to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE,
+                        help="allowed slowdown against --compare (default: %(default)s)")
+    parser.add_argument("--generate", metavar="DIRECTORY",
+                        help="only write a synthetic workspace (first scale) and run its phases")
+    args = parser.parse_args(argv)
+
+    custom = {name: getattr(args, name) for name in PARAMETERS}
+    if any(value is not None for value in custom.values()):
+        defaults = SCALES["small"]
+        scales = [("custom", {k: v if v is not None else defaults[k] for k, v in custom.items()})]
+    else:
+        unknown = [s for s in args.scales.split(",") if s not in SCALES]
+        if unknown:
+            parser.error(f"unknown scale {unknown[0]!r} (expected {', '.join(SCALES)})")
+        scales = [(s, SCALES[s]) for s in args.scales.split(",")]
+
+    if args.generate:
+        workspace = Path(args.generate)
+        if workspace.exists() and any(workspace.iterdir()):
+            parser.error(f"{workspace} is not empty")
+        generate(workspace, seed=args.seed, **scales[0][1])
+        run_phases(workspace)
+        print(f"✓ Generated {scales[0][0]} workspace {workspace}")
+        return 0
+
+    results = []
+    for name, parameters in scales:
+        entry = benchmark_scale(name, parameters, args.repeat, args.seed)
+        print_scale(entry)
+        results.append(entry)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(dict(environment(), results=results), f, indent=2)
+    print(f"✓ Wrote {args.output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            previous = json.load(f)
+        regressions = compare(results, previous, args.tolerance)
+        for scale, phase, key, old, new in regressions:
+            print(f"✗ {scale} {phase} {key}: {old:.3f}s -> {new:.3f}s")
+        if regressions:
+            return 1
+        print(f"✓ No regressions against {args.compare} (version {previous.get('version')})")
+    return 0
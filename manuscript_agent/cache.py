@@ -0,0 +1,210 @@
+"""
+Literature Metadata Cache
+Persistent SQLite cache shared by every manuscript workspace for PubMed,
+OpenAlex and Crossref lookups. Entries are keyed by normalized DOI, PMID or
+search query, expire after a per-kind TTL and are evicted least-recently-used
+once the store grows past its size budget. Hit/miss counters are kept per
+session and accumulated in the database.
+
+The default location is ~/.cache/manuscript_agent/literature.sqlite
+(override with MANUSCRIPT_AGENT_CACHE or --path).
+"""
+
+import argparse
+import json
+import os
+import re
+import sqlite3
+import time
+import zlib
+from pathlib import Path
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DAY = 24 * 3600
+# Paper metadata changes rarely; search rankings drift faster.
+PAPER_TTL = 90 * DAY
+QUERY_TTL = 7 * DAY
+COUNTERS = ("hits", "misses", "expired", "writes", "evictions")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key      TEXT PRIMARY KEY,
+    value    BLOB NOT NULL,
+    size     INTEGER NOT NULL,
+    created  REAL NOT NULL,
+    expires  REAL NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed);
+CREATE TABLE IF NOT EXISTS counters (
+    name  TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+def default_path():
+    return Path(os.environ.get("MANUSCRIPT_AGENT_CACHE",
+                               Path.home() / ".cache" / "manuscript_agent" / "literature.sqlite"))
+
+
+def normalize_doi(doi):
+    """Lower-case DOI without resolver prefix ('https://doi.org/10.1/X' -> '10.1/x')."""
+    doi = (doi or "").strip().lower()
+    return re.sub(r"^(https?://(dx\.)?doi\.org/|doi:\s*)", "", doi)
+
+
+def normalize_query(query):
+    return " ".join(re.findall(r"\w+", (query or "").lower()))
+
+
+def doi_key(source, doi):
+    return f"{source}:doi:{normalize_doi(doi)}"
+
+
+def pmid_key(source, pmid):
+    return f"{source}:pmid:{str(pmid).strip()}"
+
+
+def query_key(source, query, **params):
+    extra = "".join(f"|{k}={params[k]}" for k in sorted(params))
+    return f"{source}:query:{normalize_query(query)}{extra}"
+
+
+class MetadataCache:
+    """
+    SQLite-backed key/value cache with TTLs and size-bounded LRU eviction.
+    Values are JSON-serialisable objects stored zlib-compressed.
+    """
+
+    def __init__(self, path=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = Path(path) if path else default_path()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+        self.stats = dict.fromkeys(COUNTERS, 0)
+        self.total_bytes = self._stored_bytes()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _stored_bytes(self):
+        return self.db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def get(self, key):
+        """Cached value for `key`, or None on a miss or expired entry."""
+        now = time.time()
+        row = self.db.execute("SELECT value, expires, size FROM entries WHERE key = ?",
+                              (key,)).fetchone()
+        if row is None:
+            self.stats["misses"] += 1
+            return None
+        value, expires, size = row
+        if expires < now:
+            self.db.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self.total_bytes -= size
+            self.stats["expired"] += 1
+            self.stats["misses"] += 1
+            return None
+        self.db.execute("UPDATE entries SET accessed = ? WHERE key = ?", (now, key))
+        self.stats["hits"] += 1
+        return json.loads(zlib.decompress(value))
+
+    def set(self, key, value, ttl=PAPER_TTL):
+        now = time.time()
+        blob = zlib.compress(json.dumps(value, ensure_ascii=False).encode("utf-8"))
+        # A refreshed key replaces its old entry, whose size no longer counts
+        old = self.db.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+        self.db.execute(
+            "INSERT OR REPLACE INTO entries (key, value, size, created, expires, accessed) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (key, blob, len(blob), now, now + ttl, now))
+        self.stats["writes"] += 1
+        self.total_bytes += len(blob) - (old[0] if old else 0)
+        if self.total_bytes > self.max_bytes:
+            self.evict()
+
+    def evict(self, target=None):
+        """
+        Drop expired entries, then least-recently-used ones until the store is
+        below `target` bytes (90% of the budget by default).
+        """
+        target = int(self.max_bytes * 0.9) if target is None else target
+        self.db.execute("DELETE FROM entries WHERE expires < ?", (time.time(),))
+        self.total_bytes = self._stored_bytes()
+        if self.total_bytes <= target:
+            return 0
+        excess = self.total_bytes - target
+        removed = 0
+        freed = 0
+        keys = []
+        for key, size in self.db.execute("SELECT key, size FROM entries ORDER BY accessed"):
+            keys.append((key,))
+            freed += size
+            removed += 1
+            if freed >= excess:
+                break
+        self.db.executemany("DELETE FROM entries WHERE key = ?", keys)
+        self.total_bytes -= freed
+        self.stats["evictions"] += removed
+        return removed
+
+    def clear(self):
+        self.db.execute("DELETE FROM entries")
+        self.total_bytes = 0
+
+    def flush_counters(self):
+        """Add this session's counters to the persistent totals."""
+        with self.db:
+            for name in COUNTERS:
+                self.db.execute(
+                    "INSERT INTO counters (name, value) VALUES (?, ?) "
+                    "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                    (name, self.stats[name]))
+        self.stats = dict.fromkeys(COUNTERS, 0)
+
+    def totals(self):
+        """Accumulated counters plus current size of the store."""
+        totals = dict.fromkeys(COUNTERS, 0)
+        totals.update(dict(self.db.execute("SELECT name, value FROM counters")))
+        for name in COUNTERS:
+            totals[name] += self.stats[name]
+        lookups = totals["hits"] + totals["misses"]
+        totals["hit_rate"] = round(totals["hits"] / lookups, 4) if lookups else None
+        totals["entries"] = self.db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        totals["bytes"] = self._stored_bytes()
+        totals["max_bytes"] = self.max_bytes
+        return totals
+
+    def close(self):
+        if self.db is not None:
+            self.flush_counters()
+            self.db.close()
+            self.db = None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="manuscript_agent cache",
+                                     description=__doc__.strip().splitlines()[0])
+    parser.add_argument("action", choices=["stats", "evict", "clear"])
+    parser.add_argument("--path", help="cache database (default: %(default)s)",
+                        default=str(default_path()))
+    parser.add_argument("--max-mb", type=float, default=DEFAULT_MAX_BYTES / 2**20)
+    args = parser.parse_args(argv)
+
+    with MetadataCache(args.path, int(args.max_mb * 2**20)) as cache:
+        if args.action == "evict":
+            print(f"✓ Evicted {cache.evict()} entries")
+        elif args.action == "clear":
+            cache.clear()
+            print("✓ Cache cleared")
+        totals = cache.totals()
+    for name, value in totals.items():
+        print(f"{name:>10}: {value}")
+    return 0
@@ -0,0 +1,235 @@
+"""
+Crash-Safe Checkpoints
+Atomic JSON writes (temporary file, fsync, rename, directory fsync) for
+state.json and phase checkpoints, plus append-only journals of completed
+sub-units (citation point searches, figures, pipeline steps). A phase that
+is interrupted resumes from its journal instead of starting over; a torn
+final journal line from a crash mid-append is ignored.
+
+Journals live in checkpoints/<name>.journal.jsonl and are cleared once the
+phase they cover completes.
+
+    python -m manuscript_agent checkpoint status manuscript_11072333
+    python -m manuscript_agent checkpoint --bench 2000
+"""
+
+import argparse
+import json
+import os
+import stat
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+CHECKPOINT_DIR = "checkpoints"
+JOURNAL_SUFFIX = ".journal.jsonl"
+
+
+def fsync_dir(directory):
+    """Persist a rename in `directory` (no-op where directories can't be opened)."""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def file_mode(path):
+    """
+    Permission bits for a file about to replace `path`: those of the file it
+    replaces, or 0o666 less the umask for a new one (what open() would give).
+    mkstemp() creates 0600 files, and a rename keeps the temporary's mode.
+    """
+    try:
+        return stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+
+def atomic_write_text(path, text, durable=True):
+    """
+    Replace `path` with `text` so readers see either the old or the new
+    content, never a partial file, even across a crash.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            os.fchmod(f.fileno(), file_mode(path))
+            f.write(text)
+            f.flush()
+            if durable:
+                os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+    if durable:
+        fsync_dir(path.parent)
+
+
+def atomic_write_json(path, data, durable=True, indent=2):
+    atomic_write_text(path, json.dumps(data, indent=indent, ensure_ascii=False), durable)
+
+
+def checkpoint_path(workspace, phase):
+    """checkpoints/phase_<n>_checkpoint.json for 'PHASE_<n>'."""
+    number = phase.split("_", 1)[-1].lower()
+    return Path(workspace) / CHECKPOINT_DIR / f"phase_{number}_checkpoint.json"
+
+
+def write_checkpoint(workspace, phase, status, **details):
+    data = {"phase": phase, "status": status,
+            "timestamp": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")}
+    data.update(details)
+    atomic_write_json(checkpoint_path(workspace, phase), data)
+    return data
+
+
+class Journal:
+    """
+    Append-only JSON-lines record of completed units. Each append is
+    flushed and (by default) fsynced before returning, so a unit recorded
+    here survives a crash of the process that recorded it.
+    """
+
+    def __init__(self, path, durable=True):
+        self.path = Path(path)
+        self.durable = durable
+        self.file = None
+
+    @classmethod
+    def for_workspace(cls, workspace, name, durable=True):
+        return cls(Path(workspace) / CHECKPOINT_DIR / f"{name}{JOURNAL_SUFFIX}", durable)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def entries(self):
+        """Every intact record in append order."""
+        if not self.path.exists():
+            return []
+        records = []
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.endswith("\n"):
+                    break  # torn write from an interrupted append
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    break
+        return records
+
+    def completed(self):
+        """{unit: data} of the latest record for every unit."""
+        return {record["unit"]: record.get("data") for record in self.entries()}
+
+    def record(self, unit, data=None):
+        if self.file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._truncate_torn_tail()
+            self.file = open(self.path, 'a', encoding='utf-8')
+        line = json.dumps({"unit": unit, "time": time.time(), "data": data}, ensure_ascii=False)
+        self.file.write(line + "\n")
+        self.file.flush()
+        if self.durable:
+            os.fsync(self.file.fileno())
+
+    def _truncate_torn_tail(self):
+        """Drop a partial last line so new records start on a line boundary."""
+        if not self.path.exists():
+            return
+        with open(self.path, 'rb+') as f:
+            data = f.read()
+            if data and not data.endswith(b"\n"):
+                f.truncate(data.rfind(b"\n") + 1)
+
+    def clear(self):
+        self.close()
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+def journals(workspace):
+    return sorted((Path(workspace) / CHECKPOINT_DIR).glob(f"*{JOURNAL_SUFFIX}"))
+
+
+def benchmark(units=2000):
+    """Per-unit latency of journal appends and atomic checkpoint writes."""
+    payload = {"query": "immune cell infiltration triple negative breast cancer",
+               "file": "literature/citation3_pubmed.json", "papers": 5}
+    results = {"units": units}
+    with tempfile.TemporaryDirectory() as directory:
+        for label, durable in (("journal_fsync_us", True), ("journal_nofsync_us", False)):
+            with Journal(Path(directory) / f"{label}{JOURNAL_SUFFIX}", durable) as journal:
+                start = time.perf_counter()
+                for i in range(units):
+                    journal.record(f"unit{i}", payload)
+                results[label] = round((time.perf_counter() - start) / units * 1e6, 1)
+        state = {"phase_runs": {f"step{i}": payload for i in range(12)}}
+        count = max(1, units // 10)
+        for label, durable in (("atomic_json_fsync_us", True), ("atomic_json_nofsync_us", False)):
+            start = time.perf_counter()
+            for _ in range(count):
+                atomic_write_json(Path(directory) / "state.json", state, durable)
+            results[label] = round((time.perf_counter() - start) / count * 1e6, 1)
+        start = time.perf_counter()
+        replayed = Journal(Path(directory) / f"journal_fsync_us{JOURNAL_SUFFIX}").completed()
+        results["replay_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        results["replayed_units"] = len(replayed)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="manuscript_agent checkpoint",
+                                     description=__doc__.strip().splitlines()[0])
+    parser.add_argument("action", nargs="?", choices=["status", "clear"])
+    parser.add_argument("workspace", nargs="?", help="manuscript workspace directory")
+    parser.add_argument("--bench", type=int, metavar="UNITS",
+                        help="measure per-unit checkpoint overhead over UNITS appends")
+    args = parser.parse_args(argv)
+
+    if args.bench:
+        for name, value in benchmark(args.bench).items():
+            print(f"{name:>24}: {value}")
+        return 0
+    if not args.action or not args.workspace:
+        parser.error("action and workspace are required unless --bench is given")
+
+    paths = journals(args.workspace)
+    if not paths:
+        print("No open journals (no interrupted phases)")
+    for path in paths:
+        journal = Journal(path)
+        units = journal.completed()
+        name = path.name[:-len(JOURNAL_SUFFIX)]
+        if args.action == "clear":
+            journal.clear()
+            print(f"✓ Cleared {name} ({len(units)} units)")
+        else:
+            print(f"{name}: {len(units)} completed units")
+            for unit in list(units)[-5:]:
+                print(f"  {unit}")
+    return 0
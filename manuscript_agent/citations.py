@@ -0,0 +1,598 @@
+"""
+Citation Numbering
+Parses the <sup>N</sup> citation markers and numbered reference lists of
+the section drafts, maps every number to a reference identity (DOI or
+normalized title, matched against references.json) and numbers references
+by first appearance across the manuscript. Inserting or removing a
+citation renumbers only the markers whose references changed number and
+re-renders the affected reference lists and drafts/references.md; the rest
+of each draft is left untouched.
+
+Reference lists are the numbered entries under a "References" heading.
+A "[References 1-28 as listed in previous version]" placeholder is
+resolved from the newest earlier version of the same section
+(01_results_v2_with_full_citations.md for 01_results_final.md).
+
+    python -m manuscript_agent citations check manuscript_11072333
+    python -m manuscript_agent citations renumber manuscript_11072333
+    python -m manuscript_agent citations insert manuscript_11072333 drafts/01_results_final.md \\
+        --after "risk model" --ref 10.1200/JCO.2007.12.9791
+    python -m manuscript_agent citations remove manuscript_11072333 --ref 34
+"""
+
+import argparse
+import json
+import re
+import time
+from pathlib import Path
+
+from manuscript_agent import spans
+from manuscript_agent.checkpoint import atomic_write_text
+from manuscript_agent.dedup import title_tokens
+
+# Assembled manuscript order (Nature-style: Methods last); numbering follows
+# the first appearance of each reference in this order.
+MANUSCRIPT_ORDER = ["drafts/03_introduction_final.md", "drafts/01_results_final.md",
+                    "drafts/04_discussion_final.md", "drafts/02_methods_final.md"]
+BIBLIOGRAPHY = "drafts/references.md"
+MAX_AUTHORS = 3
+# Consecutive runs at least this long render as a range (5–7)
+RANGE_MIN = 3
+
+MARKER = re.compile(r"<sup>\s*(\d+(?:\s*[-–,]\s*\d+)*)\s*</sup>")
+LIST_HEADING = re.compile(r"^#{1,6} [^\n]*\breferences?\b[^\n]*$", re.I | re.M)
+LIST_END = re.compile(r"^(?:---|#)", re.M)
+ENTRY = re.compile(r"^(\d+)\.\s+(\S.*?)\s*$", re.M)
+PLACEHOLDER = re.compile(r"\[References (\d+)\s*[-–]\s*(\d+)[^\]]*previous version\]", re.I)
+DOI = re.compile(r"\b(10\.\d{4,9}/[^\s;,]+[^\s;,.)])")
+VERSION = re.compile(r"_v(\d+)")
+
+
+def parse_numbers(text):
+    """[5, 6, 7, 9] for '5-7,9' (hyphen or en dash ranges)."""
+    numbers = []
+    for part in text.split(","):
+        bounds = re.split(r"[-–]", part)
+        numbers.extend(range(int(bounds[0]), int(bounds[-1]) + 1))
+    return numbers
+
+
+def format_numbers(numbers):
+    """'1,2,5–7' with runs of RANGE_MIN or more collapsed to ranges."""
+    numbers = sorted(set(numbers))
+    parts, i = [], 0
+    while i < len(numbers):
+        j = i
+        while j + 1 < len(numbers) and numbers[j + 1] == numbers[j] + 1:
+            j += 1
+        if j - i + 1 >= RANGE_MIN:
+            parts.append(f"{numbers[i]}–{numbers[j]}")
+        else:
+            parts.extend(str(n) for n in numbers[i:j + 1])
+        i = j + 1
+    return ",".join(parts)
+
+
+def title_key(title):
+    return " ".join(title_tokens(title))
+
+
+def entry_title(text):
+    """Title of a 'Authors. Title. *Journal* year;...' reference entry."""
+    if "*" in text:
+        pieces = [p for p in text.split("*", 1)[0].strip().rstrip(".").split(". ") if p]
+        return pieces[-1] if pieces else text
+    pieces = [p for p in DOI.sub("", text).strip().rstrip(".").split(". ") if p]
+    return pieces[1] if len(pieces) > 1 else text
+
+
+def format_record(record):
+    """Reference list entry for a references.json citation."""
+    authors = record.get("authors") or []
+    if isinstance(authors, str):
+        authors = [a.strip() for a in authors.split(",") if a.strip()]
+    if len(authors) > MAX_AUTHORS:
+        authors = authors[:MAX_AUTHORS] + ["et al"]
+    text = f"{', '.join(authors)}. " if authors else ""
+    text += f"{record.get('title', '').rstrip('.')}."
+    if record.get("journal"):
+        text += f" *{record['journal']}*"
+    if record.get("year"):
+        text += f" {record['year']}"
+    if record.get("volume"):
+        text += f";{record['volume']}"
+        if record.get("issue"):
+            text += f"({record['issue']})"
+    if record.get("pages"):
+        text += f":{record['pages']}"
+    return text + "."
+
+
+class References:
+    """references.json citations indexed by DOI and normalized title."""
+
+    def __init__(self, records=()):
+        self.records = {}
+        self.by_title = {}
+        self.by_id = {}
+        for record in records:
+            doi = (record.get("doi") or "").lower()
+            key = f"doi:{doi}" if doi else f"title:{title_key(record.get('title'))}"
+            self.records[key] = record
+            self.by_title.setdefault(title_key(record.get("title")), key)
+            if record.get("id") is not None:
+                self.by_id[int(record["id"])] = key
+
+    @classmethod
+    def load(cls, workspace):
+        path = Path(workspace) / "references.json"
+        if not path.exists():
+            return cls()
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f).get("citations", []))
+
+    def key(self, text):
+        """Identity of a reference list entry: a references.json key, its DOI or title."""
+        match = DOI.search(text)
+        if match:
+            return f"doi:{match.group(1).lower()}"
+        title = title_key(entry_title(text))
+        return self.by_title.get(title, f"title:{title}")
+
+    def render(self, key, text=None):
+        record = self.records.get(key)
+        return format_record(record) if record else text
+
+
+class Marker:
+    def __init__(self, keys, text):
+        self.keys = keys
+        self.text = text
+
+    def render(self, numbers):
+        self.text = f"<sup>{format_numbers(numbers[k] for k in self.keys)}</sup>"
+
+
+class ReferenceList:
+    """The entries under a reference heading; `new_only` lists for 'New References'."""
+
+    def __init__(self, text, new_only=False):
+        self.text = text
+        self.new_only = new_only
+
+    def render(self, section, manuscript):
+        keys = section.cited() if not self.new_only else section.first_cited(manuscript)
+        numbered = sorted((manuscript.numbers[k], k) for k in keys)
+        lines = [f"{n}. {manuscript.entry(k)}" for n, k in numbered]
+        self.text = "\n\n" + "\n\n".join(lines) + "\n\n" if lines else "\n\n"
+
+
+def parse_lists(text):
+    """[(start, end, heading, {number: entry}, [(first, last)] placeholders)]."""
+    lists = []
+    for heading in LIST_HEADING.finditer(text):
+        start = heading.end()
+        end_match = LIST_END.search(text, start + 1)
+        end = end_match.start() if end_match else len(text)
+        body = text[start:end]
+        entries = {int(m.group(1)): m.group(2) for m in ENTRY.finditer(body)}
+        placeholders = [(int(m.group(1)), int(m.group(2))) for m in PLACEHOLDER.finditer(body)]
+        lists.append((start, end, heading.group(0), entries, placeholders))
+    return lists
+
+
+def previous_versions(path):
+    """Earlier drafts of the same section, newest version first."""
+    path = Path(path)
+    prefix = path.name.split("_", 1)[0] + "_"
+    candidates = [p for p in path.parent.glob(f"{prefix}*.md") if p != path]
+
+    def version(p):
+        match = VERSION.search(p.stem)
+        return int(match.group(1)) if match else 0
+
+    return sorted(candidates, key=lambda p: (-version(p), p.name))
+
+
+def resolve_placeholder(path, first, last):
+    """Entries first..last from the newest earlier version listing all of them."""
+    wanted = range(first, last + 1)
+    for candidate in previous_versions(path):
+        entries = {}
+        for *_, found, _ in parse_lists(candidate.read_text(encoding='utf-8')):
+            entries.update(found)
+        if all(n in entries for n in wanted):
+            return {n: entries[n] for n in wanted}, candidate
+    return {}, None
+
+
+class Section:
+    """
+    A draft as a list of pieces: plain text, Marker and ReferenceList
+    objects. Rendering joins the pieces, so a renumbering only re-renders
+    the markers and lists it touches.
+    """
+
+    def __init__(self, name, text, path=None):
+        self.name = name
+        self.path = path
+        self.pieces = []
+        self.lists = []
+        self.dirty = False
+        self.placeholders = []
+        self.entries = {}
+        self._parse(text)
+
+    def _parse(self, text):
+        position = 0
+        for start, end, heading, entries, placeholders in parse_lists(text) + [
+                (len(text), None, None, None, None)]:
+            for match in MARKER.finditer(text, position, start):
+                self.pieces.append(text[position:match.start()])
+                self.pieces.append(Marker(parse_numbers(match.group(1)), match.group(0)))
+                position = match.end()
+            self.pieces.append(text[position:start])
+            if end is None:
+                break
+            block = ReferenceList(text[start:end], new_only="new" in heading.lower())
+            self.pieces.append(block)
+            self.lists.append(block)
+            self.entries.update(entries)
+            self.placeholders.extend(placeholders)
+            position = end
+
+    def markers(self):
+        return [p for p in self.pieces if isinstance(p, Marker)]
+
+    def cited(self):
+        return {k for marker in self.markers() for k in marker.keys}
+
+    def first_cited(self, manuscript):
+        return {k for k in self.cited() if manuscript.first_section.get(k) is self}
+
+    def text(self):
+        return "".join(p if isinstance(p, str) else p.text for p in self.pieces)
+
+    def locate(self, offset):
+        """(piece index, offset within it) of a character offset in the rendered text."""
+        position = 0
+        for i, piece in enumerate(self.pieces):
+            length = len(piece) if isinstance(piece, str) else len(piece.text)
+            if position + length >= offset and isinstance(piece, str):
+                return i, offset - position
+            position += length
+        raise ValueError(f"offset {offset} is outside {self.name}")
+
+
+class Manuscript:
+    """
+    Citation state of the section drafts. `numbers` holds the number each
+    reference is currently rendered with; renumber() brings it in line
+    with first-appearance order and returns the references that moved.
+    """
+
+    def __init__(self, sections, references=None):
+        self.sections = sections
+        self.references = references or References()
+        self.entries = {}  # key -> reference list text from the drafts
+        self.rendered = {}
+        self.problems = []
+        self.first_section = {}
+        self.numbers = {}
+        self._resolve()
+
+    @classmethod
+    def load(cls, workspace, paths=None):
+        workspace = Path(workspace)
+        paths = paths or [p for p in MANUSCRIPT_ORDER if (workspace / p).exists()]
+        sections = []
+        for name in paths:
+            path = workspace / name
+            sections.append(Section(str(name), path.read_text(encoding='utf-8'), path))
+        with spans.span("citations.load", items=len(sections)):
+            return cls(sections, References.load(workspace))
+
+    def _resolve(self):
+        """Map every marker number to a reference key via the drafts' reference lists."""
+        table = {}
+        for section in self.sections:
+            entries = dict(section.entries)
+            for first, last in section.placeholders:
+                found, source = resolve_placeholder(section.path, first, last) \
+                    if section.path else ({}, None)
+                if not found:
+                    self.problems.append(f"{section.name}: references {first}-{last} not found "
+                                         f"in an earlier version")
+                entries.update(found)
+            for number, text in entries.items():
+                key = self.references.key(text)
+                self.entries.setdefault(key, text)
+                if table.setdefault(number, key) != key:
+                    self.problems.append(f"{section.name}: reference {number} differs from "
+                                         f"the entry numbered {number} in an earlier section")
+        current, conflicted = {}, set()
+        for section in self.sections:
+            for marker in section.markers():
+                keys = []
+                for number in marker.keys:
+                    key = table.get(number)
+                    if key is None:
+                        key = f"missing:{number}"
+                        self.problems.append(f"{section.name}: citation {number} has no "
+                                             f"reference entry")
+                    if current.setdefault(key, number) != number:
+                        conflicted.add(key)
+                    if key not in keys:
+                        keys.append(key)
+                marker.keys = keys
+        for key in conflicted:
+            current[key] = None  # cited under two numbers: every marker needs rewriting
+        self.numbers = current
+
+    def entry(self, key):
+        text = self.rendered.get(key)
+        if text is None:
+            text = self.rendered[key] = \
+                self.references.render(key, self.entries.get(key)) or f"[{key}]"
+        return text
+
+    def numbering(self):
+        """{key: number} by first appearance, and {key: first section}."""
+        numbers, first = {}, {}
+        for section in self.sections:
+            for marker in section.markers():
+                for key in marker.keys:
+                    if key not in numbers:
+                        numbers[key] = len(numbers) + 1
+                        first[key] = section
+        return numbers, first
+
+    def pending(self):
+        """Keys whose rendered number differs from first-appearance order."""
+        numbers, _ = self.numbering()
+        return {k for k, n in numbers.items() if self.numbers.get(k) != n}
+
+    def renumber(self):
+        """Re-render only the markers and lists holding references that moved."""
+        numbers, first = self.numbering()
+        changed = {k for k, n in numbers.items() if self.numbers.get(k) != n}
+        moved_sections = {id(s) for k, s in first.items() if self.first_section.get(k) is not s}
+        self.numbers, self.first_section = numbers, first
+        for section in self.sections:
+            touched = False
+            for marker in section.markers():
+                if changed.intersection(marker.keys):
+                    marker.render(numbers)
+                    touched = True
+            for block in section.lists:
+                if touched or (block.new_only and id(section) in moved_sections) or \
+                        PLACEHOLDER.search(block.text):
+                    block.render(section, self)
+                    touched = True
+            section.dirty = section.dirty or touched
+        return changed
+
+    def _touched(self, sections):
+        for section in sections:
+            for block in section.lists:
+                block.render(section, self)
+            section.dirty = True
+
+    def insert(self, section, offset, keys):
+        """Cite `keys` at a character offset of a section, merging with an adjacent marker."""
+        i, split = section.locate(offset)
+        piece = section.pieces[i]
+        neighbour = None
+        if split == len(piece) and i + 1 < len(section.pieces):
+            neighbour = section.pieces[i + 1]
+        elif split == 0 and i > 0:
+            neighbour = section.pieces[i - 1]
+        if isinstance(neighbour, Marker):
+            neighbour.keys.extend(k for k in keys if k not in neighbour.keys)
+            marker = neighbour
+        else:
+            marker = Marker(list(dict.fromkeys(keys)), "")
+            section.pieces[i:i + 1] = [piece[:split], marker, piece[split:]]
+        changed = self.renumber()
+        marker.render(self.numbers)
+        self._touched([section])
+        return changed
+
+    def remove(self, key):
+        """Drop every citation of `key`; markers left empty disappear."""
+        touched = []
+        for section in self.sections:
+            for i in range(len(section.pieces) - 1, -1, -1):
+                marker = section.pieces[i]
+                if isinstance(marker, Marker) and key in marker.keys:
+                    marker.keys.remove(key)
+                    if marker.keys:
+                        marker.render(self.numbers)
+                    else:
+                        del section.pieces[i]
+                    if section not in touched:
+                        touched.append(section)
+        self.numbers.pop(key, None)
+        changed = self.renumber()
+        self._touched(touched)
+        return changed
+
+    def key_for(self, ref):
+        """Reference key for a DOI, 'id:N' (references.json id) or a current number."""
+        ref = ref.strip()
+        if ref.lower().startswith("id:"):
+            key = self.references.by_id.get(int(ref[3:]))
+            if key is None:
+                raise KeyError(f"no references.json citation with id {ref[3:]}")
+            return key
+        if ref.isdigit():
+            for key, number in self.numbers.items():
+                if number == int(ref):
+                    return key
+            raise KeyError(f"no reference is currently numbered {ref}")
+        if DOI.search(ref):
+            return f"doi:{DOI.search(ref).group(1).lower()}"
+        raise KeyError(f"unrecognized reference {ref!r}")
+
+    def bibliography(self):
+        ordered = sorted((n, k) for k, n in self.numbers.items() if n is not None)
+        lines = [f"{n}. {self.entry(k)}" for n, k in ordered]
+        return "# References\n\n" + "\n\n".join(lines) + "\n"
+
+    def save(self, workspace):
+        """Write drafts with re-rendered citations and the bibliography."""
+        written = []
+        for section in self.sections:
+            if section.dirty and section.path:
+                atomic_write_text(section.path, section.text())
+                section.dirty = False
+                written.append(section.name)
+        atomic_write_text(Path(workspace) / BIBLIOGRAPHY, self.bibliography())
+        return written
+
+
+def write_bibliography(workspace):
+    """Render drafts/references.md from drafts that are already numbered in order."""
+    manuscript = Manuscript.load(workspace)
+    if manuscript.problems:
+        raise RuntimeError(manuscript.problems[0])
+    pending = manuscript.pending()
+    if pending:
+        raise RuntimeError(f"{len(pending)} references are out of order; "
+                           f"run `manuscript_agent citations renumber` first")
+    atomic_write_text(Path(workspace) / BIBLIOGRAPHY, manuscript.bibliography())
+    return len(manuscript.numbers)
+
+
+def synthetic_manuscript(refs=100, words=8000, seed=3):
+    import random
+
+    rng = random.Random(seed)
+    vocabulary = ("tumor immune cell expression signature survival cohort risk model "
+                  "analysis gene pathway infiltration response").split()
+    records = [{"id": i + 1, "authors": "Smith J, Lee K, Wang Q, Patel R", "year": 2000 + i % 25,
+                "title": f"Synthetic study number {i + 1} of {rng.choice(vocabulary)} biology",
+                "journal": "Journal of Synthetic Results", "volume": str(i % 40 + 1),
+                "pages": f"{i + 100}-{i + 110}", "doi": f"10.9999/synthetic.{i + 1}"}
+               for i in range(refs)]
+    references = References(records)
+    sections = []
+    per_section = words // 4
+    cited = 0
+    for s in range(4):
+        chunks = []
+        for w in range(per_section):
+            chunks.append(rng.choice(vocabulary))
+            if w % 35 == 34:
+                numbers = {min(cited + 1, refs)} | {rng.randint(1, max(1, cited))}
+                cited = min(cited + 1, refs)
+                chunks[-1] += f"<sup>{format_numbers(numbers)}</sup>"
+        body = " ".join(chunks)
+        listed = "\n\n".join(f"{r['id']}. {format_record(r)}" for r in records)
+        sections.append((f"section{s}", f"# Section {s}\n\n{body}\n\n## References\n\n"
+                                        f"{listed}\n\n---\n"))
+    return sections, references
+
+
+def benchmark(refs=100, words=8000):
+    """Milliseconds to parse, insert a citation early (shifting every number) and remove it."""
+    results = {"references": refs, "words": words}
+    texts, references = synthetic_manuscript(refs, words)
+    start = time.perf_counter()
+    sections = [Section(name, text) for name, text in texts]
+    manuscript = Manuscript(sections, references)
+    results["parse_ms"] = round((time.perf_counter() - start) * 1000, 2)
+    results["markers"] = sum(len(s.markers()) for s in sections)
+    start = time.perf_counter()
+    manuscript.renumber()
+    results["renumber_ms"] = round((time.perf_counter() - start) * 1000, 2)
+    extra = "doi:10.9999/inserted"
+    references.records[extra] = {"authors": "New A", "title": "Inserted study", "year": 2025}
+    start = time.perf_counter()
+    changed = manuscript.insert(sections[0], sections[0].text().find(" ", 40), [extra])
+    results["insert_ms"] = round((time.perf_counter() - start) * 1000, 2)
+    results["insert_moved"] = len(changed)
+    start = time.perf_counter()
+    changed = manuscript.remove(extra)
+    results["remove_ms"] = round((time.perf_counter() - start) * 1000, 2)
+    results["remove_moved"] = len(changed)
+    start = time.perf_counter()
+    text = "".join(s.text() for s in sections) + manuscript.bibliography()
+    results["render_ms"] = round((time.perf_counter() - start) * 1000, 2)
+    results["chars"] = len(text)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="manuscript_agent citations",
+                                     description=__doc__.strip().splitlines()[0])
+    parser.add_argument("action", nargs="?", choices=["check", "renumber", "insert", "remove"])
+    parser.add_argument("workspace", nargs="?", help="manuscript workspace directory")
+    parser.add_argument("draft", nargs="?", help="section draft to cite in (insert)")
+    parser.add_argument("--drafts", nargs="+",
+                        help="section drafts in manuscript order (default: the final drafts)")
+    parser.add_argument("--after", help="insert the citation right after this text")
+    parser.add_argument("--ref", help="DOI, 'id:N' (references.json id) or current number")
+    parser.add_argument("--dry-run", action="store_true", help="report without writing")
+    parser.add_argument("--bench", type=int, metavar="REFS",
+                        help="time renumbering a synthetic 8,000-word manuscript with REFS "
+                             "references")
+    args = parser.parse_args(argv)
+
+    if args.bench:
+        for name, value in benchmark(args.bench).items():
+            print(f"{name:>14}: {value}")
+        return 0
+    if not args.action or not args.workspace:
+        parser.error("action and workspace are required unless --bench is given")
+    if args.action in ("insert", "remove") and not args.ref:
+        parser.error(f"{args.action} needs --ref")
+    if args.action == "insert" and (not args.draft or not args.after):
+        parser.error("insert needs a draft and --after")
+
+    with spans.span("citations") as trace:
+        manuscript = Manuscript.load(args.workspace, args.drafts)
+        for problem in manuscript.problems:
+            print(f"✗ {problem}")
+        trace.add(items=len(manuscript.numbers))
+        if args.action == "check":
+            pending = manuscript.pending()
+            print(f"{len(manuscript.numbers)} references cited in {len(manuscript.sections)} "
+                  f"drafts; {len(pending)} out of first-appearance order")
+            return 1 if manuscript.problems or pending else 0
+        if manuscript.problems:
+            print("✗ Fix the reference lists before renumbering")
+            return 1
+
+        if args.ref:
+            try:
+                key = manuscript.key_for(args.ref)
+            except KeyError as e:
+                parser.error(e.args[0])
+        start = time.perf_counter()
+        if args.action == "renumber":
+            changed = manuscript.renumber()
+        elif args.action == "insert":
+            section = next((s for s in manuscript.sections if Path(s.name) == Path(args.draft)),
+                           None)
+            if section is None:
+                parser.error(f"{args.draft} is not one of the section drafts")
+            at = section.text().find(args.after)
+            if at < 0:
+                parser.error(f"{args.after!r} not found in {args.draft}")
+            changed = manuscript.insert(section, at + len(args.after), [key])
+        else:
+            changed = manuscript.remove(key)
+        elapsed = time.perf_counter() - start
+
+        dirty = [s.name for s in manuscript.sections if s.dirty]
+        print(f"✓ {len(changed)} references renumbered in {elapsed * 1000:.2f} ms; "
+              f"{len(manuscript.numbers)} in the bibliography")
+        if args.dry_run:
+            for name in dirty:
+                print(f"  would rewrite {name}")
+            return 0
+        for name in manuscript.save(args.workspace):
+            print(f"  rewrote {name}")
+        print(f"  wrote {BIBLIOGRAPHY}")
+    return 0
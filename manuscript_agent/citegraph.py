@@ -0,0 +1,458 @@
+"""
+Citation Graph Store
+On-disk graph of papers and the references between them, shared by every
+workspace. Paper identifiers (DOI, PMID, OpenAlex id) are interned to dense
+integer node ids, with all identifiers of one paper resolving to the same
+node, and cites edges are kept as CSR adjacency arrays in both directions
+(references and citing papers), memory-mapped on load. The search and
+validation layers feed it from every OpenAlex, PubMed and Crossref record
+they fetch. Additions are buffered and merged into the arrays on save,
+under a file lock so concurrent runs do not lose each other's edges.
+
+Expansion walks k hops out from the papers in a workspace's
+references.json and ranks what it reaches by co-citation (cited together
+with the seeds), bibliographic coupling (shares references with them) and
+direct links, writing literature/graph_candidates.json.
+
+The default location is ~/.cache/manuscript_agent/citation_graph/
+(override with MANUSCRIPT_AGENT_GRAPH or --path).
+
+    python -m manuscript_agent citegraph stats
+    python -m manuscript_agent citegraph expand manuscript_11072333 --hops 2 --limit 20
+    python -m manuscript_agent citegraph --bench 20000
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+from manuscript_agent.cache import normalize_doi
+from manuscript_agent.checkpoint import atomic_write_json
+
+try:
+    import fcntl
+except ImportError:  # Windows: saves from concurrent processes are not serialised
+    fcntl = None
+
+GRAPH_FILE = "graph.json"
+LOCK_FILE = ".lock"
+ARRAYS = ("cites_ptr", "cites_idx", "cited_ptr", "cited_idx")
+CANDIDATES_FILE = "graph_candidates.json"
+# Preferred primary identifier of a node, best first
+KEY_ORDER = ("doi", "pmid", "openalex")
+# A direct citation to or from a seed counts as much as this many shared neighbours.
+DIRECT_WEIGHT = 2.0
+
+
+def default_path():
+    return Path(os.environ.get("MANUSCRIPT_AGENT_GRAPH",
+                               Path.home() / ".cache" / "manuscript_agent" / "citation_graph"))
+
+
+def identifier(kind, value):
+    """Interned key for an identifier: normalized DOIs as they are, others prefixed by kind."""
+    value = str(value or "").strip()
+    if not value:
+        return None
+    if kind == "doi":
+        return normalize_doi(value) or None
+    if kind == "openalex":
+        return "openalex:" + value.rsplit("/", 1)[-1].upper()
+    return f"{kind}:{value}"
+
+
+def key_kind(key):
+    return key.split(":", 1)[0] if ":" in key.split("/", 1)[0] else "doi"
+
+
+def gather(ptr, idx, nodes):
+    """Concatenation of the CSR rows of `nodes`."""
+    starts = ptr[nodes]
+    lengths = ptr[nodes + 1] - starts
+    total = int(lengths.sum())
+    if not total:
+        return np.zeros(0, dtype=np.int32)
+    offsets = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths) + np.arange(total)
+    return np.asarray(idx[offsets])
+
+
+def csr(rows, cols, size):
+    """(indptr, indices) for edges rows -> cols, already sorted by (row, col)."""
+    ptr = np.zeros(size + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=size), out=ptr[1:])
+    return ptr, cols.astype(np.int32)
+
+
+@contextmanager
+def file_lock(path):
+    with open(path, 'a+') as f:
+        if fcntl:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class CitationGraph:
+    """Interned paper nodes with cites/cited-by CSR arrays under `root`."""
+
+    def __init__(self, root=None):
+        self.root = Path(root) if root else default_path()
+        self.lock = threading.Lock()
+        self.pending_aliases = []
+        self.pending_edges = []
+        self.pending_info = {}
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.root / GRAPH_FILE, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            meta = {}
+        self.generation = meta.get("generation", 0)
+        self.keys = meta.get("keys", [])
+        self.ids = meta.get("aliases", {})
+        self.info = {int(node): data for node, data in meta.get("info", {}).items()}
+        for name in ARRAYS:
+            path = self.root / f"{name}.{self.generation}.npy"
+            if self.generation and path.exists():
+                value = np.load(path, mmap_mode="r")
+            elif name.endswith("_ptr"):
+                value = np.zeros(len(self.keys) + 1, dtype=np.int64)
+            else:
+                value = np.zeros(0, dtype=np.int32)
+            setattr(self, name, value)
+
+    @property
+    def size(self):
+        return len(self.keys)
+
+    @property
+    def edges(self):
+        return len(self.cites_idx)
+
+    # Population
+
+    def add_paper(self, doi=None, pmid=None, openalex=None, **info):
+        """Register a paper under all its identifiers; returns its key (None without any)."""
+        keys = [key for key in (identifier("doi", doi), identifier("pmid", pmid),
+                                identifier("openalex", openalex)) if key]
+        if not keys:
+            return None
+        with self.lock:
+            self.pending_aliases.extend((keys[0], other) for other in keys[1:])
+            self.pending_info.setdefault(keys[0], {}).update(
+                (name, value) for name, value in info.items() if value not in (None, ""))
+        return keys[0]
+
+    def add_citations(self, citing, cited):
+        """Record that the paper keyed `citing` cites each key in `cited`."""
+        if not citing:
+            return
+        with self.lock:
+            self.pending_edges.extend((citing, key) for key in cited if key and key != citing)
+
+    @property
+    def dirty(self):
+        return bool(self.pending_aliases or self.pending_edges or self.pending_info)
+
+    def save(self):
+        """Merge buffered additions into the on-disk arrays; returns False if there were none."""
+        with self.lock:
+            aliases, edges, info = self.pending_aliases, self.pending_edges, self.pending_info
+            self.pending_aliases, self.pending_edges, self.pending_info = [], [], {}
+        if not (aliases or edges or info):
+            return False
+        self.root.mkdir(parents=True, exist_ok=True)
+        with file_lock(self.root / LOCK_FILE):
+            # Another process may have saved since this one loaded
+            self.load()
+            self.merge(aliases, edges, info)
+        return True
+
+    def merge(self, aliases, edges, info):
+        keys, ids = list(self.keys), dict(self.ids)
+        old_size = len(keys)
+
+        def intern(key):
+            node = ids.get(key)
+            if node is None:
+                node = ids[key] = len(keys)
+                keys.append(key)
+            return node
+
+        parent = {}
+
+        def find(node):
+            while parent.get(node, node) != node:
+                parent[node] = parent.get(parent[node], parent[node])
+                node = parent[node]
+            return node
+
+        for first, second in aliases:
+            a, b = find(intern(first)), find(intern(second))
+            if a != b:
+                parent[max(a, b)] = min(a, b)
+        for key in info:
+            intern(key)
+        pairs = np.array([(intern(a), intern(b)) for a, b in edges], dtype=np.int64).reshape(-1, 2)
+
+        # Identifiers found to name one paper collapse onto its lowest node id
+        size = len(keys)
+        roots = np.arange(size)
+        for node in parent:
+            roots[node] = find(node)
+        keep = roots == np.arange(size)
+        remap = (np.cumsum(keep) - 1)[roots]
+        new_keys = [key for key, kept in zip(keys, keep) if kept]
+        for node in parent:
+            target = remap[node]
+            if KEY_ORDER.index(key_kind(keys[node])) < KEY_ORDER.index(key_kind(new_keys[target])):
+                new_keys[target] = keys[node]
+        merged_info = {}
+        for node, data in sorted(self.info.items()):
+            merged_info.setdefault(int(remap[node]), {}).update(data)
+        for key, data in info.items():
+            merged_info.setdefault(int(remap[ids[key]]), {}).update(data)
+        merged_info = {node: data for node, data in merged_info.items() if data}
+
+        rows = np.repeat(np.arange(old_size), np.diff(self.cites_ptr)).astype(np.int64)
+        rows = np.concatenate([rows, pairs[:, 0]])
+        cols = np.concatenate([np.asarray(self.cites_idx, dtype=np.int64), pairs[:, 1]])
+        rows, cols = remap[rows], remap[cols]
+        count = len(new_keys)
+        codes = np.sort((rows * count + cols)[rows != cols])
+        codes = codes[np.r_[True, codes[1:] != codes[:-1]]] if len(codes) else codes
+        rows, cols = codes // count, codes % count
+        arrays = dict(zip(("cites_ptr", "cites_idx"), csr(rows, cols, count)))
+        codes = np.sort(cols * count + rows)
+        arrays.update(zip(("cited_ptr", "cited_idx"), csr(codes // count, codes % count, count)))
+
+        generation = self.generation + 1
+        for name, value in arrays.items():
+            fd, tmp = tempfile.mkstemp(dir=self.root, prefix=f".{name}.", suffix=".npy")
+            with os.fdopen(fd, 'wb') as f:
+                np.save(f, value)
+            os.replace(tmp, self.root / f"{name}.{generation}.npy")
+        atomic_write_json(self.root / GRAPH_FILE, {
+            "generation": generation, "nodes": count, "edges": int(len(codes)),
+            "keys": new_keys,
+            "aliases": {key: int(remap[node]) for key, node in ids.items()},
+            "info": {str(node): data for node, data in sorted(merged_info.items())},
+        }, indent=None)
+        # Readers that loaded the previous generation may still be mapping it
+        for path in self.root.glob("*.npy"):
+            stem = path.name.rsplit(".", 2)
+            if len(stem) == 3 and stem[1].isdigit() and int(stem[1]) < generation - 1:
+                path.unlink(missing_ok=True)
+        self.load()
+
+    # Queries
+
+    def node(self, doi=None, pmid=None, openalex=None):
+        for key in (identifier("doi", doi), identifier("pmid", pmid),
+                    identifier("openalex", openalex)):
+            if key in self.ids:
+                return self.ids[key]
+        return None
+
+    def references(self, node):
+        return np.asarray(self.cites_idx[self.cites_ptr[node]:self.cites_ptr[node + 1]])
+
+    def citing(self, node):
+        return np.asarray(self.cited_idx[self.cited_ptr[node]:self.cited_ptr[node + 1]])
+
+    def neighborhood(self, seeds, hops=2):
+        """Distance (in links, either direction) from `seeds` for every node; -1 beyond `hops`."""
+        distance = np.full(self.size, -1, dtype=np.int16)
+        frontier = np.unique(np.asarray(seeds, dtype=np.int64))
+        distance[frontier] = 0
+        for hop in range(1, hops + 1):
+            if not len(frontier):
+                break
+            reached = np.concatenate([gather(self.cites_ptr, self.cites_idx, frontier),
+                                      gather(self.cited_ptr, self.cited_idx, frontier)])
+            frontier = np.unique(reached)
+            frontier = frontier[distance[frontier] < 0]
+            distance[frontier] = hop
+        return distance
+
+    def rank(self, seeds, hops=2, limit=20):
+        """
+        Nodes within `hops` of `seeds` (seeds excluded), best first:
+        [{"node", "key", "score", "co_citations", "coupling", "direct_links",
+        "distance", **info}]. co_citations counts papers citing both the node
+        and a seed, coupling the seed references the node also cites.
+        """
+        seeds = np.unique(np.asarray(seeds, dtype=np.int64))
+        if not len(seeds) or not self.size:
+            return []
+        size = self.size
+        distance = self.neighborhood(seeds, hops)
+        citers = np.unique(gather(self.cited_ptr, self.cited_idx, seeds))
+        co_cited = np.bincount(gather(self.cites_ptr, self.cites_idx, citers), minlength=size)
+        shared = np.unique(gather(self.cites_ptr, self.cites_idx, seeds))
+        coupling = np.bincount(gather(self.cited_ptr, self.cited_idx, shared), minlength=size)
+        direct = np.bincount(np.concatenate([gather(self.cites_ptr, self.cites_idx, seeds),
+                                             gather(self.cited_ptr, self.cited_idx, seeds)]),
+                             minlength=size)
+        score = co_cited + coupling + DIRECT_WEIGHT * direct
+        score[distance < 0] = 0
+        score[seeds] = 0
+        order = np.argsort(-score, kind="stable")[:limit]
+        return [dict(self.info.get(int(node), {}), node=int(node), key=self.keys[node],
+                     score=float(score[node]), co_citations=int(co_cited[node]),
+                     coupling=int(coupling[node]), direct_links=int(direct[node]),
+                     distance=int(distance[node]))
+                for node in order if score[node] > 0]
+
+    def identifiers(self, nodes):
+        """{node: {"doi", "pmid", "openalex"}} for `nodes` (one pass over the aliases)."""
+        wanted = {int(node): {} for node in nodes}
+        for key, node in self.ids.items():
+            if node in wanted:
+                kind = key_kind(key)
+                wanted[node].setdefault(kind, key if kind == "doi" else key.split(":", 1)[1])
+        return wanted
+
+
+def workspace_seeds(graph, workspace):
+    """Node ids of the workspace's references.json citations known to the graph."""
+    path = Path(workspace) / "references.json"
+    if not path.exists():
+        return [], 0
+    with open(path, 'r', encoding='utf-8') as f:
+        citations = json.load(f).get("citations", [])
+    nodes = [graph.node(doi=c.get("doi"), pmid=c.get("pmid")) for c in citations]
+    return [node for node in nodes if node is not None], len(citations)
+
+
+def expand_workspace(graph, workspace, hops=2, limit=20):
+    """Rank graph candidates around the workspace's references and write them out."""
+    seeds, total = workspace_seeds(graph, workspace)
+    ranked = graph.rank(seeds, hops, limit)
+    ids = graph.identifiers(item["node"] for item in ranked)
+    papers = []
+    for item in ranked:
+        found = ids[item["node"]]
+        papers.append({
+            "title": item.get("title", ""),
+            "year": item.get("year"),
+            "citations": item.get("citations", 0),
+            "doi": found.get("doi", ""),
+            "pmid": found.get("pmid", ""),
+            "openalex": found.get("openalex", ""),
+            "graph_score": item["score"],
+            "co_citations": item["co_citations"],
+            "coupling": item["coupling"],
+            "direct_links": item["direct_links"],
+            "distance": item["distance"],
+            "source": "citation_graph",
+        })
+    result = {"seeds": len(seeds), "references": total, "hops": hops,
+              "timestamp": datetime.now().isoformat(), "total_results": len(papers),
+              "papers": papers}
+    atomic_write_json(Path(workspace) / "literature" / CANDIDATES_FILE, result)
+    return result
+
+
+def synthetic_graph(graph, count, references=25, seed=11):
+    """Feed `count` papers citing earlier ones (older papers more often) into `graph`."""
+    rng = np.random.default_rng(seed)
+    for i in range(count):
+        key = graph.add_paper(doi=f"10.5555/graph.{i}", openalex=f"W{i}",
+                              title=f"Synthetic paper {i}", year=2000 + i * 25 // count)
+        if i:
+            cited = np.unique((i * rng.random(min(i, references)) ** 2).astype(int))
+            graph.add_citations(key, [f"10.5555/graph.{j}" for j in cited])
+
+
+def benchmark(count=20000):
+    """Build, load, incremental save and ranking timings on a synthetic graph."""
+    results = {"papers": count}
+    with tempfile.TemporaryDirectory() as directory:
+        graph = CitationGraph(directory)
+        start = time.perf_counter()
+        synthetic_graph(graph, count)
+        results["ingest_s"] = round(time.perf_counter() - start, 3)
+        start = time.perf_counter()
+        graph.save()
+        results["save_s"] = round(time.perf_counter() - start, 3)
+        results["edges"] = graph.edges
+        results["edges_per_s"] = round(graph.edges / (results["ingest_s"] + results["save_s"]))
+        results["disk_mb"] = round(sum(p.stat().st_size
+                                       for p in Path(directory).iterdir()) / 1e6, 2)
+        start = time.perf_counter()
+        graph = CitationGraph(directory)
+        results["load_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        # One more lookup's worth of papers, as a search run adds
+        for i in range(count, count + 50):
+            key = graph.add_paper(doi=f"10.5555/graph.{i}")
+            graph.add_citations(key, [f"10.5555/graph.{j}" for j in range(i - 30, i)])
+        start = time.perf_counter()
+        graph.save()
+        results["incremental_save_s"] = round(time.perf_counter() - start, 3)
+        rng = np.random.default_rng(3)
+        seeds = [rng.choice(graph.size, 20, replace=False) for _ in range(20)]
+        for hops in (1, 2, 3):
+            start = time.perf_counter()
+            reached = [int((graph.neighborhood(s, hops) >= 0).sum()) for s in seeds]
+            results[f"hop{hops}_ms"] = round((time.perf_counter() - start) * 50, 2)
+            results[f"hop{hops}_nodes"] = sum(reached) // len(reached)
+        start = time.perf_counter()
+        for s in seeds:
+            graph.rank(s, 2, 20)
+        results["rank_ms"] = round((time.perf_counter() - start) * 50, 2)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="manuscript_agent citegraph",
+                                     description=__doc__.strip().splitlines()[0])
+    parser.add_argument("action", nargs="?", choices=["stats", "expand"])
+    parser.add_argument("workspace", nargs="?", help="manuscript workspace directory (expand)")
+    parser.add_argument("--path", default=str(default_path()),
+                        help="graph directory (default: %(default)s)")
+    parser.add_argument("--hops", type=int, default=2, help="expansion radius (default: 2)")
+    parser.add_argument("--limit", type=int, default=20, help="candidates to keep (default: 20)")
+    parser.add_argument("--bench", type=int, metavar="PAPERS",
+                        help="benchmark on a synthetic graph of PAPERS papers")
+    args = parser.parse_args(argv)
+
+    if args.bench:
+        for name, value in benchmark(args.bench).items():
+            print(f"{name:>20}: {value}")
+        return 0
+    if not args.action:
+        parser.error("action is required unless --bench is given")
+
+    graph = CitationGraph(args.path)
+    if args.action == "stats":
+        print(f"{graph.root}: {graph.size} papers, {graph.edges} citations, "
+              f"{len(graph.ids)} identifiers, generation {graph.generation}")
+        return 0
+    if not args.workspace:
+        parser.error("expand needs a workspace")
+    result = expand_workspace(graph, args.workspace, args.hops, args.limit)
+    if not result["seeds"]:
+        print(f"✗ None of the {result['references']} references are in the graph yet "
+              f"(it fills as literature lookups run)")
+        return 1
+    print(f"✓ {result['total_results']} candidates within {args.hops} hops of "
+          f"{result['seeds']}/{result['references']} references")
+    for paper in result["papers"]:
+        label = paper["doi"] or paper["pmid"] or paper["openalex"]
+        print(f"  {paper['graph_score']:>6.1f}  co-cited {paper['co_citations']:>3}  "
+              f"coupled {paper['coupling']:>3}  {label}  {paper['title'][:60]}")
+    return 0
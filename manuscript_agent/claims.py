@@ -0,0 +1,458 @@
+"""
+Statistical Claim Consistency
+Indexes every numeric claim (P values, hazard ratios, AUCs, correlations,
+percentages and counts such as "84,837 cells") in the drafts and figure
+captions with its statistic type, value, figure panel, file and offset,
+and cross-checks the claims against the structured_data recorded for
+those panels in image_analysis.json.
+
+Claims are attributed to the panels referenced in the same sentence of a
+draft (or the same paragraph when the sentence has none) and to the panel
+labels of a caption. Within a sentence or caption segment, claims are
+paired with facts of the same type for those panels, and a Venn or UpSet
+set's total with the sum of its regions (the Figure 3A caption's 3,067
+genes = 2,890 unique + 177 shared). A claim left without an equal fact
+while facts of its type remain unpaired is a mismatch (the Results
+draft's 807 genes against 2,890/623 in the JSON). Claims with nothing to
+compare against are reported as unverified.
+
+    python -m manuscript_agent claims check manuscript_11072333
+    python -m manuscript_agent claims index manuscript_11072333 -o claims.json
+    python -m manuscript_agent claims check manuscript_11072333 --bench 100
+"""
+
+import argparse
+import bisect
+import json
+import re
+import time
+from pathlib import Path
+
+from manuscript_agent import spans
+from manuscript_agent.checkpoint import atomic_write_json
+from manuscript_agent.quality import body_text
+
+CAPTIONS = "figure_captions.md"
+ANALYSIS = "image_analysis.json"
+# Nouns a count claim can be about, longest first so "cell types" isn't read as "cells"
+COUNT_UNITS = r"cell types?|(?:cell )?clusters?|cells?|genes?|samples?|patients?|pathways?|modules?"
+# structured_data keys whose integers count a known unit; other integers
+# (Venn set sizes, group sizes) may back a count of any unit
+KEY_UNITS = {"total_cells": "cell", "samples": "sample", "clusters": "cluster",
+             "cell_clusters": "cluster", "cell_types": "cell type", "genes_count": "gene",
+             "cell_types_plotted": "cell type"}
+SKIP_KEYS = ("threshold", "range", "months", "time_points")
+# Venn/UpSet keys whose integers are parts of a set: a set's total is the
+# sum of its parts ("3,067 genes" = 2,890 unique + 177 shared)
+PART_KEYS = ("unique", "intersection")
+# Counts spelled out, as at the start of a sentence ("Thirteen genes were ...")
+NUMBER_WORDS = {word: value for value, word in enumerate(
+    "one two three four five six seven eight nine ten eleven twelve thirteen fourteen "
+    "fifteen sixteen seventeen eighteen nineteen twenty".split(), 1)}
+
+CLAIM = re.compile(
+    r"(?P<p>(?<![\w-])\*?P\*?(?:[- ]values?)?\s*(?P<pcmp>[<=>≤≥])\s*"
+    r"(?P<pv>\d*\.?\d+(?:[eE]-?\d+)?))"
+    r"|(?P<hr>\b(?:HR|hazard ratio)\s*(?:=|:|of)?\s*(?P<hrv>\d+\.\d+))"
+    r"|(?P<corr>\bcorrelation(?: coefficient)?\s*(?:=|:|of)\s*(?P<corrv>-?\d*\.\d+))"
+    r"|(?P<auc>\bAUC\b)"
+    r"|(?P<pct>(?<![\w.,])(?P<pctv>\d+(?:\.\d+)?)\s?%)"
+    r"|(?P<count>(?<![\w.,-])(?P<countv>\d{1,3}(?:,\d{3})+|\d+|\b(?:"
+    + "|".join(NUMBER_WORDS) + r")\b)\s+"
+    r"(?:[A-Za-z][\w-]*\s+){0,3}?(?P<unit>" + COUNT_UNITS + r")"
+    r"(?![\w-]|\s+(?:types?|clusters?|sets?)\b))",
+    re.I)
+DECIMAL = re.compile(r"(?<![\w.])0?\.\d+")
+SENTENCE = re.compile(r"(?<=[.!?])\s+(?=[A-Z(*])")
+FIGURE_REF = re.compile(r"\bFig(?:ure)?s?\.?\s*(\d+)\s*((?:[A-Z](?:\s*[-–]\s*[A-Z])?"
+                        r"(?:\s*,\s*(?=[A-Z]\b|[A-Z]\s*[-–]))?)*)")
+CAPTION_FIGURE = re.compile(r"^#+\s*Figure\s+(\d+)", re.M)
+PANEL_LABEL = re.compile(r"(?:^|(?<=[.;]\s))\(([A-Z](?:\s*[-–]\s*[A-Z])?)\)\s", re.M)
+COMPARATORS = {"≤": "<", "≥": ">"}
+
+
+class Claim:
+    def __init__(self, kind, value, unit=None, comparator="=", decimals=0, text="",
+                 file=None, offset=None, line=None, panels=()):
+        self.kind = kind
+        self.value = value
+        self.unit = unit
+        self.comparator = comparator
+        self.decimals = decimals
+        self.text = text
+        self.file = file
+        self.offset = offset
+        self.line = line
+        self.panels = tuple(panels)
+        self.group = None
+        self.inferred = False  # panels taken from the paragraph, not the claim's sentence
+        self.part = False  # a fact sizing part of a set (Venn/UpSet region)
+        self.partial = False  # one of an UpSet plot's bars, which needn't cover every set
+        self.status = "unverified"
+        self.expected = []
+
+    def record(self):
+        return {"type": self.kind, "value": self.value, "unit": self.unit,
+                "comparator": self.comparator, "text": self.text, "file": self.file,
+                "offset": self.offset, "line": self.line, "panels": list(self.panels),
+                "status": self.status, "expected": self.expected}
+
+    def describe(self):
+        unit = f" {self.unit}s" if self.unit else ""
+        return f"{self.text!r} ({self.kind}{unit})"
+
+
+def parse_number(text):
+    """(value, decimal places) for '84,837', '0.00034' or '1e-5'."""
+    text = text.replace(",", "")
+    if text.isdigit():
+        return int(text), 0
+    decimals = len(text.split(".", 1)[1]) if "." in text and "e" not in text.lower() else 0
+    return float(text), decimals
+
+
+def singular(unit):
+    """'cell type', 'cluster', 'gene' for the matched count noun."""
+    unit = unit.lower().rstrip("s")
+    return "cluster" if unit.endswith("cluster") else unit
+
+
+def number_claim(kind, number, **fields):
+    value, decimals = parse_number(number)
+    return Claim(kind, value, decimals=decimals, **fields)
+
+
+def extract(text, **where):
+    """Claims in `text` in order, one scan; `where` sets file/panels on each claim."""
+    matches = list(CLAIM.finditer(text))
+    claims = []
+    for i, match in enumerate(matches):
+        kind = match.lastgroup
+        if kind == "auc":
+            # 'AUC values ... were 0.67, 0.69, and 0.72': decimals up to the next claim
+            end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
+            sentence_end = SENTENCE.search(text, match.end())
+            end = min(end, sentence_end.start() if sentence_end else len(text))
+            for decimal in DECIMAL.finditer(text, match.end(), end):
+                claim = number_claim("auc", decimal.group(0), text=decimal.group(0),
+                                     offset=decimal.start())
+                claims.append(claim)
+            continue
+        if kind == "p":
+            comparator = COMPARATORS.get(match.group("pcmp"), match.group("pcmp"))
+            claim = number_claim("p", match.group("pv"), comparator=comparator)
+        elif kind == "hr":
+            claim = number_claim("hr", match.group("hrv"))
+        elif kind == "corr":
+            claim = number_claim("correlation", match.group("corrv"))
+        elif kind == "pct":
+            claim = number_claim("percent", match.group("pctv"))
+        else:
+            number = match.group("countv")
+            unit = singular(match.group("unit"))
+            if number.lower() in NUMBER_WORDS:
+                claim = Claim("count", NUMBER_WORDS[number.lower()], unit=unit)
+            else:
+                claim = number_claim("count", number, unit=unit)
+        claim.text = match.group(0)
+        claim.offset = match.start()
+        claims.append(claim)
+    for claim in claims:
+        for name, value in where.items():
+            setattr(claim, name, value)
+    return claims
+
+
+def expand_panels(figure, letters):
+    """['5D', '5E'] for (5, 'D, E'); ['2A', '2B', '2C', '2D'] for (2, 'A-D'); ['3'] for (3, '')."""
+    panels = []
+    for part in re.split(r"\s*,\s*", letters.strip()):
+        if not part:
+            continue
+        bounds = re.split(r"\s*[-–]\s*", part)
+        for code in range(ord(bounds[0]), ord(bounds[-1]) + 1):
+            panels.append(f"{figure}{chr(code)}")
+    return panels or [str(figure)]
+
+
+def walk(data, path=()):
+    if isinstance(data, dict):
+        for key, value in data.items():
+            yield from walk(value, path + (str(key),))
+    elif isinstance(data, list):
+        for value in data:
+            yield from walk(value, path)
+    else:
+        yield path, data
+
+
+def panel_facts(structured):
+    """Typed facts (as Claims) from one panel's structured_data."""
+    facts = []
+    for path, value in walk(structured):
+        keys = "/".join(path).lower()
+        key = path[-1].lower() if path else ""
+        if isinstance(value, bool) or any(skip in keys for skip in SKIP_KEYS):
+            continue
+        if isinstance(value, str):
+            facts.extend(extract(value))
+            continue
+        if not isinstance(value, (int, float)):
+            continue
+        decimals = len(repr(value).split(".", 1)[1]) if isinstance(value, float) else 0
+        if "auc" in keys:
+            facts.append(Claim("auc", value, decimals=decimals))
+        elif "correlation" in keys:
+            facts.append(Claim("correlation", value, decimals=decimals))
+        elif "percent" in key:
+            facts.append(Claim("percent", value, decimals=decimals))
+        elif key in ("p", "p_value", "pvalue"):
+            facts.append(Claim("p", value, decimals=decimals))
+        elif isinstance(value, int):
+            fact = Claim("count", value, unit=KEY_UNITS.get(key))
+            fact.part = any(part in keys for part in PART_KEYS)
+            fact.partial = "intersections" in keys
+            facts.append(fact)
+    for fact in facts:
+        fact.text = fact.text or str(fact.value)
+    return facts
+
+
+def load_facts(workspace):
+    """{panel id: [facts]} plus figure-level ids ('3') holding every panel's facts."""
+    path = Path(workspace) / ANALYSIS
+    if not path.exists():
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        analysis = json.load(f)
+    facts = {}
+    for figure in analysis.get("figures", []):
+        number = str(figure.get("figure_number"))
+        for subplot in figure.get("subplots", []):
+            found = panel_facts(subplot.get("structured_data") or {})
+            facts[subplot["subplot_id"]] = found
+            facts.setdefault(number, []).extend(found)
+    return facts
+
+
+def line_starts(text):
+    starts = [0]
+    starts.extend(m.end() for m in re.finditer("\n", text))
+    return starts
+
+
+def draft_claims(text, name):
+    """Claims of a draft, each attributed to the figure panels of its sentence."""
+    claims = []
+    starts = line_starts(text)
+    position = 0
+    for paragraph in re.split(r"(\n\s*\n)", body_text(text)):
+        if paragraph.strip() and not paragraph.lstrip().startswith("#"):
+            refs = [p for m in FIGURE_REF.finditer(paragraph)
+                    for p in expand_panels(m.group(1), m.group(2))]
+            sentence_start = 0
+            for sentence in SENTENCE.split(paragraph):
+                at = paragraph.index(sentence, sentence_start)
+                sentence_start = at + len(sentence)
+                panels = [p for m in FIGURE_REF.finditer(sentence)
+                          for p in expand_panels(m.group(1), m.group(2))]
+                for claim in extract(sentence, file=name, panels=panels or refs):
+                    claim.offset += position + at
+                    claim.group = (name, position + at)
+                    claim.inferred = not panels
+                    claims.append(claim)
+        position += len(paragraph)
+    for claim in claims:
+        claim.line = bisect.bisect_right(starts, claim.offset)
+    return claims
+
+
+def caption_claims(text, name):
+    """Claims of the figure captions, attributed to the (A)/(A-C) panel labels."""
+    claims = []
+    starts = line_starts(text)
+    body = body_text(text)
+    headings = list(CAPTION_FIGURE.finditer(body))
+    for i, heading in enumerate(headings):
+        figure = heading.group(1)
+        end = headings[i + 1].start() if i + 1 < len(headings) else len(body)
+        rule = body.find("\n---", heading.end(), end)  # technical notes follow a rule
+        end = rule if rule >= 0 else end
+        block_start = heading.end()
+        block = body[block_start:end]
+        labels = list(PANEL_LABEL.finditer(block))
+        segments = [(0, labels[0].start() if labels else len(block), [figure])]
+        for j, label in enumerate(labels):
+            segment_end = labels[j + 1].start() if j + 1 < len(labels) else len(block)
+            segments.append((label.end(), segment_end, expand_panels(figure, label.group(1))))
+        for start, segment_end, panels in segments:
+            for claim in extract(block[start:segment_end], file=name, panels=panels):
+                claim.offset += block_start + start
+                claim.group = (name, block_start + start)
+                claims.append(claim)
+    for claim in claims:
+        claim.line = bisect.bisect_right(starts, claim.offset)
+    return claims
+
+
+def consistent(claim, fact):
+    """Whether a claim agrees with a fact at the claim's stated precision."""
+    tolerance = 0.5 * 10 ** -claim.decimals if claim.decimals else 0.5
+    if claim.kind == "count":
+        tolerance = 0
+    if claim.comparator == "=" and fact.comparator == "=":
+        return abs(claim.value - fact.value) <= tolerance
+    if claim.comparator == fact.comparator:
+        return abs(claim.value - fact.value) <= tolerance
+    if claim.comparator == "<" and fact.comparator == "=":
+        return fact.value < claim.value
+    if claim.comparator == ">" and fact.comparator == "=":
+        return fact.value > claim.value
+    if claim.comparator == "=" and fact.comparator == "<":
+        return claim.value < fact.value
+    if claim.comparator == "=" and fact.comparator == ">":
+        return claim.value > fact.value
+    return False
+
+
+def comparable(claim, fact):
+    if claim.kind != fact.kind:
+        return False
+    if claim.kind == "count":
+        return fact.unit is None or claim.unit is None or fact.unit == claim.unit
+    return True
+
+
+def cross_check(claims, facts):
+    """
+    Pair claims with facts per sentence/caption segment and set each
+    claim's status to matched, mismatch or unverified.
+    """
+    groups = {}
+    for claim in claims:
+        groups.setdefault(claim.group, []).append(claim)
+    for members in groups.values():
+        pool = []
+        seen = set()
+        for panel in dict.fromkeys(p for c in members for p in c.panels):
+            for fact in facts.get(panel, []):
+                if id(fact) not in seen:
+                    seen.add(id(fact))
+                    pool.append(fact)
+        pool.sort(key=lambda f: f.part)  # a set part only backs what nothing else does
+        used = set()
+        for claim in members:
+            for fact in pool:
+                if id(fact) not in used and comparable(claim, fact) and consistent(claim, fact):
+                    used.add(id(fact))
+                    claim.status = "matched"
+                    break
+        # A set's total is the sum of two of its parts (its unique and shared regions)
+        regions = [f for f in pool if f.part]
+        for claim in members:
+            if claim.status == "matched" or claim.kind != "count":
+                continue
+            for i, first in enumerate(regions):
+                second = next((f for f in regions[i + 1:] if first.value + f.value == claim.value
+                               and comparable(claim, first) and comparable(claim, f)), None)
+                if second:
+                    used.update((id(first), id(second)))
+                    claim.status = "matched"
+                    break
+        # Counts that add up to a fact are its breakdown ('3 normal and 16 TNBC samples')
+        parts = {}
+        for claim in members:
+            if claim.status != "matched" and claim.kind == "count":
+                parts.setdefault(claim.unit, []).append(claim)
+        for group in parts.values():
+            total = sum(c.value for c in group)
+            if len(group) > 1 and any(comparable(group[0], f) and f.value == total for f in pool):
+                for claim in group:
+                    claim.status = "matched"
+        for claim in members:
+            if claim.status == "matched" or claim.inferred:
+                continue
+            # UpSet bars show the largest intersections only, so they bound no set's total
+            left = [f for f in pool
+                    if id(f) not in used and not f.partial and comparable(claim, f)]
+            if left:
+                claim.status = "mismatch"
+                claim.expected = [f.text for f in left]
+    return claims
+
+
+def documents(workspace, names=None):
+    workspace = Path(workspace)
+    if names:
+        return [(name, workspace / name) for name in names]
+    paths = sorted((workspace / "drafts").glob("*.md")) + [workspace / CAPTIONS]
+    return [(p.relative_to(workspace).as_posix(), p) for p in paths if p.exists()]
+
+
+def check(workspace, names=None):
+    """Index and cross-check every document. Returns (claims, stats)."""
+    with spans.span("claims.check") as trace:
+        facts = load_facts(workspace)
+        claims = []
+        for name, path in documents(workspace, names):
+            text = path.read_text(encoding='utf-8')
+            trace.add(bytes_in=len(text.encode("utf-8")))
+            if path.name == CAPTIONS:
+                claims.extend(caption_claims(text, name))
+            else:
+                claims.extend(draft_claims(text, name))
+        cross_check(claims, facts)
+        stats = {status: sum(c.status == status for c in claims)
+                 for status in ("matched", "mismatch", "unverified")}
+        stats["claims"] = len(claims)
+        stats["facts"] = sum(len(v) for k, v in facts.items() if not k.isdigit())
+        trace.add(items=len(claims))
+    return claims, stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="manuscript_agent claims",
+                                     description=__doc__.strip().splitlines()[0])
+    parser.add_argument("action", choices=["check", "index"])
+    parser.add_argument("workspace", help="manuscript workspace directory")
+    parser.add_argument("--docs", nargs="+",
+                        help="documents relative to the workspace (default: drafts/*.md "
+                             "and figure_captions.md)")
+    parser.add_argument("-o", "--output", help="write the claim index as JSON (index)")
+    parser.add_argument("--unverified", action="store_true",
+                        help="also list claims with nothing to compare against")
+    parser.add_argument("--bench", type=int, metavar="PASSES",
+                        help="time PASSES full index-and-check passes")
+    args = parser.parse_args(argv)
+
+    if args.bench:
+        start = time.perf_counter()
+        for _ in range(args.bench):
+            claims, stats = check(args.workspace, args.docs)
+        elapsed = (time.perf_counter() - start) / args.bench
+        for name, value in {**stats, "pass_ms": round(elapsed * 1000, 2)}.items():
+            print(f"{name:>10}: {value}")
+        return 0
+
+    start = time.perf_counter()
+    claims, stats = check(args.workspace, args.docs)
+    elapsed = time.perf_counter() - start
+    if args.action == "index":
+        index = {"stats": stats, "claims": [c.record() for c in claims]}
+        if args.output:
+            atomic_write_json(args.output, index, durable=False)
+            print(f"✓ Indexed {stats['claims']} claims to {args.output}")
+        else:
+            print(json.dumps(index, indent=2, ensure_ascii=False))
+        return 0
+
+    for claim in claims:
+        panels = ", ".join(claim.panels) or "no figure"
+        if claim.status == "mismatch":
+            print(f"✗ {claim.file}:{claim.line} [{panels}] {claim.describe()} — "
+                  f"{ANALYSIS} has {', '.join(claim.expected)}")
+        elif claim.status == "unverified" and args.unverified:
+            print(f"  {claim.file}:{claim.line} [{panels}] {claim.describe()} unverified")
+    print(f"{stats['claims']} claims: {stats['matched']} matched, {stats['mismatch']} mismatched, "
+          f"{stats['unverified']} unverified ({elapsed * 1000:.1f} ms)")
+    return 1 if stats["mismatch"] else 0
@@ -0,0 +1,382 @@
+"""
+Literature Deduplication
+Merges candidate papers from several sources (citation<N>_pubmed.json,
+citation<N>_openalex.json, ...) into citation<N>_merged.json in roughly
+linear time. Exact duplicates are found through hash indexes on normalized
+DOI, PMID, PMCID and a title + first-author + year fingerprint; near-duplicate
+titles are found with token MinHash and LSH banding, then verified by Jaccard
+similarity. Each duplicate group is merged field by field in source-priority
+order.
+
+    python -m manuscript_agent dedup literature/citation1_pubmed.json \\
+        literature/citation1_openalex.json -o literature/citation1_merged.json
+    python -m manuscript_agent dedup --bench 100000
+"""
+
+import argparse
+import hashlib
+import random
+import re
+import time
+import unicodedata
+
+from manuscript_agent import spans
+from manuscript_agent.cache import normalize_doi
+from manuscript_agent.checkpoint import atomic_write_json
+from manuscript_agent.papers import read_papers
+
+SOURCE_PRIORITY = ("pubmed", "openalex", "crossref")
+MINHASH_BANDS = 5
+MINHASH_ROWS = 4
+NEAR_DUPLICATE_JACCARD = 0.8
+MIN_TITLE_TOKENS = 4
+MERSENNE_PRIME = (1 << 61) - 1
+STOPWORDS = frozenset("a an and as at by for from in into of on or the to with via".split())
+
+
+def title_tokens(title):
+    """Lower-case ASCII word tokens of a title, without stopwords."""
+    text = unicodedata.normalize("NFKD", title or "").encode("ascii", "ignore").decode()
+    return [t for t in re.findall(r"[a-z0-9]+", text.lower()) if t not in STOPWORDS]
+
+
+def first_author_key(authors):
+    """Last name of the first author in either 'First Last' or 'Last F' form."""
+    if not authors:
+        return ""
+    parts = re.findall(r"[a-z]+", unicodedata.normalize("NFKD", authors[0])
+                       .encode("ascii", "ignore").decode().lower())
+    if not parts:
+        return ""
+    # 'Sceneay J' style: trailing token is initials
+    if len(parts) > 1 and len(parts[-1]) <= 2:
+        return parts[0]
+    return parts[-1]
+
+
+def normalize_pmcid(pmcid):
+    pmcid = (pmcid or "").strip().upper()
+    return pmcid if pmcid.startswith("PMC") else (f"PMC{pmcid}" if pmcid else "")
+
+
+def exact_keys(paper, tokens):
+    """Hash-index keys; any shared key marks two records as the same paper."""
+    keys = []
+    doi = normalize_doi(paper.get("doi"))
+    if doi:
+        keys.append("doi:" + doi)
+    pmid = str(paper.get("pmid") or "").strip()
+    if pmid:
+        keys.append("pmid:" + pmid)
+    pmcid = normalize_pmcid(paper.get("pmcid"))
+    if pmcid:
+        keys.append("pmcid:" + pmcid)
+    if tokens:
+        year = paper.get("year") or ""
+        keys.append(f"fp:{' '.join(tokens)}|{first_author_key(paper.get('authors'))}|{year}")
+    return keys
+
+
+class MinHasher:
+    """Token-level MinHash; per-token hash vectors are computed once and reused."""
+
+    def __init__(self, bands=MINHASH_BANDS, rows=MINHASH_ROWS, seed=1):
+        rng = random.Random(seed)
+        self.bands = bands
+        self.rows = rows
+        self.params = [(rng.randrange(1, MERSENNE_PRIME), rng.randrange(MERSENNE_PRIME))
+                       for _ in range(bands * rows)]
+        self.token_hashes = {}
+
+    def _token_vector(self, token):
+        vector = self.token_hashes.get(token)
+        if vector is None:
+            # Stable across processes, unlike the salted built-in hash()
+            h = int.from_bytes(hashlib.blake2b(token.encode(), digest_size=8).digest(),
+                               "little") & MERSENNE_PRIME
+            vector = tuple((a * h + b) % MERSENNE_PRIME for a, b in self.params)
+            self.token_hashes[token] = vector
+        return vector
+
+    def band_keys(self, tokens):
+        """LSH bucket keys for a set of title tokens."""
+        signature = tuple(map(min, zip(*map(self._token_vector, tokens))))
+        r = self.rows
+        return [(band, signature[band * r:(band + 1) * r]) for band in range(self.bands)]
+
+
+class UnionFind:
+    def __init__(self, size):
+        self.parent = list(range(size))
+
+    def find(self, i):
+        parent = self.parent
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(self, i, j):
+        i, j = self.find(i), self.find(j)
+        if i != j:
+            # Keep the lower index (earlier, higher-priority record) as root
+            if j < i:
+                i, j = j, i
+            self.parent[j] = i
+
+
+def jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def years_compatible(a, b):
+    return not a or not b or abs(int(a) - int(b)) <= 1
+
+
+def record_ids(paper):
+    """{'doi': {...}, 'pmid': {...}} of one record, for conflict checks."""
+    doi = normalize_doi(paper.get("doi"))
+    pmid = str(paper.get("pmid") or "").strip()
+    return {"doi": {doi} if doi else set(), "pmid": {pmid} if pmid else set()}
+
+
+def ids_conflict(a, b):
+    """True when both sides carry a DOI (or a PMID) and none of them are shared."""
+    return any(a[field] and b[field] and a[field].isdisjoint(b[field]) for field in a)
+
+
+def duplicate_groups(papers, near_duplicates=True, threshold=NEAR_DUPLICATE_JACCARD):
+    """
+    Group indices of `papers` that refer to the same work. Returns
+    (groups, stats) where groups is a list of index lists in input order.
+    """
+    uf = UnionFind(len(papers))
+    index = {}
+    tokens = [title_tokens(p.get("title")) for p in papers]
+    stats = {"exact_matches": 0, "near_candidates": 0, "near_matches": 0,
+             "id_conflicts": 0}
+
+    for i, paper in enumerate(papers):
+        for key in exact_keys(paper, tokens[i]):
+            j = index.setdefault(key, i)
+            if j != i and uf.find(i) != uf.find(j):
+                uf.union(i, j)
+                stats["exact_matches"] += 1
+
+    if near_duplicates:
+        # Identifiers per group root: similar titles never join two groups whose
+        # DOIs (or PMIDs) differ, e.g. the "Part I" and "Part II" of a paper
+        ids = {}
+        for i, paper in enumerate(papers):
+            group = ids.setdefault(uf.find(i), {"doi": set(), "pmid": set()})
+            for field, values in record_ids(paper).items():
+                group[field] |= values
+        hasher = MinHasher()
+        buckets = {}
+        token_sets = [frozenset(t) for t in tokens]
+        seen_pairs = set()
+        band_keys = {}
+        for i, toks in enumerate(token_sets):
+            if len(toks) < MIN_TITLE_TOKENS:
+                continue
+            # Re-exported records usually share the exact token set
+            keys = band_keys.get(toks)
+            if keys is None:
+                keys = band_keys[toks] = hasher.band_keys(toks)
+            for key in keys:
+                bucket = buckets.setdefault(key, [])
+                for j in bucket:
+                    root_i, root_j = uf.find(i), uf.find(j)
+                    if root_i == root_j or (j, i) in seen_pairs:
+                        continue
+                    seen_pairs.add((j, i))
+                    stats["near_candidates"] += 1
+                    if (jaccard(token_sets[i], token_sets[j]) < threshold or
+                            not years_compatible(papers[i].get("year"), papers[j].get("year"))):
+                        continue
+                    if ids_conflict(ids[root_i], ids[root_j]):
+                        stats["id_conflicts"] += 1
+                        continue
+                    uf.union(i, j)
+                    root = uf.find(i)
+                    absorbed = ids.pop(root_j if root == root_i else root_i)
+                    for field, values in absorbed.items():
+                        ids[root][field] |= values
+                    stats["near_matches"] += 1
+                bucket.append(i)
+
+    groups = {}
+    for i in range(len(papers)):
+        groups.setdefault(uf.find(i), []).append(i)
+    return list(groups.values()), stats
+
+
+def source_rank(paper):
+    source = paper.get("source", "")
+    return SOURCE_PRIORITY.index(source) if source in SOURCE_PRIORITY else len(SOURCE_PRIORITY)
+
+
+def is_empty(value):
+    return value is None or value == "" or value == [] or value == {}
+
+
+def merge_records(records):
+    """Merge duplicate records, preferring fields from higher-priority sources."""
+    ordered = sorted(records, key=source_rank)
+    merged = dict(ordered[0])
+    for record in ordered[1:]:
+        for field, value in record.items():
+            if is_empty(merged.get(field)) and not is_empty(value):
+                merged[field] = value
+    merged["citations"] = max((r.get("citations") or 0) for r in records)
+    merged["is_open_access"] = any(r.get("is_open_access") for r in records)
+    if not merged.get("pdf_url"):
+        merged["pdf_url"] = next((r["pdf_url"] for r in ordered if r.get("pdf_url")), "")
+    return merged
+
+
+def deduplicate(papers, near_duplicates=True, threshold=NEAR_DUPLICATE_JACCARD):
+    """Merged, de-duplicated papers in first-seen order, plus match statistics."""
+    with spans.span("dedup", items=len(papers)):
+        groups, stats = duplicate_groups(papers, near_duplicates, threshold)
+        groups.sort(key=lambda group: group[0])
+        merged = [merge_records([papers[i] for i in group]) for group in groups]
+    stats.update({"input": len(papers), "output": len(merged)})
+    return merged, stats
+
+
+def load_papers(paths):
+    papers = []
+    for path in paths:
+        papers.extend(read_papers(path))
+    return papers
+
+
+def synthetic_corpus(size, duplicate_rate=0.2, seed=7, labels=None):
+    """
+    `size` records in which about `duplicate_rate` of them are re-exports of
+    another record: other source, reformatted DOI, missing ids or a lightly
+    edited title. Returns (papers, number_of_distinct_works); a `labels`
+    list is filled with the index of each record's original work.
+    """
+    rng = random.Random(seed)
+    vocabulary = [f"term{i}" for i in range(5000)]
+    unique = int(size / (1 + duplicate_rate))
+    originals = []
+    for i in range(unique):
+        originals.append({
+            "title": " ".join(rng.choice(vocabulary) for _ in range(rng.randint(8, 16))),
+            "authors": [f"Given{rng.randint(1, 9999)} Family{rng.randint(1, 9999)}"],
+            "year": rng.randint(1995, 2025),
+            "journal": f"Journal {rng.randint(1, 500)}",
+            "abstract": "",
+            "citations": rng.randint(0, 500),
+            "doi": f"10.{rng.randint(1000, 9999)}/synthetic.{i}",
+            "pmid": str(10_000_000 + i) if rng.random() < 0.7 else "",
+            "pmcid": "",
+            "is_open_access": rng.random() < 0.5,
+            "url": "",
+            "pdf_url": "",
+            "source": "pubmed",
+        })
+    papers = list(originals)
+    works = list(range(unique))
+    while len(papers) < size:
+        work = rng.randrange(unique)
+        works.append(work)
+        copy = dict(originals[work], source="openalex")
+        variant = rng.random()
+        if variant < 0.4:
+            copy["doi"] = "https://doi.org/" + copy["doi"].upper()
+            copy["pmid"] = ""
+        elif variant < 0.7:
+            copy["doi"] = ""
+            copy["title"] = copy["title"].title() + "."
+        else:
+            words = copy["title"].split()
+            words[rng.randrange(len(words))] = rng.choice(vocabulary)
+            copy.update(title=" ".join(words), doi="", pmid="")
+        papers.append(copy)
+    order = list(range(len(papers)))
+    rng.shuffle(order)
+    if labels is not None:
+        labels[:] = [works[i] for i in order]
+    return [papers[i] for i in order], unique
+
+
+def pair_accuracy(groups, labels):
+    """
+    Pairwise precision and recall of `groups` against the true work `labels`,
+    plus the number of false merges (groups spanning several works) and
+    misses (works split over several groups).
+    """
+    def pairs(n):
+        return n * (n - 1) // 2
+
+    predicted = correct = false_merges = 0
+    groups_per_work = {}
+    for group in groups:
+        counts = {}
+        for i in group:
+            counts[labels[i]] = counts.get(labels[i], 0) + 1
+        predicted += pairs(len(group))
+        correct += sum(pairs(n) for n in counts.values())
+        false_merges += len(counts) > 1
+        for work in counts:
+            groups_per_work[work] = groups_per_work.get(work, 0) + 1
+    sizes = {}
+    for work in labels:
+        sizes[work] = sizes.get(work, 0) + 1
+    actual = sum(pairs(n) for n in sizes.values())
+    return {
+        "precision": round(correct / predicted, 5) if predicted else 1.0,
+        "recall": round(correct / actual, 5) if actual else 1.0,
+        "false_merges": false_merges,
+        "missed_works": sum(1 for n in groups_per_work.values() if n > 1),
+    }
+
+
+def benchmark(size=100_000):
+    labels = []
+    papers, unique = synthetic_corpus(size, labels=labels)
+    start = time.perf_counter()
+    groups, stats = duplicate_groups(papers)
+    merged = [merge_records([papers[i] for i in group]) for group in groups]
+    elapsed = time.perf_counter() - start
+    stats.update({
+        "input": len(papers),
+        "output": len(merged),
+        "expected_output": unique,
+        **pair_accuracy(groups, labels),
+        "seconds": round(elapsed, 3),
+        "papers_per_second": round(len(papers) / elapsed),
+    })
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="manuscript_agent dedup",
+                                     description=__doc__.strip().splitlines()[0])
+    parser.add_argument("inputs", nargs="*", help="per-source result files")
+    parser.add_argument("-o", "--output", help="merged output file")
+    parser.add_argument("--exact-only", action="store_true",
+                        help="skip near-duplicate title matching")
+    parser.add_argument("--threshold", type=float, default=NEAR_DUPLICATE_JACCARD)
+    parser.add_argument("--bench", type=int, metavar="PAPERS",
+                        help="benchmark on a synthetic corpus of PAPERS records")
+    args = parser.parse_args(argv)
+
+    if args.bench:
+        for name, value in benchmark(args.bench).items():
+            print(f"{name:>18}: {value}")
+        return 0
+    if not args.inputs or not args.output:
+        parser.error("inputs and --output are required unless --bench is given")
+
+    merged, stats = deduplicate(load_papers(args.inputs), not args.exact_only, args.threshold)
+    atomic_write_json(args.output, {"papers": merged, "total": len(merged)})
+    print(f"✓ Merged {stats['input']} papers into {stats['output']} "
+          f"({stats['exact_matches']} exact, {stats['near_matches']} near-duplicate matches)")
+    return 0
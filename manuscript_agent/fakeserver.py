@@ -0,0 +1,351 @@
+"""
+Local Literature Stand-in Server
+Serves deterministic synthetic responses for the PubMed E-utilities
+(esearch.fcgi, efetch.fcgi), OpenAlex (/works) and Crossref (/works/{doi})
+endpoints used by the search layer, with configurable latency and injected
+429 responses, so concurrency, retry and throughput can be exercised offline.
+Open-access PDFs are served from /pdf/<id>.pdf (with range requests and
+connections optionally cut mid-body) and /oa/<id>, which redirects there.
+POST /translate stands in for the translation endpoint of translation.py.
+
+    python -m manuscript_agent fakeserver --port 8765
+    python -m manuscript_agent fakeserver --bench 30 --latency 0.05
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import re
+import tempfile
+import time
+from functools import lru_cache
+from pathlib import Path
+from urllib.parse import parse_qs, unquote, urlsplit
+from xml.sax.saxutils import escape
+
+WORDS = ("tumor immune cell infiltration breast cancer triple negative T "
+         "lymphocyte microenvironment signaling prognosis expression single "
+         "sequencing ubiquitination macrophage stromal metabolism").split()
+JOURNALS = ["Cancer Cell", "Cell Research", "Nature Communications",
+            "Cancer Discovery", "Frontiers in Immunology", "Nature Medicine"]
+
+
+def stable_seed(*parts):
+    return int.from_bytes(hashlib.sha256("|".join(map(str, parts)).encode()).digest()[:8], "big")
+
+
+def synthetic_paper(pmid):
+    """Deterministic paper metadata for a numeric id."""
+    rng = random.Random(stable_seed("paper", pmid))
+    return {
+        "pmid": str(pmid),
+        "title": " ".join(rng.choice(WORDS) for _ in range(10)).capitalize(),
+        "authors": [(f"Author{rng.randint(1, 999)}", rng.choice("ABCDEFGH"))
+                    for _ in range(rng.randint(2, 12))],
+        "year": rng.randint(2015, 2025),
+        "journal": rng.choice(JOURNALS),
+        "abstract": " ".join(rng.choice(WORDS) for _ in range(120)),
+        "doi": f"10.5555/fake.{pmid}",
+        "pmcid": f"PMC{pmid}" if rng.random() < 0.6 else "",
+        "citations": rng.randint(0, 400),
+    }
+
+
+def query_ids(query, count):
+    rng = random.Random(stable_seed("query", query))
+    return [rng.randint(10_000_000, 40_000_000) for _ in range(count)]
+
+
+def reference_ids(work_id):
+    """References of a synthetic work, drawn from a small pool so papers share them."""
+    rng = random.Random(stable_seed("references", work_id))
+    return sorted(rng.sample(range(10_000_000, 10_000_400), rng.randint(5, 20)))
+
+
+def esearch(params):
+    query = params.get("term", [""])[0]
+    count = int(params.get("retmax", ["5"])[0])
+    ids = [str(i) for i in query_ids(query, count)]
+    body = {"esearchresult": {"count": str(len(ids)), "retmax": str(count), "idlist": ids}}
+    return "application/json", json.dumps(body).encode()
+
+
+def efetch(params):
+    ids = [i for i in params.get("id", [""])[0].split(",") if i]
+    articles = []
+    for pmid in ids:
+        paper = synthetic_paper(pmid)
+        authors = "".join(
+            f"<Author><LastName>{last}</LastName><ForeName>{fore}</ForeName>"
+            f"<Initials>{fore}</Initials></Author>" for last, fore in paper["authors"])
+        article_ids = f'<ArticleId IdType="pubmed">{pmid}</ArticleId>' \
+                      f'<ArticleId IdType="doi">{paper["doi"]}</ArticleId>'
+        if paper["pmcid"]:
+            article_ids += f'<ArticleId IdType="pmc">{paper["pmcid"]}</ArticleId>'
+        articles.append(
+            "<PubmedArticle><MedlineCitation><PMID>{pmid}</PMID><Article>"
+            "<Journal><JournalIssue><PubDate><Year>{year}</Year></PubDate></JournalIssue>"
+            "<Title>{journal}</Title></Journal><ArticleTitle>{title}</ArticleTitle>"
+            "<Abstract><AbstractText>{abstract}</AbstractText></Abstract>"
+            "<AuthorList>{authors}</AuthorList></Article></MedlineCitation>"
+            "<PubmedData><ArticleIdList>{ids}</ArticleIdList></PubmedData>"
+            "</PubmedArticle>".format(
+                pmid=pmid, year=paper["year"], journal=escape(paper["journal"]),
+                title=escape(paper["title"]), abstract=escape(paper["abstract"]),
+                authors=authors, ids=article_ids))
+    body = "<?xml version='1.0'?><PubmedArticleSet>" + "".join(articles) + "</PubmedArticleSet>"
+    return "text/xml", body.encode()
+
+
+def works(params):
+    query = params.get("search", [""])[0]
+    count = int(params.get("per-page", ["25"])[0])
+    results = []
+    for work_id in query_ids("openalex:" + query, count):
+        paper = synthetic_paper(work_id)
+        index = {}
+        for position, word in enumerate(paper["abstract"].split()):
+            index.setdefault(word, []).append(position)
+        results.append({
+            "id": f"https://openalex.org/W{work_id}",
+            "doi": f"https://doi.org/{paper['doi']}",
+            "title": paper["title"],
+            "publication_year": paper["year"],
+            "cited_by_count": paper["citations"],
+            "ids": {"pmid": f"https://pubmed.ncbi.nlm.nih.gov/{work_id}"},
+            "authorships": [{"author": {"display_name": f"{fore}. {last}"}}
+                            for last, fore in paper["authors"]],
+            "primary_location": {"source": {"display_name": paper["journal"]}},
+            "open_access": {"is_oa": bool(paper["pmcid"]),
+                            "oa_url": f"https://example.org/{work_id}.pdf"
+                            if paper["pmcid"] else None},
+            "abstract_inverted_index": index,
+            "referenced_works": [f"https://openalex.org/W{ref}" for ref in reference_ids(work_id)],
+        })
+    body = {"meta": {"count": len(results)}, "results": results}
+    return "application/json", json.dumps(body).encode()
+
+
+def crossref_work(params, doi):
+    pmid = doi.rsplit(".", 1)[-1]
+    if not doi.startswith("10.5555/fake.") or not pmid.isdigit():
+        return None
+    paper = synthetic_paper(pmid)
+    message = {
+        "DOI": doi,
+        "title": [paper["title"]],
+        "container-title": [paper["journal"]],
+        "issued": {"date-parts": [[paper["year"]]]},
+        "author": [{"family": last, "given": fore} for last, fore in paper["authors"]],
+        "issn-type": [{"type": "electronic", "value": "1234-5678"}],
+    }
+    return "application/json", json.dumps({"status": "ok", "message": message}).encode()
+
+
+def translate(payload):
+    """Stand-in translations: each segment's text tagged with the target language."""
+    try:
+        request = json.loads(payload)
+        segments = request["segments"]
+    except (ValueError, KeyError, TypeError):
+        return None
+    target = request.get("target_language", "en")
+    translations = [f"[{target}] {segment['text']}" for segment in segments]
+    return "application/json", json.dumps({"translations": translations}).encode()
+
+
+@lru_cache(maxsize=64)
+def synthetic_pdf(number):
+    """Deterministic PDF for /pdf/<number>.pdf: 6-14 pages, 0.2-0.6 MB."""
+    from manuscript_agent.pdftext import synthetic_pdf as build
+    return build(number, pages=6 + number % 9, compact=bool(number % 2),
+                 image_bytes=200_000 + number * 7919 % 5 * 100_000)
+
+
+def pdf_file(name, headers):
+    """(status, extra headers, content type, body) for a PDF, honouring Range/If-Range."""
+    match = re.fullmatch(r"(\d+)\.pdf", name)
+    if not match:
+        return "404 Not Found", "", "text/plain", b"not found"
+    body = synthetic_pdf(int(match.group(1)))
+    etag = '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+    extra = f"ETag: {etag}\r\nAccept-Ranges: bytes\r\n"
+    requested = re.fullmatch(r"bytes=(\d+)-", headers.get("range", ""))
+    if requested and headers.get("if-range", etag) == etag:
+        start = int(requested.group(1))
+        if start >= len(body):
+            return ("416 Range Not Satisfiable", f"Content-Range: bytes */{len(body)}\r\n",
+                    "text/plain", b"")
+        extra += f"Content-Range: bytes {start}-{len(body) - 1}/{len(body)}\r\n"
+        return "206 Partial Content", extra, "application/pdf", body[start:]
+    return "200 OK", extra, "application/pdf", body
+
+
+ROUTES = {
+    "/esearch.fcgi": esearch,
+    "/efetch.fcgi": efetch,
+    "/works": works,
+}
+
+
+class FakeServer:
+    """Keep-alive HTTP/1.1 server for the ROUTES above."""
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, fail_rate=0.0, seed=0,
+                 drop_rate=0.0):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.fail_rate = fail_rate
+        # Fraction of PDF responses whose connection is closed halfway through the body
+        self.drop_rate = drop_rate
+        self.rng = random.Random(seed)
+        self.server = None
+        self.writers = set()
+        self.stats = {"requests": 0, "throttled": 0, "connections": 0, "dropped": 0}
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        self.server.close()
+        for writer in list(self.writers):
+            writer.close()
+        await self.server.wait_closed()
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+
+    async def handle(self, reader, writer):
+        self.stats["connections"] += 1
+        self.writers.add(writer)
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                method, target, _ = request_line.decode("latin-1").split(" ", 2)
+                length = int(headers.get("content-length") or 0)
+                payload = await reader.readexactly(length) if length else b""
+                status, extra, content_type, body = await self.respond(method, target, headers,
+                                                                       payload)
+                head = f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n" \
+                       f"Content-Length: {len(body)}\r\n{extra}\r\n"
+                writer.write(head.encode("latin-1"))
+                if method != "HEAD" and self.drop_rate and target.startswith("/pdf/") \
+                        and status[0] == "2" and self.rng.random() < self.drop_rate:
+                    self.stats["dropped"] += 1
+                    writer.write(body[:len(body) // 2])
+                    await writer.drain()
+                    break
+                if method != "HEAD":
+                    writer.write(body)
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, ValueError, asyncio.CancelledError,
+                asyncio.IncompleteReadError):
+            # Clients dropping connections and shutdown are both normal here
+            pass
+        finally:
+            self.writers.discard(writer)
+            writer.close()
+
+    async def respond(self, method, target, headers, payload=b""):
+        self.stats["requests"] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.fail_rate and self.rng.random() < self.fail_rate:
+            self.stats["throttled"] += 1
+            return "429 Too Many Requests", "Retry-After: 0\r\n", "text/plain", b"slow down"
+        parts = urlsplit(target)
+        params = parse_qs(parts.query)
+        if parts.path.startswith("/pdf/"):
+            return pdf_file(parts.path[len("/pdf/"):], headers)
+        if parts.path.startswith("/oa/"):
+            location = f"/pdf/{parts.path[len('/oa/'):]}.pdf"
+            return "302 Found", f"Location: {location}\r\n", "text/plain", b""
+        if parts.path.startswith("/works/"):
+            result = crossref_work(params, unquote(parts.path[len("/works/"):]))
+        elif parts.path == "/translate" and method == "POST":
+            result = translate(payload)
+        elif parts.path in ROUTES:
+            result = ROUTES[parts.path](params)
+        else:
+            result = None
+        if result is None:
+            return "404 Not Found", "", "text/plain", b"not found"
+        content_type, body = result
+        return "200 OK", "", content_type, body
+
+
+async def benchmark(points=30, latency=0.05, fail_rate=0.0, concurrency=8):
+    """
+    Time the search layer against the stand-in server: all citation points
+    concurrently versus one query at a time.
+    """
+    from manuscript_agent.search import search_workspace
+
+    queries = [{"number": n, "title": f"Point {n}", "query": f"synthetic query {n}"}
+               for n in range(1, points + 1)]
+    results = {}
+    async with FakeServer(latency=latency, fail_rate=fail_rate) as server:
+        for label, limit in (("sequential", 1), ("concurrent", concurrency)):
+            with tempfile.TemporaryDirectory() as workspace:
+                stats, failures = await search_workspace(
+                    workspace, queries, pubmed_url=server.url, openalex_url=server.url,
+                    limit_per_host=limit, pubmed_rate=1000, openalex_rate=1000)
+                files = len(list(Path(workspace, "literature").glob("*.json")))
+            stats["files"] = files
+            results[label] = stats
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="manuscript_agent fakeserver",
+                                     description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.05,
+                        help="seconds of simulated latency per request")
+    parser.add_argument("--fail-rate", type=float, default=0.0,
+                        help="fraction of requests answered with 429")
+    parser.add_argument("--bench", type=int, metavar="POINTS",
+                        help="run a search benchmark with POINTS citation points and exit")
+    args = parser.parse_args(argv)
+
+    if args.bench:
+        started = time.perf_counter()
+        results = asyncio.run(benchmark(args.bench, args.latency, args.fail_rate))
+        for label, stats in results.items():
+            print(f"{label:>10}: {stats['queries']} queries in {stats['elapsed_seconds']}s "
+                  f"({stats['queries_per_second']} queries/s, "
+                  f"{stats['connections']} connections, {stats['failures']} failures)")
+        print(f"Total benchmark time: {time.perf_counter() - started:.2f}s")
+        return 0
+
+    async def serve():
+        async with FakeServer(args.host, args.port, args.latency, args.fail_rate) as server:
+            print(f"Serving PubMed/OpenAlex stand-in on {server.url} (Ctrl-C to stop)")
+            await server.server.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+    return 0
@@ -0,0 +1,591 @@
+"""
+Figure Analysis Engine
+Discovers every images/image*.png in a manuscript workspace, analyses each
+figure independently in a process pool and renders the phase 0.5 outputs
+(image_analysis.json, figure_captions.md, image_analysis_report.md).
+
+Each per-figure result is cached under cache/figures/ and keyed by the PNG
+content hash plus its report context (annotations and the source paragraphs
+recorded in report_figures.json at ingestion), so unchanged figures are
+skipped on re-runs. Panel layout is detected on the figure's analysis
+level in image_pyramid/ (see pyramid.py) rather than the full-size PNG.
+"""
+
+import argparse
+import hashlib
+import json
+import re
+import struct
+import zlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import nullcontext
+from datetime import date
+from pathlib import Path
+
+from manuscript_agent import analyzers, panels, pyramid, spans
+from manuscript_agent.checkpoint import atomic_write_json, atomic_write_text
+from manuscript_agent.ingest import load_manifest
+from manuscript_agent.quality import SUBJECTIVE
+
+ENGINE_VERSION = 4
+IMAGE_GLOB = "image*.png"
+ANNOTATIONS_FILE = "figure_annotations.json"
+CACHE_DIR = Path("cache") / "figures"
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+HASH_CHUNK = 1 << 20
+# Nature Communications figure legends run to at most 350 words
+CAPTION_WORD_LIMIT = 350
+# Width of a 180 mm double-column figure at 300 DPI
+PRINT_WIDTH_PX = 2126
+CAPTION_LABEL = re.compile(r"\(([A-Z])(?:\s*[-–]\s*([A-Z]))?\)")
+
+
+def figure_number(path):
+    """Figure number encoded in an extracted image name (image12.png -> 12)."""
+    match = re.search(r"(\d+)$", Path(path).stem)
+    return int(match.group(1)) if match else 0
+
+
+def discover_figures(images_dir):
+    """All extracted figure PNGs, ordered by figure number."""
+    return sorted(Path(images_dir).glob(IMAGE_GLOB), key=figure_number)
+
+
+def file_digest(path):
+    """SHA-256 of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def context_digest(context):
+    """SHA-256 of the report context attached to a figure."""
+    payload = json.dumps(context, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def figure_key(content_hash, context):
+    """Cache key for one figure: PNG content + report context + engine version."""
+    payload = f"{ENGINE_VERSION}:{content_hash}:{context_digest(context)}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def png_info(path):
+    """Width, height, bit depth and colour type from the IHDR chunk."""
+    with open(path, 'rb') as f:
+        header = f.read(29)
+    if header[:8] != PNG_SIGNATURE or header[12:16] != b"IHDR":
+        raise ValueError(f"{path} is not a PNG file")
+    width, height, bit_depth, color_type = struct.unpack(">IIBB", header[16:26])
+    return {
+        "width": width,
+        "height": height,
+        "bit_depth": bit_depth,
+        "color_type": color_type,
+    }
+
+
+def report_location(source):
+    """Where the figure and its context sit in report_content.md."""
+    if not source:
+        return None
+    location = {"image_line": source["line"]}
+    for part in ("context", "legend"):
+        if source.get(part):
+            location[f"{part}_lines"] = source[part]["lines"]
+    return location
+
+
+def detected_subplots(annotated, layout):
+    """
+    Subplots with detected bounding boxes. Annotated subplots keep their
+    fields and gain bbox/phash when detection found the same number of
+    panels (a different count is recorded in the figure's layout, see
+    layout_mismatches()); without annotations the detected panels become
+    the subplots.
+    """
+    if layout is None:
+        return annotated
+    found = layout["panels"]
+    if not annotated:
+        return [dict(panel, type="unclassified") for panel in found]
+    if len(found) != len(annotated):
+        return annotated
+    return [dict(subplot, bbox=panel["bbox"], phash=panel["phash"])
+            for subplot, panel in zip(annotated, found)]
+
+
+def analyze_figure(task):
+    """
+    Analyse a single figure. Runs in a worker process, so it only takes and
+    returns plain data.
+    """
+    path = Path(task["path"])
+    annotation = task["annotation"]
+    number = figure_number(path)
+    try:
+        # Panel analysis only needs the working resolution, so it reads the
+        # smallest pyramid level that covers it instead of the full PNG.
+        store = pyramid.Pyramid(task["pyramid"])
+        image, scale = store.image(path, task["content_hash"], panels.WORK_SIDE)
+        layout = panels.analyse(image, number, scale)
+    except (ValueError, zlib.error):
+        layout = None
+    annotated = annotation.get("subplots", [])
+    subplots = [dict(subplot, **analyzers.analyze(subplot))
+                for subplot in detected_subplots(annotated, layout)]
+    caption = annotation.get("caption", {})
+    if not caption.get("text") and subplots:
+        caption = dict(caption, text=analyzers.caption_text(subplots, number), drafted=True)
+    result = {
+        "figure_id": f"figure_{number}",
+        "original_file": path.name,
+        "figure_number": number,
+        "content_hash": task["content_hash"],
+        "image": dict(png_info(path), file_size_bytes=path.stat().st_size),
+        "has_subplots": len(subplots) > 1,
+        "subplot_count": len(subplots),
+        "context_from_report": annotation.get("context_from_report", {}),
+        "report_location": report_location(task["source"]),
+        "subplots": subplots,
+    }
+    if layout is not None:
+        result["layout"] = {key: layout[key] for key in
+                            ("scale", "phash", "panel_count", "letter_count")}
+        if annotated:
+            result["layout"]["annotated_count"] = len(annotated)
+            result["layout"]["matches_annotation"] = layout["panel_count"] == len(annotated)
+    return {
+        "key": task["key"],
+        "figure": result,
+        "caption": caption,
+        "summary": annotation.get("summary", {}),
+    }
+
+
+def load_annotations(workspace):
+    """Hand-curated per-figure annotations, keyed by image file name."""
+    path = Path(workspace) / ANNOTATIONS_FILE
+    if not path.exists():
+        return {"metadata": {}, "technical_notes": [], "figures": {}}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def load_cached(cache_dir, name):
+    path = cache_dir / f"{Path(name).stem}.json"
+    if not path.exists():
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def store_cached(cache_dir, name, entry):
+    atomic_write_json(cache_dir / f"{Path(name).stem}.json", entry)
+
+
+def analyze_workspace(workspace, workers=None, force=False, executor=None):
+    """
+    Analyse every figure in the workspace, reusing cached results for figures
+    whose PNG and context are unchanged. Returns (entries, stats, annotations).
+    Figures are submitted to `executor` when given (a process pool shared by
+    a batch run) instead of a pool of `workers` created for this call.
+    """
+    workspace = Path(workspace)
+    annotations = load_annotations(workspace)
+    manifest = load_manifest(workspace)
+    cache_dir = workspace / CACHE_DIR
+    entries = {}
+    tasks = []
+    for path in discover_figures(workspace / "images"):
+        annotation = annotations["figures"].get(path.name, {})
+        source = manifest.get(path.name)
+        content_hash = file_digest(path)
+        key = figure_key(content_hash, {"annotation": annotation, "source": source})
+        cached = None if force else load_cached(cache_dir, path.name)
+        if cached and cached.get("key") == key:
+            entries[path.name] = cached
+            continue
+        tasks.append({
+            "path": str(path),
+            "annotation": annotation,
+            "source": source,
+            "content_hash": content_hash,
+            "key": key,
+            "pyramid": str(workspace / pyramid.PYRAMID_DIR),
+        })
+
+    # Each figure is cached as soon as it is analysed, so an interrupted run
+    # resumes from the figures that already finished.
+    if executor is None and (len(tasks) == 1 or workers == 1):
+        for task in tasks:
+            name = Path(task["path"]).name
+            entries[name] = analyze_figure(task)
+            store_cached(cache_dir, name, entries[name])
+    elif tasks:
+        with nullcontext(executor) if executor else ProcessPoolExecutor(workers) as pool:
+            futures = {pool.submit(analyze_figure, task): task for task in tasks}
+            for future in as_completed(futures):
+                name = Path(futures[future]["path"]).name
+                entries[name] = future.result()
+                store_cached(cache_dir, name, entries[name])
+
+    ordered = [entries[name] for name in sorted(entries, key=figure_number)]
+    pyramid.Pyramid.for_workspace(workspace).evict(
+        keep={e["figure"]["content_hash"] for e in ordered})
+    stats = {
+        "figures": len(ordered),
+        "analyzed": len(tasks),
+        "cached": len(ordered) - len(tasks),
+    }
+    return ordered, stats, annotations
+
+
+def find_duplicates(entries):
+    """Near-duplicate figure/panel pairs by perceptual hash, as (a, b, distance)."""
+    layouts = {}
+    for entry in entries:
+        figure = entry["figure"]
+        if "layout" in figure:
+            layouts[figure["original_file"]] = {
+                "phash": figure["layout"]["phash"],
+                "panels": [s for s in figure["subplots"] if s.get("phash")],
+            }
+    return panels.duplicates(layouts)
+
+
+def layout_mismatches(entries):
+    """(figure_id, detected, annotated) panel counts of figures where they differ."""
+    mismatches = []
+    for entry in entries:
+        figure = entry["figure"]
+        layout = figure.get("layout", {})
+        if layout.get("matches_annotation") is False:
+            mismatches.append((figure["figure_id"], layout["panel_count"],
+                               layout["annotated_count"]))
+    return mismatches
+
+
+def build_image_analysis(entries, annotations):
+    metadata = dict(annotations.get("metadata", {}))
+    metadata["total_figures"] = len(entries)
+    metadata["total_subplots"] = sum(e["figure"]["subplot_count"] for e in entries)
+    metadata["engine_version"] = ENGINE_VERSION
+    metadata["duplicates"] = [{"a": a, "b": b, "distance": d}
+                              for a, b, d in find_duplicates(entries)]
+    metadata["layout_mismatches"] = [
+        {"figure_id": figure_id, "detected_panels": detected, "annotated_subplots": annotated}
+        for figure_id, detected, annotated in layout_mismatches(entries)]
+    return {
+        "metadata": metadata,
+        "figures": [e["figure"] for e in entries],
+    }
+
+
+def render_captions(entries, annotations):
+    lines = ["# Publication-Grade Figure Captions", ""]
+    for entry in entries:
+        caption = entry["caption"]
+        number = entry["figure"]["figure_number"]
+        title = caption.get("title", "Caption pending.")
+        lines += [f"## Figure {number}. {title}", "", caption.get("text", ""), ""]
+    notes = annotations.get("technical_notes", [])
+    if notes:
+        lines += ["---", "", "**Technical Notes:**"]
+        lines += [f"- {note}" for note in notes]
+    return "\n".join(lines) + "\n"
+
+
+def panel_range(figure):
+    ids = [s["subplot_id"][len(str(figure["figure_number"])):] for s in figure["subplots"]]
+    if not ids:
+        return "no subplots"
+    return f"{ids[0]}-{ids[-1]}" if len(ids) > 1 else ids[0]
+
+
+def line_span(lines):
+    start, end = lines
+    return f"Line {start}" if start == end else f"Lines {start}-{end}"
+
+
+def guideline_parts(ref):
+    """('1.4', 'Scatter plots') from 'Guidelines 1.4 - Scatter plots ...'."""
+    match = re.match(r"Guidelines\s+([\d.]+)\s*-\s*(.+)", ref or "")
+    if not match:
+        return None, None
+    return match.group(1), match.group(2).strip()
+
+
+def guideline_sort_key(number):
+    return tuple(int(part) for part in number.split("."))
+
+
+def caption_review(entry):
+    """Word count, undescribed panels and subjective terms of one figure's caption."""
+    figure = entry["figure"]
+    caption = entry["caption"]
+    title, text = caption.get("title", ""), caption.get("text", "")
+    number = str(figure["figure_number"])
+    described = {f"{number}{chr(code)}" for m in CAPTION_LABEL.finditer(text)
+                 for code in range(ord(m.group(1)), ord(m.group(2) or m.group(1)) + 1)}
+    return {
+        "words": len(f"{title} {text}".split()),
+        "one_sentence_title": bool(title) and re.search(r"[.!?]\s+\S", title) is None,
+        "undescribed": [s["subplot_id"] for s in figure["subplots"]
+                        if s["subplot_id"] not in described],
+        "subjective": sorted({m.group(0).lower() for m in SUBJECTIVE.finditer(text)}),
+    }
+
+
+def mark(ok):
+    return "✓" if ok else "✗"
+
+
+def render_report(entries, annotations, workspace):
+    workspace = Path(workspace)
+    metadata = annotations.get("metadata", {})
+    figures = [e["figure"] for e in entries]
+    total_subplots = sum(f["subplot_count"] for f in figures)
+
+    lines = [
+        "# Image Analysis Summary Report",
+        "",
+        f"**Report Generated:** {date.today().isoformat()}",
+        f"**Source Document:** {metadata.get('report_file', 'unknown')}",
+        f"**Analysis Guidelines:** {metadata.get('analysis_guidelines', 'n/a')}",
+        f"**Caption Standards:** {metadata.get('caption_examples', 'n/a')}",
+        "",
+        "## Overview",
+        "",
+        f"Analyzed **{len(figures)} figures** ({total_subplots} subplots total) "
+        "extracted from the research report.",
+        "",
+        "## Figure Summary",
+        "",
+    ]
+    for entry in entries:
+        figure = entry["figure"]
+        summary = entry["summary"]
+        title = summary.get("title", figure["figure_id"])
+        lines.append(
+            f"### Figure {figure['figure_number']}: {title} "
+            f"({figure['subplot_count']} subplots: {panel_range(figure)})"
+        )
+        if summary.get("layout"):
+            lines.append(f"- **Type:** {summary['layout']}")
+        if summary.get("key_finding"):
+            lines.append(f"- **Key Finding:** {summary['key_finding']}")
+        location = figure.get("report_location")
+        if location and location.get("context_lines"):
+            legend = location.get("legend_lines")
+            lines.append(
+                f"- **Context Association:** {line_span(location['context_lines'])} "
+                "in report_content.md"
+                + (f" (legend: {line_span(legend).lower()})" if legend else "")
+            )
+        if summary.get("statistical_annotations"):
+            lines.append(f"- **Statistical Annotations:** {summary['statistical_annotations']}")
+        numbers = sorted(
+            {guideline_parts(s.get("guideline_ref"))[0] for s in figure["subplots"]} - {None},
+            key=guideline_sort_key,
+        )
+        if numbers:
+            lines.append(f"- **Guidelines Applied:** {', '.join(numbers)}")
+        image = figure["image"]
+        lines.append(f"- **Image:** {image['width']}×{image['height']} px, "
+                     f"sha256 {figure['content_hash'][:12]}")
+        lines.append("")
+
+    lines += ["## Quality Metrics", "", "### Subplot Detection"]
+    for figure in figures:
+        lines.append(f"- **Figure {figure['figure_number']}:** "
+                     f"{figure['subplot_count']} subplots ({panel_range(figure)})")
+    lines += [f"- **Total:** {total_subplots} subplots", ""]
+    mismatches = layout_mismatches(entries)
+    if mismatches:
+        lines += ["### Panel Detection Mismatches"]
+        lines += [f"- **{figure_id}:** {detected} panels detected, {annotated} annotated"
+                  for figure_id, detected, annotated in mismatches]
+        lines.append("")
+    checks = [(subplot["subplot_id"], issue) for figure in figures
+              for subplot in figure["subplots"] for issue in subplot.get("guideline_issues", [])]
+    if checks:
+        lines += ["### Guideline Checks"]
+        lines += [f"- **{subplot_id}:** {issue}" for subplot_id, issue in checks]
+        lines.append("")
+    duplicates = find_duplicates(entries)
+    if duplicates:
+        lines += ["### Possible Duplicates"]
+        lines += [f"- `{a}` ~ `{b}` (perceptual hash distance {d})" for a, b, d in duplicates]
+        lines.append("")
+
+    type_counts = {}
+    guidelines = {}
+    for figure in figures:
+        for subplot in figure["subplots"]:
+            type_counts[subplot["type"]] = type_counts.get(subplot["type"], 0) + 1
+            number, name = guideline_parts(subplot.get("guideline_ref"))
+            if number and number not in guidelines:
+                guidelines[number] = name
+    lines += ["### Figure Type Distribution"]
+    for kind, count in sorted(type_counts.items(), key=lambda item: (-item[1], item[0])):
+        lines.append(f"- **{kind}:** {count}")
+    reviews = {e["figure"]["figure_number"]: caption_review(e) for e in entries}
+    titled = [n for n, r in reviews.items() if not r["one_sentence_title"]]
+    undescribed = [i for r in reviews.values() for i in r["undescribed"]]
+    subjective = sorted({t for r in reviews.values() for t in r["subjective"]})
+    long = [n for n, r in reviews.items() if r["words"] > CAPTION_WORD_LIMIT]
+    lines += ["", "## Caption Quality Assessment", "",
+              "### Compliance with Nature Communications Guidelines",
+              f"{mark(not titled)} **One-sentence title:** "
+              + (f"Figure {', '.join(map(str, titled))} titles run past one sentence"
+                 if titled else "Each caption begins with a one-sentence title"),
+              f"{mark(not undescribed)} **Subplot descriptions:** "
+              + (f"no (X) label for {', '.join(undescribed)}" if undescribed
+                 else f"All {total_subplots} subplots labelled in their captions"),
+              f"{mark(not subjective)} **Objective language:** "
+              + (f"subjective terms: {', '.join(subjective)}" if subjective
+                 else "No subjective terms"),
+              f"{mark(not long)} **Length:** "
+              + (f"Figure {', '.join(map(str, long))} over {CAPTION_WORD_LIMIT} words" if long
+                 else f"All captions within {CAPTION_WORD_LIMIT} words"),
+              "", "### Caption Length"]
+    for figure in figures:
+        words = reviews[figure["figure_number"]]["words"]
+        lines.append(f"- Figure {figure['figure_number']}: {words} words "
+                     f"({figure['subplot_count']} subplots, "
+                     f"~{round(words / max(figure['subplot_count'], 1))} per subplot)")
+
+    lines += ["", "## Traceability", "",
+              "All structured data extractions reference specific guideline sections:"]
+    for number in sorted(guidelines, key=guideline_sort_key):
+        lines.append(f"- **{guidelines[number]}:** Guidelines {number}")
+
+    lines += ["", "## Output Files Generated", "",
+              "| File | Size | Purpose |", "|------|------|---------|"]
+    for entry in entries:
+        figure = entry["figure"]
+        title = entry["summary"].get("title", "")
+        size_kb = round(figure["image"]["file_size_bytes"] / 1024)
+        lines.append(f"| `images/{figure['original_file']}` | {size_kb} KB | "
+                     f"Figure {figure['figure_number']}: {title} |")
+    for name, purpose in (("image_analysis.json", "Structured analysis data"),
+                          ("figure_captions.md", "Publication-grade captions"),
+                          ("image_analysis_report.md", "This summary report")):
+        path = workspace / name
+        size = f"{round(path.stat().st_size / 1024)} KB" if path.exists() else "-"
+        lines.append(f"| `{name}` | {size} | {purpose} |")
+
+    low_resolution = [f for f in figures if f["image"]["width"] < PRINT_WIDTH_PX]
+    recommendations = []
+    if titled or undescribed or subjective or long:
+        recommendations.append("**Captions:** Revise the items marked ✗ under Caption Quality "
+                               "Assessment before the captions go into the Results section")
+    if checks:
+        flagged = ", ".join(dict.fromkeys(subplot_id for subplot_id, _ in checks))
+        recommendations.append(f"**Guideline Checks:** Close the caption gaps listed under "
+                               f"Quality Metrics for {flagged}")
+    if mismatches:
+        recommendations.append("**Panel Layout:** Confirm the panel letters of "
+                               f"{', '.join(i for i, _, _ in mismatches)}, whose detected "
+                               "panels differ from the annotations")
+    if duplicates:
+        recommendations.append("**Duplicates:** Check that the near-duplicate images listed "
+                               "under Quality Metrics are not reused across figures")
+    if annotations.get("technical_notes"):
+        recommendations.append("**Technical Details:** The Technical Notes at the end of "
+                               "figure_captions.md can move to the Methods")
+    if low_resolution:
+        recommendations.append(
+            "**Resolution:** Re-export "
+            + ", ".join(f"Figure {f['figure_number']} ({f['image']['width']} px)"
+                        for f in low_resolution)
+            + f" at 300 DPI; a 180 mm double-column figure needs {PRINT_WIDTH_PX} px")
+    recommendations.append(f"**Figure References:** Cite Figures 1-{len(figures)} in order "
+                           "in the Results" if len(figures) > 1 else
+                           "**Figure References:** Cite Figure 1 in the Results")
+    lines += ["", "## Recommendations for Manuscript Integration", ""]
+    lines += [f"{i}. {text}" for i, text in enumerate(recommendations, 1)]
+
+    report = workspace / "report_content.md"
+    contexts = sum(bool((f.get("report_location") or {}).get("context_lines")) for f in figures)
+    structured = sum(bool(s.get("structured_data")) for f in figures for s in f["subplots"])
+    captioned = sum(bool(e["caption"].get("text")) for e in entries)
+    issues = len(mismatches) + len(checks) + len(duplicates)
+    status = [
+        (report.exists(), "Text extraction", f"report_content.md "
+         f"({len(report.read_text(encoding='utf-8').splitlines())} lines)"
+         if report.exists() else "report_content.md missing"),
+        (bool(figures), "Image extraction", f"{len(figures)} PNG files"),
+        (bool(total_subplots), "Type classification",
+         f"{total_subplots} subplots classified across {len(type_counts)} figure types"),
+        (contexts == len(figures), "Context association",
+         f"{contexts}/{len(figures)} figures linked to report content"),
+        (structured == total_subplots, "Structured data extraction",
+         f"{structured}/{total_subplots} subplots with structured data"),
+        (captioned == len(figures), "Caption generation",
+         f"{captioned}/{len(figures)} figures captioned"),
+        (not issues, "Quality validation",
+         f"{len(mismatches)} panel mismatches, {len(checks)} guideline checks, "
+         f"{len(duplicates)} possible duplicates"),
+    ]
+    lines += ["", "## Phase 0.5 Completion Status", ""]
+    lines += [f"{'✅' if ok else '❌'} **{name}:** {detail}" for ok, name, detail in status]
+    if all(ok for ok, _, _ in status):
+        verdict = "**Ready for Phase 1:** All prerequisite materials prepared for Results " \
+                  "section generation."
+    elif all(ok for ok, _, _ in status[:-1]):
+        verdict = "**Ready for Phase 1:** All prerequisite materials prepared; resolve the " \
+                  "quality issues above before submission."
+    else:
+        verdict = "**Not ready for Phase 1:** Complete the steps marked ❌ first."
+    lines += ["", verdict]
+    return "\n".join(lines) + "\n"
+
+
+def run(workspace, workers=None, force=False, executor=None):
+    """Run phase 0.5 figure analysis for one workspace and write all outputs."""
+    workspace = Path(workspace)
+    with spans.span("figures.analyze") as trace:
+        entries, stats, annotations = analyze_workspace(workspace, workers, force, executor)
+        trace.add(items=stats["figures"], cache_hits=stats["cached"],
+                  cache_misses=stats["analyzed"],
+                  bytes_in=sum(e["figure"]["image"]["file_size_bytes"] for e in entries))
+
+    outputs = {
+        "image_analysis.json": json.dumps(build_image_analysis(entries, annotations),
+                                          indent=2, ensure_ascii=False),
+        "figure_captions.md": render_captions(entries, annotations),
+        "image_analysis_report.md": render_report(entries, annotations, workspace),
+    }
+    with spans.span("figures.render", items=len(outputs)) as trace:
+        for name, text in outputs.items():
+            atomic_write_text(workspace / name, text)
+            trace.add(bytes_out=len(text.encode("utf-8")))
+            print(f"✓ Generated: {workspace / name}")
+
+    print("\n=== Phase 0.5 Complete ===")
+    print(f"Total figures analyzed: {stats['figures']} "
+          f"({stats['analyzed']} recomputed, {stats['cached']} cached)")
+    print(f"Total subplots detected: "
+          f"{sum(e['figure']['subplot_count'] for e in entries)}")
+    for figure_id, detected, annotated in layout_mismatches(entries):
+        print(f"✗ Panel detection: {figure_id} has {detected} panels, {annotated} annotated")
+    for a, b, distance in find_duplicates(entries):
+        print(f"✗ Near-duplicate: {a} ~ {b} (distance {distance})")
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="manuscript_agent figures",
+                                     description=__doc__.strip().splitlines()[0])
+    parser.add_argument("workspace", help="manuscript workspace directory")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="process pool size (default: CPU count)")
+    parser.add_argument("--force", action="store_true",
+                        help="ignore cached per-figure results")
+    args = parser.parse_args(argv)
+    run(args.workspace, args.workers, args.force)
+    return 0
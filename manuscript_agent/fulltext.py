@@ -0,0 +1,377 @@
+"""
+Open-Access Full Text
+Downloads the open-access PDFs of the phase 1 literature into
+literature/pdfs/ and extracts their text into literature/texts/. Downloads
+stream straight to disk with a bound on transfers overall and per host,
+follow redirects, resume interrupted transfers with HTTP range requests and
+are deduplicated by SHA-256, so a preprint mirror of a publisher PDF is kept
+once. Every finished PDF is handed to a process pool that extracts its text
+page by page while the remaining downloads continue. Throughput (MB/s,
+pages/s) is printed and recorded in literature/pdfs/index.json.
+
+    python -m manuscript_agent fulltext manuscript_11072333
+    python -m manuscript_agent fulltext manuscript_11072333 --concurrency 8 --per-host 2
+    python -m manuscript_agent fulltext --bench 24 --drop-rate 0.2
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import re
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from urllib.parse import urljoin
+
+from manuscript_agent.checkpoint import atomic_write_json
+from manuscript_agent.httpclient import MAX_REDIRECTS, REDIRECT_STATUSES, RETRY_STATUSES, \
+    HttpClient, HttpError
+
+PDF_DIR = "literature/pdfs"
+TEXT_DIR = "literature/texts"
+INDEX_FILE = "index.json"
+DEFAULT_CONCURRENCY = 8
+DEFAULT_PER_HOST = 2
+RETRIES = 4
+HASH_BLOCK = 1 << 20
+USER_AGENT = "manuscript-agent/0.1 (open-access full text)"
+
+
+def paper_key(paper):
+    """File stem for a paper: its DOI (or PMID) made filename-safe, else a hash of the URL."""
+    if paper.get("doi"):
+        return re.sub(r"[^\w.-]+", "_", paper["doi"].lower()).strip("_")[:120]
+    if paper.get("pmid"):
+        return f"pmid_{paper['pmid']}"
+    return "url_" + hashlib.sha1(paper["pdf_url"].encode()).hexdigest()[:16]
+
+
+def open_access_papers(workspace):
+    """[{"key", "url", "title"}] for open-access papers with a PDF link, one per key."""
+    from manuscript_agent.papers import read_papers
+
+    found = {}
+    for path in sorted((Path(workspace) / "literature").glob("citation*_final.json")):
+        for paper in read_papers(path, ("doi", "pmid", "title", "pdf_url", "is_open_access")):
+            if paper.get("is_open_access") and paper.get("pdf_url"):
+                found.setdefault(paper_key(paper), {"key": paper_key(paper),
+                                                    "url": paper["pdf_url"],
+                                                    "title": paper.get("title", "")})
+    return list(found.values())
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while block := f.read(HASH_BLOCK):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def extract_text(pdf_path, text_path):
+    """Worker-process entry point: pdftext.extract plus timing, errors returned not raised."""
+    from manuscript_agent import pdftext
+
+    start = time.perf_counter()
+    try:
+        result = pdftext.extract(pdf_path, text_path)
+    except Exception as exc:
+        # Damaged PDFs fail in many ways; one bad file must not stop the pool
+        return {"error": f"{type(exc).__name__}: {exc}"}
+    result["seconds"] = round(time.perf_counter() - start, 4)
+    return result
+
+
+class Downloader:
+    """
+    Resumable PDF downloads into `pdf_dir`. A transfer in progress lives in
+    <key>.pdf.part next to <key>.pdf.part.json (source URL and ETag), so a
+    later attempt, in this run or the next, asks only for the missing bytes.
+    Completed files are renamed to <key>.pdf and indexed by checksum.
+    """
+
+    def __init__(self, pdf_dir, concurrency=DEFAULT_CONCURRENCY, per_host=DEFAULT_PER_HOST,
+                 timeout=60.0, retries=RETRIES, backoff=0.5):
+        self.pdf_dir = Path(pdf_dir)
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.index = self.load_index()
+        self.by_hash = {entry["sha256"]: key for key, entry in self.index.items()
+                        if entry.get("sha256") and not entry.get("duplicate_of")}
+        self.stats = {"files": 0, "bytes": 0, "resumed": 0, "duplicates": 0, "cached": 0,
+                      "failed": 0, "seconds": 0.0}
+
+    def load_index(self):
+        try:
+            with open(self.pdf_dir / INDEX_FILE, 'r', encoding='utf-8') as f:
+                return json.load(f).get("files", {})
+        except (OSError, ValueError):
+            return {}
+
+    def save_index(self, run=None):
+        doc = {"updated": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+               "files": self.index}
+        if run:
+            doc["last_run"] = run
+        atomic_write_json(self.pdf_dir / INDEX_FILE, doc)
+
+    def path(self, key):
+        return self.pdf_dir / f"{key}.pdf"
+
+    async def run(self, papers, finished):
+        """Download `papers`; `finished(key, path)` is called for each new, unique PDF."""
+        self.pdf_dir.mkdir(parents=True, exist_ok=True)
+        gate = asyncio.Semaphore(self.concurrency)
+        start = time.perf_counter()
+
+        async def one(paper):
+            async with gate:
+                return await self.download(client, paper, finished)
+
+        try:
+            async with HttpClient(limit_per_host=self.per_host, timeout=self.timeout,
+                                  user_agent=USER_AGENT) as client:
+                return await asyncio.gather(*(one(paper) for paper in papers))
+        finally:
+            self.stats["seconds"] = round(time.perf_counter() - start, 3)
+            self.save_index()
+
+    async def download(self, client, paper, finished):
+        key, url = paper["key"], paper["url"]
+        entry = self.index.get(key)
+        if entry and entry.get("sha256") and entry.get("url") == url \
+                and self.path(entry.get("duplicate_of") or key).exists():
+            self.stats["cached"] += 1
+            return dict(entry, key=key, cached=True)
+
+        part = self.pdf_dir / f"{key}.pdf.part"
+        meta_path = self.pdf_dir / f"{key}.pdf.part.json"
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            meta = {}
+        if meta.get("url") != url:
+            part.unlink(missing_ok=True)
+            meta = {"url": url}
+
+        for attempt in range(self.retries + 1):
+            try:
+                await self.transfer(client, url, part, meta, meta_path)
+                break
+            except HttpError as exc:
+                if exc.status not in RETRY_STATUSES or attempt == self.retries:
+                    return self.failed(key, url, str(exc))
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError) as exc:
+                if attempt == self.retries:
+                    return self.failed(key, url, f"{type(exc).__name__}: {exc}")
+            await asyncio.sleep(self.backoff * 2 ** attempt * (0.5 + random.random() / 2))
+
+        with open(part, 'rb') as f:
+            head = f.read(1024)
+        if b"%PDF-" not in head:
+            part.unlink()
+            meta_path.unlink(missing_ok=True)
+            return self.failed(key, url, "not a PDF (landing page or paywall)")
+        size = part.stat().st_size
+        digest = file_sha256(part)
+        entry = {"url": url, "bytes": size, "sha256": digest,
+                 "fetched": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")}
+        original = self.by_hash.get(digest)
+        if original and original != key and self.path(original).exists():
+            part.unlink()
+            entry["duplicate_of"] = original
+            self.stats["duplicates"] += 1
+        else:
+            os.replace(part, self.path(key))
+            self.by_hash[digest] = key
+            self.stats["files"] += 1
+            finished(key, self.path(key))
+        meta_path.unlink(missing_ok=True)
+        self.index[key] = entry
+        return dict(entry, key=key)
+
+    async def transfer(self, client, url, part, meta, meta_path):
+        """Stream `url` into `part`, continuing from its current size when the server allows."""
+        for _ in range(MAX_REDIRECTS + 1):
+            offset = part.stat().st_size if part.exists() else 0
+            headers = {"Accept": "application/pdf,*/*;q=0.8"}
+            if offset:
+                headers["Range"] = f"bytes={offset}-"
+                if meta.get("etag"):
+                    headers["If-Range"] = meta["etag"]
+            async with client.stream("GET", url, headers=headers) as response:
+                status = response.status
+                if status in REDIRECT_STATUSES and response.headers.get("location"):
+                    url = urljoin(url, response.headers["location"])
+                    continue
+                if status == 416 and offset:
+                    total = response.headers.get("content-range", "").rpartition("/")[2]
+                    if total == str(offset):
+                        return
+                    part.unlink()
+                    continue
+                if status >= 400:
+                    raise HttpError(status, url)
+                ranged = re.match(r"bytes (\d+)-", response.headers.get("content-range", ""))
+                resume = status == 206 and ranged and int(ranged.group(1)) == offset
+                if resume:
+                    self.stats["resumed"] += 1
+                meta["etag"] = response.headers.get("etag")
+                atomic_write_json(meta_path, meta)
+                with open(part, 'ab' if resume else 'wb') as f:
+                    async for chunk in response.iter_chunks():
+                        f.write(chunk)
+                        self.stats["bytes"] += len(chunk)
+                return
+        raise HttpError(status, url)
+
+    def failed(self, key, url, error):
+        self.stats["failed"] += 1
+        return {"key": key, "url": url, "error": error}
+
+
+async def fetch_fulltext(papers, pdf_dir, text_dir, concurrency=DEFAULT_CONCURRENCY,
+                         per_host=DEFAULT_PER_HOST, workers=None, timeout=60.0, backoff=0.5):
+    """
+    Download `papers` and extract each new PDF's text as soon as it lands.
+    Returns (per-paper results, run statistics).
+    """
+    text_dir = Path(text_dir)
+    text_dir.mkdir(parents=True, exist_ok=True)
+    loop = asyncio.get_running_loop()
+    downloader = Downloader(pdf_dir, concurrency, per_host, timeout, backoff=backoff)
+    extractions = {}
+    start = time.perf_counter()
+
+    with ProcessPoolExecutor(workers or os.cpu_count()) as pool:
+        def finished(key, path):
+            extractions[key] = loop.run_in_executor(pool, extract_text, str(path),
+                                                    str(text_dir / f"{key}.txt"))
+
+        results = await downloader.run(papers, finished)
+        # Cached PDFs whose text is missing or older (e.g. an interrupted run)
+        for result in results:
+            key = result.get("key")
+            if result.get("cached") and not result.get("duplicate_of"):
+                text = text_dir / f"{key}.txt"
+                pdf = downloader.path(key)
+                if not text.exists() or text.stat().st_mtime < pdf.stat().st_mtime:
+                    finished(key, pdf)
+        texts = dict(zip(extractions, await asyncio.gather(*extractions.values())))
+    wall = time.perf_counter() - start
+
+    pages = 0
+    for result in results:
+        text = texts.get(result.get("key"))
+        if text:
+            result.update(text)
+            pages += text.get("pages", 0)
+    stats = dict(downloader.stats)
+    stats.update({
+        "megabytes": round(stats["bytes"] / 1e6, 2),
+        "mb_per_second": round(stats["bytes"] / 1e6 / stats["seconds"], 2)
+        if stats["seconds"] else None,
+        "texts": sum(1 for t in texts.values() if "error" not in t),
+        "pages": pages,
+        "extract_seconds": round(sum(t.get("seconds", 0) for t in texts.values()), 3),
+        "pages_per_second": round(pages / wall, 1) if wall and pages else None,
+        "wall_seconds": round(wall, 3),
+    })
+    downloader.save_index(stats)
+    return results, stats
+
+
+def fulltext_workspace(workspace, **options):
+    workspace = Path(workspace)
+    return asyncio.run(fetch_fulltext(open_access_papers(workspace), workspace / PDF_DIR,
+                                      workspace / TEXT_DIR, **options))
+
+
+async def benchmark(count=24, drop_rate=0.2, concurrency=DEFAULT_CONCURRENCY,
+                    per_host=DEFAULT_PER_HOST, workers=None):
+    """
+    Cold and warm runs against the local stand-in server. Every fourth paper
+    goes through a redirect, every sixth is a mirror of the previous paper's
+    PDF (a checksum duplicate), and `drop_rate` of responses are cut mid-body.
+    """
+    from manuscript_agent.fakeserver import FakeServer
+
+    results = {}
+    async with FakeServer(drop_rate=drop_rate, seed=1) as server:
+        papers = []
+        for n in range(1, count + 1):
+            if n % 6 == 0:
+                url = f"{server.url}/pdf/{n - 1}.pdf?mirror=1"
+            elif n % 4 == 0:
+                url = f"{server.url}/oa/{n}"
+            else:
+                url = f"{server.url}/pdf/{n}.pdf"
+            papers.append({"key": f"paper{n:03d}", "url": url})
+        with tempfile.TemporaryDirectory() as directory:
+            for label in ("cold", "warm"):
+                _, stats = await fetch_fulltext(papers, Path(directory) / "pdfs",
+                                                Path(directory) / "texts", concurrency,
+                                                per_host, workers, backoff=0.05)
+                results[label] = stats
+        results["cold"]["dropped_connections"] = server.stats["dropped"]
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="manuscript_agent fulltext",
+                                     description=__doc__.strip().splitlines()[0])
+    parser.add_argument("workspace", nargs="?", help="manuscript workspace directory")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help="simultaneous downloads (default: %(default)s)")
+    parser.add_argument("--per-host", type=int, default=DEFAULT_PER_HOST,
+                        help="simultaneous downloads per host (default: %(default)s)")
+    parser.add_argument("--workers", type=int, help="text extraction processes "
+                                                    "(default: CPU count)")
+    parser.add_argument("--timeout", type=float, default=60.0,
+                        help="seconds without progress before a transfer is retried")
+    parser.add_argument("--bench", type=int, metavar="PAPERS",
+                        help="benchmark against the local stand-in server with PAPERS papers")
+    parser.add_argument("--drop-rate", type=float, default=0.2,
+                        help="fraction of benchmark responses cut mid-body (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    if args.bench:
+        results = asyncio.run(benchmark(args.bench, args.drop_rate, args.concurrency,
+                                        args.per_host, args.workers))
+        for label, stats in results.items():
+            print(f"{label}:")
+            for name, value in stats.items():
+                print(f"{name:>20}: {value}")
+        return 0
+    if not args.workspace:
+        parser.error("workspace is required unless --bench is given")
+
+    papers = open_access_papers(args.workspace)
+    if not papers:
+        print(f"✗ No open-access PDF links in {args.workspace}/literature")
+        return 1
+    results, stats = fulltext_workspace(args.workspace, concurrency=args.concurrency,
+                                        per_host=args.per_host, workers=args.workers,
+                                        timeout=args.timeout)
+    for result in results:
+        if "error" in result:
+            print(f"✗ {result['key']}: {result['error']}")
+        elif result.get("duplicate_of"):
+            print(f"✓ {result['key']}: duplicate of {result['duplicate_of']}")
+        else:
+            origin = "cached" if result.get("cached") else f"{result['bytes'] / 1e6:.2f} MB"
+            pages = f", {result['pages']} pages" if "pages" in result else ""
+            print(f"✓ {result['key']}: {origin}{pages}")
+    for name in ("files", "duplicates", "cached", "resumed", "failed", "megabytes",
+                 "mb_per_second", "pages", "pages_per_second"):
+        print(f"{name:>20}: {stats[name]}")
+    return 1 if stats["failed"] == len(papers) else 0
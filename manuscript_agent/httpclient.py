@@ -0,0 +1,350 @@
+"""
+Async HTTP Client
+Minimal HTTP/1.1 client on asyncio streams with per-host keep-alive
+connection pooling, a token-bucket rate limiter and retry with exponential
+backoff. Used by the literature search layer and the translation client;
+standard library only.
+"""
+
+import asyncio
+import json
+import random
+import ssl
+import threading
+import time
+from urllib.parse import urlencode, urljoin, urlsplit
+
+USER_AGENT = "manuscript-agent/0.1 (literature search)"
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+MAX_REDIRECTS = 5
+REDIRECT_STATUSES = {301, 302, 303, 307, 308}
+READ_CHUNK = 1 << 16
+
+
+class HttpError(Exception):
+    """Non-success HTTP status after all retries."""
+
+    def __init__(self, status, url, body=b""):
+        super().__init__(f"HTTP {status} for {url}")
+        self.status = status
+        self.url = url
+        self.body = body
+
+
+class Response:
+    def __init__(self, status, reason, headers, body):
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.body = body
+
+    def text(self):
+        return self.body.decode("utf-8", errors="replace")
+
+    def json(self):
+        return json.loads(self.body)
+
+
+class RateLimiter:
+    """Token bucket: `rate` requests per second with bursts of up to `burst`."""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class SharedRateLimiter:
+    """
+    Token bucket shared by several threads and event loops (batch runs). A
+    slot is reserved under a thread lock, letting the bucket go into debt, and
+    the wait for it happens outside the lock on the caller's own loop.
+    """
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self):
+        """Seconds until the reserved request may be sent."""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    async def acquire(self):
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class Connection:
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    def close(self):
+        self.writer.close()
+
+
+class HttpClient:
+    """
+    Keep-alive connection pool shared by all requests. At most
+    `limit_per_host` connections are open to any one host at a time.
+    """
+
+    def __init__(self, limit_per_host=8, timeout=30.0, user_agent=USER_AGENT):
+        self.limit_per_host = limit_per_host
+        self.timeout = timeout
+        self.user_agent = user_agent
+        self.idle = {}
+        self.slots = {}
+        self.ssl_context = ssl.create_default_context()
+        self.stats = {"requests": 0, "connections": 0, "reused": 0, "bytes_in": 0}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def close(self):
+        for connections in self.idle.values():
+            for conn in connections:
+                conn.close()
+        self.idle.clear()
+
+    def _slot(self, key):
+        if key not in self.slots:
+            self.slots[key] = asyncio.Semaphore(self.limit_per_host)
+        return self.slots[key]
+
+    async def _connect(self, key):
+        idle = self.idle.get(key)
+        while idle:
+            conn = idle.pop()
+            if not conn.reader.at_eof():
+                self.stats["reused"] += 1
+                return conn
+            conn.close()
+        scheme, host, port = key
+        reader, writer = await asyncio.open_connection(
+            host, port, ssl=self.ssl_context if scheme == "https" else None)
+        self.stats["connections"] += 1
+        return Connection(reader, writer)
+
+    def _release(self, key, conn, reusable):
+        if reusable:
+            self.idle.setdefault(key, []).append(conn)
+        else:
+            conn.close()
+
+    async def request(self, method, url, params=None, headers=None, body=None):
+        """Send one request (with an optional bytes `body`) and read the full response body."""
+        async with self.stream(method, url, params, headers, body) as response:
+            chunks = [chunk async for chunk in response.iter_chunks()]
+        return Response(response.status, response.reason, response.headers, b"".join(chunks))
+
+    async def get(self, url, params=None, headers=None):
+        return await self.request("GET", url, params, headers)
+
+    def stream(self, method, url, params=None, headers=None, body=None):
+        """Async context manager yielding a StreamResponse for chunked reads."""
+        return StreamResponse(self, method, url, params, headers, body)
+
+
+class StreamResponse:
+    """Response whose body is consumed incrementally via iter_chunks()."""
+
+    def __init__(self, client, method, url, params, headers, body=None):
+        self.client = client
+        self.method = method
+        self.url = url if not params else f"{url}{'&' if '?' in url else '?'}{urlencode(params)}"
+        self.request_headers = headers or {}
+        self.body = body
+        self.status = None
+        self.reason = ""
+        self.headers = {}
+        self._conn = None
+        self._key = None
+        self._reusable = False
+        self._remaining = None
+        self._chunked = False
+        self._done = False
+
+    async def __aenter__(self):
+        parts = urlsplit(self.url)
+        scheme = parts.scheme or "http"
+        port = parts.port or (443 if scheme == "https" else 80)
+        self._key = (scheme, parts.hostname, port)
+        await self.client._slot(self._key).acquire()
+        try:
+            await asyncio.wait_for(self._send(parts), self.client.timeout)
+        except BaseException:
+            if self._conn:
+                self._conn.close()
+            self.client._slot(self._key).release()
+            raise
+        return self
+
+    async def __aexit__(self, *exc):
+        reusable = self._reusable and self._done and exc[0] is None
+        self.client._release(self._key, self._conn, reusable)
+        self.client._slot(self._key).release()
+
+    async def _send(self, parts):
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+        headers = {
+            "Host": parts.netloc,
+            "User-Agent": self.client.user_agent,
+            "Accept-Encoding": "identity",
+            "Connection": "keep-alive",
+        }
+        if self.body is not None:
+            headers["Content-Length"] = str(len(self.body))
+        headers.update(self.request_headers)
+        head = f"{self.method} {path} HTTP/1.1\r\n"
+        head += "".join(f"{k}: {v}\r\n" for k, v in headers.items()) + "\r\n"
+
+        for attempt in range(2):
+            self._conn = await self.client._connect(self._key)
+            try:
+                self._conn.writer.write(head.encode("latin-1"))
+                if self.body:
+                    self._conn.writer.write(self.body)
+                await self._conn.writer.drain()
+                status_line = await self._conn.reader.readline()
+                if not status_line:
+                    raise ConnectionResetError("connection closed before response")
+                break
+            except (ConnectionError, asyncio.IncompleteReadError):
+                # A pooled keep-alive connection may have been closed by the
+                # server; retry once on a fresh connection.
+                self._conn.close()
+                self._conn = None
+                if attempt:
+                    raise
+        self.client.stats["requests"] += 1
+
+        version, status, *reason = status_line.decode("latin-1").rstrip("\r\n").split(" ", 2)
+        self.status = int(status)
+        self.reason = reason[0] if reason else ""
+        while True:
+            line = await self._conn.reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            self.headers[name.strip().lower()] = value.strip()
+
+        connection = self.headers.get("connection", "").lower()
+        self._reusable = version == "HTTP/1.1" and connection != "close"
+        if self.headers.get("transfer-encoding", "").lower() == "chunked":
+            self._chunked = True
+        elif "content-length" in self.headers:
+            self._remaining = int(self.headers["content-length"])
+        elif self.method == "HEAD" or self.status in (204, 304):
+            self._remaining = 0
+        else:
+            self._reusable = False
+        if self.method == "HEAD":
+            self._remaining = 0
+            self._chunked = False
+
+    async def _read(self, n):
+        return await asyncio.wait_for(self._conn.reader.read(n), self.client.timeout)
+
+    async def _readline(self):
+        return await asyncio.wait_for(self._conn.reader.readline(), self.client.timeout)
+
+    async def iter_chunks(self):
+        if self._chunked:
+            while True:
+                size_line = await self._readline()
+                size = int(size_line.split(b";")[0].strip() or b"0", 16)
+                if size == 0:
+                    while (await self._readline()) not in (b"\r\n", b"\n", b""):
+                        pass
+                    break
+                remaining = size
+                while remaining:
+                    chunk = await self._read(min(remaining, READ_CHUNK))
+                    if not chunk:
+                        raise asyncio.IncompleteReadError(b"", remaining)
+                    remaining -= len(chunk)
+                    self.client.stats["bytes_in"] += len(chunk)
+                    yield chunk
+                await self._readline()
+        elif self._remaining is not None:
+            while self._remaining:
+                chunk = await self._read(min(self._remaining, READ_CHUNK))
+                if not chunk:
+                    raise asyncio.IncompleteReadError(b"", self._remaining)
+                self._remaining -= len(chunk)
+                self.client.stats["bytes_in"] += len(chunk)
+                yield chunk
+        else:
+            while chunk := await self._read(READ_CHUNK):
+                self.client.stats["bytes_in"] += len(chunk)
+                yield chunk
+        self._done = True
+
+
+async def fetch(client, url, params=None, headers=None, limiter=None,
+                retries=4, backoff=0.5, max_backoff=30.0, method="GET", body=None):
+    """
+    GET (or `method` with `body`) with rate limiting and retry. Retries
+    connection errors, timeouts and 429/5xx responses with exponential
+    backoff and jitter, honouring Retry-After when the server sends one.
+    Follows up to MAX_REDIRECTS redirects (a 303 becomes a GET); any other
+    non-2xx status raises HttpError.
+    """
+    attempt = redirects = 0
+    while True:
+        if limiter is not None:
+            await limiter.acquire()
+        delay = min(max_backoff, backoff * (2 ** attempt)) * (0.5 + random.random() / 2)
+        try:
+            response = await client.request(method, url, params, headers, body)
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+            if attempt == retries:
+                raise
+            attempt += 1
+            await asyncio.sleep(delay)
+            continue
+        if response.status in REDIRECT_STATUSES and response.headers.get("location"):
+            if redirects == MAX_REDIRECTS:
+                raise HttpError(response.status, url, response.body)
+            redirects += 1
+            url, params = urljoin(url, response.headers["location"]), None
+            if response.status == 303:
+                method, body = "GET", None
+            continue
+        if response.status < 300:
+            return response
+        if response.status not in RETRY_STATUSES or attempt == retries:
+            raise HttpError(response.status, url, response.body)
+        attempt += 1
+        retry_after = response.headers.get("retry-after", "")
+        if retry_after.isdigit():
+            delay = min(max_backoff, float(retry_after))
+        await asyncio.sleep(delay)
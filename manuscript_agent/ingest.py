@@ -0,0 +1,292 @@
+"""
+Streaming DOCX Ingestion
+Turns the input report (.docx) into report_content.md and images/imageN.*
+without loading the archive into memory: zip entries are opened lazily,
+word/document.xml is parsed incrementally and each paragraph is written as
+soon as it closes, and media files are copied in chunks straight from
+word/media/ to images/.
+
+Alongside the text, report_figures.json records where each figure sits in
+report_content.md (image line, preceding context paragraphs and legend),
+which figure analysis uses for context association.
+"""
+
+import argparse
+import json
+import os
+import posixpath
+import re
+import shutil
+import zipfile
+from pathlib import Path
+from xml.etree.ElementTree import iterparse
+
+from manuscript_agent import spans
+from manuscript_agent.checkpoint import atomic_write_json
+
+W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+A = "{http://schemas.openxmlformats.org/drawingml/2006/main}"
+R = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+V = "urn:schemas-microsoft-com:vml"
+REL = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+DOCUMENT_XML = "word/document.xml"
+DOCUMENT_RELS = "word/_rels/document.xml.rels"
+MANIFEST_FILE = "report_figures.json"
+COPY_CHUNK = 1 << 20
+FALSE_VALUES = {"0", "false", "off", "none"}
+LEGEND_TITLE = re.compile(r"^(fig(ure)?\.?\s*s?\d+|图\s*\d+)", re.IGNORECASE)
+LEGEND_PANEL = re.compile(r"^[（(]\s*[A-Z](\s*[-–,，、]\s*[A-Z])*\s*[）)]")
+
+
+def read_relationships(archive):
+    """Relationship id -> target path inside the archive (e.g. word/media/image1.png)."""
+    try:
+        stream = archive.open(DOCUMENT_RELS)
+    except KeyError:
+        return {}
+    rels = {}
+    with stream:
+        for _, elem in iterparse(stream):
+            if elem.tag == f"{REL}Relationship" and elem.get("TargetMode") != "External":
+                target = posixpath.normpath(posixpath.join("word", elem.get("Target", "")))
+                rels[elem.get("Id")] = target
+    return rels
+
+
+def is_on(elem):
+    """True when a toggle property such as <w:b/> is switched on."""
+    if elem is None:
+        return False
+    return elem.get(f"{W}val", "true").lower() not in FALSE_VALUES
+
+
+def heading_level(paragraph):
+    style = paragraph.find(f"{W}pPr/{W}pStyle")
+    if style is None:
+        return 0
+    name = style.get(f"{W}val", "").lower()
+    if name.startswith("heading") and name[7:].isdigit():
+        return int(name[7:])
+    if name == "title":
+        return 1
+    return 0
+
+
+def paragraph_content(paragraph):
+    """(text, all_bold, [relationship ids of embedded images]) for one <w:p>."""
+    pieces = []
+    bold_flags = []
+    images = []
+    for run in paragraph.iter(f"{W}r"):
+        bold = is_on(run.find(f"{W}rPr/{W}b"))
+        for child in run:
+            if child.tag == f"{W}t":
+                if child.text:
+                    pieces.append(child.text)
+                    if child.text.strip():
+                        bold_flags.append(bold)
+            elif child.tag == f"{W}tab":
+                pieces.append("\t")
+            elif child.tag in (f"{W}br", f"{W}cr"):
+                pieces.append(" ")
+        for blip in run.iter(f"{A}blip"):
+            if blip.get(f"{R}embed"):
+                images.append(blip.get(f"{R}embed"))
+        for imagedata in run.iter(f"{{{V}}}imagedata"):
+            if imagedata.get(f"{R}id"):
+                images.append(imagedata.get(f"{R}id"))
+    text = "".join(pieces).strip()
+    return text, bool(bold_flags) and all(bold_flags), images
+
+
+def is_legend(text, first):
+    """Legends open with a figure label and continue with panel labels."""
+    if LEGEND_PANEL.match(text):
+        return True
+    return first and bool(LEGEND_TITLE.match(text))
+
+
+def copy_member(archive, member, dest):
+    """Stream one archive member to disk in fixed-size chunks."""
+    tmp = dest.with_name(dest.name + ".part")
+    with archive.open(member) as src, open(tmp, 'wb') as dst:
+        shutil.copyfileobj(src, dst, COPY_CHUNK)
+    os.replace(tmp, dest)
+    return archive.getinfo(member).file_size
+
+
+class ContentWriter:
+    """Writes markdown blocks and tracks their line and byte offsets."""
+
+    def __init__(self, f):
+        self.f = f
+        self.line = 1
+        self.offset = 0
+        self.blocks = 0
+
+    def write_block(self, text):
+        """Write one block; returns (start_line, end_line, byte_offset)."""
+        if self.blocks:
+            self._write("\n")
+        start_line, start_offset = self.line, self.offset
+        self._write(text + "\n")
+        self.blocks += 1
+        return start_line, self.line - 1, start_offset
+
+    def _write(self, text):
+        self.f.write(text)
+        self.line += text.count("\n")
+        self.offset += len(text.encode("utf-8"))
+
+
+def span(blocks):
+    if not blocks:
+        return None
+    return {
+        "paragraphs": [blocks[0]["paragraph"], blocks[-1]["paragraph"]],
+        "lines": [blocks[0]["start_line"], blocks[-1]["end_line"]],
+        "byte_offset": blocks[0]["byte_offset"],
+    }
+
+
+def ingest_docx(docx_path, workspace, content_name="report_content.md"):
+    """
+    Stream a .docx report into workspace/report_content.md and
+    workspace/images/, returning the figure manifest that is also written to
+    workspace/report_figures.json.
+    """
+    with spans.span("ingest.docx", bytes_in=Path(docx_path).stat().st_size) as trace:
+        manifest = extract_docx(docx_path, workspace, content_name)
+        content_bytes = (Path(workspace) / content_name).stat().st_size
+        trace.add(items=len(manifest["figures"]), bytes_out=manifest["media_bytes"] + content_bytes)
+    return manifest
+
+
+def extract_docx(docx_path, workspace, content_name):
+    docx_path = Path(docx_path)
+    workspace = Path(workspace)
+    images_dir = workspace / "images"
+    images_dir.mkdir(parents=True, exist_ok=True)
+    content_path = workspace / content_name
+    tmp_content = content_path.with_name(content_path.name + ".part")
+
+    figures = []
+    copied = {}
+    section = []
+    open_legend = None
+    paragraph_index = 0
+    media_bytes = 0
+
+    with zipfile.ZipFile(docx_path) as archive, \
+            open(tmp_content, 'w', encoding='utf-8') as out:
+        rels = read_relationships(archive)
+        writer = ContentWriter(out)
+        with archive.open(DOCUMENT_XML) as stream:
+            body = None
+            depth = 0
+            for event, elem in iterparse(stream, events=("start", "end")):
+                if event == "start":
+                    if elem.tag == f"{W}body":
+                        body = elem
+                    elif elem.tag == f"{W}p":
+                        depth += 1
+                    continue
+                if elem.tag != f"{W}p":
+                    if elem.tag == f"{W}tbl" and body is not None and depth == 0:
+                        body.clear()
+                    continue
+                depth -= 1
+                if depth:
+                    continue
+
+                text, bold, image_ids = paragraph_content(elem)
+                level = heading_level(elem)
+                elem.clear()
+                if body is not None:
+                    body.clear()
+
+                for rel_id in image_ids:
+                    member = rels.get(rel_id)
+                    if not member or member not in archive.NameToInfo:
+                        continue
+                    if member not in copied:
+                        ext = posixpath.splitext(member)[1].lower() or ".bin"
+                        name = f"image{len(copied) + 1}{ext}"
+                        media_bytes += copy_member(archive, member, images_dir / name)
+                        copied[member] = name
+                    name = copied[member]
+                    start, end, offset = writer.write_block(f"![](images/{name})")
+                    figure = {
+                        "image": name,
+                        "media": member,
+                        "paragraph": paragraph_index,
+                        "line": start,
+                        "byte_offset": offset,
+                        "context": span(section),
+                        "legend": None,
+                        "context_text": [b["text"] for b in section],
+                        "legend_text": [],
+                    }
+                    figures.append(figure)
+                    open_legend = (figure, [])
+                    section = []
+
+                if text:
+                    if level:
+                        markdown = "#" * level + " " + text
+                    elif bold:
+                        markdown = f"**{text}**"
+                    else:
+                        markdown = text
+                    start, end, offset = writer.write_block(markdown)
+                    block = {"paragraph": paragraph_index, "start_line": start,
+                             "end_line": end, "byte_offset": offset, "text": text}
+                    if level or bold:
+                        section = []
+                        open_legend = None
+                    elif open_legend is not None and not image_ids and \
+                            is_legend(text, first=not open_legend[1]):
+                        figure, legend = open_legend
+                        legend.append(block)
+                        figure["legend"] = span(legend)
+                        figure["legend_text"].append(text)
+                    elif not image_ids:
+                        open_legend = None
+                        section.append(block)
+                paragraph_index += 1
+
+    os.replace(tmp_content, content_path)
+    manifest = {
+        "source": docx_path.name,
+        "report_content": content_name,
+        "paragraphs": paragraph_index,
+        "lines": writer.line - 1,
+        "media_bytes": media_bytes,
+        "figures": figures,
+    }
+    atomic_write_json(workspace / MANIFEST_FILE, manifest)
+    return manifest
+
+
+def load_manifest(workspace):
+    """Figure manifest keyed by image name, or {} if ingestion has not run."""
+    path = Path(workspace) / MANIFEST_FILE
+    if not path.exists():
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return {figure["image"]: figure for figure in json.load(f)["figures"]}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="manuscript_agent ingest",
+                                     description=__doc__.strip().splitlines()[0])
+    parser.add_argument("docx", help="input report (.docx)")
+    parser.add_argument("workspace", help="manuscript workspace directory")
+    args = parser.parse_args(argv)
+    manifest = ingest_docx(args.docx, args.workspace)
+    print(f"✓ Extracted: {manifest['report_content']} ({manifest['lines']} lines, "
+          f"{manifest['paragraphs']} paragraphs)")
+    print(f"✓ Extracted: {len(manifest['figures'])} figures "
+          f"({manifest['media_bytes'] / 1e6:.1f} MB media)")
+    return 0
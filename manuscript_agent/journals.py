@@ -0,0 +1,387 @@
+"""
+Journal Metrics Store
+Compiled, memory-mapped table of journal metrics (impact factor, JCR
+quartile/rank, CAS division, warning list, ...) keyed by ISSN, eISSN and
+normalized journal name. Enriching a candidate list is one batch join:
+all lookup keys are hashed, resolved with a vectorized binary search over
+the mapped key index, and each distinct journal record is decoded once.
+
+The store is compiled from a CSV dump with one row per journal and the
+journal_info field names as columns (subcategories as JSON or
+"name|division;name|division"). `extract` bootstraps that CSV from the
+journal_info blocks already present in final result files.
+
+    python -m manuscript_agent journals refresh journals.csv
+    python -m manuscript_agent journals extract literature/*_final.json -o journals.csv
+    python -m manuscript_agent journals lookup "Cancer Discovery" 2041-1723
+    python -m manuscript_agent journals enrich literature/citation1_validated.json -o out.json
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import mmap
+import os
+import re
+import struct
+import tempfile
+import time
+import unicodedata
+from pathlib import Path
+
+import numpy as np
+
+from manuscript_agent import spans
+from manuscript_agent.checkpoint import atomic_write_json
+from manuscript_agent.papers import read_papers
+
+MAGIC = b"MAJM"
+FORMAT_VERSION = 1
+# magic, version, record count, key count, blob bytes
+HEADER = struct.Struct("<4sIIIQ")
+FIELDS = ("journal", "issn", "eissn", "impact_factor", "jcr_year", "jcr_category",
+          "jcr_quartile", "jcr_rank", "cas_year", "wos_type", "cas_category",
+          "cas_division", "is_top", "subcategories", "is_warning", "warning_reason")
+BOOL_FIELDS = ("is_top", "is_warning")
+
+
+def default_path():
+    return Path(os.environ.get("MANUSCRIPT_AGENT_JOURNALS",
+                               Path.home() / ".cache" / "manuscript_agent" / "journals.bin"))
+
+
+def normalize_issn(issn):
+    """'2159-8274' for any spacing or case; '' for missing or 'N/A'."""
+    digits = re.sub(r"[^0-9Xx]", "", issn or "").upper()
+    return f"{digits[:4]}-{digits[4:]}" if len(digits) == 8 else ""
+
+
+def normalize_journal(name):
+    """Case-, accent- and punctuation-insensitive name without parenthetical place."""
+    text = unicodedata.normalize("NFKD", name or "").encode("ascii", "ignore").decode().lower()
+    text = re.sub(r"\([^)]*\)", " ", text).replace("&", " and ")
+    words = re.findall(r"[a-z0-9]+", text)
+    if words[:1] == ["the"]:
+        words = words[1:]
+    return " ".join(words)
+
+
+def key_hash(key):
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "little")
+
+
+def record_keys(record):
+    keys = []
+    for field in ("issn", "eissn"):
+        issn = normalize_issn(record.get(field))
+        if issn:
+            keys.append("issn:" + issn)
+    name = normalize_journal(record.get("journal"))
+    if name:
+        keys.append("name:" + name)
+    return keys
+
+
+def paper_keys(paper):
+    """Lookup keys for a paper, most specific first."""
+    crossref = paper.get("crossref_data") or {}
+    keys = []
+    for issn in (crossref.get("issn"), crossref.get("eissn"), paper.get("issn"),
+                 paper.get("eissn")):
+        issn = normalize_issn(issn)
+        if issn and "issn:" + issn not in keys:
+            keys.append("issn:" + issn)
+    for name in (paper.get("journal"), crossref.get("journal")):
+        name = normalize_journal(name)
+        if name and "name:" + name not in keys:
+            keys.append("name:" + name)
+    return keys
+
+
+def parse_bool(value):
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ("1", "true", "yes", "y")
+
+
+def parse_subcategories(value):
+    if isinstance(value, list):
+        return value
+    value = (value or "").strip()
+    if not value:
+        return []
+    if value.startswith("["):
+        return json.loads(value)
+    items = []
+    for part in value.split(";"):
+        name, _, division = part.partition("|")
+        items.append({"name": name.strip(), "division": division.strip()})
+    return items
+
+
+def clean_record(row):
+    """journal_info dict with typed values from a CSV row or existing block."""
+    record = {field: row.get(field) if row.get(field) is not None else "" for field in FIELDS}
+    for field in ("issn", "eissn"):
+        record[field] = normalize_issn(record[field]) or "N/A"
+    try:
+        record["impact_factor"] = float(record["impact_factor"] or 0.0)
+    except ValueError:
+        record["impact_factor"] = 0.0
+    for field in BOOL_FIELDS:
+        record[field] = parse_bool(record[field])
+    record["subcategories"] = parse_subcategories(record["subcategories"])
+    for field in ("jcr_year", "cas_year"):
+        record[field] = str(record[field])
+    return record
+
+
+def compile_store(records, path):
+    """
+    Write the binary store: header, key hashes (sorted uint64), record index
+    per key (uint32), record offsets (uint64) and the concatenated
+    compact-JSON records.
+    """
+    records = [clean_record(r) for r in records]
+    blobs = [json.dumps(r, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+             for r in records]
+    offsets = np.zeros(len(blobs) + 1, np.uint64)
+    np.cumsum([len(b) for b in blobs], out=offsets[1:])
+    index = {}
+    for i, record in enumerate(records):
+        for key in record_keys(record):
+            # The first record claiming a key wins (CSV order is priority order)
+            index.setdefault(key_hash(key), i)
+    hashes = np.array(sorted(index), np.uint64)
+    targets = np.array([index[h] for h in hashes.tolist()], np.uint32)
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, len(records), len(hashes), int(offsets[-1])))
+        for array in (hashes, targets, offsets):
+            f.write(array.tobytes())
+            f.write(b"\0" * (-f.tell() % 8))
+        for blob in blobs:
+            f.write(blob)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    return {"journals": len(records), "keys": len(hashes), "bytes": path.stat().st_size}
+
+
+class JournalStore:
+    """Read-only view over a compiled store; arrays are views into the mmap."""
+
+    def __init__(self, path=None):
+        self.path = Path(path) if path else default_path()
+        with open(self.path, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count, keys, blob_bytes = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"{self.path} is not a version {FORMAT_VERSION} journal store")
+        self.count = count
+        position = HEADER.size
+        arrays = []
+        for dtype, length in ((np.uint64, keys), (np.uint32, keys), (np.uint64, count + 1)):
+            arrays.append(np.frombuffer(self.map, dtype, length, position))
+            position += length * np.dtype(dtype).itemsize
+            position += -position % 8
+        self.hashes, self.targets, self.offsets = arrays
+        self.blob_start = position
+        self.decoded = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.hashes = self.targets = self.offsets = None
+        self.map.close()
+
+    def record(self, i):
+        record = self.decoded.get(i)
+        if record is None:
+            start = self.blob_start + int(self.offsets[i])
+            end = self.blob_start + int(self.offsets[i + 1])
+            record = self.decoded[i] = json.loads(self.map[start:end])
+        return record
+
+    def resolve(self, keys):
+        """Record index for each key string, -1 where the key is unknown."""
+        if not len(keys) or not len(self.hashes):
+            return np.full(len(keys), -1, np.int64)
+        wanted = np.fromiter(map(key_hash, keys), np.uint64, len(keys))
+        positions = np.searchsorted(self.hashes, wanted)
+        positions = np.minimum(positions, len(self.hashes) - 1)
+        found = self.hashes[positions] == wanted
+        return np.where(found, self.targets[positions].astype(np.int64), -1)
+
+    def lookup(self, query):
+        """journal_info for an ISSN or journal name, or None."""
+        issn = normalize_issn(query)
+        key = "issn:" + issn if issn else "name:" + normalize_journal(query)
+        i = int(self.resolve([key])[0])
+        return self.record(i) if i >= 0 else None
+
+    def match(self, papers):
+        """Record index per paper (first key that resolves wins), -1 if none."""
+        keys, owners = [], []
+        for n, paper in enumerate(papers):
+            for key in paper_keys(paper):
+                keys.append(key)
+                owners.append(n)
+        resolved = self.resolve(keys)
+        matches = np.full(len(papers), -1, np.int64)
+        hit = resolved >= 0
+        # Keys are grouped by paper in priority order: keep each paper's first hit
+        owners, first = np.unique(np.asarray(owners, np.int64)[hit], return_index=True)
+        matches[owners] = resolved[hit][first]
+        return matches
+
+
+def enrich(papers, store):
+    """
+    Copies of `papers` with journal_info and impact_factor from one batch
+    join against the store. Papers whose journal is unknown keep
+    journal_info None and impact factor 0.
+    """
+    with spans.span("journals.enrich", items=len(papers)) as trace:
+        matches = store.match(papers)
+        enriched = []
+        for paper, i in zip(papers, matches.tolist()):
+            info = store.record(i) if i >= 0 else None
+            enriched.append(dict(paper, journal_info=info,
+                                 impact_factor=info["impact_factor"] if info else 0.0))
+        trace.add(cache_hits=int((matches >= 0).sum()), cache_misses=int((matches < 0).sum()))
+    return enriched
+
+
+def read_csv(path):
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        return list(csv.DictReader(f))
+
+
+def write_csv(records, path):
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        writer.writeheader()
+        for record in records:
+            row = dict(record)
+            row["subcategories"] = json.dumps(record.get("subcategories") or [],
+                                              ensure_ascii=False)
+            writer.writerow({field: row.get(field, "") for field in FIELDS})
+
+
+def extract_records(paths):
+    """Distinct journal_info blocks found in result files, first occurrence wins."""
+    records, seen = [], set()
+    for path in paths:
+        for paper in read_papers(path, ("journal_info",)):
+            info = paper.get("journal_info")
+            if not info:
+                continue
+            keys = tuple(record_keys(info))
+            if keys and not seen.intersection(keys):
+                seen.update(keys)
+                records.append(clean_record(info))
+    return records
+
+
+def benchmark(journals=20000, papers=10000):
+    """Store compile/open time and batch enrichment vs per-paper lookups."""
+    rng = np.random.default_rng(0)
+    records = [{"journal": f"Journal of Synthetic Studies {i}", "issn": f"{i:07d}X",
+                "impact_factor": round(float(rng.gamma(2.0, 3.0)), 1), "jcr_quartile": "Q2"}
+               for i in range(journals)]
+    picks = rng.integers(0, journals * 1.1, papers)
+    candidates = [{"journal": f"journal of synthetic studies {i}",
+                   "crossref_data": {"issn": f"{i:07d}X" if i % 3 else None}}
+                  for i in picks.tolist()]
+    results = {"journals": journals, "papers": papers}
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "journals.bin"
+        start = time.perf_counter()
+        compile_store(records, path)
+        results["compile_s"] = round(time.perf_counter() - start, 3)
+        start = time.perf_counter()
+        store = JournalStore(path)
+        results["open_ms"] = round((time.perf_counter() - start) * 1000, 3)
+        start = time.perf_counter()
+        enriched = enrich(candidates, store)
+        results["batch_enrich_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        results["matched"] = sum(p["journal_info"] is not None for p in enriched)
+        store.decoded.clear()
+        start = time.perf_counter()
+        for paper in candidates:
+            for key in paper_keys(paper):
+                i = int(store.resolve([key])[0])
+                if i >= 0:
+                    store.record(i)
+                    break
+        results["per_paper_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        store.close()
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="manuscript_agent journals",
+                                     description=__doc__.strip().splitlines()[0])
+    parser.add_argument("action", nargs="?",
+                        choices=["refresh", "extract", "lookup", "enrich", "stats"])
+    parser.add_argument("inputs", nargs="*",
+                        help="CSV (refresh), result files (extract, enrich) or ISSNs/names")
+    parser.add_argument("-o", "--output", help="output file (extract, enrich)")
+    parser.add_argument("--store", default=str(default_path()),
+                        help="compiled store (default: %(default)s)")
+    parser.add_argument("--bench", type=int, metavar="JOURNALS",
+                        help="benchmark a synthetic store of JOURNALS journals")
+    args = parser.parse_args(argv)
+
+    if args.bench:
+        for name, value in benchmark(args.bench).items():
+            print(f"{name:>16}: {value}")
+        return 0
+    if not args.action:
+        parser.error("action is required unless --bench is given")
+
+    if args.action == "refresh":
+        if len(args.inputs) != 1:
+            parser.error("refresh takes one CSV file")
+        start = time.perf_counter()
+        stats = compile_store(read_csv(args.inputs[0]), args.store)
+        print(f"✓ Compiled {stats['journals']} journals ({stats['keys']} keys, "
+              f"{stats['bytes']} bytes) into {args.store} in {time.perf_counter() - start:.2f}s")
+        return 0
+    if args.action == "extract":
+        if not args.inputs or not args.output:
+            parser.error("extract needs result files and --output")
+        records = extract_records(args.inputs)
+        write_csv(records, args.output)
+        print(f"✓ Extracted {len(records)} journals to {args.output}")
+        return 0
+
+    start = time.perf_counter()
+    with JournalStore(args.store) as store:
+        opened = time.perf_counter() - start
+        if args.action == "stats":
+            print(f"{store.count} journals, {len(store.hashes)} keys, "
+                  f"opened in {opened * 1000:.2f} ms")
+        elif args.action == "lookup":
+            for query in args.inputs:
+                print(json.dumps({query: store.lookup(query)}, indent=2, ensure_ascii=False))
+        else:
+            if len(args.inputs) != 1 or not args.output:
+                parser.error("enrich takes one result file and --output")
+            with open(args.inputs[0], 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            data["papers"] = enrich(data.get("papers", []), store)
+            atomic_write_json(args.output, data, durable=False)
+            found = sum(p["journal_info"] is not None for p in data["papers"])
+            print(f"✓ Enriched {found}/{len(data['papers'])} papers "
+                  f"({time.perf_counter() - start:.3f}s)")
+    return 0
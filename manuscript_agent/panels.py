@@ -0,0 +1,751 @@
+"""
+Figure Panel Layout and Fingerprints
+CPU-only, NumPy-vectorised analysis of the extracted figure PNGs: a PNG
+decoder (no imaging library needed), a downsampled grey-scale working
+copy, panel-letter detection (isolated, aligned letter-sized connected
+components of one font size) that lays panels out from their letters,
+a coarse XY-cut fallback for figures without letters, and 64-bit DCT
+perceptual hashes for finding duplicated or re-exported figures and panels.
+
+The figure engine uses detect() to fill subplot_count and each subplot's
+bounding box; the command prints the layout of a workspace's figures and
+any near-duplicate pairs.
+
+    python -m manuscript_agent panels manuscript_11072333
+    python -m manuscript_agent panels manuscript_11072333/images/image4.png --json
+    python -m manuscript_agent panels --bench 5
+"""
+
+import argparse
+import json
+import struct
+import tempfile
+import time
+import zlib
+from pathlib import Path
+
+import numpy as np
+from numpy.lib.stride_tricks import as_strided
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+CHANNELS = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}
+# Longest side of the working copy; large figures are block-averaged down.
+WORK_SIDE = 800
+# Grey levels at or above this are background.
+INK_THRESHOLD = 235
+# A gutter must be this fraction of the region's extent (and >= MIN_GUTTER px).
+GUTTER_FRACTION = 0.012
+MIN_GUTTER = 2
+# Recursion limit of the XY-cut.
+MAX_DEPTH = 24
+# Regions smaller than this fraction of the figure area are labels or specks.
+MIN_PANEL_AREA = 0.01
+# Panel-letter height range as fractions of the working image's longest side.
+LETTER_HEIGHT = (0.006, 0.05)
+MAX_LETTERS_PER_ROW = 6
+# Glyphs closer than this many heights to another one are legend keys or ticks.
+LETTER_SPACING = 3
+# Panel letters share one font size: heights within this fraction of each other.
+LETTER_HEIGHT_TOLERANCE = 0.2
+HASH_SIZE = 32
+HASH_BITS = 8
+# Hamming distance (of 64 bits) at or below which two images are duplicates.
+DUPLICATE_DISTANCE = 6
+
+
+def png_chunks(data):
+    pos = len(PNG_SIGNATURE)
+    while pos + 8 <= len(data):
+        length, kind = struct.unpack_from(">I4s", data, pos)
+        yield kind, data[pos + 8:pos + 8 + length]
+        pos += 12 + length
+        if kind == b"IEND":
+            break
+
+
+def predictor_table():
+    """
+    PNG predictors less the upper-left byte c (mod 256), indexed by filter
+    type and the differences a - c and b - c (offset by 255) of the left
+    and upper bytes: Sub a - c, Up b - c, Average (a + b) // 2 - c and
+    Paeth's pick of a, b or c. Type 0 is unused (None rows are re-encoded
+    as Sub).
+    """
+    p, q = np.meshgrid(np.arange(-255, 256), np.arange(-255, 256), indexing="ij")
+    pa, pb, pc = np.abs(q), np.abs(p), np.abs(p + q)
+    paeth = np.where((pa <= pb) & (pa <= pc), p, np.where(pb <= pc, q, 0))
+    table = np.stack([np.zeros_like(p), p, q, (p + q) >> 1, paeth])
+    return (table & 255).astype(np.uint8).ravel()
+
+
+PREDICTORS = predictor_table()
+
+
+def unfilter_diagonals(data, kinds, width, bpp):
+    """
+    Undo the filters of (rows, width * bpp) filtered bytes, any types. Sub,
+    Average and Paeth depend on the reconstructed left neighbour, so pixels
+    are processed along anti-diagonals, each one a single vectorised step
+    over every row: pixel (r, i) needs only (r, i-1), (r-1, i) and
+    (r-1, i-1), which all lie on the two previous diagonals. The predictor
+    is one lookup in PREDICTORS, and pixels are moved to and from the
+    skewed layout as whole bpp-byte cells rather than byte by byte.
+    """
+    height = len(kinds)
+    data = data.copy()
+    plain = kinds == 0
+    data[plain, bpp:] -= data[plain, :-bpp]  # None as Sub: differences of the raw bytes
+    cell = np.dtype((np.void, bpp))
+    # T[d, r + 1] holds pixel (r, d - r - 1); row 0 and out-of-image cells stay 0.
+    skewed = np.zeros((height + width + 1) * (height + 1) * bpp, np.uint8)
+    pixels = as_strided(skewed[(height + 2) * bpp:].view(cell), (height, width),
+                        ((height + 2) * bpp, (height + 1) * bpp))
+    pixels[...] = data.view(cell)
+    diagonals = skewed.reshape(height + width + 1, height + 1, bpp)
+    base = np.zeros((height + 1, bpp), np.int32)
+    base[1:] = (np.maximum(kinds, 1).astype(np.int32) * 511 * 511 + 255 * 511 + 255)[:, None]
+    for d in range(1, height + width):
+        lo, hi = max(1, d - width + 1), min(height, d) + 1
+        a = diagonals[d - 1, lo:hi]
+        b = diagonals[d - 1, lo - 1:hi - 1]
+        c = diagonals[d - 2, lo - 1:hi - 1] if d > 1 else np.zeros_like(a)
+        index = np.subtract(a, c, dtype=np.int32)
+        index *= 511
+        index += b
+        index -= c
+        index += base[lo:hi]
+        current = diagonals[d, lo:hi]
+        current += PREDICTORS.take(index)  # uint8 arithmetic wraps mod 256
+        current += c
+    image = np.empty((height, width), cell)
+    image[...] = pixels
+    return image.view(np.uint8).reshape(height, -1)
+
+
+def unfilter(raw, height, width, bpp):
+    """
+    Undo PNG scanline filters for a (height, width, bpp) byte image. None,
+    Sub and Up rows are undone a whole scanline at a time; only Average and
+    Paeth rows go through unfilter_diagonals, which sees a run of Up rows
+    between two of them as one Up row (their summed differences) and any
+    other gap as the reconstructed row above, given as a None row.
+    """
+    rows = np.frombuffer(raw, np.uint8, height * (width * bpp + 1)).reshape(height, -1)
+    kinds, data = rows[:, 0], rows[:, 1:]
+    if kinds.max(initial=0) > 4:
+        raise ValueError("invalid PNG filter type")
+    image = np.zeros((height + 1, width * bpp), np.uint8)  # image[r + 1] is row r
+    known = np.ones(height + 1, bool)  # rows that don't depend on an Average/Paeth row
+    for r, kind in enumerate(kinds):
+        if kind == 0:
+            image[r + 1] = data[r]
+        elif kind == 1:
+            image[r + 1] = np.cumsum(data[r].reshape(width, bpp), axis=0, dtype=np.uint8).ravel()
+        elif kind == 2 and known[r]:
+            np.add(image[r], data[r], out=image[r + 1])
+        else:
+            known[r + 1] = False
+    swept = np.flatnonzero(kinds >= 3)
+    if not len(swept):
+        return image[1:].reshape(height, width, bpp)
+    pieces, piece_kinds, positions = [], [], []
+    previous = -1
+    for r in swept:
+        if r - 1 > previous:
+            if known[r]:
+                pieces.append(image[r])
+                piece_kinds.append(0)
+            else:
+                pieces.append(np.add.reduce(data[previous + 1:r], axis=0, dtype=np.uint8))
+                piece_kinds.append(2)
+        positions.append(len(pieces))
+        pieces.append(data[r])
+        piece_kinds.append(kinds[r])
+        previous = r
+    decoded = unfilter_diagonals(np.stack(pieces), np.array(piece_kinds, np.uint8), width, bpp)
+    image[swept + 1] = decoded[positions]
+    for r in np.flatnonzero(~known[1:] & (kinds == 2)):
+        np.add(image[r], data[r], out=image[r + 1])
+    return image[1:].reshape(height, width, bpp)
+
+
+def read_png(path):
+    """Decode a non-interlaced 8/16-bit PNG to a (height, width, channels) uint8 array."""
+    data = Path(path).read_bytes()
+    if data[:8] != PNG_SIGNATURE:
+        raise ValueError(f"{path} is not a PNG file")
+    header, idat, palette = None, [], None
+    for kind, body in png_chunks(data):
+        if kind == b"IHDR":
+            header = struct.unpack(">IIBBBBB", body)
+        elif kind == b"IDAT":
+            idat.append(body)
+        elif kind == b"PLTE":
+            palette = np.frombuffer(body, np.uint8).reshape(-1, 3)
+    if header is None:
+        raise ValueError(f"{path} has no IHDR chunk")
+    width, height, depth, color, _, _, interlace = header
+    if interlace or color not in CHANNELS or depth not in (8, 16) or (color == 3 and depth != 8):
+        raise ValueError(f"{path}: unsupported PNG format "
+                         f"(colour type {color}, depth {depth}, interlace {interlace})")
+    channels = CHANNELS[color]
+    bpp = channels * depth // 8
+    image = unfilter(zlib.decompress(b"".join(idat)), height, width, bpp)
+    if depth == 16:
+        image = image[:, :, ::2]
+    if color == 3:
+        if palette is None:
+            raise ValueError(f"{path}: palette image without PLTE")
+        image = palette[image[:, :, 0]]
+    return image
+
+
+def grayscale(image):
+    """Luma in 0..255 (float32), alpha composited onto white."""
+    if image.shape[2] < 3:
+        gray = image[:, :, 0].astype(np.float32)
+    else:
+        # Rec. 601 weights in 8-bit fixed point: uint16 products are much
+        # cheaper than a float matrix product over every pixel.
+        gray = (image[:, :, 0] * np.uint16(77) + image[:, :, 1] * np.uint16(150)
+                + image[:, :, 2] * np.uint16(29)) * np.float32(1 / 256)
+    if image.shape[2] in (2, 4):
+        gray = 255 - (255 - gray) * (image[:, :, -1] * np.float32(1 / 255))
+    return gray
+
+
+def downsample(gray, side=WORK_SIDE):
+    """Block-average so the longest side is at most `side`; returns (image, factor)."""
+    factor = max(1, -(-max(gray.shape) // side))
+    if factor == 1:
+        return gray, 1
+    height, width = gray.shape[0] // factor * factor, gray.shape[1] // factor * factor
+    blocks = gray[:height, :width].reshape(height // factor, factor, width // factor, factor)
+    return blocks.mean(axis=(1, 3)), factor
+
+
+def gutters(profile, minimum):
+    """(start, end) runs of empty entries strictly inside the profile's inked span."""
+    inked = np.flatnonzero(profile)
+    if not len(inked):
+        return []
+    empty = np.concatenate(([False], profile[inked[0]:inked[-1] + 1] == 0, [False]))
+    edges = np.flatnonzero(np.diff(empty.astype(np.int8)))
+    runs = edges.reshape(-1, 2) + inked[0]
+    return [(int(s), int(e)) for s, e in runs if e - s >= minimum]
+
+
+def trim(ink, box):
+    """Shrink a (top, left, bottom, right) box to its inked extent, or None."""
+    top, left, bottom, right = box
+    region = ink[top:bottom, left:right]
+    rows, cols = np.flatnonzero(region.any(axis=1)), np.flatnonzero(region.any(axis=0))
+    if not len(rows):
+        return None
+    return (top + int(rows[0]), left + int(cols[0]),
+            top + int(rows[-1]) + 1, left + int(cols[-1]) + 1)
+
+
+def xy_cut(ink, box, depth=0):
+    """Recursively split `box` at whitespace gutters; returns leaf boxes."""
+    box = trim(ink, box)
+    if box is None:
+        return []
+    top, left, bottom, right = box
+    region = ink[top:bottom, left:right]
+    if depth < MAX_DEPTH:
+        for axis in (0, 1):
+            extent = region.shape[axis]
+            found = gutters(region.sum(axis=1 - axis),
+                            max(MIN_GUTTER, int(extent * GUTTER_FRACTION)))
+            if not found:
+                continue
+            cuts = [0] + [(s + e) // 2 for s, e in found] + [extent]
+            leaves = []
+            for start, end in zip(cuts, cuts[1:]):
+                child = (top + start, left, top + end, right) if axis == 0 else \
+                    (top, left + start, bottom, left + end)
+                leaves.extend(xy_cut(ink, child, depth + 1))
+            return leaves
+    return [box]
+
+
+def area(box):
+    return (box[2] - box[0]) * (box[3] - box[1])
+
+
+def union(a, b):
+    return (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+
+
+def gap(a, b):
+    """Chebyshev distance between two boxes (0 when they touch or overlap)."""
+    dy = max(0, max(a[0], b[0]) - min(a[2], b[2]))
+    dx = max(0, max(a[1], b[1]) - min(a[3], b[3]))
+    return max(dy, dx)
+
+
+def reading_order(boxes):
+    """Sort boxes into rows (by vertical overlap), then left to right."""
+    rows = []
+    for box in sorted(boxes, key=lambda b: (b[0], b[1])):
+        for row in rows:
+            top, bottom = min(b[0] for b in row), max(b[2] for b in row)
+            if min(bottom, box[2]) - max(top, box[0]) > 0.5 * min(bottom - top, box[2] - box[0]):
+                row.append(box)
+                break
+        else:
+            rows.append([box])
+    return [box for row in rows for box in sorted(row, key=lambda b: b[1])]
+
+
+def components(ink):
+    """
+    Bounding boxes of the 8-connected ink components. Works on horizontal
+    runs: runs in adjacent rows that touch are joined by vectorised label
+    propagation with pointer jumping, so no per-pixel Python loop is needed.
+    """
+    height, width = ink.shape
+    padded = np.zeros((height, width + 2), np.int8)
+    padded[:, 1:-1] = ink
+    steps = np.diff(padded, axis=1)
+    row, start = np.nonzero(steps == 1)
+    end = np.nonzero(steps == -1)[1]
+    if not len(row):
+        return []
+    # Runs are in row-major order, so the runs of the next row touching run i
+    # form one contiguous range of the flattened (row, column) keys.
+    stride = width + 2
+    first = np.searchsorted(row * stride + end, (row + 1) * stride + start)
+    last = np.searchsorted(row * stride + start, (row + 1) * stride + end, side="right")
+    counts = np.maximum(last - first, 0)
+    a = np.repeat(np.arange(len(row)), counts)
+    b = np.arange(counts.sum()) + np.repeat(first - np.cumsum(counts) + counts, counts)
+    labels = np.arange(len(row))
+    while True:
+        joined = labels.copy()
+        lowest = np.minimum(labels[a], labels[b])
+        np.minimum.at(joined, a, lowest)
+        np.minimum.at(joined, b, lowest)
+        joined = joined[joined]
+        if np.array_equal(joined, labels):
+            break
+        labels = joined
+    _, labels = np.unique(labels, return_inverse=True)
+    count = labels.max() + 1
+    top, left = np.full(count, height), np.full(count, width)
+    bottom, right = np.zeros(count, np.intp), np.zeros(count, np.intp)
+    np.minimum.at(top, labels, row)
+    np.minimum.at(left, labels, start)
+    np.maximum.at(bottom, labels, row + 1)
+    np.maximum.at(right, labels, end)
+    return list(zip(top.tolist(), left.tolist(), bottom.tolist(), right.tolist()))
+
+
+def is_letter(box, ink):
+    """
+    Small glyph, from a narrow I to a wide M, with clear space around it: a
+    margin of its own height to the left and half of it above and to the
+    right (panel titles often follow the letter closely on the same line).
+    """
+    top, left, bottom, right = box
+    height, width = bottom - top, right - left
+    side = max(ink.shape)
+    if not (LETTER_HEIGHT[0] * side <= height <= LETTER_HEIGHT[1] * side
+            and 0.2 <= width / height <= 1.5):
+        return False
+    surround = ink[max(0, top - height // 2):bottom,
+                   max(0, left - height):right + height // 2]
+    return surround.sum() == ink[top:bottom, left:right].sum()
+
+
+def letter_rows(letters):
+    """Letters grouped into rows (tops within one letter height), top to bottom."""
+    rows = []
+    for box in sorted(letters):
+        if rows and box[0] - rows[-1][0][0] <= box[2] - box[0]:
+            rows[-1].append(box)
+        else:
+            rows.append([box])
+    return [sorted(row, key=lambda b: b[1]) for row in rows]
+
+
+def panel_letters(glyphs, ink):
+    """
+    Rows of panel letters among the glyph boxes. Panel letters share one
+    font size, so glyphs are taken a size at a time: isolated letter-sized
+    glyphs of that size that are neither in long rows (tables) nor crowded
+    by others (legend keys, tick labels), that line up with another one by
+    their tops or left edges and that lay out a panel of at least
+    MIN_PANEL_AREA (plot markers only lay out slivers). Letters are set
+    larger than markers and tick labels, so the size with the most letters
+    weighted by height wins.
+    """
+    candidates = [box for box in glyphs if is_letter(box, ink)]
+    best, best_height = [], 0
+    for height in sorted({box[2] - box[0] for box in candidates}, reverse=True):
+        size = [box for box in candidates
+                if abs(box[2] - box[0] - height) <= LETTER_HEIGHT_TOLERANCE * height]
+        size = [box for row in letter_rows(size) if len(row) <= MAX_LETTERS_PER_ROW
+                for box in row]
+        letters = [box for box in size
+                   if all(other is box or gap(box, other) > LETTER_SPACING * height
+                          for other in size)]
+        aligned = [box for box in letters
+                   if any(other is not box and (abs(other[0] - box[0]) <= height / 2
+                                                or abs(other[1] - box[1]) <= height)
+                          for other in letters)]
+        rows = letter_rows(aligned)
+        spans = letter_spans(rows, (0, 0) + ink.shape)
+        aligned = [box for box, span in zip([box for row in rows for box in row], spans)
+                   if area(span) >= MIN_PANEL_AREA * ink.size]
+        if len(aligned) * height > len(best) * best_height:
+            best, best_height = aligned, height
+    return letter_rows(best)
+
+
+def letter_spans(rows, box):
+    """
+    Panel regions of `box` anchored at their letters: each extends right to
+    the next letter in its row and down to the next row of letters (or the
+    box's edge).
+    """
+    spans = []
+    for index, row in enumerate(rows):
+        bottom = rows[index + 1][0][0] if index + 1 < len(rows) else box[2]
+        for i, letter in enumerate(row):
+            right = row[i + 1][1] if i + 1 < len(row) else box[3]
+            spans.append((letter[0], letter[1], bottom, right))
+    return spans
+
+
+def letter_regions(ink, box, letters, depth=0):
+    """
+    (letter, region) pairs splitting `box` at the widest whitespace gutter
+    that separates its letters, across rows before columns. Letters sit at
+    their panel's top-left, so the part after a cut must start with a letter
+    and a column cut must not put a lower letter before a higher one. What
+    no gutter separates is laid out by letter_spans().
+    """
+    box = trim(ink, box)
+    top, left, bottom, right = box
+    if len(letters) > 1 and depth < MAX_DEPTH:
+        region = ink[top:bottom, left:right]
+        for axis in (0, 1):
+            best = None
+            for start, end in gutters(region.sum(axis=1 - axis), MIN_GUTTER):
+                cut = box[axis] + (start + end) // 2
+                before = [letter for letter in letters if letter[axis + 2] <= cut]
+                after = [letter for letter in letters if letter[axis] >= cut]
+                if not before or not after:
+                    continue
+                lead = min(after, key=lambda letter: letter[axis])
+                height = lead[2] - lead[0]
+                if lead[axis] > box[axis] + end + height:
+                    continue
+                if axis == 1 and min(b[0] for b in before) > min(a[0] for a in after) + height:
+                    continue
+                if best is None or end - start > best[0]:
+                    best = (end - start, cut, before, after)
+            if best:
+                _, cut, before, after = best
+                first, second = list(box), list(box)
+                first[axis + 2] = second[axis] = cut
+                return (letter_regions(ink, tuple(first), before, depth + 1)
+                        + letter_regions(ink, tuple(second), after, depth + 1))
+    rows = letter_rows(letters)
+    return list(zip([letter for row in rows for letter in row], letter_spans(rows, box)))
+
+
+def letter_order(pairs, ink):
+    """
+    Panels of (letter, region) pairs in reading order: letter rows top to
+    bottom and left to right, except that a panel reaching down past letters
+    further left (a tall panel beside a block of smaller ones) follows them.
+    """
+    panels = {letter: trim(ink, region) for letter, region in pairs}
+    letters = [letter for row in letter_rows(list(panels)) for letter in row]
+    rank = {}
+    for i, letter in enumerate(letters):
+        bottom = panels[letter][2]
+        beside = [j for j, other in enumerate(letters[i + 1:], i + 1)
+                  if other[0] < bottom and other[3] <= letter[1]]
+        rank[letter] = max(beside) + 0.5 if beside else i
+    return [panels[letter] for letter in sorted(letters, key=rank.get)]
+
+
+def segment(gray):
+    """
+    Panel boxes (in reading order) and panel-letter boxes of a working image.
+    With two or more letters the panels are laid out from them; otherwise
+    from the large XY-cut regions, smaller ones merged into the nearest.
+    """
+    ink = gray < INK_THRESHOLD
+    full = (0, 0) + ink.shape
+    rows = panel_letters(components(ink), ink)
+    letters = [box for row in rows for box in row]
+    if len(letters) >= 2:
+        return letter_order(letter_regions(ink, full, letters), ink), letters
+    leaves = xy_cut(ink, full)
+    minimum = MIN_PANEL_AREA * ink.size
+    panels = [box for box in leaves if area(box) >= minimum]
+    if not panels:
+        return ([trim(ink, full)] if leaves else []), letters
+    for box in leaves:
+        if area(box) < minimum:
+            index = min(range(len(panels)), key=lambda i: gap(box, panels[i]))
+            panels[index] = union(panels[index], box)
+    return reading_order(panels), letters
+
+
+def dct_matrix(n):
+    k = np.arange(n)[:, None]
+    matrix = np.cos(np.pi * (2 * np.arange(n)[None, :] + 1) * k / (2 * n))
+    matrix[0] /= np.sqrt(2)
+    return matrix * np.sqrt(2 / n)
+
+
+DCT = dct_matrix(HASH_SIZE)
+
+
+def resize(gray, size):
+    """Area-average resample to (size, size)."""
+    rows = np.linspace(0, gray.shape[0], size + 1).astype(int)
+    cols = np.linspace(0, gray.shape[1], size + 1).astype(int)
+    summed = np.add.reduceat(np.add.reduceat(gray, rows[:-1], axis=0), cols[:-1], axis=1)
+    counts = np.outer(np.diff(rows), np.diff(cols))
+    return summed / np.maximum(counts, 1)
+
+
+def phash(gray):
+    """64-bit DCT perceptual hash as 16 hex digits."""
+    if min(gray.shape) < 2:
+        return None
+    coefficients = DCT @ resize(gray, HASH_SIZE) @ DCT.T
+    low = coefficients[:HASH_BITS, :HASH_BITS].ravel()
+    bits = low > np.median(low[1:])
+    return f"{int(''.join('1' if b else '0' for b in bits), 2):016x}"
+
+
+def hamming(a, b):
+    return bin(int(a, 16) ^ int(b, 16)).count("1")
+
+
+def detect(path, number=None):
+    """
+    Layout and fingerprints of one figure PNG. Boxes are (top, left, bottom,
+    right) in original pixels; `number` prefixes subplot ids (4 -> 4A, 4B).
+    """
+    return analyse(read_png(path), number)
+
+
+def analyse(image, number=None, scale=1):
+    """
+    detect() for a decoded image, which may be a reduced copy of the figure
+    (`scale` original pixels per image pixel, e.g. a pyramid level).
+    """
+    gray = grayscale(image)
+    work, factor = downsample(gray)
+    panels, letters = segment(work)
+    height, width = gray.shape[0] * scale, gray.shape[1] * scale
+    scaled = lambda box: [min(v * factor * scale, limit)
+                          for v, limit in zip(box, (height, width) * 2)]
+    subplots = []
+    for i, box in enumerate(panels):
+        top, left, bottom, right = box
+        subplots.append({
+            "subplot_id": f"{number or ''}{chr(65 + i) if i < 26 else i + 1}",
+            "bbox": scaled(box),
+            "phash": phash(work[top:bottom, left:right]),
+        })
+    return {
+        "width": int(width),
+        "height": int(height),
+        "scale": factor * scale,
+        "phash": phash(work),
+        "panel_count": len(panels),
+        "letter_count": len(letters),
+        "panels": subplots,
+        "letters": [scaled(box) for box in letters],
+    }
+
+
+def duplicates(layouts, threshold=DUPLICATE_DISTANCE):
+    """
+    Near-identical (figure or panel, figure or panel, distance) pairs across
+    {name: detect() result}. Panels are compared across figures only, and
+    not at all between two figures already reported as duplicates.
+    """
+    figures = [(name, layout["phash"]) for name, layout in layouts.items() if layout.get("phash")]
+    pairs = []
+    for i, (a, hash_a) in enumerate(figures):
+        for b, hash_b in figures[i + 1:]:
+            distance = hamming(hash_a, hash_b)
+            if distance <= threshold:
+                pairs.append((a, b, distance))
+    same = {(a, b) for a, b, _ in pairs}
+    items = [(name, f"{name}:{panel['subplot_id']}", panel["phash"])
+             for name, layout in layouts.items()
+             for panel in layout.get("panels", []) if panel.get("phash")]
+    for i, (figure_a, a, hash_a) in enumerate(items):
+        for figure_b, b, hash_b in items[i + 1:]:
+            if figure_a == figure_b or (figure_a, figure_b) in same:
+                continue
+            distance = hamming(hash_a, hash_b)
+            if distance <= threshold:
+                pairs.append((a, b, distance))
+    return pairs
+
+
+def encode_png(image):
+    """Encode an (height, width, 3) uint8 array as an RGB PNG, every row Paeth-filtered."""
+    height, width, _ = image.shape
+    x = image.astype(np.int16)
+    a = np.zeros_like(x)
+    a[:, 1:] = x[:, :-1]
+    b = np.zeros_like(x)
+    b[1:] = x[:-1]
+    c = np.zeros_like(x)
+    c[1:, 1:] = x[:-1, :-1]
+    p, q = a - c, b - c
+    pa, pb, pc = np.abs(q), np.abs(p), np.abs(p + q)
+    nearest = np.where((pa <= pb) & (pa <= pc), a, np.where(pb <= pc, b, c))
+    rows = np.empty((height, width * 3 + 1), np.uint8)
+    rows[:, 0] = 4
+    rows[:, 1:] = ((x - nearest) & 255).reshape(height, -1)
+
+    def chunk(kind, body):
+        return (struct.pack(">I", len(body)) + kind + body
+                + struct.pack(">I", zlib.crc32(kind + body)))
+    return (PNG_SIGNATURE + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(rows.tobytes(), 6)) + chunk(b"IEND", b""))
+
+
+def synthetic_figure(rows=3, cols=3, panel=(800, 660), seed=0):
+    """
+    White figure of rows x cols panels, each with a bold letter at its
+    top-left corner, a framed scatter plot (every other one a heatmap, so
+    the PNG is ~1 MB like an exported multi-panel figure) and tick-label
+    specks. Returns (image, panel count).
+    """
+    rng = np.random.default_rng(seed)
+    height, width = panel
+    image = np.full((rows * height, cols * width, 3), 255, np.uint8)
+    for r in range(rows):
+        for c in range(cols):
+            top, left = r * height, c * width
+            image[top + 10:top + 40, left + 10:left + 32] = 0
+            image[top + 15:top + 35, left + 16:left + 26] = 255
+            plot = image[top + 70:top + height - 40, left + 70:left + width - 30]
+            plot[:, :3] = plot[-3:] = 40
+            if (r + c) % 2:
+                cells = rng.integers(0, 256, (plot.shape[0] // 8, (plot.shape[1] - 10) // 8, 3))
+                heat = np.repeat(np.repeat(cells, 8, axis=0), 8, axis=1)
+                heat ^= rng.integers(0, 2, heat.shape)
+                plot[:heat.shape[0], 5:5 + heat.shape[1]] = heat
+                continue
+            count = int(rng.integers(300, 900))
+            ys = rng.integers(0, plot.shape[0] - 6, count)
+            xs = rng.integers(5, plot.shape[1] - 6, count)
+            colour = rng.integers(0, 200, (count, 3))
+            for dy in range(5):
+                for dx in range(5):
+                    plot[ys + dy, xs + dx] = colour
+            for i in range(6):
+                image[top + height - 30:top + height - 22,
+                      left + 80 + i * 90:left + 96 + i * 90] = 60
+    return image, rows * cols
+
+
+def benchmark(count=5):
+    """Decode, segmentation and end-to-end detect() times on synthetic figure PNGs."""
+    results = {"figures": count}
+    timings = {"decode": [], "gray": [], "segment": [], "detect": []}
+    found, expected, size = 0, 0, 0
+    with tempfile.TemporaryDirectory() as directory:
+        for seed in range(count):
+            image, panels = synthetic_figure(seed=seed)
+            path = Path(directory) / f"image{seed + 1}.png"
+            path.write_bytes(encode_png(image))
+            size += path.stat().st_size
+            start = time.perf_counter()
+            decoded = read_png(path)
+            timings["decode"].append(time.perf_counter() - start)
+            if not np.array_equal(decoded, image):
+                raise AssertionError("PNG round trip mismatch")
+            start = time.perf_counter()
+            work, _ = downsample(grayscale(decoded))
+            timings["gray"].append(time.perf_counter() - start)
+            start = time.perf_counter()
+            segment(work)
+            timings["segment"].append(time.perf_counter() - start)
+            start = time.perf_counter()
+            layout = detect(path, seed + 1)
+            timings["detect"].append(time.perf_counter() - start)
+            found += layout["panel_count"] == panels
+            expected += 1
+    results["mean_png_kb"] = round(size / count / 1024, 1)
+    results["pixels"] = f"{image.shape[1]}x{image.shape[0]}"
+    for name, values in timings.items():
+        results[f"{name}_ms"] = round(sum(values) / len(values) * 1000, 1)
+    results["max_detect_ms"] = round(max(timings["detect"]) * 1000, 1)
+    results["panel_counts_exact"] = f"{found}/{expected}"
+    return results
+
+
+def workspace_figures(paths):
+    """PNG paths from workspaces (their images/image*.png) and individual files."""
+    from manuscript_agent.figures import discover_figures
+    figures = []
+    for path in map(Path, paths):
+        figures.extend(discover_figures(path / "images") if path.is_dir() else [path])
+    return figures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="manuscript_agent panels",
+                                     description=__doc__.strip().splitlines()[0])
+    parser.add_argument("paths", nargs="*", help="workspace directories or PNG files")
+    parser.add_argument("--json", action="store_true", help="print layouts as JSON")
+    parser.add_argument("--threshold", type=int, default=DUPLICATE_DISTANCE,
+                        help="duplicate Hamming distance (default: %(default)s of 64 bits)")
+    parser.add_argument("--bench", type=int, metavar="FIGURES",
+                        help="benchmark detection on FIGURES synthetic ~1 MB PNGs")
+    args = parser.parse_args(argv)
+
+    if args.bench:
+        for name, value in benchmark(args.bench).items():
+            print(f"{name:>20}: {value}")
+        return 0
+    if not args.paths:
+        parser.error("paths are required unless --bench is given")
+
+    from manuscript_agent.figures import figure_number
+    layouts = {}
+    for path in workspace_figures(args.paths):
+        start = time.perf_counter()
+        try:
+            layouts[path.name] = detect(path, figure_number(path))
+        except (OSError, ValueError, zlib.error) as exc:
+            print(f"✗ {path}: {exc}")
+            continue
+        layout = layouts[path.name]
+        if args.json:
+            continue
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"✓ {path.name}: {layout['width']}×{layout['height']} px, "
+              f"{layout['panel_count']} panels, {layout['letter_count']} letters, "
+              f"phash {layout['phash']} ({elapsed:.0f} ms)")
+        for panel in layout["panels"]:
+            print(f"    {panel['subplot_id']:<5} {panel['bbox']}  {panel['phash']}")
+    pairs = duplicates(layouts, args.threshold)
+    if args.json:
+        print(json.dumps({"figures": layouts,
+                          "duplicates": [{"a": a, "b": b, "distance": d} for a, b, d in pairs]},
+                         indent=2))
+        return 0
+    for a, b, distance in pairs:
+        print(f"✗ Near-duplicate: {a} ~ {b} (distance {distance})")
+    if layouts and not pairs:
+        print("✓ No duplicate figures or panels")
+    return 0
@@ -0,0 +1,441 @@
+"""
+Columnar Paper Tables
+Memory-mapped, column-per-field storage for literature result files (the
+pubmed/openalex/merged/validated/final stages). Numeric and boolean fields
+are fixed-width arrays read in place; strings and nested values (authors,
+crossref_data, journal_info, ...) are offset-indexed UTF-8 / JSON blobs,
+each decoded in one pass the first time a row asks for that field. Rows are exposed as slotted Paper
+views that behave like read-only dicts, so existing stage code works
+unchanged while a stage that opens a table with `columns=` never touches
+the others (validation without abstracts, ranking without authors).
+
+A table sits next to its JSON file (citation1_final.json ->
+citation1_final.papers); read_papers() prefers it while it is at least as new
+as the JSON, and `export` reproduces the JSON byte for byte.
+
+    python -m manuscript_agent papers convert manuscript_11072333/literature/*.json
+    python -m manuscript_agent papers info manuscript_11072333/literature/citation1_final.papers
+    python -m manuscript_agent papers export citation1_final.papers -o citation1_final.json
+    python -m manuscript_agent papers --bench 10000
+"""
+
+import argparse
+import json
+import mmap
+import os
+import struct
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Mapping
+from pathlib import Path
+
+import numpy as np
+
+from manuscript_agent.artifacts import JSON_FORMATS, render_json
+from manuscript_agent.checkpoint import file_mode, fsync_dir
+
+MAGIC = b"MAPT"
+VERSION = 1
+# magic, version, header length; the JSON header follows, padded to 8 bytes,
+# then the column data (header spans are [offset, length] into the data).
+PREAMBLE = struct.Struct("<4sII")
+SUFFIX = ".papers"
+DTYPES = {"int": np.int64, "float": np.float64, "bool": np.uint8}
+# Fields validation and journal matching read; abstracts are never needed there.
+VALIDATION_COLUMNS = ("title", "authors", "year", "journal", "doi", "pmid", "crossref_data")
+
+
+def table_path(path):
+    return Path(path).with_suffix(SUFFIX)
+
+
+def column_kind(values):
+    """Storage kind for the present values of one field."""
+    types = {type(v) for v in values}
+    if types == {bool}:
+        return "bool"
+    if types == {int} and all(-2**63 <= v < 2**63 for v in values):
+        return "int"
+    if types == {float}:
+        return "float"
+    if types == {str}:
+        return "str"
+    return "json"
+
+
+class Paper(Mapping):
+    """Read-only dict view of one table row; holds no field values itself."""
+
+    __slots__ = ("table", "row")
+
+    def __init__(self, table, row):
+        self.table = table
+        self.row = row
+
+    def __getitem__(self, name):
+        return self.table.value(name, self.row)
+
+    def __iter__(self):
+        return iter(self.table.row_keys(self.row))
+
+    def __len__(self):
+        return len(self.table.row_keys(self.row))
+
+    def __repr__(self):
+        return f"Paper({self.table.path.name}#{self.row})"
+
+
+class PaperTable:
+    """
+    A memory-mapped .papers file. `columns` limits which fields rows expose;
+    unselected columns are never read.
+    """
+
+    def __init__(self, path, columns=None):
+        self.path = Path(path)
+        self.file = open(self.path, 'rb')
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, length = PREAMBLE.unpack_from(self.map)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{self.path} is not a version {VERSION} paper table")
+        header = json.loads(self.map[PREAMBLE.size:PREAMBLE.size + length])
+        self.base = PREAMBLE.size + length + -(PREAMBLE.size + length) % 8
+        self.rows = header["rows"]
+        self.meta = header["meta"]
+        self.format = header["format"]
+        self.names = [c["name"] for c in header["columns"]]
+        wanted = set(self.names if columns is None else columns)
+        self.columns = {c["name"]: c for c in header["columns"] if c["name"] in wanted}
+        # Each row follows one of a few key orders; keeping them makes export exact.
+        self.orders = [[self.names[i] for i in order] for order in header["orders"]]
+        self.visible = [[name for name in order if name in self.columns] for order in self.orders]
+        self.order_sets = [set(order) for order in self.orders]
+        self.order = self.array_at(header["order"], np.uint16)
+        self.cache = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.cache = {}
+        self.order = None
+        try:
+            self.map.close()
+        except BufferError:
+            # NumPy views handed out by array() still reference the map.
+            pass
+        self.file.close()
+
+    def array_at(self, span, dtype):
+        offset, length = span
+        return np.frombuffer(self.map, dtype, length // np.dtype(dtype).itemsize,
+                             self.base + offset)
+
+    def __len__(self):
+        return self.rows
+
+    def __getitem__(self, row):
+        if not 0 <= row < self.rows:
+            raise IndexError(row)
+        return Paper(self, row)
+
+    def __iter__(self):
+        return (Paper(self, row) for row in range(self.rows))
+
+    def row_keys(self, row):
+        return self.visible[self.order[row]]
+
+    def present(self, name):
+        """Boolean mask of rows that have field `name`."""
+        ids = [i for i, names in enumerate(self.order_sets) if name in names]
+        return np.isin(self.order, ids)
+
+    def array(self, name):
+        """Zero-copy NumPy array of a numeric or boolean column (absent rows are 0)."""
+        column = self.columns[name]
+        if column["kind"] not in DTYPES:
+            raise TypeError(f"{name} is a {column['kind']} column")
+        return self.array_at(column["data"], DTYPES[column["kind"]])
+
+    def column(self, name):
+        """All values of a column in row order (None where absent), decoded once."""
+        values = self.cache.get(name)
+        if values is not None:
+            return values
+        column = self.columns[name]
+        kind = column["kind"]
+        if kind in DTYPES:
+            values = self.array(name).tolist()
+            if kind == "bool":
+                values = [bool(v) for v in values]
+        else:
+            offsets = self.array_at(column["offsets"], np.int64).tolist()
+            start = self.base + column["data"][0]
+            blob = self.map[start:start + column["data"][1]]
+            spans = list(zip(offsets, offsets[1:]))
+            if kind == "str":
+                values = [blob[a:b].decode('utf-8') for a, b in spans]
+            else:
+                # Absent rows have empty spans; decode the rest as one array.
+                rows = [i for i, (a, b) in enumerate(spans) if b > a]
+                decoded = json.loads(b"[" + b",".join(blob[a:b] for a, b in spans if b > a)
+                                     + b"]")
+                values = [None] * self.rows
+                for i, value in zip(rows, decoded):
+                    values[i] = value
+        self.cache[name] = values
+        return values
+
+    def value(self, name, row):
+        if name not in self.columns or name not in self.order_sets[self.order[row]]:
+            raise KeyError(name)
+        return self.column(name)[row]
+
+    def document(self):
+        """The original result-file document, with plain dict papers."""
+        doc = dict(self.meta)
+        doc["papers"] = [dict(paper) for paper in self]
+        return doc
+
+    def export(self):
+        return render_json(self.document(), self.format)
+
+
+def encode_table(papers, meta=None, fmt=None):
+    """Serialize dict papers (plus the result file's other keys) to table bytes."""
+    names, index, orders, order_ids, order = [], {}, [], {}, []
+    for paper in papers:
+        for name in paper:
+            if name not in index:
+                index[name] = len(names)
+                names.append(name)
+        key = tuple(index[name] for name in paper)
+        if key not in order_ids:
+            order_ids[key] = len(orders)
+            orders.append(list(key))
+        order.append(order_ids[key])
+    if len(orders) > 65535:
+        raise ValueError("Too many distinct field orders")
+
+    blocks, columns, position = [], [], 0
+
+    def add(data):
+        nonlocal position
+        span = [position, len(data)]
+        blocks.append(data + b"\0" * (-len(data) % 8))
+        position += len(data) + (-len(data) % 8)
+        return span
+
+    order_span = add(np.asarray(order, np.uint16).tobytes())
+    for name in names:
+        values = [paper[name] for paper in papers if name in paper]
+        kind = column_kind(values)
+        column = {"name": name, "kind": kind}
+        if kind in DTYPES:
+            array = np.zeros(len(papers), DTYPES[kind])
+            for row, paper in enumerate(papers):
+                if name in paper:
+                    array[row] = paper[name]
+            column["data"] = add(array.tobytes())
+        else:
+            offsets, chunks, size = [0], [], 0
+            for paper in papers:
+                if name in paper:
+                    value = paper[name]
+                    raw = (value if kind == "str" else
+                           json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+                           ).encode('utf-8')
+                    chunks.append(raw)
+                    size += len(raw)
+                offsets.append(size)
+            column["offsets"] = add(np.asarray(offsets, np.int64).tobytes())
+            column["data"] = add(b"".join(chunks))
+        columns.append(column)
+
+    meta = dict(meta or {"papers": None})
+    meta["papers"] = None
+    header = {"rows": len(papers), "meta": meta, "format": fmt or JSON_FORMATS[0],
+              "columns": columns, "orders": orders, "order": order_span}
+    raw = json.dumps(header, ensure_ascii=False, separators=(",", ":")).encode('utf-8')
+    padding = -(PREAMBLE.size + len(raw)) % 8
+    return PREAMBLE.pack(MAGIC, VERSION, len(raw)) + raw + b" " * padding + b"".join(blocks)
+
+
+def write_table(path, papers, meta=None, fmt=None):
+    """Atomically write a .papers table."""
+    path = Path(path)
+    data = encode_table(papers, meta, fmt)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            os.fchmod(f.fileno(), file_mode(path))
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+    fsync_dir(path.parent)
+    return len(data)
+
+
+def convert(json_path, output=None):
+    """Write the table for a JSON result file; returns (rows, bytes, exact)."""
+    data = Path(json_path).read_bytes()
+    doc = json.loads(data)
+    if not isinstance(doc, dict) or not isinstance(doc.get("papers"), list):
+        raise ValueError(f"{json_path} has no papers list")
+    fmt = next((f for f in JSON_FORMATS if render_json(doc, f) == data), None)
+    output = Path(output or table_path(json_path))
+    size = write_table(output, doc["papers"], doc, fmt)
+    # Values, key orders and the detected rendering are all kept, so export
+    # is exact whenever a rendering was found.
+    return len(doc["papers"]), size, fmt is not None
+
+
+def read_papers(path, columns=None):
+    """
+    Papers of a result file as dicts. A .papers path, or a JSON path whose
+    table is at least as new, is read from the table (limited to `columns`)
+    and closed again; otherwise the JSON is parsed. Use PaperTable directly
+    to keep rows as views into the map.
+    """
+    path = Path(path)
+    table = path if path.suffix == SUFFIX else table_path(path)
+    if table.exists() and (path == table or not path.exists()
+                           or table.stat().st_mtime_ns >= path.stat().st_mtime_ns):
+        with PaperTable(table, columns) as rows:
+            return [dict(paper) for paper in rows]
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return data.get("papers", []) if isinstance(data, dict) else []
+
+
+def synthetic_papers(count, seed=11):
+    """Final-stage papers with realistic field sizes."""
+    rng = np.random.default_rng(seed)
+    words = [f"word{i}" for i in range(3000)]
+    papers = []
+    for i in range(count):
+        title = " ".join(rng.choice(words, int(rng.integers(8, 18))).tolist())
+        authors = [f"Given{int(a)} Family{int(a)}" for a in rng.integers(0, 50000, 10)]
+        year = int(rng.integers(1995, 2026))
+        journal = f"Journal of Synthetic Studies {int(rng.integers(0, 800))}"
+        papers.append({
+            "title": title, "authors": authors, "year": year, "journal": journal,
+            "abstract": " ".join(rng.choice(words, 200).tolist()),
+            "citations": int(rng.integers(0, 500)), "doi": f"10.1000/synthetic.{i}",
+            "pmid": str(30000000 + i), "pmcid": "", "url": f"https://example.org/{i}",
+            "pdf_url": "", "is_open_access": bool(rng.random() < 0.4), "source": "pubmed",
+            "validation_score": round(float(rng.random()), 3), "validated": True,
+            "score_breakdown": {"title": 1.0, "year": 1.0, "authors": 0.9, "journal": 1.0},
+            "crossref_data": {"title": title, "authors": authors[:5], "year": year,
+                              "journal": journal, "issn": f"{i % 800:07d}X"},
+            "journal_info": {"journal": journal, "impact_factor": 4.2, "jcr_quartile": "Q2"},
+            "impact_factor": 4.2, "quality_score": round(float(rng.random()), 3)})
+    return papers
+
+
+def measure(function):
+    """(result, milliseconds, peak MB allocated) of calling `function`."""
+    start = time.perf_counter()
+    result = function()
+    elapsed = (time.perf_counter() - start) * 1000
+    tracemalloc.start()
+    function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, round(elapsed, 1), round(peak / 2**20, 1)
+
+
+def benchmark(count=10000):
+    """JSON vs table: file size, load time and peak memory per access pattern."""
+    papers = synthetic_papers(count)
+    results = {"papers": count}
+    with tempfile.TemporaryDirectory() as directory:
+        json_path = Path(directory) / "citation1_final.json"
+        json_path.write_text(json.dumps({"papers": papers}, indent=2, ensure_ascii=False),
+                             encoding='utf-8')
+        del papers
+        start = time.perf_counter()
+        rows, size, exact = convert(json_path)
+        results["convert_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        results["json_bytes"] = json_path.stat().st_size
+        results["table_bytes"] = size
+        with PaperTable(table_path(json_path)) as table:
+            results["export_exact"] = exact and table.export() == json_path.read_bytes()
+        table = table_path(json_path)
+
+        def json_load():
+            with open(json_path, 'r', encoding='utf-8') as f:
+                return json.load(f)["papers"]
+
+        def validation_rows():
+            return read_papers(table, VALIDATION_COLUMNS)
+
+        def numeric():
+            with PaperTable(table, ("citations", "year")) as t:
+                return int(t.array("citations").sum() + t.array("year").sum())
+
+        _, results["json_load_ms"], results["json_load_mb"] = measure(json_load)
+        _, results["open_ms"], results["open_mb"] = measure(lambda: PaperTable(table).close())
+        _, results["numeric_cols_ms"], results["numeric_cols_mb"] = measure(numeric)
+        _, results["validation_cols_ms"], results["validation_cols_mb"] = measure(validation_rows)
+        _, results["full_dicts_ms"], results["full_dicts_mb"] = measure(
+            lambda: read_papers(table))
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="manuscript_agent papers",
+                                     description=__doc__.strip().splitlines()[0])
+    parser.add_argument("action", nargs="?", choices=["convert", "export", "info"])
+    parser.add_argument("inputs", nargs="*", help="JSON result files (convert) or tables")
+    parser.add_argument("-o", "--output", help="output file (single input only)")
+    parser.add_argument("--bench", type=int, metavar="PAPERS",
+                        help="benchmark JSON vs table loading for PAPERS synthetic papers")
+    args = parser.parse_args(argv)
+
+    if args.bench:
+        for name, value in benchmark(args.bench).items():
+            print(f"{name:>18}: {value}")
+        return 0
+    if not args.action or not args.inputs:
+        parser.error("action and inputs are required unless --bench is given")
+    if args.output and len(args.inputs) != 1:
+        parser.error("--output takes a single input")
+
+    failed = 0
+    for name in args.inputs:
+        try:
+            if args.action == "convert":
+                rows, size, exact = convert(name, args.output)
+                mark = "✓" if exact else "✗"
+                failed += not exact
+                print(f"{mark} {name}: {rows} papers, {size} bytes "
+                      f"(JSON {Path(name).stat().st_size}){'' if exact else ', export differs'}")
+            elif args.action == "export":
+                output = Path(args.output or Path(name).with_suffix(".json"))
+                with PaperTable(name) as table:
+                    data = table.export()
+                output.write_bytes(data)
+                print(f"✓ {name}: {len(table)} papers -> {output}")
+            else:
+                with PaperTable(name) as table:
+                    print(f"{name}: {len(table)} papers, {len(table.orders)} field orders")
+                    for column in table.columns.values():
+                        print(f"  {column['name']:<18} {column['kind']:<5} "
+                              f"{column['data'][1]:>10} bytes")
+        except ValueError as e:
+            print(f"✗ {name}: {e}")
+            failed += 1
+    return 1 if failed else 0
@@ -0,0 +1,706 @@
+"""
+PDF Text Extraction
+Standard-library PDF reader for the full-text stage: the file is memory
+mapped, the cross-reference table (classic tables, xref streams and object
+streams, or a rebuilt index for damaged files) locates objects on demand,
+and pages are decoded one at a time, so only the current page's content
+streams are ever held in memory. Text comes from the text-showing
+operators, mapped through each font's ToUnicode CMap when it has one.
+
+Also writes small synthetic PDFs (classic or compressed cross-references)
+for the local file server and benchmarks.
+
+    python -m manuscript_agent.pdftext paper.pdf
+"""
+
+import mmap
+import random
+import re
+import sys
+import zlib
+from base64 import a85decode
+from pathlib import Path
+
+TOKEN = re.compile(rb"(?:[\s\x00]|%[^\r\n]*)*(<<|>>|\[|\]|\{|\}|/[^\s\x00()<>\[\]{}/%]*|\("
+                   rb"|<[0-9A-Fa-f\s]*>|[^\s\x00()<>\[\]{}/%]+)")
+REFERENCE = re.compile(rb"\s+(\d+)\s+R(?![^\s\x00()<>\[\]{}/%])")
+OBJECT = re.compile(rb"\s*(\d+)\s+(\d+)\s+obj")
+NUMBER = re.compile(rb"[-+]?(?:\d+\.?\d*|\.\d+)$")
+ESCAPES = {b"n": b"\n", b"r": b"\r", b"t": b"\t", b"b": b"\b", b"f": b"\f",
+           b"(": b"(", b")": b")", b"\\": b"\\"}
+# Kerning in a TJ array more negative than this (thousandths of an em) is a word gap.
+WORD_GAP = -200
+# bfrange entries wider than this are looked up arithmetically instead of expanded.
+EXPAND_RANGE = 255
+# Decoded object streams kept for repeated lookups.
+OBJECT_STREAM_CACHE = 4
+
+
+class PdfError(ValueError):
+    """The file is not a PDF or its structure cannot be recovered."""
+
+
+class Name(str):
+    """A PDF name (/Type), kept distinct from strings, which are bytes."""
+
+
+class Ref(tuple):
+    """Indirect reference (number, generation)."""
+
+
+class Operator(bytes):
+    """A content-stream operator or other bare keyword."""
+
+
+class Stream:
+    def __init__(self, info, raw):
+        self.info = info
+        self.raw = raw
+
+
+def literal_string(data, pos):
+    """Parse a (...) string starting after the opening parenthesis."""
+    out = bytearray()
+    depth = 1
+    while pos < len(data):
+        c = data[pos:pos + 1]
+        pos += 1
+        if c == b"\\":
+            nxt = data[pos:pos + 1]
+            pos += 1
+            if nxt in ESCAPES:
+                out += ESCAPES[nxt]
+            elif nxt.isdigit():
+                digits = nxt
+                while len(digits) < 3 and data[pos:pos + 1].isdigit():
+                    digits += data[pos:pos + 1]
+                    pos += 1
+                out.append(int(digits, 8) & 255)
+            elif nxt == b"\r":
+                pos += data[pos:pos + 1] == b"\n"
+            elif nxt != b"\n":
+                out += nxt
+        elif c == b"(":
+            depth += 1
+            out += c
+        elif c == b")":
+            depth -= 1
+            if not depth:
+                break
+            out += c
+        else:
+            out += c
+    return bytes(out), pos
+
+
+def name(token):
+    return Name(re.sub(rb"#([0-9A-Fa-f]{2})", lambda m: bytes([int(m.group(1), 16)]),
+                       token[1:]).decode("latin-1"))
+
+
+def parse(data, pos):
+    """(value, position after it) of the PDF object starting at `pos`."""
+    match = TOKEN.match(data, pos)
+    if not match:
+        raise PdfError(f"unexpected end of data at {pos}")
+    token, pos = match.group(1), match.end()
+    if token == b"<<":
+        result = {}
+        while True:
+            match = TOKEN.match(data, pos)
+            if not match or match.group(1) == b">>":
+                return result, (match.end() if match else len(data))
+            key, pos = parse(data, pos)
+            value, pos = parse(data, pos)
+            result[key] = value
+    if token == b"[":
+        result = []
+        while True:
+            match = TOKEN.match(data, pos)
+            if not match or match.group(1) == b"]":
+                return result, (match.end() if match else len(data))
+            value, pos = parse(data, pos)
+            result.append(value)
+    if token[:1] == b"/":
+        return name(token), pos
+    if token == b"(":
+        return literal_string(data, pos)
+    if token[:1] == b"<":
+        digits = re.sub(rb"\s", b"", token[1:-1])
+        return bytes.fromhex((digits + b"0" * (len(digits) % 2)).decode()), pos
+    if NUMBER.match(token):
+        if b"." not in token:
+            ref = REFERENCE.match(data, pos)
+            if ref:
+                return Ref((int(token), int(ref.group(1)))), ref.end()
+            return int(token), pos
+        return float(token), pos
+    if token in (b"true", b"false"):
+        return token == b"true", pos
+    if token == b"null":
+        return None, pos
+    return Operator(token), pos
+
+
+def png_unpredict(data, columns, colors=1, bits=8):
+    """Undo PNG row predictors (used by xref streams)."""
+    width = (columns * colors * bits + 7) // 8
+    bpp = max(1, colors * bits // 8)
+    out = bytearray()
+    previous = bytearray(width)
+    for start in range(0, len(data) - width, width + 1):
+        kind, row = data[start], bytearray(data[start + 1:start + 1 + width])
+        for i in range(width):
+            left = row[i - bpp] if i >= bpp else 0
+            up = previous[i]
+            if kind == 1:
+                row[i] = (row[i] + left) & 255
+            elif kind == 2:
+                row[i] = (row[i] + up) & 255
+            elif kind == 3:
+                row[i] = (row[i] + (left + up) // 2) & 255
+            elif kind == 4:
+                corner = previous[i - bpp] if i >= bpp else 0
+                p = left + up - corner
+                pa, pb, pc = abs(p - left), abs(p - up), abs(p - corner)
+                best = left if pa <= pb and pa <= pc else up if pb <= pc else corner
+                row[i] = (row[i] + best) & 255
+        out += row
+        previous = row
+    return bytes(out)
+
+
+class PdfReader:
+    """Random access to the objects and pages of a memory-mapped PDF."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.file = open(path, 'rb')
+        try:
+            self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self.file.close()
+            raise PdfError(f"{path} is empty")
+        if self.data.find(b"%PDF-", 0, 1024) < 0:
+            self.close()
+            raise PdfError(f"{path} is not a PDF file")
+        self.offsets = {}
+        self.trailer = {}
+        self.objects = {}
+        self.object_streams = {}
+        try:
+            self.read_xref()
+        except (PdfError, ValueError, IndexError, KeyError, zlib.error):
+            self.offsets, self.trailer = {}, {}
+        if "Root" not in self.trailer or not self.offsets:
+            self.rebuild_xref()
+
+    def close(self):
+        self.data.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # Cross-reference
+
+    def read_xref(self):
+        start = self.data.rfind(b"startxref", max(0, len(self.data) - 4096))
+        if start < 0:
+            raise PdfError("startxref not found")
+        offset = int(self.data[start + 9:start + 40].split()[0])
+        seen = set()
+        while offset is not None and offset not in seen:
+            seen.add(offset)
+            offset = self.read_section(offset)
+
+    def read_section(self, offset):
+        """Read one xref section; returns the /Prev offset (or None)."""
+        if self.data[offset:offset + 4] == b"xref":
+            pos = offset + 4
+            while True:
+                header = re.compile(rb"\s*(\d+)\s+(\d+)").match(self.data, pos)
+                if not header:
+                    break
+                first, count = int(header.group(1)), int(header.group(2))
+                pos = header.end()
+                body = self.data[pos:pos + 20 * count + 20]
+                entries = re.findall(rb"(\d{10})\s(\d{5})\s([nf])", body)[:count]
+                for i, (where, _, kind) in enumerate(entries):
+                    if kind == b"n":
+                        self.offsets.setdefault(first + i, int(where))
+                pos += re.compile(rb"(?:\s*\d{10}\s\d{5}\s[nf]){%d}" % count).match(
+                    self.data, pos).end() - pos
+            match = re.compile(rb"\s*trailer").match(self.data, pos)
+            if not match:
+                raise PdfError("trailer not found")
+            trailer, _ = parse(self.data, match.end())
+        else:
+            value = self.object_at(offset)
+            if not isinstance(value, Stream) or value.info.get("Type") != "XRef":
+                raise PdfError("xref offset does not point at an xref table or stream")
+            trailer = value.info
+            self.read_xref_stream(value)
+        for key, item in trailer.items():
+            self.trailer.setdefault(key, item)
+        if "XRefStm" in trailer:
+            self.read_section(trailer["XRefStm"])
+        return trailer.get("Prev")
+
+    def read_xref_stream(self, stream):
+        data = self.decode(stream)
+        widths = stream.info["W"]
+        size = sum(widths)
+        index = stream.info.get("Index", [0, stream.info["Size"]])
+        pos = 0
+        for first, count in zip(index[::2], index[1::2]):
+            for number in range(first, first + count):
+                fields = []
+                for width in widths:
+                    fields.append(int.from_bytes(data[pos:pos + width], "big") if width else None)
+                    pos += width
+                kind = 1 if fields[0] is None else fields[0]
+                if kind == 1:
+                    self.offsets.setdefault(number, fields[1])
+                elif kind == 2:
+                    self.offsets.setdefault(number, (fields[1], fields[2] or 0))
+                if pos + size > len(data):
+                    return
+
+    def rebuild_xref(self):
+        """Index objects by scanning for 'n g obj' when the xref is missing or damaged."""
+        self.offsets = {}
+        for match in re.finditer(rb"(?<![\d])(\d+)\s+(\d+)\s+obj\b", self.data):
+            self.offsets[int(match.group(1))] = match.start()
+        for match in re.finditer(rb"trailer", self.data):
+            try:
+                trailer, _ = parse(self.data, match.end())
+            except PdfError:
+                continue
+            if isinstance(trailer, dict):
+                self.trailer.update(trailer)
+        if "Root" not in self.trailer:
+            for number in list(self.offsets):
+                value = self.get(number)
+                info = value.info if isinstance(value, Stream) else value
+                if isinstance(info, dict) and info.get("Type") == "Catalog":
+                    self.trailer["Root"] = Ref((number, 0))
+                    break
+                if isinstance(value, Stream) and value.info.get("Type") == "ObjStm":
+                    self.index_object_stream(number)
+        if "Root" not in self.trailer:
+            raise PdfError(f"{self.path}: no document catalog found")
+
+    def index_object_stream(self, number):
+        for member in self.object_stream(number)[0]:
+            self.offsets.setdefault(member, (number, None))
+
+    # Objects
+
+    def object_at(self, offset):
+        match = OBJECT.match(self.data, offset)
+        if not match:
+            raise PdfError(f"no object at offset {offset}")
+        value, pos = parse(self.data, match.end())
+        if isinstance(value, dict):
+            keyword = TOKEN.match(self.data, pos)
+            if keyword and keyword.group(1) == b"stream":
+                start = keyword.end()
+                start += 2 if self.data[start:start + 2] == b"\r\n" else 1
+                length = self.resolve(value.get("Length"))
+                end = start + length if isinstance(length, int) else -1
+                if end < 0 or self.data[end:end + 30].find(b"endstream") < 0:
+                    end = self.data.find(b"endstream", start)
+                    while end > start and self.data[end - 1:end] in b"\r\n":
+                        end -= 1
+                return Stream(value, self.data[start:end])
+        return value
+
+    def object_stream(self, number):
+        """(member numbers in order, {member: value}) of an object stream."""
+        if number not in self.object_streams:
+            stream = self.get(number)
+            data = self.decode(stream)
+            first = stream.info["First"]
+            header = data[:first].split()
+            pairs = list(zip(map(int, header[::2]), map(int, header[1::2])))
+            members = {}
+            for member, offset in pairs:
+                try:
+                    members[member] = parse(data, first + offset)[0]
+                except PdfError:
+                    members[member] = None
+            if len(self.object_streams) >= OBJECT_STREAM_CACHE:
+                self.object_streams.pop(next(iter(self.object_streams)))
+            self.object_streams[number] = ([m for m, _ in pairs], members)
+        return self.object_streams[number]
+
+    def get(self, number):
+        if number in self.objects:
+            return self.objects[number]
+        where = self.offsets.get(number)
+        if where is None:
+            return None
+        if isinstance(where, tuple):
+            value = self.object_stream(where[0])[1].get(number)
+        else:
+            value = self.object_at(where)
+        # Dictionaries and arrays are small and reused (fonts, page tree);
+        # stream contents are re-read from the map when needed.
+        if not isinstance(value, Stream):
+            self.objects[number] = value
+        return value
+
+    def resolve(self, value):
+        while isinstance(value, Ref):
+            value = self.get(value[0])
+        return value
+
+    def decode(self, stream):
+        """Decoded stream data; None for filters this reader does not implement."""
+        data = bytes(stream.raw)
+        filters = self.resolve(stream.info.get("Filter"))
+        params = self.resolve(stream.info.get("DecodeParms"))
+        filters = filters if isinstance(filters, list) else [filters] if filters else []
+        params = params if isinstance(params, list) else [params] * len(filters)
+        for kind, param in zip(filters, params):
+            param = self.resolve(param) or {}
+            if kind in ("FlateDecode", "Fl"):
+                decompressor = zlib.decompressobj()
+                data = decompressor.decompress(data)
+                predictor = param.get("Predictor", 1)
+                if predictor >= 10:
+                    data = png_unpredict(data, param.get("Columns", 1), param.get("Colors", 1),
+                                         param.get("BitsPerComponent", 8))
+            elif kind in ("ASCII85Decode", "A85"):
+                data = a85decode(data.strip().removesuffix(b"~>").removeprefix(b"<~") + b"~>",
+                                 adobe=True)
+            elif kind in ("ASCIIHexDecode", "AHx"):
+                digits = re.sub(rb"[^0-9A-Fa-f]", b"", data.split(b">")[0])
+                data = bytes.fromhex((digits + b"0" * (len(digits) % 2)).decode())
+            else:
+                return None
+        return data
+
+    # Pages
+
+    def pages(self):
+        """Page dictionaries in order, with inherited Resources filled in."""
+        root = self.resolve(self.trailer.get("Root")) or {}
+        stack = [(self.resolve(root.get("Pages")), None)]
+        seen = set()
+        while stack:
+            node, resources = stack.pop()
+            if not isinstance(node, dict) or id(node) in seen:
+                continue
+            seen.add(id(node))
+            resources = self.resolve(node.get("Resources")) or resources
+            kids = self.resolve(node.get("Kids"))
+            if kids is not None and node.get("Type") != "Page":
+                stack.extend((self.resolve(kid), resources) for kid in reversed(kids))
+            else:
+                yield dict(node, Resources=resources or {})
+
+    def contents(self, page):
+        contents = self.resolve(page.get("Contents"))
+        parts = contents if isinstance(contents, list) else [contents]
+        chunks = []
+        for part in parts:
+            stream = self.resolve(part)
+            if isinstance(stream, Stream):
+                data = self.decode(stream)
+                if data:
+                    chunks.append(data)
+        return b"\n".join(chunks)
+
+
+class Font:
+    """Byte-to-text decoding for one font: its ToUnicode CMap or a single-byte fallback."""
+
+    def __init__(self, reader, info):
+        info = reader.resolve(info) or {}
+        self.two_byte = info.get("Subtype") == "Type0"
+        self.map = {}
+        self.ranges = []
+        cmap = reader.resolve(info.get("ToUnicode"))
+        if isinstance(cmap, Stream):
+            self.read_cmap(reader.decode(cmap) or b"")
+
+    def read_cmap(self, data):
+        def text(code):
+            try:
+                return code.decode("utf-16-be")
+            except UnicodeDecodeError:
+                return ""
+
+        for block in re.findall(rb"beginbfchar(.*?)endbfchar", data, re.S):
+            for source, target in re.findall(rb"<([0-9A-Fa-f]+)>\s*<([0-9A-Fa-f]*)>", block):
+                self.map[bytes.fromhex(source.decode())] = text(bytes.fromhex(target.decode()))
+        for block in re.findall(rb"beginbfrange(.*?)endbfrange", data, re.S):
+            for low, high, target in re.findall(
+                    rb"<([0-9A-Fa-f]+)>\s*<([0-9A-Fa-f]+)>\s*(<[0-9A-Fa-f]*>|\[[^\]]*\])", block):
+                width = len(low) // 2
+                low, high = int(low, 16), int(high, 16)
+                if target.startswith(b"["):
+                    targets = re.findall(rb"<([0-9A-Fa-f]*)>", target)
+                    for offset, item in enumerate(targets[:high - low + 1]):
+                        self.map[(low + offset).to_bytes(width, "big")] = \
+                            text(bytes.fromhex(item.decode()))
+                    continue
+                base = bytes.fromhex(target[1:-1].decode())
+                start = int.from_bytes(base, "big") if base else 0
+                if high - low > EXPAND_RANGE:
+                    self.ranges.append((width, low, high, start, max(2, len(base))))
+                    continue
+                for offset in range(high - low + 1):
+                    self.map[(low + offset).to_bytes(width, "big")] = \
+                        text((start + offset).to_bytes(max(2, len(base)), "big"))
+        if self.map or self.ranges:
+            self.two_byte = self.two_byte or all(len(k) == 2 for k in self.map) and \
+                all(width == 2 for width, *_ in self.ranges)
+
+    def lookup(self, code):
+        if code in self.map:
+            return self.map[code]
+        value = int.from_bytes(code, "big")
+        for width, low, high, start, size in self.ranges:
+            if width == len(code) and low <= value <= high:
+                try:
+                    return (start + value - low).to_bytes(size, "big").decode("utf-16-be")
+                except (UnicodeDecodeError, OverflowError):
+                    return ""
+        return ""
+
+    def decode(self, data):
+        if self.ranges and not self.map and self.ranges[0][1:4] == (0, 0xFFFF, 0) \
+                and len(data) % 2 == 0:
+            # Identity ToUnicode, the common case for embedded CID fonts
+            return data.decode("utf-16-be", errors="replace")
+        if self.two_byte:
+            codes = [data[i:i + 2] for i in range(0, len(data) - 1, 2)]
+        else:
+            codes = [data[i:i + 1] for i in range(len(data))]
+        if self.ranges:
+            return "".join(self.lookup(code) for code in codes)
+        if self.map:
+            return "".join(self.map.get(code, "") for code in codes)
+        if self.two_byte:
+            return "".join(chr(int.from_bytes(code, "big")) for code in codes)
+        return data.decode("cp1252", errors="replace")
+
+
+def page_text(reader, page, fonts):
+    """Text of one page; `fonts` caches Font objects across pages by reference."""
+    resources = reader.resolve(page.get("Resources")) or {}
+    font_dict = reader.resolve(resources.get("Font")) or {}
+    data = reader.contents(page)
+    lines, line = [], []
+    operands = []
+    font = None
+    y = None
+    pos = 0
+    while True:
+        try:
+            value, pos = parse(data, pos)
+        except PdfError:
+            break
+        if not isinstance(value, Operator):
+            operands.append(value)
+            continue
+        op = bytes(value)
+        if op == b"BI":
+            end = data.find(b"EI", pos)
+            pos = end + 2 if end >= 0 else len(data)
+        elif op == b"Tf" and operands:
+            ref = font_dict.get(operands[0]) if isinstance(operands[0], Name) else None
+            key = ref if isinstance(ref, Ref) else (id(font_dict), operands[0])
+            if key not in fonts:
+                fonts[key] = Font(reader, ref)
+            font = fonts[key]
+        elif op in (b"Tj", b"'", b'"') and operands and isinstance(operands[-1], bytes):
+            if op != b"Tj":
+                lines.append("".join(line))
+                line = []
+            line.append(font.decode(operands[-1]) if font else operands[-1].decode("latin-1"))
+        elif op == b"TJ" and operands and isinstance(operands[-1], list):
+            for item in operands[-1]:
+                if isinstance(item, bytes):
+                    line.append(font.decode(item) if font else item.decode("latin-1"))
+                elif isinstance(item, (int, float)) and item < WORD_GAP:
+                    line.append(" ")
+        elif op in (b"Td", b"TD") and len(operands) >= 2:
+            if operands[1]:
+                lines.append("".join(line))
+                line = []
+            elif line and operands[0] and not line[-1].endswith(" "):
+                line.append(" ")
+        elif op == b"T*":
+            lines.append("".join(line))
+            line = []
+        elif op == b"Tm" and len(operands) >= 6:
+            if y is not None and operands[5] != y:
+                lines.append("".join(line))
+                line = []
+            y = operands[5]
+        elif op == b"ET" and line:
+            lines.append("".join(line))
+            line = []
+        operands = []
+    if line:
+        lines.append("".join(line))
+    return "\n".join(text.rstrip() for text in lines if text.strip())
+
+
+def extract(path, out_path):
+    """
+    Write the text of `path` to `out_path`, page by page with form feeds
+    between pages; returns {"pages", "chars"}. Runs in worker processes.
+    """
+    pages = chars = 0
+    tmp = Path(out_path).with_suffix(".txt.part")
+    with PdfReader(path) as reader, open(tmp, 'w', encoding='utf-8') as out:
+        fonts = {}
+        for page in reader.pages():
+            text = page_text(reader, page, fonts)
+            if pages:
+                out.write("\f")
+            out.write(text + "\n")
+            pages += 1
+            chars += len(text)
+    tmp.replace(out_path)
+    return {"pages": pages, "chars": chars}
+
+
+def synthetic_pdf(seed, pages=8, words_per_page=400, compact=False, image_bytes=0):
+    """
+    A valid PDF of `pages` pages of deterministic words. compact=True puts
+    the page objects in an object stream indexed by an xref stream and sets
+    text in a two-byte font with a ToUnicode CMap, as modern writers do.
+    `image_bytes` adds an incompressible image stream of that size, since
+    real articles are mostly figures by weight.
+    """
+    rng = random.Random(seed)
+    vocabulary = ("tumor immune infiltration lymphocyte signalling prognosis expression "
+                  "ubiquitin proteasome macrophage stromal survival cohort hazard ratio "
+                  "validation signature single-cell sequencing").split()
+    objects = {1: b"<< /Type /Catalog /Pages 2 0 R >>"}
+    kids = []
+    number = 5
+    for page in range(pages):
+        lines = []
+        words = [rng.choice(vocabulary) for _ in range(words_per_page)]
+        for start in range(0, len(words), 12):
+            text = " ".join(words[start:start + 12])
+            if compact:
+                lines.append(b"<" + text.encode("utf-16-be").hex().encode() + b"> Tj T*")
+            else:
+                lines.append(b"(" + text.encode("latin-1") + b") Tj T*")
+        content = (b"BT /F1 10 Tf 12 TL 72 760 Td\n(Page %d) Tj T*\n" % (page + 1)
+                   if not compact else
+                   b"BT /F1 10 Tf 12 TL 72 760 Td\n<%s> Tj T*\n" %
+                   f"Page {page + 1}".encode("utf-16-be").hex().encode())
+        content += b"\n".join(lines) + b"\nET"
+        packed = zlib.compress(content)
+        objects[number] = b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(packed) \
+            + packed + b"\nendstream"
+        objects[number + 1] = (b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                               b"/Contents %d 0 R >>" % number)
+        kids.append(number + 1)
+        number += 2
+    if image_bytes:
+        side = max(1, int((image_bytes / 3) ** 0.5))
+        pixels = rng.randbytes(side * side * 3)
+        objects[number] = (b"<< /Type /XObject /Subtype /Image /Width %d /Height %d "
+                           b"/ColorSpace /DeviceRGB /BitsPerComponent 8 /Length %d >>\nstream\n"
+                           % (side, side, len(pixels)) + pixels + b"\nendstream")
+        number += 1
+    objects[2] = (b"<< /Type /Pages /Kids [" + b" ".join(b"%d 0 R" % k for k in kids)
+                  + b"] /Count %d /Resources << /Font << /F1 3 0 R >> >> >>" % pages)
+    if compact:
+        cmap = (b"/CIDInit /ProcSet findresource begin 12 dict begin begincmap\n"
+                b"1 begincodespacerange <0000> <FFFF> endcodespacerange\n"
+                b"1 beginbfrange <0000> <FFFF> <0000> endbfrange\n"
+                b"endcmap CMapName currentdict /CMap defineresource pop end end")
+        objects[3] = (b"<< /Type /Font /Subtype /Type0 /BaseFont /Helvetica "
+                      b"/Encoding /Identity-H /ToUnicode 4 0 R >>")
+        objects[4] = b"<< /Length %d >>\nstream\n" % len(cmap) + cmap + b"\nendstream"
+    else:
+        objects[3] = b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"
+        objects[4] = b"<< >>"
+
+    out = bytearray(b"%PDF-1.5\n%\xe2\xe3\xcf\xd3\n")
+    offsets = {}
+    packed_members = set(kids) | {2} if compact else set()
+    for key in sorted(objects):
+        if key in packed_members:
+            continue
+        offsets[key] = len(out)
+        out += b"%d 0 obj\n" % key + objects[key] + b"\nendobj\n"
+    size = number
+    if not compact:
+        xref = len(out)
+        out += b"xref\n0 %d\n0000000000 65535 f \n" % size
+        for key in range(1, size):
+            out += (b"%010d 00000 n \n" % offsets[key] if key in offsets
+                    else b"0000000000 65535 f \n")
+        out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (size, xref)
+        return bytes(out)
+
+    members = sorted(packed_members)
+    header, body = [], bytearray()
+    for key in members:
+        header.append(b"%d %d" % (key, len(body)))
+        body += objects[key] + b"\n"
+    head = b" ".join(header) + b"\n"
+    stream_number, xref_number = size, size + 1
+    packed = zlib.compress(head + bytes(body))
+    offsets[stream_number] = len(out)
+    out += (b"%d 0 obj\n<< /Type /ObjStm /N %d /First %d /Length %d /Filter /FlateDecode >>\n"
+            b"stream\n" % (stream_number, len(members), len(head), len(packed))
+            + packed + b"\nendstream\nendobj\n")
+    rows = bytearray()
+    for key in range(xref_number + 1):
+        if key in members:
+            fields = (2, stream_number, members.index(key))
+        elif key in offsets:
+            fields = (1, offsets[key], 0)
+        elif key == xref_number:
+            fields = (1, len(out), 0)
+        else:
+            fields = (0, 0, 0)
+        # PNG Up predictor, as most writers emit
+        rows += b"\x02" + bytes([fields[0]]) + fields[1].to_bytes(4, "big") \
+            + fields[2].to_bytes(2, "big")
+    raw = bytearray()
+    previous = bytes(7)
+    for start in range(0, len(rows), 8):
+        row = rows[start + 1:start + 8]
+        raw += b"\x02" + bytes((a - b) & 255 for a, b in zip(row, previous))
+        previous = row
+    packed = zlib.compress(bytes(raw))
+    xref = len(out)
+    out += (b"%d 0 obj\n<< /Type /XRef /Size %d /W [1 4 2] /Root 1 0 R /Length %d "
+            b"/Filter /FlateDecode /DecodeParms << /Columns 7 /Predictor 12 >> >>\nstream\n"
+            % (xref_number, xref_number + 1, len(packed))
+            + packed + b"\nendstream\nendobj\nstartxref\n%d\n%%%%EOF\n" % xref)
+    return bytes(out)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        print("usage: python -m manuscript_agent.pdftext <file.pdf>")
+        return 2
+    with PdfReader(argv[0]) as reader:
+        fonts = {}
+        for number, page in enumerate(reader.pages(), 1):
+            print(f"--- page {number} ---")
+            print(page_text(reader, page, fonts))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,507 @@
+"""
+Phase Scheduler
+Models the manuscript workflow as a DAG of steps with declared inputs and
+outputs; an edge runs from every step that produces a path to every step
+that reads it. Each step's inputs are content-hashed and compared with the
+digest recorded in state.json when it last completed, so only stale steps
+run. Independent steps run concurrently. Every decision (run, cache hit,
+skip) is appended to progress.log, and phase_completion in state.json is
+updated from the steps belonging to each phase.
+
+Actions receive a Shared bundle (literature cache path, rate limiters, CPU
+pool); a single run builds its own, while the batch runner hands every
+workspace's scheduler the same bundle and step pool.
+
+Steps without an automated action (drafting, review) are completed outside
+the scheduler and recorded with `mark`; the scheduler reports them as
+pending or stale when their inputs change. Steps left out of a run (`run ws
+figures`) satisfy their dependents while their outputs exist, and a run
+that records nothing leaves state.json untouched.
+
+    python -m manuscript_agent pipeline status manuscript_11072333
+    python -m manuscript_agent pipeline run manuscript_11072333 --dry-run
+    python -m manuscript_agent pipeline mark manuscript_11072333 results_draft
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import nullcontext
+from datetime import datetime, timezone
+from pathlib import Path
+
+from manuscript_agent import spans
+from manuscript_agent.checkpoint import Journal, atomic_write_json, checkpoint_path, \
+    write_checkpoint
+from manuscript_agent.figures import file_digest
+
+INPUT_REPORT = "@input_report"
+HASH_CACHE = Path("cache") / "pipeline" / "hashes.json"
+JOURNAL_NAME = "pipeline"
+# Step outcomes that complete a phase
+DONE = ("ran", "cached")
+# Step outcomes that let dependent steps proceed; "present" is a step left out
+# of the run whose outputs exist but were never recorded by the scheduler
+SATISFIED = DONE + ("present",)
+
+
+class Shared:
+    """
+    Resources step actions share across workspaces: the metadata cache file
+    (each action opens its own connection), rate limiters keyed by source
+    name, a process pool for CPU-bound analysis and extra search_workspace()
+    options (endpoints, API key). Defaults give a single run its usual
+    private limiters and pools.
+    """
+
+    def __init__(self, cache_path=None, limiters=None, executor=None, search=None):
+        self.cache_path = cache_path
+        self.limiters = limiters or {}
+        self.executor = executor
+        self.search = search or {}
+
+
+class Step:
+    def __init__(self, name, phase, description, inputs, outputs, action=None, optional=()):
+        self.name = name
+        self.phase = phase
+        self.description = description
+        self.inputs = inputs
+        self.outputs = outputs
+        self.action = action
+        # Inputs the step can do without; still hashed, so adding one re-runs it
+        self.optional = set(optional)
+
+
+def run_ingest(workspace, state, shared):
+    from manuscript_agent.ingest import ingest_docx
+
+    manifest = ingest_docx(input_report(workspace, state), workspace)
+    return f"{manifest['lines']} lines, {len(manifest['figures'])} figures"
+
+
+def run_figures(workspace, state, shared):
+    from manuscript_agent import figures
+
+    stats = figures.run(workspace, executor=shared.executor)
+    return f"{stats['figures']} figures ({stats['analyzed']} analyzed, {stats['cached']} cached)"
+
+
+def run_literature(workspace, state, shared):
+    from manuscript_agent.cache import MetadataCache
+    from manuscript_agent.citegraph import CitationGraph
+    from manuscript_agent.search import search_workspace
+
+    graph = CitationGraph()
+    with MetadataCache(shared.cache_path) as cache:
+        try:
+            stats, failures = asyncio.run(search_workspace(workspace, cache=cache,
+                                                           limiters=shared.limiters,
+                                                           graph=graph, **shared.search))
+        finally:
+            graph.save()
+    if failures:
+        raise RuntimeError(f"{len(failures)} searches failed")
+    return f"{stats['queries']} queries, {stats['files_written']} files"
+
+
+def run_bibliography(workspace, state, shared):
+    from manuscript_agent.citations import write_bibliography
+
+    return f"{write_bibliography(workspace)} references"
+
+
+def run_assembly(workspace, state, shared):
+    from manuscript_agent.assemble import assemble
+
+    stats = assemble(workspace, template=state.get("journal_template", {}))
+    issues = f", {len(stats['issues'])} limit issues" if stats["issues"] else ""
+    return (f"{stats['sections']} sections ({stats['rendered']} rendered, "
+            f"{stats['cached']} cached), {stats['figures']} figures{issues}")
+
+
+FINAL_DRAFTS = ["drafts/01_results_final.md", "drafts/02_methods_final.md",
+                "drafts/03_introduction_final.md", "drafts/04_discussion_final.md"]
+
+STEPS = [
+    Step("ingest", "PHASE_0.5", "Extract report text and images",
+         [INPUT_REPORT], ["report_content.md", "report_figures.json", "images"], run_ingest),
+    Step("figures", "PHASE_0.5", "Figure analysis and captions",
+         ["images", "report_figures.json", "figure_annotations.json"],
+         ["image_analysis.json", "figure_captions.md", "image_analysis_report.md"], run_figures,
+         optional=["figure_annotations.json"]),
+    Step("literature", "PHASE_1", "Citation point literature search",
+         ["citation_points_results.md"], ["literature"], run_literature),
+    Step("references", "PHASE_1", "Citation verification",
+         ["literature"], ["references.json"]),
+    Step("results_draft", "PHASE_1", "Results drafting",
+         ["report_content.md", "image_analysis.json", "figure_captions.md", "references.json"],
+         ["drafts/01_results_final.md"]),
+    Step("methods_draft", "PHASE_2", "Methods drafting",
+         ["report_content.md", "references.json"], ["drafts/02_methods_final.md"]),
+    Step("introduction_draft", "PHASE_3", "Introduction drafting",
+         ["drafts/01_results_final.md", "references.json"], ["drafts/03_introduction_final.md"]),
+    Step("discussion_draft", "PHASE_4", "Discussion drafting",
+         ["drafts/01_results_final.md", "references.json"], ["drafts/04_discussion_final.md"]),
+    Step("abstract", "PHASE_5", "Title and abstract",
+         ["drafts/01_results_final.md", "drafts/03_introduction_final.md",
+          "drafts/04_discussion_final.md"], ["drafts/05_abstract_final.md"]),
+    Step("bibliography", "PHASE_6", "Reference list",
+         FINAL_DRAFTS + ["drafts/05_abstract_final.md", "references.json"],
+         ["drafts/references.md"], run_bibliography),
+    Step("assembly", "PHASE_7", "Manuscript assembly",
+         FINAL_DRAFTS + ["drafts/05_abstract_final.md", "drafts/references.md",
+                         "figure_captions.md", "images"],
+         ["manuscript.md", "submission"], run_assembly),
+    Step("review", "PHASE_8", "Final quality review",
+         ["manuscript.md"], ["quality_reports/final_quality_report.md"]),
+]
+
+
+def load_state(workspace):
+    with open(Path(workspace) / "state.json", 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_state(workspace, state):
+    atomic_write_json(Path(workspace) / "state.json", state)
+
+
+def input_report(workspace, state):
+    """
+    The configured input report. Absolute paths from another machine fall
+    back to a file of the same name in or next to the workspace.
+    """
+    configured = Path(state.get("configuration", {}).get("input_report", ""))
+    workspace = Path(workspace).resolve()
+    for candidate in (configured, workspace / configured.name, workspace.parent / configured.name):
+        if configured.name and candidate.is_file():
+            return candidate
+    return configured
+
+
+def dependencies(steps):
+    """{step: {upstream steps}} from overlapping output and input paths."""
+    producers = {}
+    for step in steps:
+        for output in step.outputs:
+            producers[output] = step.name
+    graph = {}
+    for step in steps:
+        graph[step.name] = set()
+        for path in step.inputs:
+            for output, producer in producers.items():
+                if producer != step.name and (path == output or path.startswith(output + "/")
+                                              or output.startswith(path + "/")):
+                    graph[step.name].add(producer)
+    visiting, done = set(), set()
+
+    def visit(name):
+        if name in visiting:
+            raise ValueError(f"dependency cycle through step {name!r}")
+        if name not in done:
+            visiting.add(name)
+            for upstream in graph[name]:
+                visit(upstream)
+            visiting.discard(name)
+            done.add(name)
+
+    for name in graph:
+        visit(name)
+    return graph
+
+
+class HashCache:
+    """Content hashes of workspace files, reused while size and mtime match."""
+
+    def __init__(self, workspace):
+        self.workspace = Path(workspace)
+        self.path = self.workspace / HASH_CACHE
+        self.lock = threading.Lock()
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def key(self, path):
+        path = path.resolve()
+        try:
+            return path.relative_to(self.workspace.resolve()).as_posix()
+        except ValueError:
+            return str(path)
+
+    def file(self, path):
+        st = path.stat()
+        key = self.key(path)
+        with self.lock:
+            entry = self.entries.get(key)
+        if entry and entry[0] == st.st_size and entry[1] == st.st_mtime_ns:
+            return entry[2]
+        digest = file_digest(path)
+        with self.lock:
+            self.entries[key] = [st.st_size, st.st_mtime_ns, digest]
+        return digest
+
+    def digest(self, path):
+        """Hash of a file, or of every file below a directory; None if missing."""
+        if path.is_file():
+            return self.file(path)
+        if not path.is_dir():
+            return None
+        digest = hashlib.sha256()
+        for child in sorted(p for p in path.rglob("*") if p.is_file()):
+            digest.update(f"{child.relative_to(path).as_posix()}\0{self.file(child)}\n".encode())
+        return digest.hexdigest()
+
+    def save(self):
+        with self.lock:
+            atomic_write_json(self.path, self.entries, durable=False, indent=None)
+
+
+class Scheduler:
+    def __init__(self, workspace, steps=STEPS, workers=4, log=True, pool=None, shared=None):
+        self.workspace = Path(workspace)
+        self.steps = {step.name: step for step in steps}
+        self.graph = dependencies(steps)
+        self.workers = workers
+        # A pool passed in is shared with other schedulers and not shut down here
+        self.pool = pool
+        self.shared = shared or Shared()
+        self.log_enabled = log
+        self.state = load_state(workspace)
+        self.runs = self.state.setdefault("phase_runs", {})
+        self.saved_runs = json.dumps(self.runs, sort_keys=True)
+        # Steps that finished after the last state.json write (interrupted run)
+        self.journal = Journal.for_workspace(workspace, JOURNAL_NAME)
+        for name, run in self.journal.completed().items():
+            if name in self.steps:
+                self.runs[name] = run
+        self.hashes = HashCache(workspace)
+        self.lock = threading.Lock()
+        self.results = {}
+
+    def path(self, name):
+        if name == INPUT_REPORT:
+            return input_report(self.workspace, self.state)
+        return self.workspace / name
+
+    def input_hashes(self, step):
+        return {name: self.hashes.digest(self.path(name)) for name in step.inputs}
+
+    def outputs_exist(self, step):
+        return all(self.path(name).exists() for name in step.outputs)
+
+    def log(self, step, status, details):
+        if not self.log_enabled:
+            return
+        stamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        line = f"{stamp} | {step.phase:<10} | {status:<8} | {step.name}: {details}\n"
+        with self.lock, open(self.workspace / "progress.log", 'a', encoding='utf-8') as f:
+            f.write(line)
+
+    def record(self, step, inputs, seconds=None):
+        run = {
+            "inputs": inputs,
+            "completed": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "seconds": seconds,
+        }
+        with self.lock:
+            self.runs[step.name] = run
+            self.journal.record(step.name, run)
+
+    def changed_inputs(self, step, inputs):
+        recorded = self.runs.get(step.name, {}).get("inputs", {})
+        return [name for name in step.inputs if recorded.get(name) != inputs[name]]
+
+    def decide(self, name, dry_run=False):
+        """Outcome for a step whose upstream steps are settled, or 'run'."""
+        step = self.steps[name]
+        blocked = [up for up in sorted(self.graph[name])
+                   if self.results[up][0] not in SATISFIED]
+        if blocked:
+            return "blocked", f"waiting on {', '.join(blocked)}", None
+        inputs = self.input_hashes(step)
+        missing = [n for n, digest in inputs.items() if digest is None and n not in step.optional]
+        if missing:
+            return "pending", f"missing inputs {', '.join(missing)}", None
+        changed = self.changed_inputs(step, inputs)
+        if step.name in self.runs and not changed and self.outputs_exist(step):
+            return "cached", "inputs unchanged", None
+        if step.action is None:
+            if step.name not in self.runs and self.outputs_exist(step):
+                # Completed before the scheduler tracked it: adopt as current
+                self.record(step, inputs)
+                return "cached", "adopted existing outputs", None
+            if step.name in self.runs:
+                return "stale", f"inputs changed: {', '.join(changed) or 'outputs missing'}", None
+            return "pending", "awaiting manual completion", None
+        if dry_run:
+            reason = f"inputs changed: {', '.join(changed)}" if step.name in self.runs \
+                else "never run"
+            return "would-run", reason, None
+        return "run", None, inputs
+
+    def unselected(self, step):
+        """Outcome of a step left out of the run: satisfied while its outputs exist."""
+        if not self.outputs_exist(step):
+            return "skipped", "not selected"
+        if step.name in self.runs:
+            return "cached", "not selected"
+        return "present", "not selected, outputs present"
+
+    def execute(self, name, inputs, step_span):
+        step = self.steps[name]
+        start = time.perf_counter()
+        status = "error"
+        try:
+            with spans.within(step_span):
+                details = step.action(self.workspace, self.state, self.shared)
+            status = None
+        finally:
+            spans.finish_span(step_span, status)
+        seconds = round(time.perf_counter() - start, 3)
+        self.record(step, inputs, seconds)
+        return details, seconds
+
+    def run(self, only=None, dry_run=False):
+        """Run every stale step (or just `only`); returns {step: (outcome, details)}."""
+        if dry_run:
+            self._run(set(only or self.steps), dry_run, None)
+        else:
+            with spans.activate(self.workspace), spans.span("pipeline") as root:
+                self._run(set(only or self.steps), dry_run, root)
+                root.add(items=sum(outcome == "ran" for outcome, _ in self.results.values()))
+            # A run that neither recorded nor failed a step leaves state.json alone
+            if json.dumps(self.runs, sort_keys=True) != self.saved_runs or \
+                    any(outcome == "failed" for outcome, _ in self.results.values()):
+                self.update_phases()
+                self.commit()
+            else:
+                self.journal.clear()
+        self.hashes.save()
+        return self.results
+
+    def _run(self, selected, dry_run, root):
+        self.results = {}
+        waiting = list(self.graph)
+        running = {}
+        with nullcontext(self.pool) if self.pool else \
+                ThreadPoolExecutor(max_workers=self.workers) as pool:
+            while waiting or running:
+                for name in [n for n in waiting if all(u in self.results for u in self.graph[n])]:
+                    waiting.remove(name)
+                    step = self.steps[name]
+                    if name not in selected:
+                        self.results[name] = self.unselected(step)
+                        continue
+                    # The step's span covers the input check and, if it runs, the action
+                    step_span = spans.start_span(step.name, step.phase, parent=root)
+                    outcome, details, inputs = self.decide(name, dry_run)
+                    step_span.set(outcome=outcome)
+                    if outcome == "run":
+                        self.log(step, "STARTED", step.description)
+                        running[pool.submit(self.execute, name, inputs, step_span)] = name
+                        continue
+                    step_span.add(cache_hits=outcome == "cached")
+                    spans.finish_span(step_span)
+                    self.results[name] = (outcome, details)
+                    status = {"cached": "CACHED", "stale": "STALE"}.get(outcome, "SKIPPED")
+                    if not dry_run:
+                        self.log(step, status, details)
+                if not running:
+                    continue
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    step = self.steps[name]
+                    try:
+                        details, seconds = future.result()
+                    except Exception as exc:
+                        self.results[name] = ("failed", f"{type(exc).__name__}: {exc}")
+                        self.log(step, "FAILED", self.results[name][1])
+                    else:
+                        self.results[name] = ("ran", f"{details} ({seconds}s)")
+                        self.log(step, "SUCCESS", self.results[name][1])
+
+    def mark(self, names):
+        """Record manually completed steps as current with their present inputs."""
+        for name in names:
+            step = self.steps[name]
+            if not self.outputs_exist(step):
+                raise ValueError(f"{name}: outputs missing ({', '.join(step.outputs)})")
+            self.record(step, self.input_hashes(step))
+            self.log(step, "SUCCESS", "marked complete")
+        self.update_phases()
+        self.commit()
+        self.hashes.save()
+
+    def commit(self):
+        """Write state.json, after which the step journal is no longer needed."""
+        save_state(self.workspace, self.state)
+        self.saved_runs = json.dumps(self.runs, sort_keys=True)
+        self.journal.clear()
+
+    def update_phases(self):
+        completion = self.state.setdefault("phase_completion", {})
+        phases = {}
+        for step in self.steps.values():
+            phases.setdefault(step.phase, []).append(self.results.get(step.name, (
+                "cached" if step.name in self.runs else "pending", ""))[0])
+        for phase, outcomes in phases.items():
+            if all(o in DONE for o in outcomes):
+                if completion.get(phase) != "completed" or "ran" in outcomes or \
+                        not checkpoint_path(self.workspace, phase).exists():
+                    write_checkpoint(self.workspace, phase, "completed", steps={
+                        step.name: self.runs.get(step.name)
+                        for step in self.steps.values() if step.phase == phase})
+                completion[phase] = "completed"
+            elif "failed" in outcomes:
+                completion[phase] = "failed"
+            elif "stale" in outcomes:
+                completion[phase] = "stale"
+            elif any(o in DONE for o in outcomes):
+                completion[phase] = "in_progress"
+            else:
+                completion[phase] = "pending"
+        current = next((p for p, s in completion.items() if s != "completed"), None)
+        if current:
+            self.state["current_phase"] = current
+            self.state["phase_status"] = completion[current]
+        else:
+            self.state["phase_status"] = "completed"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="manuscript_agent pipeline",
+                                     description=__doc__.strip().splitlines()[0])
+    parser.add_argument("action", choices=["status", "run", "mark"])
+    parser.add_argument("workspace", help="manuscript workspace directory")
+    parser.add_argument("steps", nargs="*", help="steps to run or mark (default: all)")
+    parser.add_argument("--workers", type=int, default=4, help="concurrent steps")
+    parser.add_argument("--dry-run", action="store_true", help="show what would run")
+    args = parser.parse_args(argv)
+
+    scheduler = Scheduler(args.workspace, workers=args.workers)
+    unknown = [s for s in args.steps if s not in scheduler.steps]
+    if unknown:
+        parser.error(f"unknown steps: {', '.join(unknown)} "
+                     f"(choose from {', '.join(scheduler.steps)})")
+    if args.action == "mark":
+        try:
+            scheduler.mark(args.steps)
+        except ValueError as exc:
+            parser.error(str(exc))
+        print(f"✓ Marked {', '.join(args.steps)} complete")
+        return 0
+
+    dry_run = args.dry_run or args.action == "status"
+    results = scheduler.run(args.steps or None, dry_run=dry_run)
+    for name, (outcome, details) in results.items():
+        step = scheduler.steps[name]
+        print(f"{step.phase:<10} {name:<19} {outcome:<10} {details}")
+    return 1 if any(outcome == "failed" for outcome, _ in results.values()) else 0
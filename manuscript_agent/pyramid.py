@@ -0,0 +1,269 @@
+"""
+Image Pyramid Cache
+Reduced copies of the workspace figures at halving resolutions (1/2, 1/4,
+... down to thumbnail size), generated once per PNG content hash and kept
+next to images/ in image_pyramid/<sha256>/. Consumers ask for the smallest
+level whose longest side still covers what they need: panel analysis asks
+for the working resolution, previews for a thumbnail, and full resolution
+is the original file itself. Entries are evicted least recently used first
+when the directory grows past its size budget.
+
+    python -m manuscript_agent pyramid build manuscript_11072333
+    python -m manuscript_agent pyramid show manuscript_11072333
+    python -m manuscript_agent pyramid evict manuscript_11072333 --budget 8
+    python -m manuscript_agent pyramid --bench 3
+"""
+
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from manuscript_agent import panels
+
+PYRAMID_DIR = "image_pyramid"
+META_FILE = "levels.json"
+# Levels are halved until the longest side is at most this.
+THUMBNAIL_SIDE = 256
+DEFAULT_BUDGET = 256 * 1024 * 1024
+
+
+def rgb(image):
+    """(height, width, 3) uint8 copy of a decoded PNG, alpha composited onto white."""
+    if image.shape[2] in (2, 4):
+        alpha = image[:, :, -1:].astype(np.uint16)
+        colour = image[:, :, :-1].astype(np.uint16)
+        image = ((colour * alpha + 255 * (255 - alpha) + 127) // 255).astype(np.uint8)
+    if image.shape[2] == 1:
+        image = np.repeat(image, 3, axis=2)
+    return image
+
+
+def halve(image):
+    """2x2 box average, replicating the last row/column of odd-sized images."""
+    height, width = image.shape[:2]
+    padded = np.pad(image, ((0, height % 2), (0, width % 2), (0, 0)), mode="edge")
+    blocks = padded.reshape(padded.shape[0] // 2, 2, padded.shape[1] // 2, 2, -1)
+    return ((blocks.sum(axis=(1, 3), dtype=np.uint16) + 2) >> 2).astype(np.uint8)
+
+
+def reductions(image, smallest=THUMBNAIL_SIDE):
+    """(factor, image) for every halving down to `smallest` on the longest side."""
+    factor = 1
+    while max(image.shape[:2]) > smallest:
+        image, factor = halve(image), factor * 2
+        yield factor, image
+
+
+class Pyramid:
+    """Content-addressed pyramid levels under `root`, one directory per PNG digest."""
+
+    def __init__(self, root, budget=DEFAULT_BUDGET):
+        self.root = Path(root)
+        self.budget = budget
+
+    @classmethod
+    def for_workspace(cls, workspace, budget=DEFAULT_BUDGET):
+        return cls(Path(workspace) / PYRAMID_DIR, budget)
+
+    def entry(self, digest):
+        return self.root / digest
+
+    def levels(self, digest):
+        """Metadata of a built entry ({"width", "height", "levels": {factor: [w, h]}}) or None."""
+        try:
+            with open(self.entry(digest) / META_FILE, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def build(self, path, digest, image=None):
+        """
+        Decode `path` (unless `image` is given) and write its levels. Returns
+        {factor: level image}, factor 1 being the original. The entry is
+        assembled in a temporary directory and renamed into place, so
+        concurrent builders of the same digest (worker processes) are safe.
+        """
+        if image is None:
+            image = panels.read_png(path)
+        built = {1: image}
+        built.update(reductions(rgb(image)))
+        self.root.mkdir(parents=True, exist_ok=True)
+        staging = Path(tempfile.mkdtemp(dir=self.root, prefix=f".{digest[:12]}."))
+        try:
+            meta = {"source": Path(path).name, "width": int(image.shape[1]),
+                    "height": int(image.shape[0]), "levels": {}}
+            for factor, level in built.items():
+                if factor == 1:
+                    continue
+                (staging / f"{factor}.png").write_bytes(panels.encode_png(level))
+                meta["levels"][str(factor)] = [int(level.shape[1]), int(level.shape[0])]
+            (staging / META_FILE).write_text(json.dumps(meta, indent=2), encoding='utf-8')
+            try:
+                os.rename(staging, self.entry(digest))
+            except OSError:
+                # Another process finished the same entry first
+                shutil.rmtree(staging, ignore_errors=True)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        return built
+
+    def choose(self, meta, side):
+        """Factor of the smallest level whose longest side is >= `side` (1: the original)."""
+        best = 1
+        for factor, size in meta["levels"].items():
+            if side is not None and max(size) >= side and int(factor) > best:
+                best = int(factor)
+        return best
+
+    def request(self, path, digest, side=None):
+        """(path, factor) of the smallest level covering `side`; builds on first use."""
+        meta = self.levels(digest)
+        if meta is None:
+            self.build(path, digest)
+            meta = self.levels(digest)
+            if meta is None:
+                return Path(path), 1
+        self.touch(digest)
+        factor = self.choose(meta, side)
+        return (Path(path), 1) if factor == 1 else (self.entry(digest) / f"{factor}.png", factor)
+
+    def image(self, path, digest, side=None):
+        """
+        (decoded level, factor) of the smallest level covering `side`. A first
+        request builds the entry and reuses the in-memory level it produced.
+        """
+        meta = self.levels(digest)
+        if meta is None:
+            built = self.build(path, digest)
+            meta = {"levels": {str(f): [im.shape[1], im.shape[0]]
+                               for f, im in built.items() if f != 1}}
+            factor = self.choose(meta, side)
+            return built[factor], factor
+        level, factor = self.request(path, digest, side)
+        try:
+            return panels.read_png(level), factor
+        except (OSError, ValueError):
+            # Evicted or damaged between lookup and read: fall back to the original
+            return panels.read_png(path), 1
+
+    def touch(self, digest):
+        try:
+            os.utime(self.entry(digest))
+        except OSError:
+            pass
+
+    def usage(self):
+        """[(digest, bytes, last used)] for every entry, least recently used first."""
+        if not self.root.is_dir():
+            return []
+        entries = []
+        for entry in self.root.iterdir():
+            if entry.name.startswith(".") or not entry.is_dir():
+                continue
+            size = sum(f.stat().st_size for f in entry.iterdir())
+            entries.append((entry.name, size, entry.stat().st_mtime))
+        return sorted(entries, key=lambda e: e[2])
+
+    def evict(self, budget=None, keep=()):
+        """
+        Remove least recently used entries until the total is within the
+        budget; entries in `keep` (digests in use) go last. Returns
+        (entries removed, bytes freed).
+        """
+        budget = self.budget if budget is None else budget
+        entries = sorted(self.usage(), key=lambda e: e[0] in keep)
+        total = sum(size for _, size, _ in entries)
+        removed = freed = 0
+        for digest, size, _ in entries:
+            if total <= budget:
+                break
+            shutil.rmtree(self.entry(digest), ignore_errors=True)
+            total -= size
+            removed += 1
+            freed += size
+        return removed, freed
+
+
+def benchmark(count=3):
+    """Full decode vs pyramid-level reads of synthetic ~1 MB figures."""
+    results = {"figures": count}
+    timings = {"full_decode": [], "build": [], "analysis_level": [], "thumbnail_level": []}
+    with tempfile.TemporaryDirectory() as directory:
+        store = Pyramid(Path(directory) / PYRAMID_DIR)
+        size = 0
+        for seed in range(count):
+            image, _ = panels.synthetic_figure(seed=seed)
+            path = Path(directory) / f"image{seed + 1}.png"
+            path.write_bytes(panels.encode_png(image))
+            size += path.stat().st_size
+            digest = f"{seed:064x}"
+            start = time.perf_counter()
+            image = panels.read_png(path)
+            timings["full_decode"].append(time.perf_counter() - start)
+            start = time.perf_counter()
+            store.build(path, digest, image)
+            timings["build"].append(time.perf_counter() - start)
+            for name, side in (("analysis_level", panels.WORK_SIDE),
+                               ("thumbnail_level", THUMBNAIL_SIDE)):
+                start = time.perf_counter()
+                store.image(path, digest, side)
+                timings[name].append(time.perf_counter() - start)
+        results["mean_png_kb"] = round(size / count / 1024, 1)
+        results["pyramid_kb"] = round(sum(s for _, s, _ in store.usage()) / count / 1024, 1)
+    for name, values in timings.items():
+        results[f"{name}_ms"] = round(sum(values) / len(values) * 1000, 1)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="manuscript_agent pyramid",
+                                     description=__doc__.strip().splitlines()[0])
+    parser.add_argument("action", nargs="?", choices=["build", "show", "evict"])
+    parser.add_argument("workspace", nargs="?", help="manuscript workspace directory")
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET / 1024 ** 2,
+                        help="size budget in MiB (default: %(default)s)")
+    parser.add_argument("--bench", type=int, metavar="FIGURES",
+                        help="benchmark level reads against full decodes on FIGURES figures")
+    args = parser.parse_args(argv)
+
+    if args.bench:
+        for name, value in benchmark(args.bench).items():
+            print(f"{name:>20}: {value}")
+        return 0
+    if not args.action or not args.workspace:
+        parser.error("action and workspace are required unless --bench is given")
+
+    from manuscript_agent.figures import discover_figures, file_digest
+    store = Pyramid.for_workspace(args.workspace, int(args.budget * 1024 ** 2))
+    figures = {path: file_digest(path) for path in discover_figures(Path(args.workspace) / "images")}
+    if args.action == "build":
+        for path, digest in figures.items():
+            if store.levels(digest):
+                print(f"✓ {path.name}: cached")
+                continue
+            start = time.perf_counter()
+            try:
+                store.build(path, digest)
+            except (OSError, ValueError) as exc:
+                print(f"✗ {path.name}: {exc}")
+                continue
+            meta = store.levels(digest) or {"levels": {}}
+            sizes = ", ".join(f"1/{f} {w}×{h}" for f, (w, h) in meta["levels"].items())
+            print(f"✓ {path.name}: {sizes} ({(time.perf_counter() - start) * 1000:.0f} ms)")
+    elif args.action == "evict":
+        removed, freed = store.evict(keep=set(figures.values()))
+        print(f"✓ Evicted {removed} entries ({freed / 1024:.0f} KB)")
+    names = {digest: path.name for path, digest in figures.items()}
+    entries = store.usage()
+    for digest, size, _ in reversed(entries):
+        print(f"  {digest[:12]}  {size / 1024:>8.0f} KB  {names.get(digest, '(stale)')}")
+    total = sum(size for _, size, _ in entries)
+    print(f"{len(entries)} entries, {total / 1024:.0f} KB of {store.budget / 1024:.0f} KB budget")
+    return 0
@@ -0,0 +1,382 @@
+"""
+Draft Quality Scoring
+Scores section drafts on the weighted rubrics of the quality reports
+(Results: information density 30%, objectivity 30%, structure 20%, data
+accuracy 20%; Methods: reproducibility 40%, information density 30%,
+logical correspondence 20%, length control 10%) and compares each score
+with quality_threshold from state.json.
+
+Drafts are split into paragraphs and each paragraph's metrics (words,
+citations, subjective-term and filler hits, figure references, numeric
+parameters, ...) are cached under cache/quality/, keyed by the paragraph's
+hash. Re-scoring after an edit recomputes only the edited paragraphs;
+sections with uncached paragraphs are measured in parallel.
+
+    python -m manuscript_agent quality manuscript_11072333
+    python -m manuscript_agent quality manuscript_11072333 --drafts drafts/01_results_v2_with_full_citations.md
+    python -m manuscript_agent quality --bench 400
+"""
+
+import argparse
+import hashlib
+import json
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from manuscript_agent import spans
+from manuscript_agent.checkpoint import atomic_write_json
+from manuscript_agent.citations import LIST_HEADING, MANUSCRIPT_ORDER, MARKER, parse_numbers
+
+CACHE_FILE = Path("cache") / "quality" / "paragraphs.json"
+# Bump when paragraph_metrics changes so cached values are recomputed
+METRICS_VERSION = 1
+DEFAULT_THRESHOLD = 0.75
+
+RUBRICS = {
+    "results": {"information_density": 0.3, "objectivity": 0.3, "structure": 0.2,
+                "data_accuracy": 0.2},
+    "methods": {"reproducibility": 0.4, "information_density": 0.3,
+                "logical_correspondence": 0.2, "length_control": 0.1},
+    "introduction": {"citation_support": 0.4, "information_density": 0.3, "structure": 0.3},
+    "discussion": {"objectivity": 0.3, "citation_support": 0.3, "information_density": 0.2,
+                   "structure": 0.2},
+}
+# Words per citation considered optimal (the drafts' own 45-100 target)
+WORDS_PER_CITATION = (45, 100)
+LENGTH_TARGETS = {"results": (800, 1600), "methods": (500, 1000), "introduction": (400, 800),
+                  "discussion": (800, 1500)}
+MAX_PARAGRAPH_WORDS = 220
+PARAGRAPHS_PER_HEADING = (1, 4)
+SUBJECTIVE_PENALTY = 0.05
+FILLER_PENALTY = 0.05
+
+SUBJECTIVE_TERMS = ("might", "possibly", "perhaps", "could suggest", "suggesting", "remarkably",
+                    "interestingly", "surprisingly", "clearly", "obviously", "undoubtedly",
+                    "strikingly", "dramatically", "for the first time", "novel", "rigorous")
+FILLER_PHRASES = ("it is worth noting", "it should be noted", "in order to", "it is important to",
+                  "as is well known", "needless to say", "a total of", "in this study, we")
+SUBJECTIVE = re.compile(r"\b(?:" + "|".join(map(re.escape, SUBJECTIVE_TERMS)) + r")\b", re.I)
+FILLER = re.compile(r"\b(?:" + "|".join(map(re.escape, FILLER_PHRASES)) + r")\b", re.I)
+FIGURE = re.compile(r"\bFig(?:ure)?s?\.?\s*(\d+)", re.I)
+NUMBER = re.compile(r"(?<![\w.])[<>=≤≥]?\s*\d[\d,.]*%?")
+STATISTIC = re.compile(r"\*?P\*?\s*[<=>]|\bAUC\b|\bHR\b|hazard ratio|\bCI\b|\bFDR\b", re.I)
+VERSION = re.compile(r"\b(?:version\s*|v)\d", re.I)
+PLACEHOLDER = re.compile(r"CITATION NEEDED", re.I)
+WORD = re.compile(r"[A-Za-z0-9][\w'’-]*")
+SENTENCE_END = re.compile(r"[.!?](?:\s|$)")
+
+
+def section_kind(path):
+    """'results' for drafts/01_results_final.md."""
+    for kind in RUBRICS:
+        if kind in Path(path).stem.lower():
+            return kind
+    return None
+
+
+def body_text(text):
+    """Draft text before the reference list or trailing metadata block."""
+    heading = LIST_HEADING.search(text)
+    end = heading.start() if heading else len(text)
+    metadata = text.find("**Metadata")
+    if 0 <= metadata < end:
+        end = metadata
+    return text[:end]
+
+
+def paragraphs(text):
+    """[(kind, text)] with kind 'heading' or 'paragraph'; rules and the title skipped."""
+    blocks = []
+    for block in re.split(r"\n\s*\n", body_text(text)):
+        block = block.strip()
+        if not block or block == "---" or block.startswith("# "):
+            continue
+        blocks.append(("heading" if block.startswith("#") else "paragraph", block))
+    return blocks
+
+
+def paragraph_key(text):
+    return hashlib.sha1(f"{METRICS_VERSION}\0{text}".encode("utf-8")).hexdigest()
+
+
+def paragraph_metrics(text):
+    plain = MARKER.sub(" ", text)
+    citations = [n for m in MARKER.finditer(text) for n in parse_numbers(m.group(1))]
+    return {
+        "words": len(WORD.findall(plain)),
+        "sentences": max(1, len(SENTENCE_END.findall(plain))),
+        "markers": len(MARKER.findall(text)),
+        "citations": len(citations),
+        "cited": sorted(set(citations)),
+        "subjective": [m.group(0).lower() for m in SUBJECTIVE.finditer(plain)],
+        "filler": [m.group(0).lower() for m in FILLER.finditer(plain)],
+        "figures": [int(n) for n in FIGURE.findall(plain)],
+        "numbers": len(NUMBER.findall(plain)),
+        "statistics": len(STATISTIC.findall(plain)),
+        "versions": len(VERSION.findall(plain)),
+        "placeholders": len(PLACEHOLDER.findall(plain)),
+    }
+
+
+def measure(task):
+    """Worker: metrics for the uncached paragraphs of one section."""
+    return task["section"], {key: paragraph_metrics(text) for key, text in task["paragraphs"]}
+
+
+def clamp(value):
+    return max(0.0, min(1.0, value))
+
+
+def in_range(value, low, high):
+    """1 inside [low, high], falling off proportionally outside."""
+    if value <= 0:
+        return 0.0
+    if value < low:
+        return value / low
+    if value > high:
+        return high / value
+    return 1.0
+
+
+def rubric_metrics(kind, blocks, metrics, figure_count=0):
+    """Every rubric metric in 0..1 from a section's blocks and paragraph metrics."""
+    measured = [metrics[paragraph_key(text)] for k, text in blocks if k == "paragraph"]
+    count = len(measured) or 1
+    words = sum(m["words"] for m in measured)
+    citations = sum(m["citations"] for m in measured)
+    subjective = sum(len(m["subjective"]) for m in measured)
+    filler = sum(len(m["filler"]) for m in measured)
+    long = sum(m["words"] > MAX_PARAGRAPH_WORDS for m in measured)
+    placeholders = sum(m["placeholders"] for m in measured)
+
+    words_per_citation = words / citations if citations else 0
+    density = in_range(words_per_citation, *WORDS_PER_CITATION)
+    density -= FILLER_PENALTY * filler + 0.5 * long / count
+
+    # Subsections with a reasonable number of paragraphs, figures cited in order
+    groups = []
+    for k, _ in blocks:
+        if k == "heading":
+            groups.append(0)
+        elif groups:
+            groups[-1] += 1
+    low, high = PARAGRAPHS_PER_HEADING
+    structure = sum(low <= g <= high for g in groups) / len(groups) if groups else 0.5
+    first_mentions = []
+    for f in (f for m in measured for f in m["figures"]):
+        if f not in first_mentions:
+            first_mentions.append(f)
+    if len(first_mentions) > 1:
+        ordered = sum(a < b for a, b in zip(first_mentions, first_mentions[1:]))
+        structure = (structure + ordered / (len(first_mentions) - 1)) / 2
+
+    figures = {f for m in measured for f in m["figures"]}
+    coverage = len(figures & set(range(1, figure_count + 1))) / figure_count \
+        if figure_count else 1.0
+    quantified = sum(m["numbers"] > 0 or m["statistics"] > 0 for m in measured) / count
+    parameterized = sum(m["numbers"] >= 2 or m["citations"] > 0
+                        for m in measured) / count
+    supported = sum(m["citations"] > 0 or bool(m["figures"]) for m in measured) / count
+    cited = sum(m["citations"] > 0 for m in measured) / count
+    versions = 1.0 if any(m["versions"] for m in measured) else 0.5
+
+    return {
+        "information_density": clamp(density),
+        "objectivity": clamp(1 - SUBJECTIVE_PENALTY * subjective),
+        "structure": clamp(structure),
+        "data_accuracy": clamp((coverage + quantified) / 2),
+        "reproducibility": clamp((parameterized + versions) / 2),
+        "logical_correspondence": clamp(supported),
+        "length_control": in_range(words, *LENGTH_TARGETS.get(kind, (1, float("inf")))),
+        "citation_support": clamp(cited - 0.1 * placeholders),
+        "words": words,
+        "citations": citations,
+        "words_per_citation": round(words_per_citation, 1),
+        "subjective_terms": subjective,
+        "figures_referenced": sorted(figures),
+    }
+
+
+def score_section(kind, values, rubric=None):
+    rubric = rubric or RUBRICS[kind]
+    return sum(weight * values[name] for name, weight in rubric.items())
+
+
+def load_cache(workspace):
+    path = Path(workspace) / CACHE_FILE
+    if not path.exists():
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except ValueError:
+        return {}
+
+
+def figure_count(workspace):
+    path = Path(workspace) / "image_analysis.json"
+    if not path.exists():
+        return 0
+    with open(path, 'r', encoding='utf-8') as f:
+        return len(json.load(f).get("figures", []))
+
+
+def threshold(workspace):
+    path = Path(workspace) / "state.json"
+    if not path.exists():
+        return DEFAULT_THRESHOLD
+    with open(path, 'r', encoding='utf-8') as f:
+        state = json.load(f)
+    return state.get("configuration", {}).get("quality_threshold", DEFAULT_THRESHOLD)
+
+
+def score_drafts(workspace, drafts=None, workers=None):
+    """
+    Score every draft, measuring only paragraphs missing from the cache.
+    Returns ([{section, kind, score, passed, metrics, ...}], stats).
+    """
+    workspace = Path(workspace)
+    drafts = drafts or [p for p in MANUSCRIPT_ORDER if (workspace / p).exists()]
+    cache = load_cache(workspace)
+    sections, tasks = [], []
+    hits, queued = set(), set()
+    for name in drafts:
+        kind = section_kind(name)
+        if kind is None:
+            raise ValueError(f"cannot tell which section {name} is")
+        blocks = paragraphs((workspace / name).read_text(encoding='utf-8'))
+        missing = {}
+        for k, text in blocks:
+            if k != "paragraph":
+                continue
+            key = paragraph_key(text)
+            if key in cache:
+                hits.add(key)
+            elif key not in queued:
+                queued.add(key)
+                missing[key] = text
+        sections.append((name, kind, blocks))
+        if missing:
+            tasks.append({"section": name, "paragraphs": list(missing.items())})
+
+    if len(tasks) == 1 or workers == 1:
+        for task in tasks:
+            cache.update(measure(task)[1])
+    elif tasks:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for future in as_completed([pool.submit(measure, task) for task in tasks]):
+                cache.update(future.result()[1])
+
+    limit = threshold(workspace)
+    figures = figure_count(workspace)
+    results = []
+    for name, kind, blocks in sections:
+        values = rubric_metrics(kind, blocks, cache, figures)
+        score = score_section(kind, values)
+        results.append({"section": name, "kind": kind, "score": round(score, 3),
+                        "threshold": limit, "passed": score >= limit,
+                        "rubric": {m: round(values[m], 3) for m in RUBRICS[kind]},
+                        "paragraphs": sum(k == "paragraph" for k, _ in blocks),
+                        "details": {m: values[m] for m in ("words", "citations",
+                                                           "words_per_citation",
+                                                           "subjective_terms",
+                                                           "figures_referenced")}})
+    # Drop paragraphs found in neither the scored drafts nor the other manuscript
+    # drafts: the cache doesn't grow unbounded, and scoring one draft keeps the rest
+    live = hits | queued
+    for name in MANUSCRIPT_ORDER:
+        if name not in drafts and (workspace / name).exists():
+            text = (workspace / name).read_text(encoding='utf-8')
+            live.update(paragraph_key(t) for k, t in paragraphs(text) if k == "paragraph")
+    stale = cache.keys() - live
+    if queued or stale:
+        kept = {key: value for key, value in cache.items() if key in live}
+        atomic_write_json(workspace / CACHE_FILE, kept, durable=False, indent=None)
+    stats = {"sections": len(results), "paragraphs": len(hits) + len(queued),
+             "recomputed": len(queued), "cached": len(hits)}
+    return results, stats
+
+
+def synthetic_draft(paragraph_count, seed=0):
+    import random
+
+    rng = random.Random(seed)
+    vocabulary = ("tumor immune cells expression revealed signature survival cohort risk model "
+                  "analysis gene pathway infiltration response interestingly").split()
+    lines = ["# Results", ""]
+    for i in range(paragraph_count):
+        if i % 3 == 0:
+            lines += [f"## Finding {i // 3 + 1}", ""]
+        words = [rng.choice(vocabulary) for _ in range(rng.randint(60, 160))]
+        for w in range(40, len(words), 50):
+            words[w] += f"<sup>{rng.randint(1, 80)}</sup>"
+        lines += [" ".join(words) + f" (**Figure {i % 8 + 1}A**), *P* = 0.0{i % 9 + 1}.", ""]
+    return "\n".join(lines)
+
+
+def benchmark(paragraph_count=400, workers=None):
+    """Cold scoring vs re-scoring after editing one paragraph, on synthetic drafts."""
+    import tempfile
+
+    results = {"paragraphs": paragraph_count * 4}
+    with tempfile.TemporaryDirectory() as directory:
+        workspace = Path(directory)
+        drafts = []
+        for n, kind in enumerate(RUBRICS, 1):
+            name = f"drafts/0{n}_{kind}_final.md"
+            (workspace / name).parent.mkdir(parents=True, exist_ok=True)
+            (workspace / name).write_text(synthetic_draft(paragraph_count, n), encoding='utf-8')
+            drafts.append(name)
+        start = time.perf_counter()
+        score_drafts(workspace, drafts, workers)
+        results["cold_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        start = time.perf_counter()
+        score_drafts(workspace, drafts, workers)
+        results["unchanged_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        path = workspace / drafts[0]
+        text = path.read_text(encoding='utf-8')
+        path.write_text(text.replace("tumor", "tumour", 1), encoding='utf-8')
+        start = time.perf_counter()
+        _, stats = score_drafts(workspace, drafts, workers)
+        results["one_edit_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        results["recomputed"] = stats["recomputed"]
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="manuscript_agent quality",
+                                     description=__doc__.strip().splitlines()[0])
+    parser.add_argument("workspace", nargs="?", help="manuscript workspace directory")
+    parser.add_argument("--drafts", nargs="+",
+                        help="drafts to score, relative to the workspace (default: final drafts)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="process pool size (default: CPU count)")
+    parser.add_argument("--json", action="store_true", help="print scores as JSON")
+    parser.add_argument("--bench", type=int, metavar="PARAGRAPHS",
+                        help="benchmark four synthetic sections of PARAGRAPHS paragraphs")
+    args = parser.parse_args(argv)
+
+    if args.bench:
+        for name, value in benchmark(args.bench, args.workers).items():
+            print(f"{name:>14}: {value}")
+        return 0
+    if not args.workspace:
+        parser.error("workspace is required unless --bench is given")
+
+    with spans.span("quality") as trace:
+        results, stats = score_drafts(args.workspace, args.drafts, args.workers)
+        trace.add(items=stats["paragraphs"], cache_hits=stats["cached"],
+                  cache_misses=stats["recomputed"])
+    if args.json:
+        print(json.dumps({"sections": results, "stats": stats}, indent=2, ensure_ascii=False))
+    else:
+        for result in results:
+            mark = "✓" if result["passed"] else "✗"
+            rubric = ", ".join(f"{name} {value:.2f}" for name, value in result["rubric"].items())
+            print(f"{mark} {result['section']}: {result['score']:.3f} "
+                  f"(threshold {result['threshold']}) — {rubric}")
+        print(f"{stats['paragraphs']} paragraphs ({stats['recomputed']} recomputed, "
+              f"{stats['cached']} cached)")
+    return 0 if all(r["passed"] for r in results) else 1
@@ -0,0 +1,453 @@
+"""
+Citation Scoring
+Batch validation and quality ranking of merged candidate papers. Every
+candidate is loaded into columnar NumPy arrays (year, citations, impact
+factor, open-access flag and Crossref match similarities) and each score
+component is computed for all papers in one vectorized pass.
+
+    validate: citation<N>_merged.json    -> citation<N>_validated.json
+              adds validation_score, validated, score_breakdown, crossref_data
+    rank:     citation<N>_validated.json -> citation<N>_final.json
+              adds impact_factor and quality_score, best first
+    check:    re-scores a validated file from its stored crossref_data and
+              lists every score that differs from the one on file
+
+Author agreement is the fraction of family names Crossref agrees on, or the
+ratio of author counts when only the Crossref count is known (as in stored
+crossref_data). The validated files archived in the workspace were scored
+by an earlier, unrecorded author-name comparison, so their author scores
+(and validation scores) are lower for several papers; `check --ignore
+authors` confirms everything else still agrees.
+
+    python -m manuscript_agent score validate literature/citation1_merged.json \\
+        -o literature/citation1_validated.json
+    python -m manuscript_agent score rank literature/citation1_validated.json \\
+        -o literature/citation1_final.json --weights impact=0.5,citations=0.2
+    python -m manuscript_agent score check literature/citation1_validated.json
+    python -m manuscript_agent score --bench 50000
+"""
+
+import argparse
+import asyncio
+import random
+import re
+import time
+import unicodedata
+from difflib import SequenceMatcher
+from pathlib import Path
+
+import numpy as np
+
+from manuscript_agent import cache as metadata_cache
+from manuscript_agent import spans
+from manuscript_agent.checkpoint import atomic_write_json
+from manuscript_agent.papers import read_papers
+
+VALIDATION_WEIGHTS = {"title": 0.4, "year": 0.2, "authors": 0.3, "journal": 0.1}
+VALIDATION_THRESHOLD = 0.85
+QUALITY_WEIGHTS = {"impact": 0.35, "citations": 0.25, "recency": 0.15,
+                   "open_access": 0.1, "validation": 0.15}
+# Impact factors and citation counts are log-scaled and saturate at these values
+IMPACT_CAP = 50.0
+CITATION_CAP = 1000
+RECENCY_YEARS = 10
+JOURNAL_CONTAINED = 0.8
+CROSSREF_FIELDS = ("title", "year", "journal", "authors", "issn", "eissn")
+
+
+def normalize_text(text):
+    text = unicodedata.normalize("NFKD", text or "").encode("ascii", "ignore").decode()
+    return " ".join(re.findall(r"[a-z0-9]+", text.lower()))
+
+
+def family_name(author):
+    """Family name of 'Given Family', 'Family GI' or 'G. Family'."""
+    parts = normalize_text(author).split()
+    if not parts:
+        return ""
+    if len(parts) > 1 and len(parts[-1]) <= 2:
+        return parts[0]
+    return parts[-1]
+
+
+def title_similarity(title, other):
+    a, b = normalize_text(title), normalize_text(other)
+    if not a or not b:
+        return 0.0
+    return 1.0 if a == b else SequenceMatcher(None, a, b).ratio()
+
+
+def journal_similarity(journal, other):
+    """1 for the same journal, 0.8 when one name contains the other."""
+    a, b = normalize_text(journal), normalize_text(other)
+    if not a or not b:
+        return 0.0
+    if a == b:
+        return 1.0
+    return JOURNAL_CONTAINED if a in b or b in a else 0.0
+
+
+def author_similarity(authors, crossref):
+    """
+    Fraction of author family names Crossref agrees on. When only the
+    Crossref author count is known, the ratio of the two counts.
+    """
+    authors = authors or []
+    names = crossref.get("author_names")
+    if names is None:
+        count = crossref.get("authors") or 0
+        if not authors or not count:
+            return 0.0
+        return min(len(authors), count) / max(len(authors), count)
+    if not authors or not names:
+        return 0.0
+    remaining = {}
+    for name in map(family_name, names):
+        remaining[name] = remaining.get(name, 0) + 1
+    matched = 0
+    for name in map(family_name, authors):
+        if remaining.get(name):
+            remaining[name] -= 1
+            matched += 1
+    return matched / max(len(authors), len(names))
+
+
+def match_similarities(paper, crossref):
+    """Raw [0, 1] similarity of each VALIDATION_WEIGHTS field to Crossref."""
+    if not crossref:
+        return dict.fromkeys(VALIDATION_WEIGHTS, 0.0)
+    year = paper.get("year")
+    return {
+        "title": title_similarity(paper.get("title"), crossref.get("title")),
+        "year": 1.0 if year and str(year) == str(crossref.get("year")) else 0.0,
+        "authors": author_similarity(paper.get("authors"), crossref),
+        "journal": journal_similarity(paper.get("journal"), crossref.get("journal")),
+    }
+
+
+def impact_factor(paper):
+    info = paper.get("journal_info") or {}
+    return float(info.get("impact_factor") or paper.get("impact_factor") or 0.0)
+
+
+def columns(papers, similarities=None):
+    """
+    Columnar view of `papers`: one NumPy array per scoring input. Match
+    similarities are included when `similarities` (a list of
+    match_similarities() dicts in paper order) is given.
+    """
+    cols = {
+        "year": np.fromiter((int(p.get("year") or 0) for p in papers), np.int32, len(papers)),
+        "citations": np.fromiter((p.get("citations") or 0 for p in papers),
+                                 np.float64, len(papers)),
+        "impact_factor": np.fromiter(map(impact_factor, papers), np.float64, len(papers)),
+        "open_access": np.fromiter((bool(p.get("is_open_access")) for p in papers),
+                                   np.bool_, len(papers)),
+        "validation": np.fromiter((p.get("validation_score") or 0.0 for p in papers),
+                                  np.float64, len(papers)),
+    }
+    if similarities is not None:
+        for field in VALIDATION_WEIGHTS:
+            cols[field] = np.fromiter((s[field] for s in similarities),
+                                      np.float64, len(papers))
+    return cols
+
+
+def validation_scores(cols, weights=VALIDATION_WEIGHTS):
+    """Weighted sum of the match similarity columns."""
+    total = np.zeros(len(cols["year"]))
+    for field, weight in weights.items():
+        total = total + weight * cols[field]
+    return total
+
+
+def quality_components(cols, reference_year=None):
+    """Each quality component scaled to [0, 1], one array per QUALITY_WEIGHTS key."""
+    reference_year = reference_year or time.localtime().tm_year
+    age = reference_year - cols["year"].astype(np.float64)
+    return {
+        "impact": np.minimum(np.log1p(np.maximum(cols["impact_factor"], 0.0))
+                             / np.log1p(IMPACT_CAP), 1.0),
+        "citations": np.minimum(np.log1p(np.maximum(cols["citations"], 0.0))
+                                / np.log1p(CITATION_CAP), 1.0),
+        "recency": np.where(cols["year"] > 0,
+                            np.clip(1.0 - age / RECENCY_YEARS, 0.0, 1.0), 0.0),
+        "open_access": cols["open_access"].astype(np.float64),
+        "validation": np.clip(cols["validation"], 0.0, 1.0),
+    }
+
+
+def quality_scores(cols, weights=QUALITY_WEIGHTS, reference_year=None):
+    components = quality_components(cols, reference_year)
+    total = np.zeros(len(cols["year"]))
+    for name, weight in weights.items():
+        total = total + weight * components[name]
+    return total
+
+
+def score_paper(paper, crossref, weights=VALIDATION_WEIGHTS, threshold=VALIDATION_THRESHOLD):
+    """Per-paper reference implementation of validate_batch()."""
+    similarities = match_similarities(paper, crossref)
+    score = 0.0
+    for field, weight in weights.items():
+        score = score + weight * similarities[field]
+    return {
+        "validation_score": round(score, 3),
+        "validated": score >= threshold,
+        "score_breakdown": {f: round(similarities[f], 2) for f in VALIDATION_WEIGHTS},
+    }
+
+
+def validate_batch(papers, crossref_records, weights=VALIDATION_WEIGHTS,
+                   threshold=VALIDATION_THRESHOLD):
+    """
+    Validated copies of `papers`; crossref_records holds the Crossref
+    metadata (or None) for each paper in order.
+    """
+    with spans.span("score.validate", items=len(papers)):
+        similarities = [match_similarities(p, c) for p, c in zip(papers, crossref_records)]
+        cols = columns(papers, similarities)
+        scores = validation_scores(cols, weights)
+    validated = scores >= threshold
+    breakdown = {field: cols[field].tolist() for field in VALIDATION_WEIGHTS}
+    results = []
+    for i, (paper, crossref) in enumerate(zip(papers, crossref_records)):
+        results.append(dict(
+            paper,
+            validation_score=round(scores[i].item(), 3),
+            validated=bool(validated[i]),
+            score_breakdown={f: round(breakdown[f][i], 2) for f in VALIDATION_WEIGHTS},
+            crossref_data={k: crossref.get(k) for k in CROSSREF_FIELDS} if crossref else {},
+        ))
+    return results
+
+
+def rank_batch(papers, weights=QUALITY_WEIGHTS, reference_year=None):
+    """Papers with impact_factor and quality_score, sorted best first."""
+    with spans.span("score.rank", items=len(papers)):
+        cols = columns(papers)
+        scores = np.round(quality_scores(cols, weights, reference_year), 4)
+        order = np.argsort(-scores, kind="stable")
+    factors = cols["impact_factor"].tolist()
+    scores = scores.tolist()
+    return [dict(papers[i], impact_factor=factors[i], quality_score=scores[i])
+            for i in order.tolist()]
+
+
+def parse_weights(text, defaults):
+    """'impact=0.5,citations=0.2' merged over `defaults`."""
+    weights = dict(defaults)
+    for item in filter(None, (text or "").split(",")):
+        name, _, value = item.partition("=")
+        name = name.strip()
+        if name not in defaults:
+            raise ValueError(f"unknown weight {name!r} (expected one of {', '.join(defaults)})")
+        weights[name] = float(value)
+    return weights
+
+
+async def lookup_crossref(papers, cache=None, base_url=None, email=None, graph=None):
+    from manuscript_agent.httpclient import HttpClient
+    from manuscript_agent.search import CROSSREF_URL, CrossrefSource
+
+    async with HttpClient() as client:
+        source = CrossrefSource(client, base_url or CROSSREF_URL, email, cache=cache,
+                                graph=graph)
+        return await asyncio.gather(*(source.lookup(p.get("doi")) for p in papers))
+
+
+def synthetic_candidates(size, seed=11):
+    """(papers, crossref_records) with a spread of partial Crossref matches."""
+    rng = random.Random(seed)
+    papers, records = [], []
+    for i in range(size):
+        authors = [f"Given{rng.randint(1, 99)} Family{rng.randint(1, 999)}"
+                   for _ in range(rng.randint(1, 12))]
+        paper = {
+            "title": f"Synthetic candidate {i} on tumour immunity",
+            "authors": authors,
+            "year": rng.randint(2000, 2025),
+            "journal": f"Journal {rng.randint(1, 300)}",
+            "citations": rng.randint(0, 3000),
+            "is_open_access": rng.random() < 0.5,
+            "journal_info": {"impact_factor": round(rng.uniform(0, 60), 1)},
+            "doi": f"10.5555/fake.{i}",
+        }
+        names = [a if rng.random() < 0.8 else f"Other Name{rng.randint(1, 99)}" for a in authors]
+        records.append({
+            "title": paper["title"] if rng.random() < 0.9 else f"Unrelated work {i}",
+            "year": paper["year"] + (rng.random() < 0.1),
+            "journal": paper["journal"] + (" (Online)" if rng.random() < 0.2 else ""),
+            "authors": len(names),
+            "author_names": names,
+        })
+        papers.append(paper)
+    return papers, records
+
+
+def benchmark(size=50_000):
+    """Time batch scoring against the per-paper path and check they agree."""
+    papers, records = synthetic_candidates(size)
+    similarities = [match_similarities(p, c) for p, c in zip(papers, records)]
+
+    start = time.perf_counter()
+    cols = columns(papers, similarities)
+    loaded = time.perf_counter()
+    scores = validation_scores(cols)
+    validation_seconds = time.perf_counter() - loaded
+    for i, paper in enumerate(papers):
+        paper["validation_score"] = round(scores[i].item(), 3)
+
+    cols = columns(papers)
+    start_vector = time.perf_counter()
+    order = np.argsort(-quality_scores(cols), kind="stable")
+    vector_seconds = time.perf_counter() - start_vector
+    start_rank = time.perf_counter()
+    ranked = rank_batch(papers)
+    rank_seconds = time.perf_counter() - start_rank
+
+    start_scalar = time.perf_counter()
+    scalar = [score_paper(p, c) for p, c in zip(papers, records)]
+    scalar_seconds = time.perf_counter() - start_scalar
+    batch = validate_batch(papers, records)
+    mismatches = sum(
+        s["score_breakdown"] != b["score_breakdown"] or
+        s["validation_score"] != b["validation_score"] or s["validated"] != b["validated"]
+        for s, b in zip(scalar, batch))
+    return {
+        "candidates": size,
+        "column_load_ms": round((loaded - start) * 1000, 2),
+        "validation_vector_ms": round(validation_seconds * 1000, 3),
+        "quality_sort_vector_ms": round(vector_seconds * 1000, 2),
+        "rank_with_output_ms": round(rank_seconds * 1000, 2),
+        "per_paper_validation_ms": round(scalar_seconds * 1000, 2),
+        "batch_vs_per_paper_mismatches": mismatches,
+        "top_quality_score": ranked[0]["quality_score"],
+        "top_matches_vector": ranked[0]["doi"] == papers[order[0]]["doi"],
+    }
+
+
+def check_scores(papers, weights=VALIDATION_WEIGHTS, threshold=VALIDATION_THRESHOLD,
+                 tolerance=0.01, ignore=()):
+    """
+    [(index, field, stored, rescored)] for every score of a validated file
+    that differs by more than `tolerance` when re-scored from the paper's
+    stored crossref_data. Fields in `ignore` are not compared; the stored
+    value stands in for them in the re-scored validation score.
+    """
+    differences = []
+    for i, paper in enumerate(papers):
+        stored = paper.get("score_breakdown")
+        if stored is None:
+            continue
+        rescored = score_paper(paper, paper.get("crossref_data") or {}, weights, threshold)
+        breakdown = rescored["score_breakdown"]
+        for field in VALIDATION_WEIGHTS:
+            if field in ignore and field in stored:
+                breakdown[field] = stored[field]
+            elif abs(stored.get(field, 0.0) - breakdown[field]) > tolerance:
+                differences.append((i, field, stored.get(field), breakdown[field]))
+        score = round(sum(weights[f] * breakdown[f] for f in weights), 3)
+        if abs((paper.get("validation_score") or 0.0) - score) > tolerance:
+            differences.append((i, "validation_score", paper.get("validation_score"), score))
+    return differences
+
+
+def load(path):
+    return read_papers(path)
+
+
+def dump(path, papers, total=True):
+    data = {"papers": papers, "total": len(papers)} if total else {"papers": papers}
+    atomic_write_json(path, data)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="manuscript_agent score",
+                                     description=__doc__.strip().splitlines()[0])
+    parser.add_argument("stage", nargs="?", choices=["validate", "rank", "check"])
+    parser.add_argument("input", nargs="?",
+                        help="merged (validate) or validated (rank, check) papers")
+    parser.add_argument("-o", "--output", help="output file")
+    parser.add_argument("--weights", help="comma-separated name=value overrides, e.g. "
+                                          "title=0.5 (validate) or impact=0.5 (rank)")
+    parser.add_argument("--threshold", type=float, default=VALIDATION_THRESHOLD)
+    parser.add_argument("--tolerance", type=float, default=0.01,
+                        help="largest score difference check accepts (default: %(default)s)")
+    parser.add_argument("--ignore", default="",
+                        help="comma-separated breakdown fields check leaves out, e.g. authors")
+    parser.add_argument("--year", type=int, help="reference year for recency (default: now)")
+    parser.add_argument("--crossref-url", help="Crossref API base URL")
+    parser.add_argument("--email", help="contact address for the Crossref polite pool")
+    parser.add_argument("--cache", default=str(metadata_cache.default_path()),
+                        help="metadata cache database (default: %(default)s)")
+    parser.add_argument("--no-cache", action="store_true", help="always query Crossref")
+    parser.add_argument("--graph", help="citation graph directory (default: the shared graph)")
+    parser.add_argument("--no-graph", action="store_true",
+                        help="do not record Crossref reference lists in the citation graph")
+    parser.add_argument("--journals", help="journal metrics store used to enrich papers "
+                                           "before ranking (default: the shared store, if built)")
+    parser.add_argument("--bench", type=int, metavar="CANDIDATES",
+                        help="benchmark on CANDIDATES synthetic papers")
+    args = parser.parse_args(argv)
+
+    if args.bench:
+        for name, value in benchmark(args.bench).items():
+            print(f"{name:>24}: {value}")
+        return 0
+    if not args.stage or not args.input or not (args.output or args.stage == "check"):
+        parser.error("stage, input and --output are required unless --bench is given")
+
+    papers = load(args.input)
+    try:
+        defaults = QUALITY_WEIGHTS if args.stage == "rank" else VALIDATION_WEIGHTS
+        weights = parse_weights(args.weights, defaults)
+    except ValueError as exc:
+        parser.error(str(exc))
+
+    if args.stage == "check":
+        ignore = set(filter(None, (f.strip() for f in args.ignore.split(","))))
+        unknown = ignore - set(VALIDATION_WEIGHTS)
+        if unknown:
+            parser.error(f"unknown field(s) {', '.join(sorted(unknown))}")
+        differences = check_scores(papers, weights, args.threshold, args.tolerance, ignore)
+        for i, field, stored, rescored in differences:
+            print(f"✗ {papers[i].get('doi') or f'paper {i + 1}'}: {field} {stored} -> {rescored}")
+        if differences:
+            return 1
+        print(f"✓ {len(papers)} papers re-score as stored")
+        return 0
+
+    if args.stage == "validate":
+        cache = None if args.no_cache else metadata_cache.MetadataCache(args.cache)
+        graph = None
+        if not args.no_graph:
+            from manuscript_agent.citegraph import CitationGraph
+
+            graph = CitationGraph(args.graph)
+        try:
+            records = asyncio.run(lookup_crossref(papers, cache, args.crossref_url, args.email,
+                                                  graph))
+        finally:
+            if cache:
+                cache.close()
+            if graph:
+                graph.save()
+        results = validate_batch(papers, records, weights, args.threshold)
+        passed = sum(p["validated"] for p in results)
+        dump(args.output, results)
+        print(f"✓ Validated {passed}/{len(results)} papers against Crossref")
+    else:
+        from manuscript_agent import journals
+
+        store_path = Path(args.journals) if args.journals else journals.default_path()
+        if store_path.exists():
+            with journals.JournalStore(store_path) as store:
+                papers = journals.enrich(papers, store)
+        elif args.journals:
+            parser.error(f"journal store {store_path} does not exist")
+        results = rank_batch(papers, weights, args.year)
+        dump(args.output, results, total=False)
+        print(f"✓ Ranked {len(results)} papers "
+              f"(top quality score {results[0]['quality_score'] if results else 'n/a'})")
+    return 0
@@ -0,0 +1,501 @@
+"""
+Concurrent Literature Search
+Runs every citation-point query from citation_points_results.md against
+PubMed and OpenAlex at once on a shared asyncio connection pool, with
+per-source rate limits and retry/backoff. Results are written in the same
+{query, timestamp, total_results, papers[...]} layout as before, one file
+per citation point and source (literature/citation<N>_<source>.json).
+
+Lookups go through the shared MetadataCache: query results, PubMed records
+(by PMID) and Crossref metadata (by DOI) are served locally when fresh.
+Records fetched from the sources also feed the shared citation graph
+(citegraph.py) with each paper's identifiers and reference list.
+"""
+
+import argparse
+import asyncio
+import re
+import time
+from datetime import datetime
+from pathlib import Path
+from xml.etree import ElementTree
+
+from manuscript_agent import cache as metadata_cache
+from manuscript_agent import spans
+from manuscript_agent.checkpoint import Journal, atomic_write_json
+from manuscript_agent.httpclient import HttpClient, HttpError, RateLimiter, fetch
+
+PUBMED_URL = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils"
+OPENALEX_URL = "https://api.openalex.org"
+CROSSREF_URL = "https://api.crossref.org"
+DEFAULT_FILTER = "publication_year:>2018"
+
+# Requests per second. NCBI allows 3/s without an API key and 10/s with one;
+# OpenAlex asks polite-pool clients to stay at or below 10/s.
+PUBMED_RATE = 3
+PUBMED_RATE_WITH_KEY = 10
+OPENALEX_RATE = 10
+CROSSREF_RATE = 10
+JOURNAL_NAME = "literature"
+
+
+def parse_citation_points(path):
+    """[{'number', 'title', 'query'}] for every citation point that has a query."""
+    points = []
+    current = None
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            heading = re.match(r"###\s+Citation Point\s+(\d+):\s*(.+)", line)
+            if heading:
+                current = {"number": int(heading.group(1)),
+                           "title": heading.group(2).strip(), "query": None}
+                points.append(current)
+                continue
+            query = re.match(r'\*\*Query:\*\*\s*"(.+)"', line.strip())
+            if query and current is not None:
+                current["query"] = query.group(1)
+    return [point for point in points if point["query"]]
+
+
+class PubMedSource:
+    """
+    NCBI E-utilities: esearch for PMIDs, then one efetch for the records that
+    are not already cached.
+    """
+
+    name = "pubmed"
+
+    def __init__(self, client, base_url=PUBMED_URL, api_key=None, email=None, rate=None,
+                 cache=None, limiter=None, graph=None):
+        self.client = client
+        self.base_url = base_url.rstrip("/")
+        self.cache = cache
+        self.graph = graph
+        self.params = {}
+        if api_key:
+            self.params["api_key"] = api_key
+        if email:
+            self.params["email"] = email
+        default_rate = PUBMED_RATE_WITH_KEY if api_key else PUBMED_RATE
+        self.limiter = limiter or RateLimiter(rate or default_rate, burst=1)
+
+    async def search_ids(self, query, max_results):
+        key = metadata_cache.query_key(self.name, query, retmax=max_results)
+        ids = self.cache.get(key) if self.cache else None
+        if ids is None:
+            params = dict(self.params, db="pubmed", term=query, retmode="json",
+                          retmax=max_results, sort="relevance")
+            response = await fetch(self.client, f"{self.base_url}/esearch.fcgi",
+                                   params, limiter=self.limiter)
+            ids = response.json()["esearchresult"].get("idlist", [])
+            if self.cache:
+                self.cache.set(key, ids, ttl=metadata_cache.QUERY_TTL)
+        return ids
+
+    async def fetch_records(self, ids):
+        """Records for PMIDs, in the given order; cached ones skip efetch."""
+        records = {}
+        if self.cache:
+            for pmid in ids:
+                record = self.cache.get(metadata_cache.pmid_key(self.name, pmid))
+                if record is not None:
+                    records[pmid] = record
+        missing = [pmid for pmid in ids if pmid not in records]
+        if missing:
+            params = dict(self.params, db="pubmed", id=",".join(missing), retmode="xml")
+            response = await fetch(self.client, f"{self.base_url}/efetch.fcgi",
+                                   params, limiter=self.limiter)
+            for record in parse_pubmed_xml(response.body, self.graph):
+                records[record["pmid"]] = record
+                if self.cache:
+                    self.cache.set(metadata_cache.pmid_key(self.name, record["pmid"]), record)
+        return [records[pmid] for pmid in ids if pmid in records]
+
+    async def search(self, query, max_results=5, max_oa=2):
+        ids = await self.search_ids(query, max_results)
+        papers = await self.fetch_records(ids) if ids else []
+        return {
+            "query": query,
+            "max_oa": max_oa,
+            "timestamp": datetime.now().isoformat(),
+            "total_results": len(papers),
+            "open_access_count": sum(1 for p in papers if p["is_open_access"]),
+            "papers": papers,
+        }
+
+
+def element_text(elem):
+    return "".join(elem.itertext()).strip() if elem is not None else ""
+
+
+def article_ids(id_list):
+    return {aid.get("IdType"): (aid.text or "").strip()
+            for aid in (id_list.iter("ArticleId") if id_list is not None else ())}
+
+
+def parse_pubmed_xml(body, graph=None):
+    """
+    Paper records from an efetch PubmedArticleSet document. With a citation
+    `graph`, each article and its ReferenceList are added to it.
+    """
+    papers = []
+    root = ElementTree.fromstring(body)
+    for article in root.iter("PubmedArticle"):
+        citation = article.find("MedlineCitation")
+        info = citation.find("Article")
+        # Only the article's own list: references carry ArticleIds too
+        ids = article_ids(article.find("PubmedData/ArticleIdList"))
+        pmid = element_text(citation.find("PMID"))
+        year = element_text(info.find("Journal/JournalIssue/PubDate/Year"))
+        if not year:
+            medline_date = element_text(info.find("Journal/JournalIssue/PubDate/MedlineDate"))
+            year = medline_date[:4]
+        authors = []
+        for author in info.iter("Author"):
+            last = element_text(author.find("LastName"))
+            fore = element_text(author.find("ForeName"))
+            collective = element_text(author.find("CollectiveName"))
+            if last:
+                authors.append(f"{fore} {last}".strip())
+            elif collective:
+                authors.append(collective)
+        abstract = " ".join(element_text(part) for part in info.iter("AbstractText"))
+        pmcid = ids.get("pmc", "")
+        papers.append({
+            "title": element_text(info.find("ArticleTitle")),
+            "authors": authors,
+            "year": int(year) if year.isdigit() else None,
+            "journal": element_text(info.find("Journal/Title")),
+            "abstract": abstract,
+            "citations": 0,
+            "doi": ids.get("doi", ""),
+            "pmid": pmid,
+            "pmcid": pmcid,
+            "is_open_access": bool(pmcid),
+            "url": f"https://pubmed.ncbi.nlm.nih.gov/{pmid}/",
+            "pdf_url": f"https://www.ncbi.nlm.nih.gov/pmc/articles/{pmcid}/pdf/" if pmcid else "",
+            "source": "pubmed",
+        })
+        if graph is not None:
+            paper = papers[-1]
+            key = graph.add_paper(doi=paper["doi"], pmid=pmid, title=paper["title"],
+                                  year=paper["year"])
+            cited = []
+            for reference in article.iterfind("PubmedData/ReferenceList/Reference"):
+                ref_ids = article_ids(reference.find("ArticleIdList"))
+                cited.append(graph.add_paper(doi=ref_ids.get("doi"), pmid=ref_ids.get("pubmed")))
+            graph.add_citations(key, cited)
+    return papers
+
+
+class OpenAlexSource:
+    """OpenAlex /works search."""
+
+    name = "openalex"
+
+    def __init__(self, client, base_url=OPENALEX_URL, email=None, rate=None, cache=None,
+                 limiter=None, graph=None):
+        self.client = client
+        self.base_url = base_url.rstrip("/")
+        self.cache = cache
+        self.graph = graph
+        self.params = {"mailto": email} if email else {}
+        self.limiter = limiter or RateLimiter(rate or OPENALEX_RATE, burst=2)
+
+    async def search(self, query, max_results=5, max_oa=2, filter=DEFAULT_FILTER):
+        key = metadata_cache.query_key(self.name, query, filter=filter, per_page=max_results)
+        papers = self.cache.get(key) if self.cache else None
+        if papers is None:
+            params = dict(self.params, search=query, filter=filter,
+                          **{"per-page": max_results})
+            response = await fetch(self.client, f"{self.base_url}/works", params,
+                                   limiter=self.limiter)
+            works = response.json().get("results", [])
+            papers = [openalex_record(work) for work in works]
+            if self.graph is not None:
+                for work, paper in zip(works, papers):
+                    node = self.graph.add_paper(doi=paper["doi"], pmid=paper["pmid"],
+                                                openalex=paper["url"], title=paper["title"],
+                                                year=paper["year"], citations=paper["citations"])
+                    self.graph.add_citations(node, [self.graph.add_paper(openalex=ref)
+                                                    for ref in work.get("referenced_works") or []])
+            if self.cache:
+                self.cache.set(key, papers, ttl=metadata_cache.QUERY_TTL)
+                for paper in papers:
+                    if paper["doi"]:
+                        self.cache.set(metadata_cache.doi_key(self.name, paper["doi"]), paper)
+        return {
+            "query": query,
+            "filter": filter,
+            "max_oa": max_oa,
+            "timestamp": datetime.now().isoformat(),
+            "total_results": len(papers),
+            "oa_count": sum(1 for p in papers if p["is_open_access"]),
+            "papers": papers,
+        }
+
+
+class CrossrefSource:
+    """Crossref /works/{doi} lookups producing the crossref_data block."""
+
+    name = "crossref"
+
+    def __init__(self, client, base_url=CROSSREF_URL, email=None, rate=None, cache=None,
+                 graph=None):
+        self.client = client
+        self.base_url = base_url.rstrip("/")
+        self.cache = cache
+        self.graph = graph
+        self.params = {"mailto": email} if email else {}
+        self.limiter = RateLimiter(rate or CROSSREF_RATE, burst=2)
+
+    async def lookup(self, doi):
+        """crossref_data for a DOI, or None if Crossref does not know it."""
+        doi = metadata_cache.normalize_doi(doi)
+        if not doi:
+            return None
+        key = metadata_cache.doi_key(self.name, doi)
+        if self.cache:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached or None
+        try:
+            response = await fetch(self.client, f"{self.base_url}/works/{doi}",
+                                   self.params or None, limiter=self.limiter)
+            message = response.json()["message"]
+            data = crossref_record(message)
+            if self.graph is not None:
+                node = self.graph.add_paper(doi=doi, title=data["title"], year=data["year"])
+                self.graph.add_citations(node, [self.graph.add_paper(doi=ref.get("DOI"))
+                                                for ref in message.get("reference") or []])
+        except HttpError as exc:
+            if exc.status != 404:
+                raise
+            data = {}
+        if self.cache:
+            # Unknown DOIs are cached as {} so they are not re-queried every run
+            self.cache.set(key, data)
+        return data or None
+
+
+def crossref_record(message):
+    issued = (message.get("issued") or message.get("published") or {}).get("date-parts")
+    issns = {item.get("type"): item.get("value") for item in message.get("issn-type", [])}
+    titles = message.get("title") or [""]
+    journals = message.get("container-title") or [""]
+    return {
+        "title": titles[0],
+        "year": issued[0][0] if issued and issued[0] and issued[0][0] else None,
+        "journal": journals[0],
+        "authors": len(message.get("author", [])),
+        "author_names": [a.get("family") or a.get("name", "") for a in message.get("author", [])],
+        "issn": issns.get("print"),
+        "eissn": issns.get("electronic"),
+    }
+
+
+def inverted_index_text(index):
+    """Rebuild an abstract from OpenAlex's abstract_inverted_index."""
+    if not index:
+        return ""
+    positions = [(pos, word) for word, places in index.items() for pos in places]
+    return " ".join(word for _, word in sorted(positions))
+
+
+def openalex_record(work):
+    location = work.get("primary_location") or {}
+    source = location.get("source") or {}
+    open_access = work.get("open_access") or {}
+    ids = work.get("ids") or {}
+    doi = (work.get("doi") or "").replace("https://doi.org/", "").lower()
+    pmid = (ids.get("pmid") or "").rsplit("/", 1)[-1]
+    pmcid = (ids.get("pmcid") or "").rsplit("/", 1)[-1]
+    return {
+        "title": work.get("title") or work.get("display_name") or "",
+        "authors": [a["author"]["display_name"] for a in work.get("authorships", [])
+                    if a.get("author", {}).get("display_name")],
+        "year": work.get("publication_year"),
+        "journal": source.get("display_name") or "",
+        "abstract": inverted_index_text(work.get("abstract_inverted_index")),
+        "citations": work.get("cited_by_count", 0),
+        "doi": doi,
+        "pmid": pmid,
+        "pmcid": pmcid,
+        "url": work.get("id", ""),
+        "pdf_url": open_access.get("oa_url") or location.get("pdf_url") or "",
+        "is_open_access": bool(open_access.get("is_oa")),
+        "source": "openalex",
+    }
+
+
+async def run_searches(points, sources, max_results=5, max_oa=2, on_result=None):
+    """
+    Fan every citation point out to every source concurrently. Returns
+    {(point_number, source_name): result or exception}; on_result(point,
+    source_name, result) is called as each search succeeds.
+    """
+    async def one(point, source):
+        try:
+            result = await source.search(point["query"], max_results, max_oa)
+        except Exception as exc:
+            return exc
+        if on_result is not None:
+            on_result(point, source.name, result)
+        return result
+
+    jobs = [(point["number"], source.name, one(point, source))
+            for point in points for source in sources]
+    results = await asyncio.gather(*(job for _, _, job in jobs))
+    return {(number, name): result for (number, name, _), result in zip(jobs, results)}
+
+
+def result_path(literature_dir, number, name):
+    return Path(literature_dir) / f"citation{number}_{name}.json"
+
+
+def write_result(literature_dir, number, name, result):
+    path = result_path(literature_dir, number, name)
+    atomic_write_json(path, result)
+    return path
+
+
+async def search_workspace(workspace, points=None, pubmed_url=PUBMED_URL,
+                           openalex_url=OPENALEX_URL, api_key=None, email=None,
+                           max_results=5, max_oa=2, limit_per_host=8,
+                           pubmed_rate=None, openalex_rate=None, cache=None, resume=True,
+                           limiters=None, graph=None):
+    """
+    Search all citation points of a workspace and write literature/ files.
+    Each finished (point, source) search is written and journaled at once;
+    with `resume`, searches journaled by an interrupted earlier run for the
+    same query are not repeated. `limiters` ({source name: limiter}) replaces
+    the per-run rate limiters, e.g. with process-wide ones in batch runs.
+    Fetched records are added to the citation `graph` (saved by the caller).
+    """
+    limiters = limiters or {}
+    workspace = Path(workspace)
+    literature_dir = workspace / "literature"
+    literature_dir.mkdir(parents=True, exist_ok=True)
+    if points is None:
+        points = parse_citation_points(workspace / "citation_points_results.md")
+    journal = Journal.for_workspace(workspace, JOURNAL_NAME)
+    done = journal.completed() if resume else {}
+    if not resume:
+        journal.clear()
+
+    def finished(point, name, result):
+        write_result(literature_dir, point["number"], name, result)
+        journal.record(f"{point['number']}:{name}", {"query": point["query"]})
+
+    def resumed(point, source):
+        data = done.get(f"{point['number']}:{source.name}") or {}
+        return (data.get("query") == point["query"] and
+                result_path(literature_dir, point["number"], source.name).exists())
+
+    start = time.perf_counter()
+    with spans.span("literature.search") as trace:
+        async with HttpClient(limit_per_host=limit_per_host) as client:
+            sources = [
+                PubMedSource(client, pubmed_url, api_key, email, pubmed_rate, cache,
+                             limiters.get("pubmed"), graph),
+                OpenAlexSource(client, openalex_url, email, openalex_rate, cache,
+                               limiters.get("openalex"), graph),
+            ]
+            pending = {}
+            skipped = 0
+            for source in sources:
+                todo = [point for point in points if not resumed(point, source)]
+                skipped += len(points) - len(todo)
+                for point in todo:
+                    pending.setdefault(point["number"], (point, []))[1].append(source)
+            jobs = [run_searches([point], point_sources, max_results, max_oa, finished)
+                    for point, point_sources in pending.values()]
+            results = {}
+            for partial in await asyncio.gather(*jobs):
+                results.update(partial)
+            stats = dict(client.stats)
+        trace.add(items=len(results), bytes_in=stats["bytes_in"],
+                  cache_hits=cache.stats["hits"] if cache else 0,
+                  cache_misses=cache.stats["misses"] if cache else 0)
+    elapsed = time.perf_counter() - start
+    failures = {key: str(result) for key, result in results.items()
+                if isinstance(result, Exception)}
+    if failures:
+        journal.close()
+    else:
+        journal.clear()
+    stats.update({
+        "queries": len(results),
+        "resumed": skipped,
+        "files_written": len(results) - len(failures),
+        "failures": len(failures),
+        "elapsed_seconds": round(elapsed, 3),
+        "queries_per_second": round(len(results) / elapsed, 2) if elapsed else None,
+    })
+    if cache:
+        stats["cache_hits"] = cache.stats["hits"]
+        stats["cache_misses"] = cache.stats["misses"]
+    return stats, failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="manuscript_agent search",
+                                     description=__doc__.strip().splitlines()[0])
+    parser.add_argument("workspace", help="manuscript workspace directory")
+    parser.add_argument("--points", type=int, nargs="*",
+                        help="citation point numbers to search (default: all)")
+    parser.add_argument("--max-results", type=int, default=5)
+    parser.add_argument("--max-oa", type=int, default=2)
+    parser.add_argument("--pubmed-url", default=PUBMED_URL)
+    parser.add_argument("--openalex-url", default=OPENALEX_URL)
+    parser.add_argument("--api-key", help="NCBI API key (raises the PubMed rate limit)")
+    parser.add_argument("--email", help="contact address for NCBI/OpenAlex polite pools")
+    parser.add_argument("--cache", default=str(metadata_cache.default_path()),
+                        help="metadata cache database (default: %(default)s)")
+    parser.add_argument("--no-cache", action="store_true", help="always query the sources")
+    parser.add_argument("--graph", help="citation graph directory (default: the shared graph)")
+    parser.add_argument("--no-graph", action="store_true",
+                        help="do not record fetched records in the citation graph")
+    parser.add_argument("--no-resume", action="store_true",
+                        help="ignore searches journaled by an interrupted run")
+    parser.add_argument("--fill-gaps", action="store_true",
+                        help="only search points the local semantic index cannot cover")
+    args = parser.parse_args(argv)
+
+    points = parse_citation_points(Path(args.workspace) / "citation_points_results.md")
+    if args.points:
+        points = [p for p in points if p["number"] in set(args.points)]
+    if args.fill_gaps:
+        from manuscript_agent import semantic
+
+        covered = len(points)
+        points = semantic.gaps(semantic.load_index(args.workspace), points, args.max_results)
+        print(f"  Local index covers {covered - len(points)} of {covered} citation points")
+    cache = None if args.no_cache else metadata_cache.MetadataCache(args.cache)
+    graph = None
+    if not args.no_graph:
+        from manuscript_agent.citegraph import CitationGraph
+
+        graph = CitationGraph(args.graph)
+    try:
+        stats, failures = asyncio.run(search_workspace(
+            args.workspace, points, args.pubmed_url, args.openalex_url, args.api_key,
+            args.email, args.max_results, args.max_oa, cache=cache,
+            resume=not args.no_resume, graph=graph))
+    finally:
+        if cache:
+            cache.close()
+        if graph:
+            graph.save()
+    print(f"✓ Searched {len(points)} citation points "
+          f"({stats['queries']} queries, {stats['elapsed_seconds']}s, "
+          f"{stats['queries_per_second']} queries/s)")
+    if stats["resumed"]:
+        print(f"  Resumed: {stats['resumed']} searches already completed by an earlier run")
+    if cache:
+        print(f"  Cache: {stats['cache_hits']} hits, {stats['cache_misses']} misses")
+    if graph:
+        print(f"  Citation graph: {graph.size} papers, {graph.edges} citations")
+    for (number, name), error in sorted(failures.items()):
+        print(f"✗ Citation point {number} ({name}): {error}")
+    return 1 if failures else 0
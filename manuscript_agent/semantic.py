@@ -0,0 +1,323 @@
+"""
+Local Semantic Index
+On-disk vector index over the title and abstract of every paper collected
+under a workspace's literature/ directory. Texts are embedded with hashed
+TF-IDF (unigrams and bigrams folded into a fixed number of buckets), stored
+as a memory-mapped float32 matrix with L2-normalized rows, and searched
+with a blocked exact top-k over the mapped rows. Citation points get local
+candidates first; the remote search only has to fill the gaps.
+
+The index lives in cache/semantic/ and is rebuilt automatically when any
+literature file changes.
+
+    python -m manuscript_agent semantic build manuscript_11072333
+    python -m manuscript_agent semantic query manuscript_11072333 "CD8 T cell exclusion"
+    python -m manuscript_agent semantic match manuscript_11072333 -k 5
+    python -m manuscript_agent semantic --bench 20000
+"""
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+import zlib
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+from manuscript_agent import spans
+from manuscript_agent.cache import normalize_doi
+from manuscript_agent.checkpoint import atomic_write_json
+from manuscript_agent.dedup import title_tokens
+from manuscript_agent.papers import read_papers
+
+INDEX_VERSION = 1
+DEFAULT_DIM = 2048
+BLOCK_ROWS = 16384
+# Cosine similarity below which a local hit does not count as a candidate
+MIN_SIMILARITY = 0.1
+LOCAL_SUFFIX = "_local.json"
+
+
+def index_dir(workspace):
+    return Path(workspace) / "cache" / "semantic"
+
+
+def literature_files(workspace):
+    """Result files under literature/, excluding the local matches written here."""
+    return sorted(path for path in (Path(workspace) / "literature").glob("*.json")
+                  if not path.name.endswith(LOCAL_SUFFIX))
+
+
+def fingerprint(paths):
+    return [[path.name, (st := path.stat()).st_size, st.st_mtime_ns] for path in paths]
+
+
+def paper_key(paper):
+    doi = normalize_doi(paper.get("doi"))
+    if doi:
+        return "doi:" + doi
+    if paper.get("pmid"):
+        return f"pmid:{paper['pmid']}"
+    return "title:" + " ".join(title_tokens(paper.get("title")))
+
+
+def collect_papers(paths):
+    """Distinct papers (first occurrence wins) across result files."""
+    papers = {}
+    for path in paths:
+        for paper in read_papers(path):
+            key = paper_key(paper)
+            if key not in papers or (paper.get("abstract") and not papers[key].get("abstract")):
+                papers[key] = dict(paper, literature_file=path.name)
+    return list(papers.values())
+
+
+def document_text(paper):
+    return f"{paper.get('title') or ''} {paper.get('abstract') or ''}"
+
+
+class HashedTfidf:
+    """Unigram + bigram hashing vectorizer with a fixed bucket count."""
+
+    def __init__(self, dim=DEFAULT_DIM, idf=None):
+        self.dim = dim
+        self.idf = idf
+        self.buckets = {}
+
+    def _bucket(self, term):
+        bucket = self.buckets.get(term)
+        if bucket is None:
+            bucket = self.buckets[term] = zlib.crc32(term.encode()) % self.dim
+        return bucket
+
+    def indices(self, text):
+        tokens = title_tokens(text)
+        terms = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+        return np.fromiter(map(self._bucket, terms), np.int64, len(terms))
+
+    def fit_idf(self, documents):
+        """Smoothed IDF from the bucket indices of every document."""
+        df = np.zeros(self.dim, np.float64)
+        for indices in documents:
+            df[np.unique(indices)] += 1
+        self.idf = (np.log((1 + len(documents)) / (1 + df)) + 1).astype(np.float32)
+        return self.idf
+
+    def weigh(self, indices):
+        counts = np.bincount(indices, minlength=self.dim).astype(np.float32)
+        nonzero = counts > 0
+        counts[nonzero] = (1 + np.log(counts[nonzero])) * self.idf[nonzero]
+        norm = np.linalg.norm(counts)
+        return counts / norm if norm else counts
+
+    def transform(self, text):
+        return self.weigh(self.indices(text))
+
+
+class SemanticIndex:
+    """
+    Memory-mapped float32 matrix of paper vectors plus the paper records and
+    IDF weights needed to embed queries.
+    """
+
+    def __init__(self, directory, meta, vectors, vectorizer):
+        self.directory = Path(directory)
+        self.meta = meta
+        self.papers = meta["papers"]
+        self.vectors = vectors
+        self.vectorizer = vectorizer
+
+    @classmethod
+    def build(cls, directory, papers, dim=DEFAULT_DIM, sources=None):
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        vectorizer = HashedTfidf(dim)
+        documents = [vectorizer.indices(document_text(p)) for p in papers]
+        idf = vectorizer.fit_idf(documents)
+        # Write into temporary files and rename, so readers never see a partial index
+        tmp_vectors = directory / "vectors.npy.tmp"
+        matrix = np.lib.format.open_memmap(tmp_vectors, mode="w+", dtype=np.float32,
+                                           shape=(len(papers), dim))
+        for row, indices in enumerate(documents):
+            matrix[row] = vectorizer.weigh(indices)
+        matrix.flush()
+        del matrix
+        tmp_idf = directory / "idf.npy.tmp"
+        with open(tmp_idf, 'wb') as f:
+            np.save(f, idf)
+        meta = {"version": INDEX_VERSION, "dim": dim, "count": len(papers),
+                "built": datetime.now().isoformat(), "sources": sources or [],
+                "papers": papers}
+        os.replace(tmp_idf, directory / "idf.npy")
+        os.replace(tmp_vectors, directory / "vectors.npy")
+        # papers.json goes last: an index is complete once it is in place
+        atomic_write_json(directory / "papers.json", meta, indent=None)
+        return cls.open(directory)
+
+    @classmethod
+    def open(cls, directory):
+        directory = Path(directory)
+        with open(directory / "papers.json", 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        vectors = np.load(directory / "vectors.npy", mmap_mode="r")
+        idf = np.load(directory / "idf.npy")
+        return cls(directory, meta, vectors, HashedTfidf(meta["dim"], idf))
+
+    def search(self, query, k=5, block_rows=BLOCK_ROWS):
+        """[(similarity, paper)] for the k best matches, best first."""
+        vector = self.vectorizer.transform(query)
+        if not len(self.papers) or not vector.any():
+            return []
+        best_scores = np.empty(0, np.float32)
+        best_rows = np.empty(0, np.int64)
+        for start in range(0, len(self.papers), block_rows):
+            scores = self.vectors[start:start + block_rows] @ vector
+            if len(scores) > k:
+                top = np.argpartition(scores, -k)[-k:]
+            else:
+                top = np.arange(len(scores))
+            best_scores = np.concatenate([best_scores, scores[top]])
+            best_rows = np.concatenate([best_rows, top + start])
+            if len(best_scores) > k:
+                keep = np.argpartition(best_scores, -k)[-k:]
+                best_scores, best_rows = best_scores[keep], best_rows[keep]
+        order = np.argsort(-best_scores, kind="stable")
+        return [(round(float(best_scores[i]), 4), self.papers[best_rows[i]])
+                for i in order if best_scores[i] > 0]
+
+
+def load_index(workspace, dim=DEFAULT_DIM, rebuild=False):
+    """Open the workspace index, rebuilding it if literature/ has changed."""
+    directory = index_dir(workspace)
+    sources = fingerprint(literature_files(workspace))
+    if not rebuild and (directory / "papers.json").exists():
+        index = SemanticIndex.open(directory)
+        if (index.meta.get("version") == INDEX_VERSION and index.meta["dim"] == dim
+                and index.meta["sources"] == sources):
+            return index
+    with spans.span("semantic.build") as trace:
+        papers = collect_papers(literature_files(workspace))
+        index = SemanticIndex.build(directory, papers, dim, sources)
+        trace.add(items=len(papers), bytes_in=sum(size for _, size, _ in sources),
+                  bytes_out=index.vectors.nbytes)
+    return index
+
+
+def match_points(index, points, k=5, min_similarity=MIN_SIMILARITY):
+    """{number: result} of local candidates per citation point, in search-result layout."""
+    results = {}
+    for point in points:
+        hits = [(score, paper) for score, paper in index.search(point["query"], k)
+                if score >= min_similarity]
+        papers = [dict(paper, similarity=score, source=paper.get("source", "local"))
+                  for score, paper in hits]
+        results[point["number"]] = {
+            "query": point["query"],
+            "timestamp": datetime.now().isoformat(),
+            "total_results": len(papers),
+            "open_access_count": sum(bool(p.get("is_open_access")) for p in papers),
+            "papers": papers,
+        }
+    return results
+
+
+def write_matches(results, literature_dir):
+    written = []
+    for number, result in sorted(results.items()):
+        if not result["papers"]:
+            continue
+        path = Path(literature_dir) / f"citation{number}{LOCAL_SUFFIX}"
+        atomic_write_json(path, result)
+        written.append(path)
+    return written
+
+
+def gaps(index, points, wanted=5, min_similarity=MIN_SIMILARITY):
+    """Citation points with fewer than `wanted` local candidates."""
+    matches = match_points(index, points, wanted, min_similarity)
+    return [p for p in points if matches[p["number"]]["total_results"] < wanted]
+
+
+def synthetic_abstracts(size, seed=3):
+    from manuscript_agent.fakeserver import WORDS
+
+    rng = random.Random(seed)
+    vocabulary = list(WORDS) + [f"gene{i}" for i in range(3000)]
+    return [{"title": " ".join(rng.choice(vocabulary) for _ in range(10)),
+             "abstract": " ".join(rng.choice(vocabulary) for _ in range(180)),
+             "doi": f"10.5555/fake.{i}"} for i in range(size)]
+
+
+def benchmark(size=20_000, queries=50, k=5, dim=DEFAULT_DIM):
+    papers = synthetic_abstracts(size)
+    rng = random.Random(5)
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        SemanticIndex.build(directory, papers, dim)
+        build_seconds = time.perf_counter() - start
+        index = SemanticIndex.open(directory)
+        latencies = []
+        for _ in range(queries):
+            words = papers[rng.randrange(size)]["abstract"].split()
+            offset = rng.randrange(len(words) - 6)
+            query = " ".join(words[offset:offset + 6])
+            began = time.perf_counter()
+            index.search(query, k)
+            latencies.append(time.perf_counter() - began)
+        del index
+    latencies.sort()
+    return {
+        "papers": size,
+        "dimensions": dim,
+        "matrix_mb": round(size * dim * 4 / 2**20, 1),
+        "build_seconds": round(build_seconds, 2),
+        "query_ms_median": round(latencies[len(latencies) // 2] * 1000, 2),
+        "query_ms_p95": round(latencies[int(len(latencies) * 0.95)] * 1000, 2),
+    }
+
+
+def main(argv=None):
+    from manuscript_agent.search import parse_citation_points
+
+    parser = argparse.ArgumentParser(prog="manuscript_agent semantic",
+                                     description=__doc__.strip().splitlines()[0])
+    parser.add_argument("action", nargs="?", choices=["build", "query", "match"])
+    parser.add_argument("workspace", nargs="?", help="manuscript workspace directory")
+    parser.add_argument("query", nargs="?", help="free-text query (query action)")
+    parser.add_argument("-k", type=int, default=5, help="candidates per query")
+    parser.add_argument("--min-similarity", type=float, default=MIN_SIMILARITY)
+    parser.add_argument("--dim", type=int, default=DEFAULT_DIM)
+    parser.add_argument("--bench", type=int, metavar="PAPERS",
+                        help="benchmark build and query time on PAPERS synthetic abstracts")
+    args = parser.parse_args(argv)
+
+    if args.bench:
+        for name, value in benchmark(args.bench, k=args.k, dim=args.dim).items():
+            print(f"{name:>16}: {value}")
+        return 0
+    if not args.action or not args.workspace:
+        parser.error("action and workspace are required unless --bench is given")
+
+    start = time.perf_counter()
+    index = load_index(args.workspace, args.dim, rebuild=args.action == "build")
+    if args.action == "build":
+        print(f"✓ Indexed {index.meta['count']} papers from "
+              f"{len(index.meta['sources'])} files in {time.perf_counter() - start:.2f}s")
+    elif args.action == "query":
+        if not args.query:
+            parser.error("query text is required")
+        for score, paper in index.search(args.query, args.k):
+            print(f"{score:.3f}  {paper.get('year', '')}  {paper.get('title', '')}")
+    else:
+        points = parse_citation_points(Path(args.workspace) / "citation_points_results.md")
+        results = match_points(index, points, args.k, args.min_similarity)
+        written = write_matches(results, Path(args.workspace) / "literature")
+        missing = [n for n, r in results.items() if r["total_results"] < args.k]
+        print(f"✓ Matched {len(points)} citation points locally "
+              f"({len(written)} files, {time.perf_counter() - start:.2f}s)")
+        print(f"  {len(missing)} points need remote search: {missing}")
+    return 0
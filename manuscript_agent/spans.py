@@ -0,0 +1,354 @@
+"""
+Run Instrumentation
+Structured timing spans written as JSON lines to <workspace>/progress.jsonl
+next to the human-readable progress.log. Each span records start and end
+time, duration, items processed, bytes in/out, cache hits/misses, peak RSS
+and its parent span, so phases and their sub-stages nest into one tree per
+run. The `profile` command aggregates a run into a per-phase flame-style
+table and compares it with an earlier run to catch regressions.
+
+Spans are recorded while a tracer is active: the pipeline scheduler
+activates one per run, and any command traces to the file named by
+MANUSCRIPT_AGENT_TRACE when it is set. Without a tracer, span() only
+times the block. Activation is per context and child spans inherit their
+parent's tracer, so concurrent runs (batch mode) trace to their own files.
+
+    python -m manuscript_agent profile manuscript_11072333
+    python -m manuscript_agent profile manuscript_11072333 --run 3 --compare 1
+"""
+
+import argparse
+import contextvars
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+TRACE_FILE = "progress.jsonl"
+TRACE_ENV = "MANUSCRIPT_AGENT_TRACE"
+COUNTERS = ("items", "bytes_in", "bytes_out", "cache_hits", "cache_misses")
+# Slowdowns below either bound are treated as noise when comparing runs
+REGRESSION_RATIO = 1.2
+REGRESSION_MIN_SECONDS = 0.05
+
+_current = contextvars.ContextVar("manuscript_agent_span", default=None)
+_active = contextvars.ContextVar("manuscript_agent_tracer", default=None)
+_tracer = None
+
+
+def peak_rss_kb():
+    """Peak resident set size of this process and its finished children, in KiB."""
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    peak = max(usage, children)
+    # ru_maxrss is in bytes on macOS and KiB elsewhere
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+class Span:
+    def __init__(self, name, phase=None, parent=None, tracer=None):
+        self.id = uuid.uuid4().hex[:12]
+        self.name = name
+        self.phase = phase
+        self.parent = parent
+        self.tracer = tracer
+        self.run = tracer.run if tracer else None
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.attrs = {}
+        self.status = "ok"
+        self.start = time.time()
+        self.started = time.perf_counter()
+        self.duration = None
+
+    def add(self, **counts):
+        """Accumulate items, bytes_in, bytes_out, cache_hits or cache_misses."""
+        for name, value in counts.items():
+            if name not in self.counters:
+                raise KeyError(f"unknown span counter {name!r}")
+            self.counters[name] += value or 0
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def record(self):
+        return {
+            "run": self.run, "span": self.id, "parent": self.parent, "name": self.name,
+            "phase": self.phase, "status": self.status,
+            "start": datetime.fromtimestamp(self.start, timezone.utc).isoformat(),
+            "end": datetime.fromtimestamp(self.start + self.duration, timezone.utc).isoformat(),
+            "duration": round(self.duration, 6),
+            **self.counters,
+            "peak_rss_kb": peak_rss_kb(),
+            "pid": os.getpid(),
+            **({"attrs": self.attrs} if self.attrs else {}),
+        }
+
+
+class Tracer:
+    """Appends finished spans to a JSON-lines file; safe to share across threads."""
+
+    def __init__(self, path, run=None):
+        self.path = Path(path)
+        self.run = run or self.next_run()
+        self.lock = threading.Lock()
+
+    def next_run(self):
+        """Run ids count up from the last run recorded in the trace file."""
+        last = 0
+        for record in load_records(self.path):
+            last = max(last, int(record.get("run") or 0))
+        return last + 1
+
+    def emit(self, span):
+        line = json.dumps(span.record(), ensure_ascii=False) + "\n"
+        with self.lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line)
+
+
+def active_tracer():
+    global _tracer
+    tracer = _active.get()
+    if tracer is not None:
+        return tracer
+    if _tracer is None and os.environ.get(TRACE_ENV):
+        _tracer = Tracer(os.environ[TRACE_ENV])
+    return _tracer
+
+
+@contextmanager
+def activate(workspace):
+    """Trace every span in the block to <workspace>/progress.jsonl as one run."""
+    tracer = Tracer(Path(workspace) / TRACE_FILE)
+    token = _active.set(tracer)
+    try:
+        yield tracer
+    finally:
+        _active.reset(token)
+
+
+def start_span(name, phase=None, parent=None, **counts):
+    """
+    Open a span without entering it; finish it with finish_span(). Used when
+    a span starts on one thread and its work completes on another.
+    """
+    parent = parent or _current.get()
+    tracer = parent.tracer if parent else active_tracer()
+    current = Span(name, phase or (parent.phase if parent else None),
+                   parent.id if parent else None, tracer)
+    current.add(**counts)
+    return current
+
+
+def finish_span(current, status=None):
+    current.duration = time.perf_counter() - current.started
+    if status:
+        current.status = status
+    if current.tracer is not None:
+        current.tracer.emit(current)
+
+
+@contextmanager
+def within(current):
+    """Make `current` the parent of spans opened in this block (and thread)."""
+    token = _current.set(current)
+    try:
+        yield current
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def span(name, phase=None, parent=None, **counts):
+    """
+    Time the block as a span named `name`. Nested spans become children;
+    pass `parent` (a Span) explicitly for work handed to another thread.
+    """
+    current = start_span(name, phase, parent, **counts)
+    status = None
+    try:
+        with within(current):
+            yield current
+    except BaseException:
+        status = "error"
+        raise
+    finally:
+        finish_span(current, status)
+
+
+def load_records(path):
+    path = Path(path)
+    if not path.exists():
+        return []
+    records = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue
+    return records
+
+
+def runs(records):
+    grouped = {}
+    for record in records:
+        grouped.setdefault(record.get("run"), []).append(record)
+    return grouped
+
+
+def aggregate(records):
+    """
+    Per-span-path totals for one run: {path: {...}}, where path joins the
+    names from the root span down ('pipeline/figures/figures.analyze').
+    """
+    by_id = {r["span"]: r for r in records}
+
+    def path_of(record):
+        names = []
+        while record is not None:
+            names.append(record["name"])
+            record = by_id.get(record.get("parent"))
+        return "/".join(reversed(names))
+
+    totals = {}
+    for record in records:
+        path = path_of(record)
+        entry = totals.setdefault(path, {"name": record["name"], "phase": record.get("phase"),
+                                         "depth": path.count("/"), "calls": 0, "duration": 0.0,
+                                         "child_duration": 0.0, "peak_rss_kb": 0,
+                                         "errors": 0, **dict.fromkeys(COUNTERS, 0)})
+        entry["calls"] += 1
+        entry["duration"] += record["duration"]
+        entry["errors"] += record.get("status") == "error"
+        entry["peak_rss_kb"] = max(entry["peak_rss_kb"], record.get("peak_rss_kb") or 0)
+        for name in COUNTERS:
+            entry[name] += record.get(name) or 0
+    for record in records:
+        parent = by_id.get(record.get("parent"))
+        if parent is not None:
+            totals[path_of(parent)]["child_duration"] += record["duration"]
+    return totals
+
+
+def tree_order(totals):
+    """Span paths depth-first, slowest sibling first."""
+    children = {}
+    for path in totals:
+        parent = path.rpartition("/")[0]
+        children.setdefault(parent, []).append(path)
+    ordered = []
+
+    def walk(parent):
+        for path in sorted(children.get(parent, []), key=lambda p: -totals[p]["duration"]):
+            ordered.append(path)
+            walk(path)
+
+    walk("")
+    return ordered
+
+
+def format_bytes(value):
+    return f"{value / 2**20:.1f}" if value else "-"
+
+
+def render_profile(totals, baseline=None, width=20):
+    roots = [e["duration"] for p, e in totals.items() if "/" not in p]
+    total = sum(roots) or 1.0
+    header = (f"{'span':<44} {'phase':<10} {'calls':>5} {'total s':>9} {'self s':>8} "
+              f"{'%':>6} {'items':>7} {'items/s':>9} {'MB in':>7} {'MB out':>7} "
+              f"{'hit %':>6} {'RSS MB':>7}")
+    if baseline is not None:
+        header += f" {'vs base':>9}"
+    lines = [header, "-" * len(header)]
+    for path in tree_order(totals):
+        e = totals[path]
+        label = ("  " * e["depth"] + e["name"])[:44]
+        self_time = max(e["duration"] - e["child_duration"], 0.0)
+        share = e["duration"] / total
+        rate = f"{e['items'] / e['duration']:.0f}" if e["items"] and e["duration"] else "-"
+        lookups = e["cache_hits"] + e["cache_misses"]
+        hit = f"{100 * e['cache_hits'] / lookups:.0f}" if lookups else "-"
+        rss = f"{e['peak_rss_kb'] / 1024:.0f}" if e["peak_rss_kb"] else "-"
+        line = (f"{label:<44} {(e['phase'] or ''):<10} {e['calls']:>5} {e['duration']:>9.3f} "
+                f"{self_time:>8.3f} {100 * share:>5.1f}% {e['items'] or '-':>7} {rate:>9} "
+                f"{format_bytes(e['bytes_in']):>7} {format_bytes(e['bytes_out']):>7} "
+                f"{hit:>6} {rss:>7}")
+        if baseline is not None:
+            base = baseline.get(path)
+            if base is None:
+                line += f" {'new':>9}"
+            elif base["duration"]:
+                line += f" {100 * (e['duration'] / base['duration'] - 1):>+8.0f}%"
+            else:
+                line += f" {'-':>9}"
+        lines.append(line + "  " + "█" * max(1, round(share * width)))
+    return "\n".join(lines)
+
+
+def regressions(totals, baseline, ratio=REGRESSION_RATIO, min_seconds=REGRESSION_MIN_SECONDS):
+    """[(path, before, after)] for spans that slowed down beyond both bounds."""
+    found = []
+    for path, entry in totals.items():
+        base = baseline.get(path)
+        if base is None:
+            continue
+        if (entry["duration"] > base["duration"] * ratio and
+                entry["duration"] - base["duration"] > min_seconds):
+            found.append((path, base["duration"], entry["duration"]))
+    return sorted(found, key=lambda item: item[1] - item[2])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="manuscript_agent profile",
+                                     description=__doc__.strip().splitlines()[0])
+    parser.add_argument("workspace", help="manuscript workspace (or a .jsonl trace file)")
+    parser.add_argument("--run", type=int, help="run to report (default: latest)")
+    parser.add_argument("--compare", type=int,
+                        help="baseline run (default: the run before --run)")
+    parser.add_argument("--no-compare", action="store_true")
+    parser.add_argument("--fail-on-regression", action="store_true",
+                        help="exit with status 1 when a span regressed")
+    parser.add_argument("--json", action="store_true", help="print aggregates as JSON")
+    args = parser.parse_args(argv)
+
+    path = Path(args.workspace)
+    if path.is_dir():
+        path = path / TRACE_FILE
+    grouped = runs(load_records(path))
+    if not grouped:
+        print(f"No spans recorded in {path}")
+        return 1
+    ids = sorted(r for r in grouped if r is not None)
+    run = args.run or ids[-1]
+    if run not in grouped:
+        parser.error(f"run {run} not found (recorded: {', '.join(map(str, ids))})")
+    earlier = [r for r in ids if r < run]
+    base_run = None if args.no_compare else (args.compare or (earlier[-1] if earlier else None))
+    totals = aggregate(grouped[run])
+    baseline = aggregate(grouped[base_run]) if base_run in grouped else None
+
+    if args.json:
+        print(json.dumps({"run": run, "baseline": base_run, "spans": totals}, indent=2))
+    else:
+        started = min(r["start"] for r in grouped[run])
+        print(f"Run {run} ({started}, {len(grouped[run])} spans)"
+              + (f" compared with run {base_run}" if baseline else ""))
+        print(render_profile(totals, baseline))
+    found = regressions(totals, baseline) if baseline else []
+    for path_name, before, after in found:
+        print(f"✗ Regression: {path_name} {before:.3f}s -> {after:.3f}s")
+    return 1 if found and args.fail_on_regression else 0
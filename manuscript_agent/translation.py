@@ -0,0 +1,533 @@
+"""
+Translation Memory
+Segment-level reuse of translations of the (Chinese) report content. The
+report text (report_content.md) is split into sentence segments, each
+normalized (NFKC, whitespace collapsed) and looked up by hash in a
+persistent SQLite translation memory shared by every workspace. Segments
+without an exact match are looked up through a character-bigram index for
+near-identical sentences from earlier report revisions; a fuzzy match is
+sent to the translator with the stored pair as a reference, or reused as-is
+at or above --accept-fuzzy. Only segments without a reusable translation are
+sent, de-duplicated and in batches, and every run's hit rate is recorded.
+
+The translator is an HTTP endpoint taking {"source_language",
+"target_language", "segments": [{"id", "text", "reference"}]} and answering
+{"translations": [...]} in segment order (fakeserver serves a stand-in at
+/translate). Without one, --export writes the segments still to translate
+as JSON lines for a translator to fill in, and `import` stores them.
+
+The default location is ~/.cache/manuscript_agent/translation_memory.sqlite
+(override with MANUSCRIPT_AGENT_TM or --path).
+
+    python -m manuscript_agent translate run manuscript_11072333 --translator URL
+    python -m manuscript_agent translate run manuscript_11072333 --export pending.jsonl
+    python -m manuscript_agent translate import pending.jsonl
+    python -m manuscript_agent translate stats
+    python -m manuscript_agent translate --bench 2000
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+import unicodedata
+from difflib import SequenceMatcher
+from pathlib import Path
+
+from manuscript_agent.checkpoint import atomic_write_text
+
+SOURCE_LANGUAGE = "zh"
+TARGET_LANGUAGE = "en"
+SOURCE_FILE = "report_content.md"
+OUTPUT_FILE = "report_content_en.md"
+NGRAM = 2
+# Only the rarest grams of a segment are queried, which bounds the lookup cost
+QUERY_GRAMS = 16
+FUZZY_CANDIDATES = 8
+# Similarity (difflib ratio of normalized text) for a stored segment to count as a fuzzy match
+FUZZY_THRESHOLD = 0.8
+BATCH_SEGMENTS = 40
+BATCH_CHARS = 4000
+CONCURRENCY = 4
+
+CJK = re.compile(r"[㐀-䶿一-鿿豈-﫿]")
+SENTENCE_END = re.compile(r"(?<=[。！？!?])")
+MARKUP = re.compile(r"^(#{1,6}\s+|[-*]\s+|\*\*)?(.*?)(\*\*)?$", re.S)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS segments (
+    key     TEXT PRIMARY KEY,
+    pair    TEXT NOT NULL,
+    source  TEXT NOT NULL,
+    target  TEXT NOT NULL,
+    grams   INTEGER NOT NULL,
+    created REAL NOT NULL,
+    used    REAL NOT NULL,
+    uses    INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS grams (
+    gram TEXT NOT NULL,
+    key  TEXT NOT NULL,
+    PRIMARY KEY (gram, key)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS gram_counts (
+    gram  TEXT PRIMARY KEY,
+    count INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS runs (
+    started   REAL NOT NULL,
+    workspace TEXT NOT NULL,
+    pair      TEXT NOT NULL,
+    stats     TEXT NOT NULL
+);
+"""
+
+
+def default_path():
+    return Path(os.environ.get("MANUSCRIPT_AGENT_TM", Path.home() / ".cache" /
+                               "manuscript_agent" / "translation_memory.sqlite"))
+
+
+def normalize(text):
+    """NFKC (full-width forms folded) with whitespace collapsed."""
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+
+def segment_grams(text):
+    """Character n-grams of a normalized segment, ignoring spaces."""
+    compact = text.replace(" ", "")
+    if len(compact) <= NGRAM:
+        return {compact} if compact else set()
+    return {compact[i:i + NGRAM] for i in range(len(compact) - NGRAM + 1)}
+
+
+def split_sentences(text):
+    return [piece for piece in SENTENCE_END.split(text) if piece.strip()]
+
+
+def parse(markdown):
+    """
+    Report lines as either a kept string (blank, image, no CJK text) or
+    (prefix, [sentences], suffix) for lines with text to translate.
+    """
+    lines = []
+    for line in markdown.split("\n"):
+        if not CJK.search(line) or line.startswith("!["):
+            lines.append(line)
+            continue
+        prefix, body, suffix = MARKUP.match(line).groups()
+        lines.append((prefix or "", split_sentences(body), suffix or ""))
+    return lines
+
+
+def render(lines, translations, key):
+    """The report with every translated sentence replaced; the rest kept as is."""
+    out = []
+    for line in lines:
+        if isinstance(line, str):
+            out.append(line)
+            continue
+        prefix, sentences, suffix = line
+        parts = [translations.get(key(s), s) if CJK.search(s) else s.strip() for s in sentences]
+        out.append(prefix + " ".join(part.strip() for part in parts) + suffix)
+    return "\n".join(out)
+
+
+def batches(segments, size=BATCH_SEGMENTS, chars=BATCH_CHARS):
+    """Split segments into batches of at most `size` segments and about `chars` characters."""
+    batch, length = [], 0
+    for segment in segments:
+        if batch and (len(batch) >= size or length + len(segment["text"]) > chars):
+            yield batch
+            batch, length = [], 0
+        batch.append(segment)
+        length += len(segment["text"])
+    if batch:
+        yield batch
+
+
+class TranslationMemory:
+    """
+    Source/target segment pairs keyed by the hash of the normalized source,
+    with a character n-gram index for fuzzy lookup.
+    """
+
+    def __init__(self, path=None, source_language=SOURCE_LANGUAGE,
+                 target_language=TARGET_LANGUAGE):
+        self.path = Path(path) if path else default_path()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.pair = f"{source_language}>{target_language}"
+        self.source_language = source_language
+        self.target_language = target_language
+        self.db = sqlite3.connect(self.path, timeout=30)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def key(self, text):
+        return hashlib.sha1(f"{self.pair}\0{normalize(text)}".encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """Stored translation for a segment key, or None."""
+        row = self.db.execute("SELECT target FROM segments WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        self.db.execute("UPDATE segments SET used = ?, uses = uses + 1 WHERE key = ?",
+                        (time.time(), key))
+        return row[0]
+
+    def fuzzy(self, text, threshold=FUZZY_THRESHOLD):
+        """(source, target, similarity) of the closest stored segment at or above `threshold`."""
+        text = normalize(text)
+        grams = sorted(segment_grams(text))
+        if not grams:
+            return None
+        marks = ",".join("?" * len(grams))
+        counts = self.db.execute(f"SELECT gram, count FROM gram_counts WHERE gram IN ({marks})",
+                                 grams).fetchall()
+        rare = [gram for gram, _ in sorted(counts, key=lambda row: row[1])[:QUERY_GRAMS]]
+        if not rare:
+            return None
+        marks = ",".join("?" * len(rare))
+        candidates = self.db.execute(
+            f"SELECT s.source, s.target FROM (SELECT key, COUNT(*) AS shared FROM grams "
+            f"WHERE gram IN ({marks}) GROUP BY key ORDER BY shared DESC LIMIT ?) AS c "
+            f"JOIN segments AS s ON s.key = c.key WHERE s.pair = ?",
+            rare + [FUZZY_CANDIDATES, self.pair]).fetchall()
+        best = None
+        for source, target in candidates:
+            similarity = SequenceMatcher(None, text, source, autojunk=False).ratio()
+            if similarity >= threshold and (best is None or similarity > best[2]):
+                best = (source, target, round(similarity, 3))
+        return best
+
+    def add(self, source, target):
+        """Store (or replace) the translation of one source segment."""
+        return self.add_many([(source, target)])[0]
+
+    def add_many(self, pairs):
+        """Store (source, target) pairs in one transaction; returns their keys."""
+        keys = []
+        now = time.time()
+        with self.db:
+            for source, target in pairs:
+                key = self.key(source)
+                keys.append(key)
+                if self.db.execute("SELECT 1 FROM segments WHERE key = ?", (key,)).fetchone():
+                    self.db.execute("UPDATE segments SET target = ?, used = ? WHERE key = ?",
+                                    (target, now, key))
+                    continue
+                source = normalize(source)
+                grams = segment_grams(source)
+                self.db.execute("INSERT INTO segments (key, pair, source, target, grams, "
+                                "created, used) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                (key, self.pair, source, target, len(grams), now, now))
+                self.db.executemany("INSERT INTO grams (gram, key) VALUES (?, ?)",
+                                    [(gram, key) for gram in grams])
+                self.db.executemany(
+                    "INSERT INTO gram_counts (gram, count) VALUES (?, 1) "
+                    "ON CONFLICT(gram) DO UPDATE SET count = count + 1",
+                    [(gram,) for gram in grams])
+        return keys
+
+    def record_run(self, workspace, stats):
+        with self.db:
+            self.db.execute("INSERT INTO runs (started, workspace, pair, stats) "
+                            "VALUES (?, ?, ?, ?)",
+                            (time.time(), str(workspace), self.pair, json.dumps(stats)))
+
+    def runs(self, limit=10):
+        """[(started, workspace, stats)] of the latest runs, newest first."""
+        rows = self.db.execute("SELECT started, workspace, stats FROM runs WHERE pair = ? "
+                               "ORDER BY started DESC LIMIT ?", (self.pair, limit)).fetchall()
+        return [(started, workspace, json.loads(stats)) for started, workspace, stats in rows]
+
+    def totals(self):
+        entries, uses = self.db.execute("SELECT COUNT(*), COALESCE(SUM(uses), 0) FROM segments "
+                                        "WHERE pair = ?", (self.pair,)).fetchone()
+        return {"pair": self.pair, "segments": entries, "reuses": uses,
+                "runs": self.db.execute("SELECT COUNT(*) FROM runs WHERE pair = ?",
+                                        (self.pair,)).fetchone()[0],
+                "bytes": self.path.stat().st_size}
+
+    def close(self):
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+
+
+class HttpTranslator:
+    """POSTs batches of segments to a translation endpoint, `concurrency` at a time."""
+
+    def __init__(self, url, source_language=SOURCE_LANGUAGE, target_language=TARGET_LANGUAGE,
+                 concurrency=CONCURRENCY, timeout=120.0):
+        self.url = url
+        self.source_language = source_language
+        self.target_language = target_language
+        self.concurrency = concurrency
+        self.timeout = timeout
+
+    async def translate(self, batches, on_batch):
+        """Translate every batch; on_batch(batch, translations) runs as each one returns."""
+        from manuscript_agent.httpclient import HttpClient, fetch
+
+        async with HttpClient(limit_per_host=self.concurrency, timeout=self.timeout) as client:
+            async def one(batch):
+                body = json.dumps({"source_language": self.source_language,
+                                   "target_language": self.target_language,
+                                   "segments": batch}, ensure_ascii=False).encode("utf-8")
+                response = await fetch(client, self.url, method="POST", body=body,
+                                       headers={"Content-Type": "application/json"})
+                translations = response.json()["translations"]
+                if len(translations) != len(batch):
+                    raise ValueError(f"{len(translations)} translations for {len(batch)} segments")
+                on_batch(batch, translations)
+
+            results = await asyncio.gather(*(one(batch) for batch in batches),
+                                           return_exceptions=True)
+        return [result for result in results if isinstance(result, Exception)]
+
+    def __call__(self, batches, on_batch):
+        """Failures (one exception per failed batch) after translating `batches`."""
+        return asyncio.run(self.translate(batches, on_batch))
+
+
+def translate_text(text, memory, translator=None, accept_fuzzy=None, threshold=FUZZY_THRESHOLD):
+    """
+    (translated text, segments still to translate, stats) for one report.
+    Stored translations are reused; the rest go to `translator` when given.
+    """
+    lines = parse(text)
+    occurrences = [s for line in lines if not isinstance(line, str)
+                   for s in line[1] if CJK.search(s)]
+    unique = {}
+    for sentence in occurrences:
+        unique.setdefault(memory.key(sentence), sentence)
+
+    translations, pending = {}, []
+    stats = {"segments": len(occurrences), "unique": len(unique), "exact": 0, "fuzzy": 0,
+             "fuzzy_reused": 0, "sent": 0, "batches": 0, "failed_batches": 0, "translated": 0}
+    start = time.perf_counter()
+    for key, sentence in unique.items():
+        target = memory.get(key)
+        if target is not None:
+            translations[key] = target
+            stats["exact"] += 1
+            continue
+        match = memory.fuzzy(sentence, threshold)
+        segment = {"id": key, "text": sentence.strip()}
+        if match:
+            stats["fuzzy"] += 1
+            source, target, similarity = match
+            if accept_fuzzy is not None and similarity >= accept_fuzzy:
+                translations[key] = target
+                stats["fuzzy_reused"] += 1
+                continue
+            segment["reference"] = {"source": source, "translation": target,
+                                    "similarity": similarity}
+        pending.append(segment)
+    stats["lookup_seconds"] = round(time.perf_counter() - start, 3)
+
+    if translator is not None and pending:
+        todo = list(batches(pending))
+        stats["sent"], stats["batches"] = len(pending), len(todo)
+
+        def store(batch, results):
+            memory.add_many([(segment["text"], target)
+                             for segment, target in zip(batch, results)])
+            translations.update((segment["id"], target)
+                                for segment, target in zip(batch, results))
+            stats["translated"] += len(batch)
+
+        start = time.perf_counter()
+        stats["failed_batches"] = len(translator(todo, store))
+        stats["translate_seconds"] = round(time.perf_counter() - start, 3)
+        pending = [segment for segment in pending if segment["id"] not in translations]
+
+    reused = stats["exact"] + stats["fuzzy_reused"]
+    stats["hit_rate"] = round(reused / len(unique), 4) if unique else None
+    stats["pending"] = len(pending)
+    return render(lines, translations, memory.key), pending, stats
+
+
+def translate_workspace(workspace, memory, translator=None, accept_fuzzy=None,
+                        threshold=FUZZY_THRESHOLD, export=None):
+    """Translate report_content.md into report_content_en.md; returns the run's stats."""
+    workspace = Path(workspace)
+    text = (workspace / SOURCE_FILE).read_text(encoding='utf-8')
+    translated, pending, stats = translate_text(text, memory, translator, accept_fuzzy,
+                                                threshold)
+    atomic_write_text(workspace / OUTPUT_FILE, translated)
+    if export:
+        lines = [json.dumps(dict(segment, translation=""), ensure_ascii=False)
+                 for segment in pending]
+        atomic_write_text(export, "".join(line + "\n" for line in lines))
+    memory.record_run(workspace.resolve(), stats)
+    return stats
+
+
+def import_translations(memory, path):
+    """Store the filled-in translations of an exported JSON lines file; returns the count."""
+    pairs = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            if (entry.get("translation") or "").strip():
+                pairs.append((entry["text"], entry["translation"].strip()))
+    return len(memory.add_many(pairs))
+
+
+def synthetic_report(sentences, seed=0):
+    """Chinese-like report of `sentences` sentences in paragraphs of five, with headings."""
+    import random
+
+    rng = random.Random(seed)
+    terms = ("细胞 基因 表达 分析 肿瘤 免疫 浸润 样本 数据 通路 风险 模型 预后 生存 差异 "
+             "聚类 亚群 信号 患者 队列 验证 显著 富集 特征").split()
+    lines = []
+    for i in range(sentences):
+        if i % 20 == 0:
+            lines += [f"**{''.join(rng.sample(terms, 3))}**", ""]
+        words = "".join(rng.choice(terms) for _ in range(rng.randint(10, 24)))
+        lines.append(f"{words}（n={rng.randint(10, 900)}）。")
+        if i % 5 == 4:
+            lines.append("")
+    text, paragraph = [], []
+    for line in lines:
+        if line.endswith("。"):
+            paragraph.append(line)
+            continue
+        if paragraph:
+            text += ["".join(paragraph), ""]
+            paragraph = []
+        if line:
+            text += [line, ""]
+    if paragraph:
+        text.append("".join(paragraph))
+    return "\n".join(text) + "\n"
+
+
+def revise(text, changed=0.1, seed=1):
+    """A later revision: about `changed` of the sentences with one number edited."""
+    import random
+
+    rng = random.Random(seed)
+
+    def edit(match):
+        if rng.random() >= changed:
+            return match.group(0)
+        return f"（n={int(match.group(1)) + rng.randint(1, 9)}）"
+    return re.sub(r"（n=(\d+)）", edit, text)
+
+
+def benchmark(sentences=2000):
+    """First translation of a report, then of a revision, through the stand-in endpoint."""
+    import tempfile
+
+    from manuscript_agent.fakeserver import FakeServer
+
+    results = {"sentences": sentences}
+
+    async def serve(run):
+        async with FakeServer() as server:
+            return await asyncio.to_thread(run, f"{server.url}/translate"), server.stats
+
+    with tempfile.TemporaryDirectory() as directory:
+        first = synthetic_report(sentences)
+        second = revise(first)
+
+        def run(url):
+            translator = HttpTranslator(url)
+            out = []
+            with TranslationMemory(Path(directory) / "tm.sqlite") as memory:
+                for label, text in (("first", first), ("revision", second), ("unchanged", second)):
+                    start = time.perf_counter()
+                    _, _, stats = translate_text(text, memory, translator)
+                    stats["seconds"] = round(time.perf_counter() - start, 3)
+                    out.append((label, stats))
+                totals = memory.totals()
+            return out, totals
+
+        (runs, totals), server_stats = asyncio.run(serve(run))
+    for label, stats in runs:
+        for name in ("unique", "exact", "fuzzy", "sent", "batches", "hit_rate", "seconds"):
+            results[f"{label}_{name}"] = stats[name]
+    results["requests"] = server_stats["requests"]
+    results["memory_segments"] = totals["segments"]
+    results["memory_kb"] = round(totals["bytes"] / 1024)
+    return results
+
+
+def print_stats(stats):
+    rate = "n/a" if stats["hit_rate"] is None else f"{stats['hit_rate']:.1%}"
+    print(f"  segments {stats['segments']} ({stats['unique']} unique): {stats['exact']} exact, "
+          f"{stats['fuzzy']} fuzzy ({stats['fuzzy_reused']} reused), {stats['sent']} sent in "
+          f"{stats['batches']} batches, {stats['pending']} pending; hit rate {rate}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="manuscript_agent translate",
+                                     description=__doc__.strip().splitlines()[0])
+    parser.add_argument("action", nargs="?", choices=["run", "import", "stats"])
+    parser.add_argument("target", nargs="?",
+                        help="workspace (run) or exported JSON lines file (import)")
+    parser.add_argument("--translator", default=os.environ.get("MANUSCRIPT_AGENT_TRANSLATOR"),
+                        help="translation endpoint URL (default: $MANUSCRIPT_AGENT_TRANSLATOR)")
+    parser.add_argument("--export", help="write segments still to translate to this file")
+    parser.add_argument("--accept-fuzzy", type=float, metavar="RATIO",
+                        help="reuse fuzzy matches at or above RATIO without translating")
+    parser.add_argument("--threshold", type=float, default=FUZZY_THRESHOLD,
+                        help="similarity for a fuzzy match (default: %(default)s)")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY)
+    parser.add_argument("--source-language", default=SOURCE_LANGUAGE)
+    parser.add_argument("--target-language", default=TARGET_LANGUAGE)
+    parser.add_argument("--path", default=str(default_path()),
+                        help="translation memory database (default: %(default)s)")
+    parser.add_argument("--bench", type=int, metavar="SENTENCES",
+                        help="benchmark a report of SENTENCES sentences and a revision of it")
+    args = parser.parse_args(argv)
+
+    if args.bench:
+        for name, value in benchmark(args.bench).items():
+            print(f"{name:>20}: {value}")
+        return 0
+    if not args.action:
+        parser.error("action is required unless --bench is given")
+    if args.action != "stats" and not args.target:
+        parser.error(f"{args.action} needs a {'workspace' if args.action == 'run' else 'file'}")
+
+    with TranslationMemory(args.path, args.source_language, args.target_language) as memory:
+        if args.action == "import":
+            print(f"✓ Stored {import_translations(memory, args.target)} translations")
+        elif args.action == "stats":
+            for name, value in memory.totals().items():
+                print(f"{name:>10}: {value}")
+            for started, workspace, stats in memory.runs():
+                stamp = time.strftime("%Y-%m-%d %H:%M", time.localtime(started))
+                print(f"{stamp}  {workspace}")
+                print_stats(stats)
+        else:
+            translator = HttpTranslator(args.translator, args.source_language,
+                                        args.target_language, args.concurrency) \
+                if args.translator else None
+            stats = translate_workspace(args.target, memory, translator, args.accept_fuzzy,
+                                        args.threshold, args.export)
+            print_stats(stats)
+            if stats["failed_batches"]:
+                print(f"✗ {stats['failed_batches']} batches failed")
+                return 1
+            print(f"✓ Wrote {Path(args.target) / OUTPUT_FILE}"
+                  + (f" and {args.export}" if args.export else ""))
+    return 0
@@ -0,0 +1,50 @@
+"""Snapshots record file permissions and restore puts them back."""
+
+import os
+import stat
+import tempfile
+import unittest
+from pathlib import Path
+
+from manuscript_agent.artifacts import ArtifactStore
+
+
+def mode(path):
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+
+class RestoreModeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.root = Path(self.directory.name)
+        self.umask = os.umask(0o022)
+        self.workspace = self.root / "ws"
+        (self.workspace / "drafts").mkdir(parents=True)
+        (self.workspace / "state.json").write_text('{"phase": 1}\n')
+        (self.workspace / "drafts" / "01_results.md").write_text("Results.\n")
+        os.chmod(self.workspace / "drafts" / "01_results.md", 0o640)
+        self.store = ArtifactStore(self.root / "store")
+
+    def tearDown(self):
+        os.umask(self.umask)
+        self.directory.cleanup()
+
+    def test_restore_applies_recorded_modes(self):
+        self.store.snapshot(self.workspace, label="initial")
+        self.store.restore(self.workspace, "initial", self.root / "restored")
+        self.assertEqual(mode(self.root / "restored" / "state.json"), 0o644)
+        self.assertEqual(mode(self.root / "restored" / "drafts" / "01_results.md"), 0o640)
+
+    def test_mode_change_is_a_new_snapshot(self):
+        first = self.store.snapshot(self.workspace)
+        os.chmod(self.workspace / "state.json", 0o600)
+        second = self.store.snapshot(self.workspace)
+        self.assertNotEqual(first["id"], second["id"])
+        os.chmod(self.workspace / "state.json", 0o644)
+        self.store.restore(self.workspace, "latest")
+        self.assertEqual(mode(self.workspace / "state.json"), 0o600)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,44 @@
+"""Atomic writes keep the permissions a plain write would have given."""
+
+import os
+import stat
+import tempfile
+import unittest
+from pathlib import Path
+
+from manuscript_agent.checkpoint import atomic_write_json, atomic_write_text
+
+
+def mode(path):
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+
+class AtomicWriteModeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.root = Path(self.directory.name)
+        self.umask = os.umask(0o022)
+
+    def tearDown(self):
+        os.umask(self.umask)
+        self.directory.cleanup()
+
+    def test_new_file_follows_umask(self):
+        atomic_write_json(self.root / "state.json", {"phase": 1})
+        self.assertEqual(mode(self.root / "state.json"), 0o644)
+        os.umask(0o077)
+        atomic_write_text(self.root / "private.md", "text")
+        self.assertEqual(mode(self.root / "private.md"), 0o600)
+
+    def test_existing_file_keeps_its_mode(self):
+        path = self.root / "references.json"
+        path.write_text("{}")
+        os.chmod(path, 0o640)
+        atomic_write_json(path, {"references": []})
+        self.assertEqual(mode(path), 0o640)
+        self.assertEqual(path.read_text(), '{\n  "references": []\n}')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+"""Caption claims are checked against the panel under their nearest label."""
+
+import unittest
+from pathlib import Path
+
+from manuscript_agent import claims
+
+WORKSPACE = Path(__file__).resolve().parent.parent / "manuscript_11072333"
+
+
+def figure_caption(number):
+    text = (WORKSPACE / claims.CAPTIONS).read_text(encoding="utf-8")
+    start = text.index(f"## Figure {number}.")
+    end = text.find("\n## ", start + 1)
+    return text[start:end if end >= 0 else len(text)]
+
+
+class FigureThreeCaptionTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.claims = claims.cross_check(claims.caption_claims(figure_caption(3), claims.CAPTIONS),
+                                        claims.load_facts(WORKSPACE))
+
+    def claim(self, text, panel):
+        found = [c for c in self.claims if c.text.startswith(text) and panel in c.panels]
+        self.assertEqual(len(found), 1, f"{text!r} under {panel}")
+        return found[0]
+
+    def test_claims_take_the_nearest_preceding_label(self):
+        self.assertEqual(self.claim("30 genes", "3E").panels, ["3E"])
+        for text in ("21 genes", "30 genes", "59 genes", "Thirteen genes"):
+            self.assertEqual(self.claim(text, "3G").panels, ["3G"])
+
+    def test_upset_set_totals_are_not_mismatches(self):
+        statuses = {c.text: c.status for c in self.claims if c.panels == ["3G"]}
+        self.assertEqual(statuses, {"21 genes": "matched", "30 genes": "matched",
+                                    "59 genes": "unverified", "Thirteen genes": "matched"})
+
+    def test_venn_set_totals_match_their_regions(self):
+        for text in ("3,067 genes", "800 genes", "177 T cell-related ubiquitination genes"):
+            self.assertEqual(self.claim(text, "3A").status, "matched")
+
+    def test_a_wrong_total_is_still_a_mismatch(self):
+        found = claims.cross_check(claims.extract("(807 genes)", panels=["3A"]),
+                                   claims.load_facts(WORKSPACE))
+        self.assertEqual([c.status for c in found], ["mismatch"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+"""The summary report's caption, recommendation and status sections follow the analysis."""
+
+import tempfile
+import unittest
+
+from manuscript_agent import figures
+
+
+def entry(number, caption, width=2400, subplots="AB"):
+    return {
+        "figure": {
+            "figure_id": f"Figure {number}", "original_file": f"image{number}.png",
+            "figure_number": number, "content_hash": "0" * 64,
+            "image": {"width": width, "height": 1800, "file_size_bytes": 4096},
+            "subplot_count": len(subplots),
+            "report_location": {"context_lines": [3, 3]},
+            "subplots": [{"subplot_id": f"{number}{letter}", "type": "bar_chart",
+                          "structured_data": {"bars": 2}} for letter in subplots],
+        },
+        "caption": {"title": "Two bar charts.", "text": caption},
+        "summary": {"title": f"Figure {number}"},
+    }
+
+
+class ReportSectionsTest(unittest.TestCase):
+
+    def render(self, *entries):
+        with tempfile.TemporaryDirectory() as workspace:
+            return figures.render_report(list(entries), {}, workspace)
+
+    def test_clean_captions_pass(self):
+        report = self.render(entry(1, "(A) Counts per group. (B) Counts per sample."))
+        self.assertIn("✓ **Subplot descriptions:** All 2 subplots labelled", report)
+        self.assertIn("- Figure 1: 11 words (2 subplots, ~6 per subplot)", report)
+        self.assertIn("1. **Figure References:** Cite Figure 1 in the Results", report)
+        self.assertIn("❌ **Text extraction:** report_content.md missing", report)
+        self.assertIn("**Not ready for Phase 1:**", report)
+
+    def test_caption_problems_become_recommendations(self):
+        report = self.render(entry(1, "(A) Remarkably high counts per group.", width=1200))
+        self.assertIn("✗ **Subplot descriptions:** no (X) label for 1B", report)
+        self.assertIn("✗ **Objective language:** subjective terms: remarkably", report)
+        self.assertIn("**Captions:** Revise the items marked ✗", report)
+        self.assertIn("**Resolution:** Re-export Figure 1 (1200 px) at 300 DPI", report)
+
+    def test_panel_ranges_cover_their_letters(self):
+        report = self.render(entry(2, "(A-C) Counts per group.", subplots="ABC"))
+        self.assertIn("All 3 subplots labelled", report)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+"""fetch follows redirects up to a limit and treats other 3xx as errors."""
+
+import asyncio
+import unittest
+
+from manuscript_agent.fakeserver import FakeServer
+from manuscript_agent.httpclient import MAX_REDIRECTS, HttpClient, HttpError, Response, fetch
+
+
+class ScriptedClient:
+    """Answers every request with the next (status, headers) of a script."""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    async def request(self, method, url, params=None, headers=None, body=None):
+        self.requests.append((method, url, body))
+        status, headers = self.responses.pop(0) if self.responses else self.last
+        self.last = status, headers
+        return Response(status, "", headers, b"")
+
+
+class FetchRedirectTest(unittest.TestCase):
+
+    def test_follows_redirect_to_the_target(self):
+        async def run():
+            async with FakeServer() as server:
+                async with HttpClient() as client:
+                    return await fetch(client, f"{server.url}/oa/3")
+        response = asyncio.run(run())
+        self.assertEqual(response.status, 200)
+        self.assertTrue(response.body.startswith(b"%PDF"))
+
+    def test_redirect_loop_stops_at_the_limit(self):
+        client = ScriptedClient((302, {"location": "/again"}))
+        with self.assertRaises(HttpError) as raised:
+            asyncio.run(fetch(client, "http://example.org/start"))
+        self.assertEqual(raised.exception.status, 302)
+        self.assertEqual(len(client.requests), MAX_REDIRECTS + 1)
+        self.assertEqual(client.requests[-1][1], "http://example.org/again")
+
+    def test_see_other_turns_a_post_into_a_get(self):
+        client = ScriptedClient((303, {"location": "/result"}), (200, {}))
+        response = asyncio.run(fetch(client, "http://example.org/submit", method="POST",
+                                     body=b"{}"))
+        self.assertEqual(response.status, 200)
+        self.assertEqual(client.requests[-1], ("GET", "http://example.org/result", None))
+
+    def test_other_3xx_is_an_error(self):
+        for status, headers in ((304, {}), (302, {})):
+            with self.assertRaises(HttpError) as raised:
+                asyncio.run(fetch(ScriptedClient((status, headers)), "http://example.org/"))
+            self.assertEqual(raised.exception.status, status)
+
+
+if __name__ == "__main__":
+    unittest.main()
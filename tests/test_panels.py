@@ -0,0 +1,86 @@
+"""Panel detection on the example workspace matches its annotated subplots."""
+
+import json
+import time
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from manuscript_agent import panels
+from manuscript_agent.figures import figure_number
+
+WORKSPACE = Path(__file__).resolve().parent.parent / "manuscript_11072333"
+
+
+def paeth(a, b, c):
+    p = a + b - c
+    pa, pb, pc = abs(p - a), abs(p - b), abs(p - c)
+    return a if pa <= pb and pa <= pc else b if pb <= pc else c
+
+
+def filtered(image, kinds):
+    """PNG scanlines for a (height, width, bpp) image, row r filtered with kinds[r]."""
+    height, width, bpp = image.shape
+    flat = image.reshape(height, -1).astype(int)
+    raw = bytearray()
+    for r, kind in enumerate(kinds):
+        raw.append(kind)
+        for i, x in enumerate(flat[r]):
+            a = flat[r, i - bpp] if i >= bpp else 0
+            b = flat[r - 1, i] if r else 0
+            c = flat[r - 1, i - bpp] if r and i >= bpp else 0
+            predicted = (0, a, b, (a + b) // 2, paeth(a, b, c))[kind]
+            raw.append((x - predicted) % 256)
+    return bytes(raw)
+
+
+class PanelDetectionTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        annotations = json.loads((WORKSPACE / "figure_annotations.json").read_text())
+        cls.annotated = {name: figure["subplots"]
+                         for name, figure in annotations["figures"].items()}
+        cls.layouts, cls.seconds = {}, {}
+        for path in sorted((WORKSPACE / "images").glob("image*.png")):
+            start = time.perf_counter()
+            cls.layouts[path.name] = panels.detect(path, figure_number(path))
+            cls.seconds[path.name] = time.perf_counter() - start
+
+    def test_panel_counts_match_annotations(self):
+        counts = {name: layout["panel_count"] for name, layout in self.layouts.items()}
+        expected = {name: len(subplots) for name, subplots in self.annotated.items()}
+        self.assertEqual(counts, expected)
+
+    def test_tall_panel_follows_the_block_beside_it(self):
+        # Figure 2E spans the rows of 2A-2D to their right and is lettered after them.
+        boxes = [panel["bbox"] for panel in self.layouts["image2.png"]["panels"]]
+        tops = [top for top, left, bottom, right in boxes[:5]]
+        self.assertEqual(tops[4], tops[0])
+        self.assertGreaterEqual(boxes[4][1], max(box[3] for box in boxes[:4]))
+        self.assertGreater(boxes[4][2], boxes[2][0])
+
+    def test_detection_is_well_under_a_second(self):
+        # ~1 MB PNGs of up to 2000 x 3000 pixels; decoding used to take ~750 ms alone
+        slow = {name: round(seconds, 2) for name, seconds in self.seconds.items()
+                if seconds > 0.6}
+        self.assertEqual(slow, {})
+
+    def test_unfilter_undoes_every_filter_type(self):
+        rng = np.random.default_rng(0)
+        for kinds in ([4, 2, 2, 4, 0, 2, 3, 1, 2, 2], [2, 2, 0, 1, 2], [3, 4, 4, 0, 4]):
+            image = rng.integers(0, 256, (len(kinds), 7, 3), dtype=np.uint8)
+            image[:, 3:] = 255  # flat regions exercise the predictors' ties
+            decoded = panels.unfilter(filtered(image, kinds), len(kinds), 7, 3)
+            np.testing.assert_array_equal(decoded, image)
+
+    def test_synthetic_panel_counts(self):
+        image, count = panels.synthetic_figure(seed=1)
+        work, _ = panels.downsample(panels.grayscale(image))
+        found, letters = panels.segment(work)
+        self.assertEqual((len(found), len(letters)), (count, count))
+
+
+if __name__ == "__main__":
+    unittest.main()
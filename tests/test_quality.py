@@ -0,0 +1,56 @@
+"""The paragraph cache survives scoring one draft at a time."""
+
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from manuscript_agent import quality
+
+RESULTS = "drafts/01_results_final.md"
+METHODS = "drafts/02_methods_final.md"
+
+
+class ParagraphCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.workspace = Path(self.directory.name)
+        (self.workspace / "drafts").mkdir()
+        self.write(RESULTS, ["Cells clustered into groups (Figure 1A).",
+                             "T cells signalled more in TNBC (Figure 2)."])
+        self.write(METHODS, ["Samples were sequenced on one platform.",
+                             "Clusters were annotated by marker genes."])
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, name, paragraphs):
+        text = "## Section\n\n" + "\n\n".join(paragraphs) + "\n"
+        (self.workspace / name).write_text(text, encoding="utf-8")
+
+    def cache(self):
+        return json.loads((self.workspace / quality.CACHE_FILE).read_text())
+
+    def test_scoring_one_draft_keeps_the_others(self):
+        _, stats = quality.score_drafts(self.workspace, workers=1)
+        self.assertEqual((stats["recomputed"], stats["cached"]), (4, 0))
+        self.write(RESULTS, ["Cells clustered into groups (Figure 1A).",
+                             "T cells signalled much more in TNBC (Figure 2)."])
+        _, stats = quality.score_drafts(self.workspace, [RESULTS], workers=1)
+        self.assertEqual((stats["paragraphs"], stats["recomputed"], stats["cached"]), (2, 1, 1))
+        # Methods paragraphs stay cached; only the edited Results paragraph is gone
+        self.assertEqual(len(self.cache()), 4)
+        _, stats = quality.score_drafts(self.workspace, workers=1)
+        self.assertEqual((stats["recomputed"], stats["cached"]), (0, 4))
+
+    def test_paragraph_repeated_across_drafts_is_counted_once(self):
+        self.write(METHODS, ["Cells clustered into groups (Figure 1A)."])
+        _, stats = quality.score_drafts(self.workspace, workers=1)
+        self.assertEqual((stats["paragraphs"], stats["recomputed"], stats["cached"]), (2, 2, 0))
+        _, stats = quality.score_drafts(self.workspace, workers=1)
+        self.assertEqual((stats["paragraphs"], stats["recomputed"], stats["cached"]), (2, 0, 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
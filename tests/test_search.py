@@ -0,0 +1,63 @@
+"""Repeat searches with the citation graph enabled are served from the metadata cache."""
+
+import asyncio
+import tempfile
+import unittest
+from pathlib import Path
+
+from manuscript_agent.cache import MetadataCache
+from manuscript_agent.citegraph import CitationGraph
+from manuscript_agent.fakeserver import FakeServer
+from manuscript_agent.httpclient import HttpClient
+from manuscript_agent.search import CrossrefSource, search_workspace
+
+POINTS = [{"number": n, "title": f"Point {n}", "query": f"synthetic query {n}"}
+          for n in range(1, 4)]
+
+
+class SearchCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.root = Path(self.directory.name)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_repeat_search_with_graph_hits_cache(self):
+        async def run():
+            async with FakeServer() as server:
+                with MetadataCache(self.root / "cache.sqlite") as cache:
+                    graph = CitationGraph(self.root / "graph")
+                    for _ in range(2):
+                        before = server.stats["requests"]
+                        await search_workspace(self.root / "ws", POINTS, pubmed_url=server.url,
+                                               openalex_url=server.url, pubmed_rate=1000,
+                                               openalex_rate=1000, cache=cache, resume=False,
+                                               graph=graph)
+                    graph.save()
+                    return server.stats["requests"] - before, graph.size
+
+        repeat_requests, papers = asyncio.run(run())
+        self.assertGreater(papers, 0)
+        self.assertEqual(repeat_requests, 0)
+
+    def test_repeat_crossref_lookup_with_graph_hits_cache(self):
+        async def run():
+            async with FakeServer() as server, HttpClient() as client:
+                with MetadataCache(self.root / "cache.sqlite") as cache:
+                    source = CrossrefSource(client, server.url, rate=1000, cache=cache,
+                                            graph=CitationGraph(self.root / "graph"))
+                    first = await source.lookup("10.5555/fake.12345")
+                    before = server.stats["requests"]
+                    second = await source.lookup("10.5555/fake.12345")
+                    return first, second, server.stats["requests"] - before
+
+        first, second, repeat_requests = asyncio.run(run())
+        self.assertIsNotNone(first)
+        self.assertEqual(first, second)
+        self.assertEqual(repeat_requests, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()